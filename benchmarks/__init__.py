@@ -0,0 +1,8 @@
+# benchmarks/__init__.py
+"""
+Suíte de benchmarks reprodutíveis do pipeline de processamento de PDFs.
+
+Uso:
+    python -m benchmarks.run_benchmarks run --sizes 10 100 --output benchmarks/baselines/atual.json
+    python -m benchmarks.run_benchmarks compare benchmarks/baselines/base.json benchmarks/baselines/atual.json
+"""
@@ -0,0 +1,171 @@
+# benchmarks/corpus_generator.py
+"""
+Gerador de corpora sintéticos de PDFs (PyMuPDF) para os benchmarks do pipeline.
+
+Cada corpus mistura páginas de texto jurídico em português, páginas duplicadas,
+páginas com lixo de extração '(cid:NN)' e páginas em branco (simulando digitalizações
+sem OCR). A geração é determinística para uma mesma semente.
+"""
+import logging
+logger = logging.getLogger(__name__)
+
+from time import perf_counter
+start_time = perf_counter()
+logger.debug(f"{start_time:.4f}s - Iniciando corpus_generator.py")
+
+import os, random
+from typing import Dict, List, Optional, Sequence
+
+DEFAULT_CORPUS_SIZES = (10, 100, 1000, 5000)
+
+# Proporções padrão dos tipos de página no corpus
+DEFAULT_PAGE_MIX = {
+    "duplicada": 0.15,
+    "cid": 0.05,
+    "branco": 0.05,
+}
+
+FRASES_JURIDICAS = [
+    "Trata-se de notícia-crime encaminhada pela Receita Federal do Brasil noticiando possível prática de crime contra a ordem tributária.",
+    "Consta dos autos que o investigado teria inserido informações falsas em declaração de ajuste anual, suprimindo tributo federal.",
+    "O valor consolidado do crédito tributário, incluindo multa e juros, alcança o montante de R$ 1.254.387,22.",
+    "A representação fiscal para fins penais foi instruída com cópia integral do processo administrativo fiscal.",
+    "Nos termos do artigo 1º, inciso I, da Lei nº 8.137/1990, constitui crime suprimir ou reduzir tributo mediante omissão de informação.",
+    "O Ministério Público Federal requisitou a instauração de inquérito policial para apuração dos fatos narrados.",
+    "Foram identificadas movimentações financeiras incompatíveis com a renda declarada pelo contribuinte no período de 2019 a 2021.",
+    "A empresa possui sede no município de Campinas/SP e filiais em Santos/SP e São José dos Campos/SP.",
+    "Segundo o relatório de inteligência financeira, houve fracionamento de depósitos em espécie abaixo do limite de comunicação.",
+    "O noticiante relata que servidor público federal teria solicitado vantagem indevida para agilizar a liberação de mercadorias.",
+    "Há indícios de uso de documento falso perante a agência do INSS localizada em Ribeirão Preto/SP.",
+    "A autoridade policial determinou a oitiva dos representantes legais da pessoa jurídica e a juntada dos contratos sociais.",
+    "Não houve constituição definitiva do crédito tributário, conforme Súmula Vinculante nº 24 do Supremo Tribunal Federal.",
+    "O dano estimado aos cofres da União, segundo a Controladoria-Geral da União, é de aproximadamente R$ 3.480.000,00.",
+    "Os fatos teriam ocorrido no Porto de Santos, em área alfandegada sob jurisdição da Receita Federal.",
+    "A vítima, empresa pública federal, apresentou representação acompanhada de laudo pericial contábil.",
+    "Diante do exposto, sugere-se a instauração de inquérito policial pela Delegacia de Polícia Federal com circunscrição sobre o local dos fatos.",
+    "O contrato administrativo nº 45/2020 foi firmado sem prévia licitação, com sobrepreço apontado pelo Tribunal de Contas da União.",
+    "Consta ainda a utilização de interpostas pessoas para ocultar a origem dos recursos, o que pode configurar lavagem de dinheiro.",
+    "Encaminhe-se à Corregedoria Regional para análise e deliberação quanto à destinação do expediente.",
+]
+
+CABECALHOS = [
+    "MINISTÉRIO DA JUSTIÇA E SEGURANÇA PÚBLICA - POLÍCIA FEDERAL",
+    "SUPERINTENDÊNCIA REGIONAL NO ESTADO DE SÃO PAULO",
+    "RECEITA FEDERAL DO BRASIL - DELEGACIA ESPECIAL DE FISCALIZAÇÃO",
+]
+
+RODAPE = "Documento assinado eletronicamente. Autenticidade verificável no sistema SEI."
+
+def gerar_texto_juridico(rng: random.Random, num_paragrafos: int = 6) -> str:
+    """
+    Gera um texto jurídico sintético em português a partir das frases de referência.
+
+    Args:
+        rng (random.Random): Gerador pseudo-aleatório (para reprodutibilidade).
+        num_paragrafos (int): Quantidade de parágrafos a gerar.
+
+    Returns:
+        str: Texto com parágrafos separados por linha em branco.
+    """
+    paragrafos = []
+    for _ in range(num_paragrafos):
+        frases = rng.sample(FRASES_JURIDICAS, k=rng.randint(2, 5))
+        paragrafos.append(" ".join(frases))
+    return "\n\n".join(paragrafos)
+
+def gerar_texto_cid(rng: random.Random, num_tokens: int = 400) -> str:
+    """Gera texto com marcadores '(cid:NN)', típico de fontes sem mapeamento Unicode."""
+    return " ".join(f"(cid:{rng.randint(1, 250)})" for _ in range(num_tokens))
+
+def _planejar_tipos_paginas(num_pages: int, page_mix: Dict[str, float], rng: random.Random) -> List[str]:
+    """Define, de forma determinística, o tipo de cada página do corpus."""
+    tipos = ["texto"] * num_pages
+    posicoes = list(range(1, num_pages)) # A primeira página é sempre texto (origem das duplicatas)
+    rng.shuffle(posicoes)
+    cursor = 0
+    for tipo in ("duplicada", "cid", "branco"):
+        quantidade = int(round(num_pages * page_mix.get(tipo, 0.0)))
+        for pos in posicoes[cursor:cursor + quantidade]:
+            tipos[pos] = tipo
+        cursor += quantidade
+    return tipos
+
+def gerar_pdf_sintetico(output_path: str, num_pages: int, seed: int = 42,
+                        page_mix: Optional[Dict[str, float]] = None) -> Dict[str, int]:
+    """
+    Gera um PDF sintético com a mistura de páginas configurada.
+
+    Args:
+        output_path (str): Caminho do PDF a ser criado.
+        num_pages (int): Número total de páginas.
+        seed (int): Semente para geração determinística.
+        page_mix (Optional[Dict[str, float]]): Proporções de páginas 'duplicada', 'cid' e 'branco'.
+                                               As demais páginas são de texto jurídico.
+
+    Returns:
+        Dict[str, int]: Contagem de páginas por tipo.
+    """
+    import fitz
+
+    rng = random.Random(seed)
+    page_mix = page_mix or DEFAULT_PAGE_MIX
+    tipos = _planejar_tipos_paginas(num_pages, page_mix, rng)
+
+    doc = fitz.open()
+    textos_gerados: List[str] = []
+    contagem = {"texto": 0, "duplicada": 0, "cid": 0, "branco": 0}
+    retangulo_texto = fitz.Rect(50, 60, 545, 790)
+
+    for page_idx, tipo in enumerate(tipos):
+        page = doc.new_page(width=595, height=842) # A4
+        contagem[tipo] += 1
+
+        if tipo == "branco":
+            # Simula uma digitalização sem OCR: apenas uma área cinza, sem camada de texto.
+            page.draw_rect(fitz.Rect(40, 40, 555, 802), color=(0.85, 0.85, 0.85), fill=(0.95, 0.95, 0.95))
+            textos_gerados.append("")
+            continue
+
+        if tipo == "duplicada" and textos_gerados:
+            candidatos = [t for t in textos_gerados if t and "(cid:" not in t]
+            texto = rng.choice(candidatos) if candidatos else gerar_texto_juridico(rng)
+        elif tipo == "cid":
+            texto = gerar_texto_cid(rng)
+        else:
+            texto = f"{rng.choice(CABECALHOS)}\n\n{gerar_texto_juridico(rng, rng.randint(3, 8))}\n\n{RODAPE} Página {page_idx + 1}"
+
+        page.insert_textbox(retangulo_texto, texto, fontsize=9, fontname="helv")
+        textos_gerados.append(texto)
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    doc.save(output_path, garbage=3, deflate=True)
+    doc.close()
+    logger.debug(f"PDF sintético gerado em '{output_path}': {contagem}")
+    return contagem
+
+def gerar_corpus(output_dir: str, sizes: Sequence[int] = DEFAULT_CORPUS_SIZES, seed: int = 42,
+                 page_mix: Optional[Dict[str, float]] = None, overwrite: bool = False) -> Dict[int, str]:
+    """
+    Gera (ou reaproveita) um PDF sintético para cada tamanho de corpus solicitado.
+
+    Args:
+        output_dir (str): Diretório de saída dos PDFs.
+        sizes (Sequence[int]): Tamanhos (em páginas) dos corpora.
+        seed (int): Semente base; o nome do arquivo inclui a semente para evitar colisões.
+        page_mix (Optional[Dict[str, float]]): Proporções de tipos de página.
+        overwrite (bool): Se True, regera os arquivos mesmo que já existam.
+
+    Returns:
+        Dict[int, str]: Mapeamento tamanho -> caminho do PDF.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    corpus_paths: Dict[int, str] = {}
+    for size in sizes:
+        pdf_path = os.path.join(output_dir, f"corpus_{size}p_seed{seed}.pdf")
+        if overwrite or not os.path.exists(pdf_path):
+            gerar_pdf_sintetico(pdf_path, size, seed=seed + size, page_mix=page_mix)
+        corpus_paths[size] = pdf_path
+    return corpus_paths
+
+execution_time = perf_counter() - start_time
+logger.debug(f"Carregado CORPUS_GENERATOR em {execution_time:.4f}s")
@@ -0,0 +1,180 @@
+# benchmarks/fake_endpoints.py
+"""
+Cliente OpenAI falso (em processo) para executar os benchmarks totalmente offline.
+
+Implementa a superfície usada por `ai_orchestrator`: `embeddings.create`,
+`responses.create` e `responses.parse`, com latência configurável, embeddings
+determinísticos e respostas estruturadas válidas para `formatted_initial_analysis`.
+"""
+import logging
+logger = logging.getLogger(__name__)
+
+from time import perf_counter
+start_time = perf_counter()
+logger.debug(f"{start_time:.4f}s - Iniciando fake_endpoints.py")
+
+import hashlib, math, re, time
+from contextlib import contextmanager
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+FAKE_API_KEY = "sk-fake-benchmark-key"
+FAKE_EMBEDDING_DIM = 1536
+
+_RE_PALAVRAS = re.compile(r"\w+", re.UNICODE)
+
+def fake_embedding(text: str, dim: int = FAKE_EMBEDDING_DIM) -> List[float]:
+    """
+    Gera um embedding determinístico por 'hashing trick' das palavras do texto.
+    Textos iguais geram vetores iguais e textos parecidos geram vetores próximos,
+    preservando o comportamento do filtro de similaridade.
+    """
+    vetor = [0.0] * dim
+    for palavra in _RE_PALAVRAS.findall(text.lower()):
+        digest = hashlib.md5(palavra.encode("utf-8")).digest()
+        posicao = int.from_bytes(digest[:4], "little") % dim
+        sinal = 1.0 if digest[4] & 1 else -1.0
+        vetor[posicao] += sinal
+    norma = math.sqrt(sum(v * v for v in vetor))
+    if not norma: # Texto vazio: vetor unitário fixo para não gerar NaN na similaridade
+        vetor[0] = 1.0
+        return vetor
+    return [v / norma for v in vetor]
+
+def _estimar_tokens(conteudo: Any) -> int:
+    """Estimativa barata de tokens (~4 caracteres por token), suficiente para métricas falsas."""
+    return max(1, len(str(conteudo)) // 4)
+
+def fake_initial_analysis_payload() -> Dict[str, Any]:
+    """Retorna um payload válido para `formatted_initial_analysis`."""
+    return {
+        "descricao_geral": "Notícia-crime sintética gerada para benchmark.",
+        "tipo_documento_origem": "Representação Fiscal para Fins Penais",
+        "orgao_origem": "Receita Federal do Brasil",
+        "uf_origem": "SP",
+        "municipio_origem": "Campinas",
+        "resumo_fato": "Supressão de tributo federal mediante omissão de informações.",
+        "uf_fato": "SP",
+        "municipio_fato": "Campinas",
+        "tipo_local": "Não classificado / Outros",
+        "valor_apuracao": 1254387.22,
+        "tipificacao_penal": "Art. 1º, I, da Lei 8.137/1990",
+        "materia_especial": "Não aplicável",
+        "area_atribuicao": "Crimes Fazendários",
+        "destinacao": "DPF/CAS/SP",
+        "tipo_a_autuar": "IPL - Inquérito Policial",
+        "assunto_re": "Não aplicável",
+        "pessoas_envolvidas": ["Contribuinte sintético"],
+        "linha_do_tempo": ["2019 a 2021: movimentações incompatíveis"],
+        "observacoes": "",
+    }
+
+def _build_usage(input_tokens: int, output_tokens: int, cached_tokens: int = 0) -> SimpleNamespace:
+    """Monta um objeto de uso compatível com `response.usage` da Responses API."""
+    return SimpleNamespace(
+        input_tokens=input_tokens,
+        input_tokens_details=SimpleNamespace(cached_tokens=cached_tokens),
+        output_tokens=output_tokens,
+        total_tokens=input_tokens + output_tokens,
+    )
+
+class _FakeEmbeddingsAPI:
+    def __init__(self, client: "FakeOpenAIClient"):
+        self._client = client
+
+    def create(self, model: str, input: List[str], **kwargs) -> SimpleNamespace:
+        self._client._simular_latencia()
+        textos = input if isinstance(input, list) else [input]
+        data = [SimpleNamespace(index=i, embedding=fake_embedding(t, self._client.embedding_dim)) for i, t in enumerate(textos)]
+        total_tokens = sum(_estimar_tokens(t) for t in textos)
+        self._client.calls["embeddings.create"] += 1
+        return SimpleNamespace(data=data, model=model, usage=SimpleNamespace(prompt_tokens=total_tokens, total_tokens=total_tokens))
+
+class _FakeResponsesAPI:
+    def __init__(self, client: "FakeOpenAIClient"):
+        self._client = client
+        self._prefixos_vistos = set()
+
+    def _tokens_em_cache(self, input_messages: Any) -> int:
+        """Simula o cache de prefixo do provedor: o maior prefixo de mensagens inteiras já visto conta como cache."""
+        if not isinstance(input_messages, list) or not input_messages:
+            return 0
+        em_cache = 0
+        for k in range(1, len(input_messages) + 1):
+            prefixo = str(input_messages[:k])
+            if prefixo in self._prefixos_vistos:
+                em_cache = _estimar_tokens(prefixo)
+            else:
+                self._prefixos_vistos.add(prefixo)
+        return em_cache
+
+    def create(self, model: str, input: Any, **kwargs) -> SimpleNamespace:
+        self._client._simular_latencia()
+        output_text = "Segmento analisado (resposta sintética)."
+        self._client.calls["responses.create"] += 1
+        return SimpleNamespace(
+            output_text=output_text,
+            usage=_build_usage(_estimar_tokens(input), _estimar_tokens(output_text), self._tokens_em_cache(input)),
+        )
+
+    def parse(self, model: str, input: Any, text_format: Any = None, **kwargs) -> SimpleNamespace:
+        import json
+        self._client._simular_latencia()
+        payload = fake_initial_analysis_payload()
+        output_parsed = None
+        if text_format is not None and hasattr(text_format, "model_fields"):
+            payload = {k: v for k, v in payload.items() if k in text_format.model_fields}
+            output_parsed = text_format(**payload)
+        output_text = json.dumps(payload, ensure_ascii=False)
+        self._client.calls["responses.parse"] += 1
+        return SimpleNamespace(
+            output_text=output_text,
+            output_parsed=output_parsed,
+            usage=_build_usage(_estimar_tokens(input), _estimar_tokens(output_text), self._tokens_em_cache(input)),
+        )
+
+class FakeOpenAIClient:
+    """
+    Substituto em processo do cliente `openai.OpenAI` para benchmarks offline.
+
+    Args:
+        api_key (str): Chave falsa (comparada por `get_embeddings_from_api`).
+        latency_s (float): Latência fixa simulada por chamada, em segundos.
+        embedding_dim (int): Dimensão dos embeddings falsos.
+    """
+    def __init__(self, api_key: str = FAKE_API_KEY, latency_s: float = 0.0, embedding_dim: int = FAKE_EMBEDDING_DIM):
+        self.api_key = api_key
+        self.latency_s = latency_s
+        self.embedding_dim = embedding_dim
+        self.calls = {"embeddings.create": 0, "responses.create": 0, "responses.parse": 0}
+        self.embeddings = _FakeEmbeddingsAPI(self)
+        self.responses = _FakeResponsesAPI(self)
+
+    def with_options(self, **kwargs) -> "FakeOpenAIClient":
+        """Compatível com `OpenAI.with_options` (timeout/max_retries são ignorados pelo fake)."""
+        return self
+
+    def _simular_latencia(self):
+        if self.latency_s > 0:
+            time.sleep(self.latency_s)
+
+@contextmanager
+def offline_openai_client(fake_client: Optional[FakeOpenAIClient] = None):
+    """
+    Instala temporariamente um `FakeOpenAIClient` como cliente global de `ai_orchestrator`.
+
+    Yields:
+        FakeOpenAIClient: O cliente falso instalado.
+    """
+    import src.core.ai_orchestrator as ai_orchestrator
+
+    fake_client = fake_client or FakeOpenAIClient()
+    cliente_anterior = ai_orchestrator.client_openai
+    ai_orchestrator.client_openai = fake_client
+    try:
+        yield fake_client
+    finally:
+        ai_orchestrator.client_openai = cliente_anterior
+
+execution_time = perf_counter() - start_time
+logger.debug(f"Carregado FAKE_ENDPOINTS em {execution_time:.4f}s")
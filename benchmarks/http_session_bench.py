@@ -0,0 +1,153 @@
+# benchmarks/http_session_bench.py
+"""
+Microbenchmark da latência por requisição às APIs REST do Firebase: chamadas avulsas
+(`requests.request`, nova conexão a cada chamada) versus a sessão compartilhada com pool keep-alive
+de src/services/http_sessions.py, contra um servidor HTTP local que imita respostas do Firestore.
+
+Exemplo:
+    python -m benchmarks.http_session_bench --requests 300 --tls
+"""
+import logging
+logger = logging.getLogger(__name__)
+
+from time import perf_counter
+start_time = perf_counter()
+logger.debug(f"{start_time:.4f}s - Iniciando http_session_bench.py")
+
+import argparse, json, os, statistics, sys, tempfile, threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence
+
+FAKE_DOCUMENT = json.dumps({
+    "name": "projects/bench/databases/(default)/documents/app_config/version_control",
+    "fields": {"latest_version": {"stringValue": "1.0.0"}},
+    "updateTime": "2025-01-01T00:00:00.000000Z",
+}).encode("utf-8")
+
+class FirestoreStandInHandler(BaseHTTPRequestHandler):
+    """Responde a qualquer caminho com um documento fixo; `fail_next` (no servidor) força respostas 503."""
+    protocol_version = "HTTP/1.1" # Mantém a conexão aberta entre requisições (keep-alive)
+    disable_nagle_algorithm = True # Cabeçalho e corpo são escritos separadamente (evita o atraso do ACK atrasado)
+
+    def _respond(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        server = self.server
+        with server.lock:
+            server.requests_seen += 1
+            failing = server.fail_next > 0
+            if failing:
+                server.fail_next -= 1
+        status, body = (503, b'{"error": {"message": "indisponivel"}}') if failing else (200, FAKE_DOCUMENT)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if failing:
+            self.send_header("Retry-After", "0")
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = do_PATCH = _respond
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections_seen += 1
+
+    def log_message(self, format, *args):
+        pass
+
+def start_stand_in_server(tls: bool = False) -> ThreadingHTTPServer:
+    """Inicia o servidor local em uma porta livre (thread daemon). Com tls=True, usa um certificado autoassinado."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FirestoreStandInHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.requests_seen = server.connections_seen = server.fail_next = 0
+    server.scheme = "http"
+    if tls:
+        import ssl
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        cert_path, key_path = _self_signed_certificate()
+        context.load_cert_chain(cert_path, key_path)
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+        server.scheme = "https"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    server.url = f"{server.scheme}://127.0.0.1:{server.server_address[1]}"
+    return server
+
+def _self_signed_certificate():
+    from datetime import datetime, timedelta, timezone
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "127.0.0.1")])
+    now = datetime.now(timezone.utc)
+    cert = (x509.CertificateBuilder().subject_name(name).issuer_name(name).public_key(key.public_key())
+            .serial_number(x509.random_serial_number()).not_valid_before(now - timedelta(days=1))
+            .not_valid_after(now + timedelta(days=1)).sign(key, hashes.SHA256()))
+    directory = tempfile.mkdtemp(prefix="bench_tls_")
+    cert_path, key_path = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+    with open(cert_path, "wb") as f:
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, "wb") as f:
+        f.write(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()))
+    return cert_path, key_path
+
+def _latencies_ms(call, n_requests: int) -> List[float]:
+    latencies = []
+    for _ in range(n_requests):
+        start = perf_counter()
+        call().raise_for_status()
+        latencies.append((perf_counter() - start) * 1000)
+    return latencies
+
+def _summary(latencies: Sequence[float]) -> Dict[str, float]:
+    ordered = sorted(latencies)
+    return {"mean_ms": statistics.fmean(ordered), "p50_ms": ordered[len(ordered) // 2],
+            "p95_ms": ordered[int(0.95 * (len(ordered) - 1))]}
+
+def run_http_session_bench(n_requests: int = 200, tls: bool = False) -> Dict[str, Dict[str, float]]:
+    """Mede a latência por requisição sem e com a sessão compartilhada."""
+    import requests
+    import urllib3
+    from src.services.http_sessions import build_session
+
+    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+    server = start_stand_in_server(tls=tls)
+    url = f"{server.url}/v1/projects/bench/databases/(default)/documents/app_config/version_control"
+    try:
+        results = {}
+        server.connections_seen = 0
+        results["requests_avulso"] = _summary(_latencies_ms(lambda: requests.request("GET", url, timeout=10, verify=False), n_requests))
+        results["requests_avulso"]["connections"] = server.connections_seen
+
+        server.connections_seen = 0
+        session = build_session(verify_ssl=False)
+        results["sessao_compartilhada"] = _summary(_latencies_ms(lambda: session.request("GET", url, timeout=10), n_requests))
+        results["sessao_compartilhada"]["connections"] = server.connections_seen
+        session.close()
+        return results
+    finally:
+        server.shutdown()
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Latência por requisição: requests avulso vs. sessão keep-alive.")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--tls", action="store_true", help="Usa HTTPS (certificado autoassinado) no servidor local.")
+    args = parser.parse_args(argv)
+
+    results = run_http_session_bench(args.requests, args.tls)
+    for mode, stats in results.items():
+        print(f"{mode:22s} média {stats['mean_ms']:7.3f} ms | p50 {stats['p50_ms']:7.3f} ms | "
+              f"p95 {stats['p95_ms']:7.3f} ms | conexões {stats['connections']}")
+    return 0
+
+execution_time = perf_counter() - start_time
+logger.debug(f"Carregado HTTP_SESSION_BENCH em {execution_time:.4f}s")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,323 @@
+# benchmarks/run_benchmarks.py
+"""
+Executor dos benchmarks do pipeline de PDFs e comparador de baselines JSON.
+
+Comandos:
+    run      Gera o corpus sintético (se necessário), cronometra cada etapa do
+             PDFDocumentAnalyzer para cada extrator e modo de vetorização e salva o JSON.
+    compare  Compara dois JSONs de resultados e sinaliza regressões acima do limiar.
+
+Exemplos:
+    python -m benchmarks.run_benchmarks run --sizes 10 100 --output benchmarks/baselines/atual.json
+    python -m benchmarks.run_benchmarks compare benchmarks/baselines/base.json benchmarks/baselines/atual.json --threshold 0.2
+"""
+import logging
+logger = logging.getLogger(__name__)
+
+from time import perf_counter
+start_time = perf_counter()
+logger.debug(f"{start_time:.4f}s - Iniciando run_benchmarks.py")
+
+import argparse, json, os, platform, sys, statistics
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CORPUS_DIR = os.path.join(BENCHMARKS_DIR, "corpus")
+DEFAULT_BASELINES_DIR = os.path.join(BENCHMARKS_DIR, "baselines")
+
+EXTRACTORS = ("PyMuPdf-fitz", "PdfPlumber", "PyPdf")
+VECTORIZATION_MODES = ("tfidf_vectorizer", "text-embedding-3-small", "all-MiniLM-L6-v2")
+
+# Etapas cronometradas, na ordem do pipeline de `_pdf_processing_thread_func`
+STAGES = ("extract_texts_and_preprocess_files", "build_combined_page_data", "get_embeddings_from_api",
+          "get_similarity_and_tfidf_score_docs", "filter_and_classify_pages",
+          "compress_relevant_pages", "group_texts_by_relevance_and_token_limit")
+
+# Métricas de qualidade por caso (mediana entre repetições) e o sentido de melhora:
+# +1 = maior é melhor (queda acima do limiar é regressão); 0 = apenas informativa
+QUALITY_METRICS = {
+    "budget_recovered_pct": 1,      # Valor recuperado pelo planejador de orçamento vs. guloso (%)
+    "boilerplate_tokens_saved": 1,  # Tokens de cabeçalhos/rodapés removidos
+    "compression_ratio": 0,         # tokens_after / tokens_before da compressão extrativa
+}
+
+DEFAULT_REGRESSION_THRESHOLD = 0.20 # 20% mais lento que a baseline
+MIN_SECONDS_TO_COMPARE = 0.05       # Etapas muito rápidas são ruidosas demais para comparar
+
+def _get_extractor(extractor_name: str):
+    """Instancia a estratégia de extração a partir do nome usado nas configurações."""
+    from src.core.pdf_processor import FitzExtractor, PdfPlumberExtractor, PyPdfExtractor
+    return {"PyMuPdf-fitz": FitzExtractor, "PdfPlumber": PdfPlumberExtractor, "PyPdf": PyPdfExtractor}[extractor_name]()
+
+def _vectorization_available(vectorization_model: str) -> Tuple[bool, str]:
+    """Verifica se o modo de vetorização pode ser executado neste ambiente."""
+    if vectorization_model != "all-MiniLM-L6-v2":
+        return True, ""
+    from src import app_cache
+    if app_cache.sentence_transformer_model is not None:
+        return True, ""
+    try:
+        from sentence_transformers import SentenceTransformer
+        from src.settings import ASSETS_DIR
+        model_local_path = os.path.join(ASSETS_DIR, 'models', vectorization_model)
+        if not os.path.exists(model_local_path):
+            return False, f"Modelo local não encontrado em {model_local_path}"
+        app_cache.sentence_transformer_model = SentenceTransformer(model_local_path)
+        app_cache.model_loading_event.set()
+        return True, ""
+    except Exception as e:
+        return False, f"SentenceTransformer indisponível: {e}"
+
+def _timed(stage_timings: Dict[str, float], stage: str, func: Callable, *args, **kwargs):
+    """Executa `func` e acumula o tempo gasto em `stage_timings[stage]`."""
+    t0 = perf_counter()
+    result = func(*args, **kwargs)
+    stage_timings[stage] = stage_timings.get(stage, 0.0) + (perf_counter() - t0)
+    return result
+
+def run_pipeline_once(pdf_path: str, extractor_name: str, vectorization_model: str,
+                      token_limit: int, similarity_threshold: float = 0.87) -> Dict[str, Any]:
+    """
+    Executa uma vez o pipeline de processamento de PDF, cronometrando cada etapa.
+
+    Returns:
+        Dict[str, Any]: {'stages': {etapa: segundos}, 'pages': int, 'selected_pages': int, 'final_tokens': int}
+    """
+    from src.core.pdf_processor import PDFDocumentAnalyzer
+    import src.core.ai_orchestrator as ai_orchestrator
+    from benchmarks.fake_endpoints import FAKE_API_KEY
+
+    analyzer = PDFDocumentAnalyzer(extractor_strategy=_get_extractor(extractor_name))
+    stage_timings: Dict[str, float] = {}
+
+    processed_files_metadata, all_indices, all_texts_to_storage, all_texts_to_loop = _timed(
+        stage_timings, "extract_texts_and_preprocess_files", analyzer.extract_texts_and_preprocess_files, [pdf_path])
+
+    processed_page_data, all_global_page_keys_ordered = _timed(
+        stage_timings, "build_combined_page_data", analyzer.build_combined_page_data,
+        processed_files_metadata, all_indices, all_texts_to_storage)
+
+    ready_embeddings = None
+    if vectorization_model == "text-embedding-3-small":
+        ready_embeddings, _, _ = _timed(stage_timings, "get_embeddings_from_api", ai_orchestrator.get_embeddings_from_api,
+                                        all_texts_to_loop, vectorization_model, FAKE_API_KEY, None)
+
+    embedding_vectors, tfidf_vectors, tfidf_scores = _timed(
+        stage_timings, "get_similarity_and_tfidf_score_docs", analyzer.get_similarity_and_tfidf_score_docs,
+        all_texts_to_loop, model_embedding=vectorization_model, ready_embeddings=ready_embeddings)
+
+    relevant_ordered_indices, _, _ = _timed(
+        stage_timings, "filter_and_classify_pages", analyzer.filter_and_classify_pages,
+        processed_page_data, all_global_page_keys_ordered, embedding_vectors, tfidf_vectors, tfidf_scores,
+        'get_pages_among_similars_graphs', 'bigger_content', similarity_threshold)
+
+    _timed(stage_timings, "compress_relevant_pages", analyzer.compress_relevant_pages,
+           processed_page_data, relevant_ordered_indices, token_limit)
+
+    pages_agg_indices, _, _, final_tokens = _timed(
+        stage_timings, "group_texts_by_relevance_and_token_limit", analyzer.group_texts_by_relevance_and_token_limit,
+        processed_page_data, relevant_ordered_indices, token_limit)
+
+    stage_timings["total"] = sum(stage_timings.values())
+    return {
+        "stages": stage_timings,
+        "pages": len(processed_page_data),
+        "selected_pages": len(pages_agg_indices),
+        "final_tokens": final_tokens,
+        "budget_recovered_pct": (getattr(analyzer, "last_budget_plan", None) or {}).get("recovered_pct", 0.0),
+        "compression_ratio": (getattr(analyzer, "last_compression", None) or {}).get("compression_ratio", 1.0),
+        "boilerplate_tokens_saved": (getattr(analyzer, "last_boilerplate_stats", None) or {}).get("tokens_saved", 0),
+    }
+
+def run_benchmarks(sizes: Sequence[int], extractors: Sequence[str] = EXTRACTORS,
+                   vectorization_modes: Sequence[str] = VECTORIZATION_MODES, repeats: int = 1,
+                   token_limit: int = 180000, corpus_dir: str = DEFAULT_CORPUS_DIR, seed: int = 42,
+                   fake_latency_s: float = 0.0, stub_server_latency: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Executa a matriz completa (tamanho x extrator x vetorização) e retorna os resultados.
+
+    Cada caso guarda a mediana de cada etapa e de cada métrica de QUALITY_METRICS entre as repetições. Falhas de um caso
+    (ex.: dependência ausente) são registradas em 'error' sem interromper os demais.
+
+    Com `stub_server_latency` (ex.: 'lognormal:-1.5,0.5'), as chamadas passam pelo cliente OpenAI
+    real contra o servidor stub local (HTTP), em vez do cliente falso em processo.
+    """
+    from benchmarks.corpus_generator import gerar_corpus
+    from benchmarks.fake_endpoints import FakeOpenAIClient, offline_openai_client
+    from benchmarks.stub_server import offline_openai_stub_server
+
+    corpus_paths = gerar_corpus(corpus_dir, sizes, seed=seed)
+    results: Dict[str, Any] = {
+        "metadata": {
+            "created_at": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeats": repeats,
+            "token_limit": token_limit,
+            "seed": seed,
+            "openai_backend": f"stub_server({stub_server_latency})" if stub_server_latency else "fake_client",
+        },
+        "cases": {},
+    }
+
+    openai_backend = (offline_openai_stub_server(latency=stub_server_latency, seed=seed) if stub_server_latency
+                      else offline_openai_client(FakeOpenAIClient(latency_s=fake_latency_s)))
+    with openai_backend:
+        for size, pdf_path in corpus_paths.items():
+            for extractor_name in extractors:
+                for vectorization_model in vectorization_modes:
+                    case_key = f"{size}p|{extractor_name}|{vectorization_model}"
+                    available, reason = _vectorization_available(vectorization_model)
+                    if not available:
+                        results["cases"][case_key] = {"skipped": reason}
+                        logger.warning(f"[{case_key}] Ignorado: {reason}")
+                        continue
+
+                    runs: List[Dict[str, Any]] = []
+                    try:
+                        for _ in range(repeats):
+                            runs.append(run_pipeline_once(pdf_path, extractor_name, vectorization_model, token_limit))
+                    except Exception as e:
+                        logger.error(f"[{case_key}] Falha na execução: {e}", exc_info=True)
+                        results["cases"][case_key] = {"error": f"{type(e).__name__}: {e}"}
+                        continue
+
+                    stage_names = runs[0]["stages"].keys()
+                    results["cases"][case_key] = {
+                        "stages": {stage: statistics.median(r["stages"][stage] for r in runs) for stage in stage_names},
+                        "pages": runs[0]["pages"],
+                        "selected_pages": runs[0]["selected_pages"],
+                        "final_tokens": runs[0]["final_tokens"],
+                        **{metric: statistics.median(r[metric] for r in runs) for metric in QUALITY_METRICS},
+                    }
+                    logger.info(f"[{case_key}] total={results['cases'][case_key]['stages']['total']:.3f}s")
+    return results
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any],
+                    threshold: float = DEFAULT_REGRESSION_THRESHOLD,
+                    min_seconds: float = MIN_SECONDS_TO_COMPARE) -> List[Dict[str, Any]]:
+    """
+    Compara resultados atuais com a baseline, etapa a etapa e métrica a métrica (QUALITY_METRICS).
+
+    Args:
+        baseline (Dict[str, Any]): Resultados de referência.
+        current (Dict[str, Any]): Resultados atuais.
+        threshold (float): Aumento relativo de tempo a partir do qual há regressão (0.2 = +20%).
+        min_seconds (float): Etapas com tempo de baseline inferior a este valor são ignoradas.
+
+    Returns:
+        List[Dict[str, Any]]: Uma entrada por (caso, etapa) comparável, com a chave 'regression', seguida
+            de uma entrada por (caso, métrica) presente nos dois resultados (chaves 'metric', 'baseline', 'current').
+    """
+    comparisons = []
+    for case_key, base_case in baseline.get("cases", {}).items():
+        curr_case = current.get("cases", {}).get(case_key)
+        if not curr_case or "stages" not in base_case or "stages" not in curr_case:
+            continue
+        for stage, base_seconds in base_case["stages"].items():
+            curr_seconds = curr_case["stages"].get(stage)
+            if curr_seconds is None or base_seconds < min_seconds:
+                continue
+            ratio = (curr_seconds - base_seconds) / base_seconds
+            comparisons.append({
+                "case": case_key,
+                "stage": stage,
+                "baseline_s": round(base_seconds, 4),
+                "current_s": round(curr_seconds, 4),
+                "change_pct": round(ratio * 100, 1),
+                "regression": ratio > threshold,
+            })
+        for metric, direction in QUALITY_METRICS.items():
+            base_value, curr_value = base_case.get(metric), curr_case.get(metric)
+            if base_value is None or curr_value is None:
+                continue
+            ratio = (curr_value - base_value) / abs(base_value) if base_value else 0.0
+            comparisons.append({
+                "case": case_key,
+                "metric": metric,
+                "baseline": round(base_value, 4),
+                "current": round(curr_value, 4),
+                "change_pct": round(ratio * 100, 1),
+                "regression": direction > 0 and -ratio > threshold,
+            })
+    return comparisons
+
+def _print_comparisons(comparisons: List[Dict[str, Any]]):
+    """Exibe o comparativo em tabela (rich)."""
+    from rich.console import Console
+    from rich.table import Table
+
+    table = Table(title="Comparativo de benchmarks")
+    for column in ("Caso", "Etapa", "Baseline (s)", "Atual (s)", "Variação"):
+        table.add_column(column)
+    for c in comparisons:
+        if "stage" not in c:
+            continue
+        style = "bold red" if c["regression"] else ("green" if c["change_pct"] < 0 else None)
+        table.add_row(c["case"], c["stage"], f"{c['baseline_s']:.4f}", f"{c['current_s']:.4f}", f"{c['change_pct']:+.1f}%", style=style)
+    Console().print(table)
+
+    metrics_table = Table(title="Comparativo de métricas de qualidade")
+    for column in ("Caso", "Métrica", "Baseline", "Atual", "Variação"):
+        metrics_table.add_column(column)
+    for c in comparisons:
+        if "metric" not in c:
+            continue
+        metrics_table.add_row(c["case"], c["metric"], f"{c['baseline']:.4f}", f"{c['current']:.4f}", f"{c['change_pct']:+.1f}%",
+                              style="bold red" if c["regression"] else None)
+    if metrics_table.row_count:
+        Console().print(metrics_table)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks do pipeline de processamento de PDFs.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Executa os benchmarks e salva o JSON de resultados.")
+    run_parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    run_parser.add_argument("--extractors", nargs="+", default=list(EXTRACTORS), choices=EXTRACTORS)
+    run_parser.add_argument("--vectorization", nargs="+", default=list(VECTORIZATION_MODES), choices=VECTORIZATION_MODES)
+    run_parser.add_argument("--repeats", type=int, default=1)
+    run_parser.add_argument("--token-limit", type=int, default=180000)
+    run_parser.add_argument("--seed", type=int, default=42)
+    run_parser.add_argument("--fake-latency", type=float, default=0.0, help="Latência simulada por chamada da API falsa (s).")
+    run_parser.add_argument("--stub-server-latency", default=None,
+                            help="Usa o servidor stub HTTP local com esta distribuição de latência (ex.: lognormal:-1.5,0.5).")
+    run_parser.add_argument("--corpus-dir", default=DEFAULT_CORPUS_DIR)
+    run_parser.add_argument("--output", default=os.path.join(DEFAULT_BASELINES_DIR, f"bench_{datetime.now():%Y%m%d_%H%M%S}.json"))
+
+    compare_parser = subparsers.add_parser("compare", help="Compara resultados com uma baseline.")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD)
+    compare_parser.add_argument("--min-seconds", type=float, default=MIN_SECONDS_TO_COMPARE)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        results = run_benchmarks(args.sizes, args.extractors, args.vectorization, args.repeats,
+                                 args.token_limit, args.corpus_dir, args.seed, args.fake_latency, args.stub_server_latency)
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"Resultados salvos em: {args.output}")
+        return 0
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.current, "r", encoding="utf-8") as f:
+        current = json.load(f)
+    comparisons = compare_results(baseline, current, args.threshold, args.min_seconds)
+    _print_comparisons(comparisons)
+    regressions = [c for c in comparisons if c["regression"]]
+    if regressions:
+        print(f"{len(regressions)} regressão(ões) acima de {args.threshold:.0%} detectada(s).")
+        return 1
+    print("Nenhuma regressão detectada.")
+    return 0
+
+execution_time = perf_counter() - start_time
+logger.debug(f"Carregado RUN_BENCHMARKS em {execution_time:.4f}s")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,419 @@
+# benchmarks/stub_server.py
+"""
+Servidor HTTP local compatível com a API da OpenAI, para testes de carga e execução offline.
+
+Endpoints (prefixo /v1):
+- POST /responses          -> `responses.create` e `responses.parse` (text.format json_schema)
+- POST /embeddings         -> `embeddings.create` (embeddings determinísticos)
+- POST /chat/completions   -> ChatCompletions (caminho `lang_chain_openai`)
+
+Recursos:
+- Distribuições de latência: 'fixed:S', 'uniform:MIN,MAX', 'normal:MEDIA,DESVIO', 'lognormal:MU,SIGMA'.
+- Injeção de erros por taxa: 429 (rate limit), 500 e timeout (resposta atrasada além do timeout do cliente).
+- Respostas estruturadas válidas para o schema pedido (ex.: `formatted_initial_analysis`).
+- Simulação do cache de prefixo (cached_tokens), como em `fake_endpoints`.
+- Streaming (SSE) da Responses API (`stream=True` / `responses.stream`), em pedaços de texto.
+
+Uso:
+    python -m benchmarks.stub_server --port 8089 --latency lognormal:-1.5,0.5 --error-429 0.05
+    export DOCS_ANALYZER_OPENAI_BASE_URL=http://127.0.0.1:8089/v1
+"""
+import logging
+logger = logging.getLogger(__name__)
+
+from time import perf_counter
+start_time = perf_counter()
+logger.debug(f"{start_time:.4f}s - Iniciando stub_server.py")
+
+import argparse, json, os, random, sys, threading, time, uuid
+from collections import Counter
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_endpoints import (FAKE_API_KEY, FAKE_EMBEDDING_DIM, fake_embedding,
+                                       fake_initial_analysis_payload, _estimar_tokens)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8089
+FAKE_SEGMENT_TEXT = "Segmento analisado (resposta sintética)."
+
+def parse_latency_spec(spec: str) -> Callable[[random.Random], float]:
+    """
+    Converte uma especificação de latência em um amostrador (segundos).
+
+    Exemplos: 'fixed:0.2', 'uniform:0.1,0.6', 'normal:0.3,0.05', 'lognormal:-1.2,0.4'.
+    """
+    kind, _, raw_params = (spec or "fixed:0").partition(":")
+    params = [float(p) for p in raw_params.split(",") if p.strip()] or [0.0]
+    kind = kind.strip().lower()
+    if kind == "fixed":
+        return lambda rng: max(0.0, params[0])
+    if kind == "uniform":
+        low, high = params[0], params[1] if len(params) > 1 else params[0]
+        return lambda rng: max(0.0, rng.uniform(low, high))
+    if kind == "normal":
+        mean, std = params[0], params[1] if len(params) > 1 else 0.0
+        return lambda rng: max(0.0, rng.gauss(mean, std))
+    if kind == "lognormal":
+        mu, sigma = params[0], params[1] if len(params) > 1 else 0.0
+        return lambda rng: rng.lognormvariate(mu, sigma)
+    raise ValueError(f"Distribuição de latência desconhecida: '{spec}'")
+
+def _fake_value_for_schema(prop_schema: Dict[str, Any], defs: Dict[str, Any]) -> Any:
+    """Gera um valor válido para uma propriedade de JSON schema (enum, tipo simples, array, anyOf, $ref)."""
+    if "$ref" in prop_schema:
+        return _fake_value_for_schema(defs.get(prop_schema["$ref"].split("/")[-1], {}), defs)
+    if "enum" in prop_schema:
+        return prop_schema["enum"][0]
+    if "anyOf" in prop_schema:
+        options = [opt for opt in prop_schema["anyOf"] if opt.get("type") != "null"] or prop_schema["anyOf"]
+        return _fake_value_for_schema(options[0], defs)
+    prop_type = prop_schema.get("type")
+    if prop_type == "string":
+        return "valor sintético"
+    if prop_type == "number":
+        return 0.0
+    if prop_type == "integer":
+        return 0
+    if prop_type == "boolean":
+        return False
+    if prop_type == "array":
+        return [_fake_value_for_schema(prop_schema.get("items", {"type": "string"}), defs)]
+    if prop_type == "object":
+        return fake_payload_for_schema(prop_schema, defs)
+    return None
+
+def fake_payload_for_schema(schema: Dict[str, Any], defs: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Monta um payload válido para o JSON schema recebido. Campos presentes em
+    `fake_initial_analysis_payload` reaproveitam os valores realistas de lá.
+    """
+    defs = defs if defs is not None else schema.get("$defs", {})
+    base_payload = fake_initial_analysis_payload()
+    payload = {}
+    for name, prop_schema in schema.get("properties", {}).items():
+        if name in base_payload and "enum" not in prop_schema:
+            payload[name] = base_payload[name]
+        else:
+            payload[name] = _fake_value_for_schema(prop_schema, defs)
+    return payload
+
+class OpenAIStubServer:
+    """
+    Servidor stub compatível com a API da OpenAI, executado em thread daemon.
+
+    Args:
+        host (str): Endereço de escuta.
+        port (int): Porta (0 = porta livre escolhida pelo SO).
+        latency (str): Especificação da distribuição de latência (ver `parse_latency_spec`).
+        error_rate_429 (float): Probabilidade de responder 429.
+        error_rate_500 (float): Probabilidade de responder 500.
+        timeout_rate (float): Probabilidade de atrasar a resposta em `timeout_s` (simula timeout).
+        timeout_s (float): Atraso aplicado nos timeouts simulados.
+        embedding_dim (int): Dimensão dos embeddings.
+        seed (Optional[int]): Semente para latências e erros reprodutíveis.
+        stream_chunk_chars (int): Tamanho dos deltas de texto no streaming.
+        stream_chunk_delay_s (float): Atraso entre deltas no streaming.
+    """
+    def __init__(self, host: str = DEFAULT_HOST, port: int = 0, latency: str = "fixed:0",
+                 error_rate_429: float = 0.0, error_rate_500: float = 0.0, timeout_rate: float = 0.0,
+                 timeout_s: float = 30.0, embedding_dim: int = FAKE_EMBEDDING_DIM, seed: Optional[int] = None,
+                 stream_chunk_chars: int = 16, stream_chunk_delay_s: float = 0.0):
+        self.latency_sampler = parse_latency_spec(latency)
+        self.error_rate_429 = error_rate_429
+        self.error_rate_500 = error_rate_500
+        self.timeout_rate = timeout_rate
+        self.timeout_s = timeout_s
+        self.embedding_dim = embedding_dim
+        self.stream_chunk_chars = max(1, stream_chunk_chars)
+        self.stream_chunk_delay_s = stream_chunk_delay_s
+        self.calls: Counter = Counter()
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._prefixes_seen = set()
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "OpenAIStubServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True, name="OpenAIStubServer")
+        self._thread.start()
+        logger.info(f"Servidor stub OpenAI em execução: {self.base_url}")
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread:
+            self._thread.join(timeout=2)
+        logger.info(f"Servidor stub OpenAI encerrado. Chamadas: {dict(self.calls)}")
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # --- Comportamento simulado ---
+
+    def _draw(self) -> tuple:
+        """Sorteia (latência, falha) de uma requisição: falha em {None, 429, 500, 'timeout'}."""
+        with self._rng_lock:
+            latency = self.latency_sampler(self._rng)
+            roll = self._rng.random()
+        if roll < self.error_rate_429:
+            return latency, 429
+        if roll < self.error_rate_429 + self.error_rate_500:
+            return latency, 500
+        if roll < self.error_rate_429 + self.error_rate_500 + self.timeout_rate:
+            return latency, "timeout"
+        return latency, None
+
+    def _cached_tokens(self, messages: Any) -> int:
+        """Simula o cache de prefixo do provedor: o maior prefixo de mensagens inteiras já visto conta como cache."""
+        if not isinstance(messages, list) or not messages:
+            return 0
+        cached = 0
+        with self._rng_lock:
+            for k in range(1, len(messages) + 1):
+                prefix = json.dumps(messages[:k], sort_keys=True, ensure_ascii=False)
+                if prefix in self._prefixes_seen:
+                    cached = _estimar_tokens(messages[:k])
+                else:
+                    self._prefixes_seen.add(prefix)
+        return cached
+
+    def handle_responses(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        messages = body.get("input")
+        text_format = (body.get("text") or {}).get("format") or {}
+        if text_format.get("type") == "json_schema":
+            self.calls["responses.parse"] += 1
+            output_text = json.dumps(fake_payload_for_schema(text_format.get("schema", {})), ensure_ascii=False)
+        else:
+            self.calls["responses.create"] += 1
+            output_text = FAKE_SEGMENT_TEXT
+        input_tokens, output_tokens = _estimar_tokens(messages), _estimar_tokens(output_text)
+        return {
+            "id": f"resp_{uuid.uuid4().hex}",
+            "object": "response",
+            "created_at": time.time(),
+            "status": "completed",
+            "model": body.get("model", "stub-model"),
+            "output": [{
+                "id": f"msg_{uuid.uuid4().hex}",
+                "type": "message",
+                "status": "completed",
+                "role": "assistant",
+                "content": [{"type": "output_text", "text": output_text, "annotations": []}],
+            }],
+            "parallel_tool_calls": False,
+            "tool_choice": "auto",
+            "tools": [],
+            "temperature": body.get("temperature"),
+            "usage": {
+                "input_tokens": input_tokens,
+                "input_tokens_details": {"cached_tokens": self._cached_tokens(messages)},
+                "output_tokens": output_tokens,
+                "output_tokens_details": {"reasoning_tokens": 0},
+                "total_tokens": input_tokens + output_tokens,
+            },
+        }
+
+    def iter_response_stream_events(self, response: Dict[str, Any]):
+        """Gera a sequência de eventos SSE da Responses API para uma resposta completa."""
+        message = response["output"][0]
+        text = message["content"][0]["text"]
+        in_progress = dict(response, status="in_progress", output=[], usage=None)
+        seq = iter(range(1_000_000))
+        yield {"type": "response.created", "sequence_number": next(seq), "response": in_progress}
+        yield {"type": "response.output_item.added", "sequence_number": next(seq), "output_index": 0,
+               "item": dict(message, status="in_progress", content=[])}
+        yield {"type": "response.content_part.added", "sequence_number": next(seq), "item_id": message["id"],
+               "output_index": 0, "content_index": 0, "part": {"type": "output_text", "text": "", "annotations": []}}
+        for start in range(0, len(text), self.stream_chunk_chars):
+            if self.stream_chunk_delay_s:
+                time.sleep(self.stream_chunk_delay_s)
+            yield {"type": "response.output_text.delta", "sequence_number": next(seq), "item_id": message["id"],
+                   "output_index": 0, "content_index": 0, "delta": text[start:start + self.stream_chunk_chars], "logprobs": []}
+        yield {"type": "response.output_text.done", "sequence_number": next(seq), "item_id": message["id"],
+               "output_index": 0, "content_index": 0, "text": text, "logprobs": []}
+        yield {"type": "response.content_part.done", "sequence_number": next(seq), "item_id": message["id"],
+               "output_index": 0, "content_index": 0, "part": message["content"][0]}
+        yield {"type": "response.output_item.done", "sequence_number": next(seq), "output_index": 0, "item": message}
+        yield {"type": "response.completed", "sequence_number": next(seq), "response": response}
+
+    def handle_embeddings(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        self.calls["embeddings.create"] += 1
+        texts = body.get("input")
+        texts = [texts] if isinstance(texts, str) else list(texts or [])
+        dim = int(body.get("dimensions") or self.embedding_dim)
+        total_tokens = sum(_estimar_tokens(t) for t in texts)
+        return {
+            "object": "list",
+            "model": body.get("model", "text-embedding-3-small"),
+            "data": [{"object": "embedding", "index": i, "embedding": fake_embedding(str(t), dim)} for i, t in enumerate(texts)],
+            "usage": {"prompt_tokens": total_tokens, "total_tokens": total_tokens},
+        }
+
+    def handle_chat_completions(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        self.calls["chat.completions.create"] += 1
+        messages = body.get("messages")
+        response_format = body.get("response_format") or {}
+        if response_format.get("type") == "json_schema":
+            schema = (response_format.get("json_schema") or {}).get("schema", {})
+            content = json.dumps(fake_payload_for_schema(schema), ensure_ascii=False)
+        else:
+            content = json.dumps(fake_initial_analysis_payload(), ensure_ascii=False)
+        prompt_tokens, completion_tokens = _estimar_tokens(messages), _estimar_tokens(content)
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub-model"),
+            "choices": [{"index": 0, "finish_reason": "stop", "logprobs": None,
+                         "message": {"role": "assistant", "content": content}}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+                "prompt_tokens_details": {"cached_tokens": self._cached_tokens(messages)},
+            },
+        }
+
+    def _make_handler(self):
+        server = self
+        routes = {
+            "/v1/responses": server.handle_responses,
+            "/v1/embeddings": server.handle_embeddings,
+            "/v1/chat/completions": server.handle_chat_completions,
+        }
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args): # Silencia o log padrão do http.server
+                logger.debug("stub: " + format % args)
+
+            def _send_json(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _send_sse(self, events):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                for event in events:
+                    data = json.dumps(event, ensure_ascii=False)
+                    self.wfile.write(f"event: {event['type']}\ndata: {data}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                self.close_connection = True
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    body = json.loads(self.rfile.read(length) or b"{}")
+                except json.JSONDecodeError:
+                    return self._send_json(400, {"error": {"message": "JSON inválido", "type": "invalid_request_error"}})
+
+                route = routes.get(self.path.split("?")[0].rstrip("/"))
+                if route is None:
+                    return self._send_json(404, {"error": {"message": f"Rota não suportada: {self.path}", "type": "invalid_request_error"}})
+
+                latency, failure = server._draw()
+                server.calls["requests"] += 1
+                if failure == "timeout":
+                    server.calls["timeouts"] += 1
+                    time.sleep(server.timeout_s)
+                elif latency:
+                    time.sleep(latency)
+
+                if failure == 429:
+                    server.calls["errors_429"] += 1
+                    return self._send_json(429, {"error": {"message": "Rate limit simulado", "type": "rate_limit_error", "code": "rate_limit_exceeded"}},
+                                           headers={"retry-after-ms": "50"})
+                if failure == 500:
+                    server.calls["errors_500"] += 1
+                    return self._send_json(500, {"error": {"message": "Erro interno simulado", "type": "server_error"}})
+                try:
+                    payload = route(body)
+                    if body.get("stream") and route == server.handle_responses:
+                        self._send_sse(server.iter_response_stream_events(payload))
+                    else:
+                        self._send_json(200, payload)
+                except (BrokenPipeError, ConnectionResetError): # Cliente desistiu (ex.: timeout)
+                    pass
+
+        return _Handler
+
+@contextmanager
+def offline_openai_stub_server(**server_kwargs):
+    """
+    Inicia um `OpenAIStubServer` e aponta o `ai_orchestrator` para ele (via LLM_BASE_URL_ENV_VAR),
+    restaurando o ambiente e o cliente global ao final.
+
+    Yields:
+        OpenAIStubServer: O servidor em execução.
+    """
+    import src.core.ai_orchestrator as ai_orchestrator
+    from src.settings import LLM_BASE_URL_ENV_VAR
+
+    previous_url = os.environ.get(LLM_BASE_URL_ENV_VAR)
+    previous_client = ai_orchestrator.client_openai
+    with OpenAIStubServer(**server_kwargs) as server:
+        os.environ[LLM_BASE_URL_ENV_VAR] = server.base_url
+        ai_orchestrator.client_openai = None
+        try:
+            yield server
+        finally:
+            if previous_url is None:
+                os.environ.pop(LLM_BASE_URL_ENV_VAR, None)
+            else:
+                os.environ[LLM_BASE_URL_ENV_VAR] = previous_url
+            ai_orchestrator.client_openai = previous_client
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Servidor stub compatível com a API da OpenAI.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--latency", default="fixed:0", help="fixed:S | uniform:MIN,MAX | normal:MEDIA,DESVIO | lognormal:MU,SIGMA")
+    parser.add_argument("--error-429", type=float, default=0.0)
+    parser.add_argument("--error-500", type=float, default=0.0)
+    parser.add_argument("--timeout-rate", type=float, default=0.0)
+    parser.add_argument("--timeout-s", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    server = OpenAIStubServer(args.host, args.port, args.latency, args.error_429, args.error_500,
+                              args.timeout_rate, args.timeout_s, seed=args.seed)
+    print(f"Servidor stub em {server.base_url} (chave aceita: qualquer, ex.: {FAKE_API_KEY}). Ctrl+C para encerrar.")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+    return 0
+
+execution_time = perf_counter() - start_time
+logger.debug(f"Carregado STUB_SERVER em {execution_time:.4f}s")
+
+if __name__ == "__main__":
+    sys.exit(main())
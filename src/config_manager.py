@@ -9,10 +9,13 @@ logger.debug(f"{start_time:.4f}s - Iniciando config_manager.py")
 import atexit
 import keyring
 import logging
+import threading
+import urllib.parse
+from dataclasses import dataclass
 from typing import Dict, Any, Optional
 
 from src.settings import (APP_NAME, PROXY_URL_DEFAULT, PROXY_PORT_DEFAULT, PROXY_KEYRING_SERVICE, K_PROXY_ENABLED, K_PROXY_PASSWORD_SAVED, 
-                          K_PROXY_IP_URL, K_PROXY_PORT, K_PROXY_USERNAME, K_PROXY_PASSWORD)
+                          K_PROXY_IP_URL, K_PROXY_PORT, K_PROXY_USERNAME, K_PROXY_PASSWORD, PROXY_SKIP_SSL_VERIFY)
 
 ''' Se essa backend migrar para nuvem, avaliar como funcionará a sistemática do Save_proxy_settings se necessário'''
 
@@ -57,6 +60,72 @@ def get_proxy_settings() -> Optional[Dict[str, Any]]:
         # Retorna um estado seguro (desabilitado) em caso de erro na leitura
         return config_start
 
+@dataclass(frozen=True)
+class ProxyConfig:
+    """
+    Configuração de rede efetiva (proxy e verificação SSL), repassada explicitamente aos clientes HTTP
+    (sessões `requests` do Firebase, pools httpx da OpenAI) em vez de variáveis de ambiente.
+    """
+    url: Optional[str] = None # URL do proxy (com credenciais, se houver); None = conexão direta
+    verify_ssl: bool = True
+
+    @property
+    def enabled(self) -> bool:
+        return self.url is not None
+
+    @property
+    def requests_proxies(self) -> Dict[str, str]:
+        """Dicionário `proxies` para chamadas `requests` ({} = conexão direta)."""
+        return {"http": self.url, "https": self.url} if self.url else {}
+
+_proxy_config: Optional[ProxyConfig] = None
+_proxy_config_lock = threading.Lock()
+
+def _build_proxy_config() -> ProxyConfig:
+    config = get_proxy_settings() or {}
+    if not config.get(K_PROXY_ENABLED):
+        return ProxyConfig()
+    ip, port, username = config.get(K_PROXY_IP_URL), config.get(K_PROXY_PORT), config.get(K_PROXY_USERNAME)
+    if not ip or not port:
+        logger.warning("Proxy habilitado mas IP ou Porta não definidos. Proxy não será aplicado.")
+        return ProxyConfig()
+
+    proxy_url = f"http://{ip}:{port}"
+    if username:
+        try:
+            password = keyring.get_password(PROXY_KEYRING_SERVICE, K_PROXY_PASSWORD)
+            if password:
+                # Cuidado com caracteres especiais na senha/usuário para URLs
+                proxy_url = f"http://{urllib.parse.quote(username)}:{urllib.parse.quote(password)}@{ip}:{port}"
+            else:
+                logger.warning(f"Proxy user '{username}' definido, mas senha não encontrada no Keyring. Usando proxy sem autenticação.")
+        except Exception as e:
+            logger.error(f"Erro ao buscar senha do proxy do Keyring: {e}", exc_info=True)
+    # Com proxy corporativo, a verificação do certificado SSL é desativada (inspeção TLS do proxy)
+    return ProxyConfig(url=proxy_url, verify_ssl=not PROXY_SKIP_SSL_VERIFY)
+
+def get_proxy_config() -> ProxyConfig:
+    """
+    Configuração de proxy efetiva, lida do Keyring uma única vez e mantida em memória até
+    `invalidate_proxy_config` (chamada ao salvar ou remover as configurações de proxy).
+    """
+    global _proxy_config
+    config = _proxy_config
+    if config is not None:
+        return config
+    with _proxy_config_lock:
+        if _proxy_config is None:
+            _proxy_config = _build_proxy_config()
+            logger.debug(f"Configuração de proxy carregada (proxy={'sim' if _proxy_config.enabled else 'não'}, "
+                         f"verify_ssl={_proxy_config.verify_ssl}).")
+        return _proxy_config
+
+def invalidate_proxy_config():
+    """Descarta a configuração em memória; a próxima chamada de `get_proxy_config` relê o Keyring."""
+    global _proxy_config
+    with _proxy_config_lock:
+        _proxy_config = None
+
 def delete_proxy_settings() -> None:
     """
     Deleta as configurações de proxy (username e password) do Keyring.
@@ -70,6 +139,7 @@ def delete_proxy_settings() -> None:
         keyring.delete_password(PROXY_KEYRING_SERVICE, K_PROXY_PASSWORD)
     except keyring.errors.PasswordDeleteError:
         logger.debug("Senha não existia para deletar.")
+    invalidate_proxy_config()
     
 def save_proxy_settings(config: Dict[str, Any]) -> bool:
     """
@@ -114,6 +184,8 @@ def save_proxy_settings(config: Dict[str, Any]) -> bool:
     except Exception as e:
         logger.error(f"Erro ao salvar configurações de proxy no Keyring: {e}", exc_info=True)
         return False
+    finally:
+        invalidate_proxy_config()
 
 def set_final_keyring_proxy():
     """
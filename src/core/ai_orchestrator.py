@@ -12,7 +12,8 @@ start_time = perf_counter()
 logger.debug(f"{start_time:.4f}s - Iniciando ai_orchestrator.py")
 
 import os
-from typing import Optional, Dict, Any, List, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, Callable, List, Tuple, Union
 from openai import OpenAI, AuthenticationError, APIError # Para tratamento específico de erros OpenAI
 
 # LangChain Imports
@@ -24,11 +25,21 @@ from langchain_core.output_parsers import StrOutputParser # Para LCEL
 from langchain_community.callbacks.manager import get_openai_callback
 
 # Imports do Projeto
-from src.settings import DEFAULT_LLM_PROVIDER, DEFAULT_LLM_MODEL, DEFAULT_TEMPERATURE
+from src.settings import (DEFAULT_LLM_PROVIDER, DEFAULT_LLM_MODEL, DEFAULT_TEMPERATURE,
+                          LLM_SEGMENTS_CONCURRENT, LLM_SEGMENTS_MAX_CONCURRENCY, LLM_BASE_URL_ENV_VAR,
+                          LLM_STREAMING_ENABLED, LLM_MAP_REDUCE_MAX_CONCURRENCY, LLM_MAP_REDUCE_MAX_COST_USD,
+                          LLM_MAP_REDUCE_MAX_CHUNKS, LLM_MAP_REDUCE_EST_OUTPUT_TOKENS)
 
 from src.utils import with_proxy
 from src.core.prompts import (output_formats, review_function, normalizing_function, # prompts
-                                formatted_initial_analysis, try_convert_to_pydantic_format, return_parse_prompt)
+                                formatted_initial_analysis, try_convert_to_pydantic_format, return_parse_prompt,
+                                merge_parts_into_model)
+from src.core import llm_response_cache
+from src.core.partial_json import IncrementalJSONObjectParser
+from src.core.llm_resilience import ResilientLLMCaller, CircuitOpenError, LLMDeadlineExceededError
+from src.core.llm_clients import get_openai_client, get_llm_http_client
+from src.core.prompt_layout import cache_friendly_layout, add_cache_efficiency
+from src.core.prompt_registry import STATIC_TOKEN_COUNTS_KEY
 
 MODEL_FOR_COUNT_TOKENS = "gpt-4o"
 
@@ -240,8 +251,20 @@ def criar_batches(
     logger.debug("Procedido: criar_batches")
     return batches_com_info_original
 
+# Cliente injetado (testes/benchmarks). Quando None, os clientes vêm do registro em src/core/llm_clients.py,
+# um por (provedor, chave, URL base, proxy), com a chave passada explicitamente (nunca via os.environ).
 client_openai = None
 
+def get_llm_base_url() -> Optional[str]:
+    """Retorna a URL base sobrescrita da API (LLM_BASE_URL_ENV_VAR), ou None para o endpoint padrão do provedor."""
+    return os.getenv(LLM_BASE_URL_ENV_VAR) or None
+
+def _get_openai_client(api_key: Optional[str], provider: str = "openai") -> Any:
+    """Retorna o cliente injetado, se houver, ou o cliente do registro para a chave informada."""
+    if client_openai is not None:
+        return client_openai
+    return get_openai_client(api_key, provider=provider, base_url=get_llm_base_url())
+
 @with_proxy()
 def get_embeddings_from_api(
     pages_texts: List[str],
@@ -266,8 +289,6 @@ def get_embeddings_from_api(
         - total_tokens_api: Número total de tokens processados pela API.
         - cost_usd: Custo estimado em USD do processamento.
     """
-    global client_openai
-
     if not pages_texts:
         logger.debug("get_embeddings_from_api: Recebeu uma lista de textos vazia. Retornando resultados vazios.")
         return [], 0, 0
@@ -315,19 +336,13 @@ def get_embeddings_from_api(
         return lista_final_embeddings_ordenada, total_tokens_api, cost_usd
 
     try:
-        # Configura o cliente OpenAI se ainda não estiver configurado ou se uma nova chave for fornecida
-        # Esta lógica assume que se `api_key` é fornecido, ele deve ser usado,
-        # caso contrário, o cliente (se já existir) ou um novo cliente usará a chave do ambiente.
-        current_api_key_in_env = os.environ.get("OPENAI_API_KEY")
-        key_to_use = api_key if api_key else current_api_key_in_env
+        # Usa a chave fornecida ou, na falta dela, a do ambiente (apenas leitura)
+        key_to_use = api_key if api_key else os.environ.get("OPENAI_API_KEY")
 
-        if not key_to_use:
+        if not key_to_use and client_openai is None:
             raise ValueError("Chave API da OpenAI não fornecida nem configurada no ambiente.")
 
-        # Reinstanciar o cliente se a chave mudou ou se não existe
-        if client_openai is None or (api_key and client_openai.api_key != api_key) :
-             logger.debug("Instanciando ou reinstanciando o cliente OpenAI com a chave fornecida/ambiente.")
-             client_openai = OpenAI(api_key=key_to_use) # Usa a chave efetiva
+        embeddings_client = _get_openai_client(key_to_use)
         
         for batch_de_textos, batch_de_indices_originais in batches_para_api:
             if not batch_de_textos: # Segurança, não deve acontecer se criar_batches for correta
@@ -335,7 +350,7 @@ def get_embeddings_from_api(
 
             # Para text-embedding-3-small, a dimensão padrão é 1536.
             # Se você quisesse um número menor de dimensões (e o modelo suportar), passaria `dimensions=`
-            response = client_openai.embeddings.create(
+            response = embeddings_client.embeddings.create(
                 model=model_embedding,
                 input=batch_de_textos
                 # dimensions=256 # Exemplo se quisesse embeddings menores e o modelo suportasse
@@ -393,6 +408,8 @@ def convert_pydantic_to_json_schema(formatted_initial_pydantic: Any) -> Dict[str
 def _get_prompt_to_cache(prompts, key_prompt: str, placeholder_str: str, input_processed_text: str) -> Tuple[List[Dict[str, str]], int]:
     """
     Prepara um prompt para cache, substituindo um placeholder e contando os tokens.
+    As mensagens estáticas ficam à frente do documento (`cache_friendly_layout`), de modo que
+    parte do prefixo também é reaproveitada entre documentos diferentes.
 
     Args:
         key_prompt (str): Chave para recuperar o prompt do dicionário `prompts`.
@@ -404,7 +421,7 @@ def _get_prompt_to_cache(prompts, key_prompt: str, placeholder_str: str, input_p
             - A lista de dicionários do prompt modificado.
             - A contagem de tokens do prompt principal.
     """
-    prompt_inicial_para_cache = prompts[key_prompt]
+    prompt_inicial_para_cache = cache_friendly_layout(prompts[key_prompt], placeholder_str)
     prompt_inicial_para_cache = [{key: value.replace(placeholder_str, input_processed_text) for key, value in msg_dict.items()} for msg_dict in prompt_inicial_para_cache]
     main_tokens_count = contar_tokens(prompt_inicial_para_cache, MODEL_FOR_COUNT_TOKENS)
     if main_tokens_count:
@@ -481,6 +498,110 @@ def _get_token_usage_info(dados_segmentados: List[Any], waited_cached_tokens: in
     logger.debug("Procedido: _get_token_usage_info")
     return token_usage_info
 
+def _run_prompt_segments(client: Any, model_name: str, temperature: float, prompt_inicial_para_cache: List[Dict[str, str]],
+                         prompt_groups: List[List[Dict[str, str]]], concurrent: bool = LLM_SEGMENTS_CONCURRENT,
+                         max_concurrency: int = LLM_SEGMENTS_MAX_CONCURRENCY,
+                         caller: Optional[ResilientLLMCaller] = None) -> List[Any]:
+    """
+    Executa os segmentos de PROMPTS_SEGMENTADOS, retornando as respostas na ordem original dos grupos.
+
+    No modo concorrente, o primeiro segmento é enviado sozinho para gravar o prefixo comum
+    (`prompt_inicial_para_cache`) no cache do provedor; os demais seguem em paralelo e já
+    encontram o prefixo em cache. Assim a expectativa de cached_tokens de `_get_token_usage_info`
+    (todos os segmentos exceto o primeiro e o parse final) continua válida.
+
+    Args:
+        client (Any): Cliente OpenAI.
+        model_name (str): Modelo a ser usado.
+        temperature (float): Temperatura da geração.
+        prompt_inicial_para_cache (List[Dict[str, str]]): Mensagens comuns (com o documento) prefixadas a cada segmento.
+        prompt_groups (List[List[Dict[str, str]]]): Mensagens específicas de cada segmento.
+        concurrent (bool): Se False, executa os segmentos sequencialmente.
+        max_concurrency (int): Número máximo de requisições simultâneas após o aquecimento.
+        caller (Optional[ResilientLLMCaller]): Camada de resiliência compartilhada pela análise
+                                               (se None, uma nova é criada para o modelo).
+
+    Returns:
+        List[Any]: Respostas (`responses.create`) na mesma ordem de `prompt_groups`.
+    """
+    caller = caller or ResilientLLMCaller("openai", model_name)
+
+    def _request_segment(prompt_group):
+        response = caller.call(lambda timeout: client.responses.create(
+            model=model_name,
+            input=prompt_inicial_para_cache+prompt_group, 
+            temperature=temperature,
+            user="Assistant_NC_Analytics",
+            timeout=timeout,
+        ), label="responses.create")
+        logger.debug(f"Token usage info for segment: {response.usage}\n\n")
+        return response
+
+    if not prompt_groups:
+        return []
+    if not concurrent or max_concurrency <= 1 or len(prompt_groups) <= 2:
+        return [_request_segment(prompt_group) for prompt_group in prompt_groups]
+
+    # 1º segmento isolado: aquece o cache de prefixo antes das requisições paralelas
+    dados_segmentados = [_request_segment(prompt_groups[0])]
+    with ThreadPoolExecutor(max_workers=min(max_concurrency, len(prompt_groups) - 1), thread_name_prefix="llm_segment") as executor:
+        dados_segmentados.extend(executor.map(_request_segment, prompt_groups[1:])) # map preserva a ordem original
+    logger.debug(f"Procedido: _run_prompt_segments ({len(prompt_groups)} segmentos, concorrência {max_concurrency})")
+    return dados_segmentados
+
+def _render_messages_for_cache(prompt_name: str, prompts: Dict[str, List], processed_text: str) -> Any:
+    """
+    Renderiza as mensagens de uma análise (com o texto do documento) para compor a chave do cache de respostas.
+    No modo PROMPTS_SEGMENTADOS, inclui o prefixo comum e todos os grupos de segmentos.
+    """
+    def _render(prompt_list_dicts):
+        return [{key: value.replace("{input_text}", processed_text) for key, value in msg_dict.items()}
+                for msg_dict in cache_friendly_layout(prompt_list_dicts)]
+
+    if prompt_name == "PROMPTS_SEGMENTADOS_for_INITIAL_ANALYSIS":
+        return {"prefix": _render(prompts["prompt_inicial_para_cache"]), "groups": prompts[prompt_name]}
+    return _render(prompts[prompt_name])
+
+def _stream_structured_response(client: Any, model_name: str, input_messages: List[Dict[str, str]], temperature: float,
+                                text_format: Any, on_partial_fields: Callable[[Dict[str, Any]], None],
+                                timeout: Optional[float] = None) -> Any:
+    """
+    Executa `responses.stream` com saída estruturada, repassando a `on_partial_fields` cada lote
+    de campos de primeiro nível assim que seus valores JSON ficam completos.
+
+    Args:
+        client (Any): Cliente OpenAI.
+        model_name (str): Modelo a ser usado.
+        input_messages (List[Dict[str, str]]): Mensagens já renderizadas.
+        temperature (float): Temperatura da geração.
+        text_format (Any): Modelo Pydantic da saída (ex.: formatted_initial_analysis).
+        on_partial_fields (Callable[[Dict[str, Any]], None]): Callback com os campos concluídos (acumulados).
+        timeout (Optional[float]): Timeout da requisição, em segundos (None = padrão do cliente).
+
+    Returns:
+        Any: Resposta final (com `output_text` e `usage`), equivalente à de `responses.parse`.
+    """
+    parser = IncrementalJSONObjectParser()
+    first_field_time = None
+    t0 = perf_counter()
+    request_options = {"timeout": timeout} if timeout else {}
+    with client.responses.stream(model=model_name, input=input_messages, temperature=temperature,
+                                 text_format=text_format, **request_options) as stream:
+        for event in stream:
+            if event.type != "response.output_text.delta":
+                continue
+            if parser.feed(event.delta):
+                if first_field_time is None:
+                    first_field_time = perf_counter() - t0
+                    logger.info(f"Streaming LLM: primeiro campo recebido em {first_field_time:.2f}s")
+                try:
+                    on_partial_fields(dict(parser.fields))
+                except Exception as e: # Falhas na GUI não devem interromper a análise
+                    logger.warning(f"Falha no callback de campos parciais: {e}")
+        response = stream.get_final_response()
+    logger.debug(f"Procedido: _stream_structured_response ({len(parser.fields)} campos em {perf_counter() - t0:.2f}s)")
+    return response
+
 # --- Função Principal de Análise ---
 @with_proxy()
 def analyze_text_with_llm(
@@ -492,6 +613,7 @@ def analyze_text_with_llm(
         temperature: float = DEFAULT_TEMPERATURE,
         api_key: str = None,
         loaded_llm_providers: Dict = {},
+        on_partial_fields: Optional[Callable[[Dict[str, Any]], None]] = None,
     ) -> tuple[Optional[str], Optional[Dict[str, Any]]]:
     """
     Envia texto processado para um LLM através do LangChain para análise,
@@ -505,14 +627,14 @@ def analyze_text_with_llm(
         temperature (float): Parâmetro de temperatura para a geração do LLM.
         prompt_name (str): O nome do prompt a ser recuperado do módulo `prompts`.
                            Espera-se que retorne uma lista de tuplas (role, content_template).
+        on_partial_fields (Optional[Callable]): Se informado (provider 'openai' com PROMPT_UNICO), a resposta
+                           é consumida em streaming e os campos já concluídos são repassados a este callback.
 
     Returns:
         Tuple[Optional[Any], Optional[Dict[str, Any]]]: Uma tupla contendo:
             - final_response: A resposta final do LLM, formatada conforme `output_formats`.
             - token_usage_info: Um dicionário com informações detalhadas sobre o uso de tokens e custo.
     """
-    global client_openai
-
     logger.info(f"Iniciando análise de texto com LLM. Provider: {provider}, Prompt: {prompt_name}")
        
     start_time = perf_counter()
@@ -521,27 +643,62 @@ def analyze_text_with_llm(
     #chain_result: Optional[Dict[str, Any]] = None
     final_response: Optional[str] = None
     token_usage_info: Optional[Dict[str, Any]] = None
+    raw_output: Optional[str] = None # Texto bruto da resposta final, gravado no cache de respostas
+
+    # Cache de respostas: requisições idênticas (e determinísticas) não voltam à API
+    cache_key = None
+    if llm_response_cache.is_cacheable(temperature):
+        try:
+            cache_key = llm_response_cache.make_cache_key(provider, model_name, temperature,
+                                                          _render_messages_for_cache(prompt_name, prompts, processed_text),
+                                                          output_formats.get(prompt_name))
+            cached_entry = llm_response_cache.get_cached_response(cache_key)
+        except Exception as e:
+            logger.warning(f"Cache de respostas LLM indisponível para esta requisição: {e}")
+            cache_key, cached_entry = None, None
+
+        if cached_entry:
+            logger.info(f"Resposta LLM obtida do cache local (chave {cache_key[:12]}...). Nenhuma requisição à API.")
+            final_response = cached_entry["raw_output"]
+            if provider == "openai" and prompt_name == "PROMPTS_SEGMENTADOS_for_INITIAL_ANALYSIS":
+                final_response = try_convert_to_pydantic_format(final_response, formatted_initial_analysis)
+            token_usage_info = llm_response_cache.build_cache_hit_usage(cached_entry, cache_key)
+
+            final_response = normalizing_function(final_response)
+            final_response = review_function(final_response)
+            logger.info(f"Token_usage_info: {token_usage_info}")
+            return final_response, token_usage_info, perf_counter() - start_time
+
+    # Timeouts, novas tentativas, circuit breaker e hedging (contadores anexados ao token_usage_info)
+    caller = ResilientLLMCaller(provider, model_name)
 
     try:
         if provider == "openai":
-            os.environ["OPENAI_API_KEY"] = api_key
-            # Chamada à API de ChatCompletion
-            if not client_openai:
-                client_openai = OpenAI()
+            # Cliente de longa duração do registro (pool keep-alive); a chave não passa pelo ambiente
+            llm_client = _get_openai_client(api_key, provider).with_options(max_retries=0) # Novas tentativas ficam a cargo do ResilientLLMCaller
             if prompt_name == "PROMPT_UNICO_for_INITIAL_ANALYSIS":
-                prompt_list_dicts = prompts[prompt_name]
+                prompt_list_dicts = cache_friendly_layout(prompts[prompt_name]) # Documento ao final: prefixo estático reaproveitado
                 modified_prompt_list = []
                 for msg_dict in prompt_list_dicts:
                     modified_msg_dict = {key: value.replace("{input_text}", processed_text) for key, value in msg_dict.items()}
                     modified_prompt_list.append(modified_msg_dict)
 
-                response = client_openai.responses.parse(
-                    model=model_name,
-                    input=modified_prompt_list, # Lista única
-                    temperature=temperature,
-                    text_format = output_formats[prompt_name]
-                )
+                if on_partial_fields is not None and LLM_STREAMING_ENABLED:
+                    # Sem hedging: uma cópia duplicaria os campos parciais enviados à GUI
+                    response = caller.call(lambda timeout: _stream_structured_response(
+                                               llm_client, model_name, modified_prompt_list, temperature,
+                                               output_formats[prompt_name], on_partial_fields, timeout=timeout),
+                                           label="responses.stream", hedgeable=False)
+                else:
+                    response = caller.call(lambda timeout: llm_client.responses.parse(
+                        model=model_name,
+                        input=modified_prompt_list, # Lista única
+                        temperature=temperature,
+                        text_format = output_formats[prompt_name],
+                        timeout=timeout,
+                    ), label="responses.parse")
                 final_response = response.output_text
+                raw_output = response.output_text
 
                 # Obter informações sobre o uso de tokens
                 cb = response.usage # callback
@@ -557,33 +714,25 @@ def analyze_text_with_llm(
             elif prompt_name == "PROMPTS_SEGMENTADOS_for_INITIAL_ANALYSIS":
                 prompt_inicial_para_cache, main_tokens_count = _get_prompt_to_cache(prompts, "prompt_inicial_para_cache", "{input_text}", processed_text)
 
-                dados_segmentados = []
-                for prompt_group in prompts[prompt_name]:
-                    
-                    response = client_openai.responses.create(
-                        model=model_name,
-                        input=prompt_inicial_para_cache+prompt_group, 
-                        temperature=temperature,
-                        user="Assistant_NC_Analytics" 
-                    )
-                    dados_segmentados.append(response)
-                    #logger.debug(f"Final response for segment: {response.output_text}")
-                    logger.debug(f"Token usage info for segment: {response.usage}\n\n")
+                dados_segmentados = _run_prompt_segments(llm_client, model_name, temperature,
+                                                         prompt_inicial_para_cache, prompts[prompt_name], caller=caller)
                 
                 parser_prompt_final = return_parse_prompt([response.output_text for response in dados_segmentados])
                 
-                response = client_openai.responses.parse(
+                response = caller.call(lambda timeout: llm_client.responses.parse(
                     model=model_name,
                     input=parser_prompt_final, 
                     temperature=temperature,
-                    text_format=formatted_initial_analysis
-                )
+                    text_format=formatted_initial_analysis,
+                    timeout=timeout,
+                ), label="responses.parse")
                 dados_segmentados.append(response)
                 
                 #logger.debug(f"Final response for segment: {response.output_text}")
                 logger.debug(f"Token usage info for Last segment: {response.usage}\n\n")
                 
                 final_response = _get_final_response(dados_segmentados, formatted_initial_analysis)
+                raw_output = dados_segmentados[-1].output_text
                 
                 waited_cached_tokens=main_tokens_count*(len(dados_segmentados)-2) # O prompt inicial e final não aproveita cache
                 token_usage_info = _get_token_usage_info(dados_segmentados, waited_cached_tokens)
@@ -593,7 +742,7 @@ def analyze_text_with_llm(
                 # "successful_requests": 1,
 
         elif provider == "lang_chain_openai":
-            prompt_dicts = prompts[prompt_name]
+            prompt_dicts = cache_friendly_layout(prompts[prompt_name])
             try:
                 prompt_messages_for_template: List[Tuple[str, str]] = []
                 for msg_dict in prompt_dicts:
@@ -605,22 +754,28 @@ def analyze_text_with_llm(
 
             logger.debug(f"Configurando LangChain com OpenAI. Modelo: {model_name}, Temp: {temperature}")
 
-            llm = ChatOpenAI(
-                model_name=model_name,
-                temperature=temperature,
-                openai_api_key=api_key # Passa a chave aqui  
-            )
-            
-            #prompt_template = PromptTemplate(input_variables=["input_text"], template=prompt_string)
-            #chain = LLMChain(llm=llm, prompt=prompt_template)
-            
-            # Construindo a cadeia com LCEL
-            chain = chat_prompt_template | llm | StrOutputParser()
+            def _invoke_chain(timeout):
+                llm = ChatOpenAI(
+                    model_name=model_name,
+                    temperature=temperature,
+                    openai_api_key=api_key, # Passa a chave aqui  
+                    openai_api_base=get_llm_base_url(),
+                    http_client=get_llm_http_client(), # Reaproveita o pool keep-alive do registro
+                    request_timeout=timeout,
+                    max_retries=0, # Novas tentativas ficam a cargo do ResilientLLMCaller
+                )
+                
+                #prompt_template = PromptTemplate(input_variables=["input_text"], template=prompt_string)
+                #chain = LLMChain(llm=llm, prompt=prompt_template)
+                
+                # Construindo a cadeia com LCEL
+                chain = chat_prompt_template | llm | StrOutputParser()
+                # A variável no dicionário de entrada DEVE corresponder a 'input_variables' do PromptTemplate
+                return chain.invoke({"input_text": processed_text})
 
             # Usar o callback do OpenAI para capturar o uso de tokens
-            # A variável no dicionário de entrada DEVE corresponder a 'input_variables' do PromptTemplate
             with get_openai_callback() as cb:
-                final_response = chain.invoke({"input_text": processed_text})
+                final_response = caller.call(_invoke_chain, label="langchain.invoke")
                 token_usage_info = {
                     "input_tokens":  cb.prompt_tokens,
                     "cached_tokens": cb.prompt_tokens_cached,
@@ -636,6 +791,7 @@ def analyze_text_with_llm(
                 # A chave do resultado no dicionário é geralmente 'text' para LLMChain
                 final_response = final_response.get("text") if isinstance(final_response, dict) else final_response
                 if final_response:
+                    raw_output = final_response
                     logger.info("Análise LLM concluída com sucesso.")
                 else:
                     logger.error(f"Cadeia LangChain executada, mas a resposta não contém a chave 'text' esperada. Resultado: {final_response}")
@@ -656,6 +812,14 @@ def analyze_text_with_llm(
             logger.error(f"Provedor LLM '{provider}' não suportado.")
             return None, None
 
+        if token_usage_info is not None:
+            token_usage_info.update(caller.usage_fields())
+            add_cache_efficiency(token_usage_info)
+
+    except CircuitOpenError as circuit_err:
+        logger.error(f"Chamada à API {provider} recusada: {circuit_err}")
+    except LLMDeadlineExceededError as deadline_err:
+        logger.error(f"Prazo da análise LLM esgotado ({provider}): {deadline_err}")
     except AuthenticationError as auth_err:
         logger.error(f"Erro de Autenticação com a API {provider}: {auth_err}. Verifique a chave API.", exc_info=True)
         # A GUI deve notificar o usuário sobre a chave inválida.
@@ -664,9 +828,10 @@ def analyze_text_with_llm(
         # Pode ser útil retornar a mensagem de erro para a UI.
     except Exception as e:
         logger.error(f"Erro inesperado durante a execução de Analyze_text_with_LLM ({provider}): {e}", exc_info=True)
-    
-    finally:
-        os.environ["OPENAI_API_KEY"] = ""
+
+    if cache_key and raw_output and token_usage_info:
+        llm_response_cache.store_response(cache_key, raw_output, token_usage_info,
+                                          metadata={"provider": provider, "model": model_name, "prompt_name": prompt_name})
 
     #pr-int('\n\n', f'final_response: {type(final_response)}\n', final_response, '\n\n')
 
@@ -681,5 +846,135 @@ def analyze_text_with_llm(
     return final_response, token_usage_info, processing_time
 
 
+def select_map_reduce_chunks(chunks: List[Dict[str, Any]], prompt_template_tokens: int, provider: str, model_name: str,
+                             loaded_llm_providers: Dict, max_cost_usd: float = LLM_MAP_REDUCE_MAX_COST_USD,
+                             max_chunks: int = LLM_MAP_REDUCE_MAX_CHUNKS) -> Tuple[List[Dict[str, Any]], float]:
+    """
+    Limita os blocos do map-reduce ao custo máximo estimado, mantendo os mais relevantes (ao menos um).
+
+    Args:
+        chunks (List[Dict[str, Any]]): Blocos de `PDFDocumentAnalyzer.build_map_reduce_chunks`.
+        prompt_template_tokens (int): Tokens estimados do prompt, sem o texto do documento.
+        max_cost_usd (float): Custo máximo estimado (entrada + LLM_MAP_REDUCE_EST_OUTPUT_TOKENS por bloco).
+        max_chunks (int): Número máximo de blocos.
+
+    Returns:
+        Tuple[List[Dict[str, Any]], float]: Blocos mantidos (na ordem dos documentos) e custo estimado.
+    """
+    by_relevance = sorted(range(len(chunks)), key=lambda i: chunks[i].get("relevance", 0.0), reverse=True)
+    kept, estimated_cost = [], 0.0
+    for i in by_relevance[:max(1, max_chunks)]:
+        chunk_cost = calc_costs_llm_analysis(chunks[i]["tokens"] + prompt_template_tokens, 0, LLM_MAP_REDUCE_EST_OUTPUT_TOKENS,
+                                             provider, model_name, loaded_llm_providers) or 0.0
+        if kept and estimated_cost + chunk_cost > max_cost_usd:
+            continue
+        kept.append(i)
+        estimated_cost += chunk_cost
+    return [chunks[i] for i in sorted(kept)], estimated_cost
+
+def _sum_token_usage(usages: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Soma os token_usage_info de várias chamadas (contadores numéricos somados, listas concatenadas)."""
+    total: Dict[str, Any] = {}
+    for usage in usages:
+        for key, value in (usage or {}).items():
+            if isinstance(value, bool) or key.startswith("response_cache_") or key == "cached_tokens_ratio":
+                continue
+            if isinstance(value, (int, float)):
+                total[key] = total.get(key, 0) + value
+            elif isinstance(value, list):
+                total[key] = total.get(key, []) + value
+    return total
+
+@with_proxy()
+def analyze_text_with_llm_map_reduce(
+        prompts: Dict[str, List],
+        chunks: List[Dict[str, Any]],
+        provider: str = DEFAULT_LLM_PROVIDER,
+        model_name: Optional[str] = DEFAULT_LLM_MODEL,
+        temperature: float = DEFAULT_TEMPERATURE,
+        api_key: str = None,
+        loaded_llm_providers: Dict = {},
+        max_concurrency: int = LLM_MAP_REDUCE_MAX_CONCURRENCY,
+        max_cost_usd: float = LLM_MAP_REDUCE_MAX_COST_USD,
+    ) -> Tuple[Optional[Any], Optional[Dict[str, Any]], float]:
+    """
+    Analisa documentos muito acima do limite de tokens em modo map-reduce.
+
+    Map: cada bloco de páginas é analisado com o PROMPT_UNICO (o 1º sozinho, para aquecer o
+    cache de prefixo do provedor; os demais em paralelo). Reduce: as respostas parciais são consolidadas
+    por `return_parse_prompt`; se a consolidação falhar, as partes são mescladas com `merge_parts_into_model`
+    (o bloco mais relevante prevalece).
+
+    Args:
+        prompts (Dict[str, List]): Prompts carregados (usa "PROMPT_UNICO_for_INITIAL_ANALYSIS").
+        chunks (List[Dict[str, Any]]): Blocos de `PDFDocumentAnalyzer.build_map_reduce_chunks`.
+        max_concurrency (int): Requisições simultâneas na etapa map.
+        max_cost_usd (float): Custo máximo estimado; blocos menos relevantes são descartados acima dele.
+
+    Returns:
+        Tuple[Optional[Any], Optional[Dict[str, Any]], float]: Resposta consolidada, uso de tokens somado
+        (com 'map_reduce_chunks', 'map_reduce_chunks_skipped' e 'map_reduce_estimated_cost_usd') e tempo total.
+    """
+    start_time = perf_counter()
+    map_prompt_name = "PROMPT_UNICO_for_INITIAL_ANALYSIS"
+    # Executa o corpo de analyze_text_with_llm sem reaplicar with_proxy (já ativo aqui) em cada thread
+    analyze_chunk = analyze_text_with_llm.__wrapped__
+
+    # Tokens fixos pré-calculados pelo registro de prompts; sem eles, estimativa (~4 caracteres/token)
+    template_tokens = (prompts.get(STATIC_TOKEN_COUNTS_KEY) or {}).get(map_prompt_name) or \
+        sum(len(msg.get("content", "")) for msg in prompts[map_prompt_name]) // 4
+    selected_chunks, estimated_cost = select_map_reduce_chunks(chunks, template_tokens, provider, model_name,
+                                                               loaded_llm_providers, max_cost_usd=max_cost_usd)
+    skipped = len(chunks) - len(selected_chunks)
+    if skipped:
+        logger.warning(f"Map-reduce: {skipped} bloco(s) menos relevante(s) descartado(s) pelo limite de custo (US$ {max_cost_usd:.2f}).")
+    logger.info(f"Map-reduce: analisando {len(selected_chunks)} bloco(s); custo estimado US$ {estimated_cost:.4f}.")
+
+    def _map(chunk):
+        return analyze_chunk(map_prompt_name, prompts, chunk["text"], provider, model_name, temperature,
+                             api_key, loaded_llm_providers)
+
+    results = [_map(selected_chunks[0])] if selected_chunks else []
+    if len(selected_chunks) > 1:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(selected_chunks) - 1)), thread_name_prefix="llm_map") as executor:
+            results.extend(executor.map(_map, selected_chunks[1:]))
+
+    # analyze_text_with_llm retorna (None, None) em alguns erros de configuração
+    parts = [(chunk, result[0]) for chunk, result in zip(selected_chunks, results)
+             if isinstance(result[0], formatted_initial_analysis)]
+    usages = [result[1] for result in results if result[1]]
+    if not parts:
+        logger.error("Map-reduce: nenhum bloco retornou resposta válida.")
+        return None, _sum_token_usage(usages) or None, perf_counter() - start_time
+
+    if len(parts) == 1:
+        final_response = parts[0][1]
+    else:
+        reduce_prompt = return_parse_prompt([response.model_dump_json() for _, response in parts])
+        if provider == "lang_chain_openai": # ChatPromptTemplate interpreta chaves como variáveis
+            reduce_prompt = [{k: v.replace("{", "{{").replace("}", "}}") for k, v in msg.items()} for msg in reduce_prompt]
+        reduce_result = analyze_chunk(map_prompt_name, {map_prompt_name: reduce_prompt}, "", provider,
+                                      model_name, temperature, api_key, loaded_llm_providers)
+        final_response = reduce_result[0]
+        if reduce_result[1]:
+            usages.append(reduce_result[1])
+        if not isinstance(final_response, formatted_initial_analysis):
+            logger.warning("Map-reduce: consolidação pela LLM falhou; mesclando as respostas parciais localmente.")
+            ordered_parts = [response for _, response in sorted(parts, key=lambda item: item[0].get("relevance", 0.0))]
+            try:
+                final_response = review_function(normalizing_function(merge_parts_into_model(ordered_parts, formatted_initial_analysis)))
+            except Exception as e:
+                logger.error(f"Map-reduce: falha ao mesclar respostas parciais ({e}); usando a do bloco mais relevante.")
+                final_response = ordered_parts[-1]
+
+    token_usage_info = add_cache_efficiency(_sum_token_usage(usages))
+    token_usage_info.update({
+        "map_reduce_chunks": len(selected_chunks),
+        "map_reduce_chunks_skipped": skipped,
+        "map_reduce_estimated_cost_usd": estimated_cost,
+    })
+    logger.info(f"Map-reduce concluído: {len(parts)}/{len(selected_chunks)} blocos válidos. Token_usage_info: {token_usage_info}")
+    return final_response, token_usage_info, perf_counter() - start_time
+
 execution_time = perf_counter() - start_time
 logger.info(f"[DEBUG] Carregado AI_ORCHESTRATOR em {execution_time:.4f}s")
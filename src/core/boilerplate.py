@@ -0,0 +1,96 @@
+# src/core/boilerplate.py
+"""
+Remoção de cabeçalhos, rodapés e demais linhas repetidas entre as páginas de um arquivo.
+
+Documentos oficiais repetem timbres, rodapés, carimbos de protocolo e linhas como "Documento
+assinado eletronicamente" em todas as páginas. Cada linha do texto bruto (antes da normalização de
+espaços) é reduzida a uma impressão digital (minúsculas, espaços colapsados e dígitos trocados
+por '#', para que "Página 3 de 10" e "Página 4 de 10" coincidam); as que aparecem em uma fração
+alta das páginas do arquivo são removidas antes da contagem de tokens, da similaridade e da agregação.
+A primeira ocorrência de cada uma é mantida (em geral na primeira página): o timbre identifica o órgão e o
+tipo do documento de origem, que a LLM precisa para preencher a análise.
+"""
+import logging
+logger = logging.getLogger(__name__)
+
+from time import perf_counter
+start_time = perf_counter()
+logger.debug(f"{start_time:.4f}s - Iniciando boilerplate.py")
+
+import hashlib
+import math
+import re
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from src.settings import BOILERPLATE_MIN_PAGE_FRACTION, BOILERPLATE_MIN_PAGES, BOILERPLATE_MIN_LINE_CHARS
+
+def line_fingerprint(line: str) -> Optional[int]:
+    """Impressão digital de 64 bits da linha normalizada (None para linhas curtas demais)."""
+    normalized = re.sub(r'\s+', ' ', re.sub(r'\d+', '#', line.lower())).strip()
+    if len(normalized) < BOILERPLATE_MIN_LINE_CHARS:
+        return None
+    return int.from_bytes(hashlib.blake2b(normalized.encode("utf-8"), digest_size=8).digest(), "big")
+
+def find_boilerplate_fingerprints(pages_texts: List[str], min_page_fraction: float = BOILERPLATE_MIN_PAGE_FRACTION,
+                                  min_pages: int = BOILERPLATE_MIN_PAGES) -> Set[int]:
+    """
+    Retorna as impressões digitais das linhas presentes em pelo menos `min_page_fraction` das páginas
+    (e em no mínimo `min_pages` páginas). Arquivos com menos de `min_pages` páginas não são avaliados.
+    """
+    if len(pages_texts) < min_pages:
+        return set()
+    page_frequency: Counter = Counter()
+    for text in pages_texts:
+        fingerprints = {line_fingerprint(line) for line in (text or "").splitlines()}
+        fingerprints.discard(None)
+        page_frequency.update(fingerprints)
+    threshold = max(min_pages, math.ceil(min_page_fraction * len(pages_texts)))
+    return {fingerprint for fingerprint, count in page_frequency.items() if count >= threshold}
+
+def strip_boilerplate(pages_texts: List[str], count_tokens_fn: Optional[Callable[[str], int]] = None,
+                      min_page_fraction: float = BOILERPLATE_MIN_PAGE_FRACTION,
+                      min_pages: int = BOILERPLATE_MIN_PAGES) -> Tuple[List[str], Dict[str, Any]]:
+    """
+    Remove as linhas repetidas entre as páginas de um arquivo, mantendo a primeira ocorrência de cada uma.
+
+    Args:
+        pages_texts (List[str]): Texto bruto (com quebras de linha) de cada página do arquivo.
+        count_tokens_fn (Optional[Callable[[str], int]]): Contador de tokens para estimar a economia
+                                                          (cada linha distinta é contada uma única vez).
+        min_page_fraction (float): Fração mínima de páginas em que a linha deve aparecer.
+        min_pages (int): Número mínimo de páginas (do arquivo e de ocorrências da linha).
+
+    Returns:
+        Tuple[List[str], Dict[str, Any]]: Textos sem as repetições e estatísticas ('boilerplate_patterns',
+        'lines_removed', 'tokens_saved'), que contam apenas as linhas efetivamente removidas.
+    """
+    stats = {"boilerplate_patterns": 0, "lines_removed": 0, "tokens_saved": 0}
+    boilerplate = find_boilerplate_fingerprints(pages_texts, min_page_fraction, min_pages)
+    if not boilerplate:
+        return list(pages_texts), stats
+
+    removed_lines: Counter = Counter()
+    seen: Set[int] = set()
+    cleaned_pages = []
+    for text in pages_texts:
+        kept_lines = []
+        for line in (text or "").splitlines():
+            fingerprint = line_fingerprint(line)
+            if fingerprint in boilerplate and fingerprint in seen:
+                removed_lines[line.strip()] += 1
+            else:
+                if fingerprint in boilerplate:
+                    seen.add(fingerprint)
+                kept_lines.append(line)
+        cleaned_pages.append("\n".join(kept_lines))
+
+    stats["boilerplate_patterns"] = len(boilerplate)
+    stats["lines_removed"] = sum(removed_lines.values())
+    if count_tokens_fn is not None:
+        stats["tokens_saved"] = sum(count_tokens_fn(line) * count for line, count in removed_lines.items())
+    logger.debug(f"Boilerplate: {len(boilerplate)} padrões, {stats['lines_removed']} linhas removidas em {len(pages_texts)} páginas.")
+    return cleaned_pages, stats
+
+execution_time = perf_counter() - start_time
+logger.debug(f"Carregado BOILERPLATE em {execution_time:.4f}s")
@@ -0,0 +1,149 @@
+# src/core/budget_planner.py
+"""
+Planejador do orçamento de tokens para a seleção de páginas enviadas à LLM.
+
+A seleção é tratada como uma mochila 0/1: valor = relevância recalculada da página, custo = número
+de tokens (já calculado em `build_combined_page_data`), capacidade = limite de tokens do prompt.
+A programação dinâmica é exata enquanto `n_itens * (capacidade + 1)` for pequeno; acima disso os
+custos são reescalados (arredondados para cima, o que preserva a viabilidade) e a sobra do orçamento
+é preenchida com os melhores itens restantes.
+"""
+import logging
+logger = logging.getLogger(__name__)
+
+from time import perf_counter
+start_time = perf_counter()
+logger.debug(f"{start_time:.4f}s - Iniciando budget_planner.py")
+
+import math
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.settings import KNAPSACK_EXACT_MAX_CELLS, KNAPSACK_APPROX_BUCKETS
+
+def solve_knapsack(values: Sequence[float], costs: Sequence[int], capacity: int,
+                   max_exact_cells: int = KNAPSACK_EXACT_MAX_CELLS,
+                   approx_buckets: int = KNAPSACK_APPROX_BUCKETS) -> Tuple[List[int], bool]:
+    """
+    Resolve a mochila 0/1 por programação dinâmica (vetorizada com numpy).
+
+    Args:
+        values (Sequence[float]): Valor de cada item (>= 0).
+        costs (Sequence[int]): Custo inteiro de cada item (>= 0).
+        capacity (int): Custo total máximo.
+        max_exact_cells (int): Tamanho máximo da tabela n * (capacidade+1) para a solução exata.
+        approx_buckets (int): Resolução da capacidade reescalada na solução aproximada.
+
+    Returns:
+        Tuple[List[int], bool]: Índices selecionados (ordem crescente) e se a solução é exata.
+    """
+    n = len(values)
+    if n == 0 or capacity <= 0:
+        return [], True
+
+    exact = n * (capacity + 1) <= max_exact_cells
+    scale = 1 if exact else max(1, math.ceil(capacity / max(1, approx_buckets)))
+    budget = capacity // scale
+    weights = [math.ceil(max(0, c) / scale) for c in costs]
+
+    dp = np.zeros(budget + 1, dtype=np.float64) # dp[c] = melhor valor com custo <= c
+    keep = np.zeros((n, budget + 1), dtype=bool)
+    for i, (value, weight) in enumerate(zip(values, weights)):
+        if value <= 0 or weight > budget:
+            continue
+        if weight == 0:
+            keep[i, :] = True
+            dp += value
+            continue
+        candidate = dp[:budget + 1 - weight] + value
+        take = candidate > dp[weight:]
+        keep[i, weight:] = take
+        dp[weight:] = np.where(take, candidate, dp[weight:])
+
+    selected = []
+    c = budget
+    for i in range(n - 1, -1, -1):
+        if keep[i, c]:
+            selected.append(i)
+            c -= weights[i]
+
+    if not exact: # O arredondamento dos custos desperdiça orçamento: completa com os melhores itens que ainda cabem
+        used = sum(costs[i] for i in selected)
+        chosen = set(selected)
+        for i in sorted(range(n), key=lambda j: values[j], reverse=True):
+            if i not in chosen and values[i] > 0 and used + costs[i] <= capacity:
+                chosen.add(i)
+                used += costs[i]
+        selected = list(chosen)
+    return sorted(selected), exact
+
+def greedy_plan(values: Sequence[float], costs: Sequence[int], capacity: int) -> Tuple[List[int], Optional[int], int, float]:
+    """
+    Reproduz o plano guloso legado: na ordem recebida, inclui as páginas que cabem e trunca a
+    primeira que não cabe (valor proporcional à fração mantida), ignorando as seguintes.
+
+    Returns:
+        Tuple[List[int], Optional[int], int, float]: Índices inteiros, índice truncado (ou None),
+        tokens disponíveis para o truncado e o valor total do plano.
+    """
+    used, total_value, included = 0, 0.0, []
+    for i, (value, cost) in enumerate(zip(values, costs)):
+        if used + cost <= capacity:
+            used += cost
+            total_value += value
+            included.append(i)
+        else:
+            remaining = capacity - used
+            if remaining > 0 and cost > 0:
+                return included, i, remaining, total_value + value * remaining / cost
+            break
+    return included, None, 0, total_value
+
+def plan_page_selection(page_keys: Sequence[str], values: Sequence[float], costs: Sequence[int],
+                        capacity: int) -> Dict[str, Any]:
+    """
+    Planeja quais páginas entram no orçamento, incluindo (truncada) a melhor página excluída que
+    ainda tenha espaço, e compara a relevância obtida com a do plano guloso. Se a solução
+    (aproximada) não superar o plano guloso, este é mantido.
+
+    Args:
+        page_keys (Sequence[str]): Chaves das páginas, em ordem decrescente de relevância.
+        values (Sequence[float]): Relevância de cada página.
+        costs (Sequence[int]): Tokens de cada página.
+        capacity (int): Limite de tokens.
+
+    Returns:
+        Dict[str, Any]: 'full_keys' (páginas inteiras, na ordem de relevância), 'partial_key'
+        (página a truncar em 'partial_budget' tokens, ou None), 'exact', 'value', 'greedy_value',
+        'recovered_value' e 'recovered_pct'.
+    """
+    selected, exact = solve_knapsack(values, costs, capacity)
+    used = sum(costs[i] for i in selected)
+    value = sum(values[i] for i in selected)
+
+    partial_index, remaining = None, capacity - used
+    if remaining > 0:
+        chosen = set(selected)
+        excluded = [i for i in range(len(page_keys)) if i not in chosen and costs[i] > remaining and values[i] > 0]
+        if excluded:
+            partial_index = max(excluded, key=lambda i: values[i] * remaining / costs[i])
+            value += values[partial_index] * remaining / costs[partial_index]
+
+    greedy_full, greedy_partial, greedy_remaining, greedy_value = greedy_plan(values, costs, capacity)
+    if value < greedy_value:
+        selected, partial_index, remaining, value = greedy_full, greedy_partial, greedy_remaining, greedy_value
+    recovered = value - greedy_value
+    return {
+        "full_keys": [page_keys[i] for i in selected],
+        "partial_key": page_keys[partial_index] if partial_index is not None else None,
+        "partial_budget": remaining if partial_index is not None else 0,
+        "exact": exact,
+        "value": value,
+        "greedy_value": greedy_value,
+        "recovered_value": recovered,
+        "recovered_pct": (recovered / greedy_value * 100) if greedy_value > 0 else 0.0,
+    }
+
+execution_time = perf_counter() - start_time
+logger.debug(f"Carregado BUDGET_PLANNER em {execution_time:.4f}s")
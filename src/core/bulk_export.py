@@ -0,0 +1,180 @@
+# src/core/bulk_export.py
+"""
+Exportação em lote de análises para DOCX (um arquivo por caso), compactadas em um ZIP.
+
+Os documentos são gerados em um pool de processos (cada processo mantém seu DocxExporter e o template
+compilado em cache) e gravados no ZIP à medida que ficam prontos: apenas os documentos em andamento
+(no máximo 2 × workers) ficam em memória. Pode ser usada pela interface (InternalExportManager) ou
+sem interface:
+
+    python -m src.core.bulk_export analises.json saida.zip --template "assets/templates_docx/Mod. Info 1.docx"
+
+O JSON de entrada é uma lista de objetos com os campos de `formatted_initial_analysis` (a chave opcional
+"nome_arquivo" define o nome do DOCX) ou um objeto {nome_arquivo: campos}.
+"""
+import logging
+logger = logging.getLogger(__name__)
+
+from time import perf_counter
+start_time = perf_counter()
+logger.debug(f"{start_time:.4f}s - Iniciando bulk_export.py")
+
+import os
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from io import BytesIO
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from src.settings import BULK_EXPORT_MAX_WORKERS
+
+# Progresso: (documentos concluídos, total)
+ProgressCallback = Callable[[int, int], None]
+
+def _safe_filename(name: str) -> str:
+    name = re.sub(r'[\\/:*?"<>|\r\n\t]+', "_", str(name)).strip(" ._")
+    return name[:120] or "analise"
+
+def _unique_docx_names(names: Sequence[str]) -> List[str]:
+    """Nomes .docx seguros e sem repetição (sufixo _2, _3... para duplicados)."""
+    used, result = set(), []
+    for name in names:
+        base = _safe_filename(name[:-len(".docx")] if name.lower().endswith(".docx") else name)
+        candidate, counter = base, 1
+        while candidate.lower() in used:
+            counter += 1
+            candidate = f"{base}_{counter}"
+        used.add(candidate.lower())
+        result.append(f"{candidate}.docx")
+    return result
+
+_worker_exporter = None
+
+def _render_docx_worker(fields: Dict[str, Any], template_path: Optional[str]) -> Tuple[Optional[bytes], List[str]]:
+    """Gera um DOCX em memória (executado nos processos do pool). Retorna (conteúdo ou None, chaves ausentes)."""
+    global _worker_exporter
+    from src.core.doc_generator import DocxExporter
+    from src.core.prompts import formatted_initial_analysis
+    if _worker_exporter is None:
+        _worker_exporter = DocxExporter()
+
+    data = formatted_initial_analysis.model_construct(**fields)
+    buffer = BytesIO()
+    if template_path:
+        success, missing = _worker_exporter.export_from_template_docx(data, template_path, buffer)
+    else:
+        success, missing = _worker_exporter.export_simple_docx(data, buffer), []
+    return (buffer.getvalue() if success else None), missing
+
+def export_bulk_docx(analyses: Sequence[Tuple[str, Any]], zip_path: Union[str, Any],
+                     template_path: Optional[str] = None, max_workers: int = BULK_EXPORT_MAX_WORKERS,
+                     progress_callback: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+    """
+    Gera um DOCX por análise e os grava, conforme ficam prontos, em um arquivo ZIP.
+
+    Args:
+        analyses (Sequence[Tuple[str, Any]]): Pares (nome do arquivo, análise), em que a análise é um
+                                              `formatted_initial_analysis` ou um dict com seus campos.
+        zip_path (Union[str, Any]): Caminho (ou stream binário) do ZIP de saída.
+        template_path (Optional[str]): Template DOCX; se None, usa a exportação simples (tabela).
+        max_workers (int): Processos do pool (1 = geração no próprio processo, sem pool).
+        progress_callback (Optional[ProgressCallback]): Chamado com (concluídos, total) a cada documento.
+
+    Returns:
+        Dict[str, Any]: 'total', 'exported', 'failed' (nomes), 'missing_keys' ({nome: chaves ausentes no template})
+                        e 'elapsed_seconds'.
+    """
+    start = perf_counter()
+    names = _unique_docx_names([name for name, _ in analyses])
+    jobs = []
+    for (_, analysis), name in zip(analyses, names):
+        fields = analysis.model_dump() if hasattr(analysis, "model_dump") else dict(analysis)
+        fields.pop("nome_arquivo", None)
+        jobs.append((name, fields))
+
+    total = len(jobs)
+    result = {"total": total, "exported": 0, "failed": [], "missing_keys": {}, "elapsed_seconds": 0.0}
+
+    def _store(archive: zipfile.ZipFile, name: str, outcome: Optional[Tuple[Optional[bytes], List[str]]]):
+        content, missing = outcome if outcome is not None else (None, [])
+        if content is None:
+            result["failed"].append(name)
+        else:
+            archive.writestr(name, content)
+            result["exported"] += 1
+            if missing:
+                result["missing_keys"][name] = missing
+        if progress_callback is not None:
+            try:
+                progress_callback(result["exported"] + len(result["failed"]), total)
+            except Exception as e:
+                logger.debug(f"Falha no callback de progresso da exportação em lote: {e}")
+
+    with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        if max_workers <= 1 or total <= 1:
+            for name, fields in jobs:
+                try:
+                    outcome = _render_docx_worker(fields, template_path)
+                except Exception as e:
+                    logger.error(f"Exportação em lote: falha ao gerar '{name}': {e}", exc_info=True)
+                    outcome = None
+                _store(archive, name, outcome)
+        else:
+            with ProcessPoolExecutor(max_workers=min(max_workers, total)) as executor:
+                pending_jobs = iter(jobs)
+                in_flight = {}
+                max_in_flight = 2 * max_workers # Limita os documentos prontos/pendentes mantidos em memória
+                while True:
+                    for name, fields in pending_jobs:
+                        in_flight[executor.submit(_render_docx_worker, fields, template_path)] = name
+                        if len(in_flight) >= max_in_flight:
+                            break
+                    if not in_flight:
+                        break
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        name = in_flight.pop(future)
+                        try:
+                            outcome = future.result()
+                        except Exception as e:
+                            logger.error(f"Exportação em lote: falha ao gerar '{name}': {e}", exc_info=True)
+                            outcome = None
+                        _store(archive, name, outcome)
+
+    result["elapsed_seconds"] = perf_counter() - start
+    logger.info(f"Exportação em lote: {result['exported']}/{total} DOCX em {result['elapsed_seconds']:.2f}s "
+                f"({len(result['failed'])} falha(s)).")
+    return result
+
+def load_analyses_json(path: str) -> List[Tuple[str, Dict[str, Any]]]:
+    """Lê o JSON de entrada do modo sem interface (lista de análises ou {nome_arquivo: análise})."""
+    import json
+    with open(path, "r", encoding="utf-8") as f:
+        content = json.load(f)
+    if isinstance(content, dict):
+        return [(name, fields) for name, fields in content.items()]
+    return [(item.get("nome_arquivo") or f"analise_{i + 1:03d}", item) for i, item in enumerate(content)]
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    import argparse
+    parser = argparse.ArgumentParser(description="Exportação em lote de análises para DOCX (ZIP).")
+    parser.add_argument("entrada", help="JSON com as análises.")
+    parser.add_argument("saida", help="Arquivo ZIP de saída.")
+    parser.add_argument("--template", default=None, help="Template DOCX (padrão: exportação simples em tabela).")
+    parser.add_argument("--workers", type=int, default=BULK_EXPORT_MAX_WORKERS, help="Processos do pool.")
+    args = parser.parse_args(argv)
+
+    analyses = load_analyses_json(args.entrada)
+    result = export_bulk_docx(analyses, args.saida, template_path=args.template, max_workers=args.workers,
+                              progress_callback=lambda done, total: print(f"\r{done}/{total}", end="", flush=True))
+    print(f"\n{result['exported']}/{result['total']} documentos exportados para {args.saida} em {result['elapsed_seconds']:.2f}s.")
+    for name in result["failed"]:
+        print(f"Falha: {name}")
+    return 0 if not result["failed"] else 1
+
+execution_time = perf_counter() - start_time
+logger.debug(f"Carregado BULK_EXPORT em {execution_time:.4f}s")
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
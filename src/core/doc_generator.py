@@ -8,12 +8,130 @@ start_time = perf_counter()
 logger.debug(f"{start_time:.4f}s - Iniciando doc_generator.py")
 
 import os
-from typing import List, Tuple, Any
+import re
+import threading
+from bisect import bisect_right
+from io import BytesIO
+from typing import List, Tuple, Any, Dict, Set, Union, IO
 from docx import Document
 
 from src.core.prompts import formatted_initial_analysis # Para type hinting e acesso aos campos
 from src.settings import ASSETS_DIR, TEMPLATES_DOCX_SUBDIR # Para acessar a pasta de assets
 
+# Placeholders a serem substituídos (devem corresponder aos campos de FormatAnaliseInicial)
+# Exclui as justificativas e campos que podem não fazer sentido em todos os templates
+TEMPLATE_FIELDS = [
+    "tipo_documento_origem", "orgao_origem", "uf_origem", "municipio_origem",
+    "tipo_local", "uf_fato", "municipio_fato", "valor_apuracao",
+    "area_atribuicao", "tipificacao_penal", "tipo_a_autuar", "assunto_re", "destinacao",
+    "descricao_geral", "resumo_fato", "pessoas_envolvidas", "linha_do_tempo", "observacoes"
+]
+PLACEHOLDER_RE = re.compile("<(" + "|".join(map(re.escape, TEMPLATE_FIELDS)) + ")>") # Formato: <nome_do_campo>
+
+def _format_template_value(field_name: str, value: Any) -> str:
+    """Formata o valor de um campo para inserção no template."""
+    if isinstance(value, list):
+        return "\n".join(map(str, value)) if value else "" # Lista de itens, um por linha
+    if isinstance(value, float) and field_name == "valor_apuracao":
+        return f"R$ {value:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+    return str(value) if value is not None else ""
+
+def _iter_template_paragraphs(document: Any) -> List[Any]:
+    """
+    Parágrafos do corpo e das células de tabelas, em ordem estável e sem repetição
+    (células mescladas aparecem várias vezes em `row.cells`).
+    """
+    paragraphs, seen = [], set()
+    candidates = list(document.paragraphs)
+    for table in document.tables:
+        for row in table.rows:
+            for cell in row.cells:
+                candidates.extend(cell.paragraphs)
+    for paragraph in candidates:
+        if paragraph._p not in seen:
+            seen.add(paragraph._p)
+            paragraphs.append(paragraph)
+    return paragraphs
+
+class CompiledDocxTemplate:
+    """
+    Template DOCX analisado uma única vez: guarda o conteúdo do arquivo e a posição exata
+    (índice do parágrafo, run/deslocamento inicial e final) de cada placeholder, inclusive os
+    divididos entre vários runs e os que ficam em células de tabelas.
+
+    Args:
+        template_path (str): Caminho do arquivo .docx do template.
+    """
+    def __init__(self, template_path: str):
+        with open(template_path, "rb") as f:
+            self._content = f.read()
+        # {índice do parágrafo: [(campo, run inicial, deslocamento inicial, run final, deslocamento final), ...]}
+        self.spans: Dict[int, List[Tuple[str, int, int, int, int]]] = {}
+        self.fields: Set[str] = set()
+
+        document = Document(BytesIO(self._content))
+        for paragraph_index, paragraph in enumerate(_iter_template_paragraphs(document)):
+            run_texts = [run.text for run in paragraph.runs]
+            full_text = "".join(run_texts)
+            if "<" not in full_text:
+                continue
+            run_starts, position = [], 0
+            for text in run_texts:
+                run_starts.append(position)
+                position += len(text)
+            for match in PLACEHOLDER_RE.finditer(full_text):
+                start_run = bisect_right(run_starts, match.start()) - 1
+                end_run = bisect_right(run_starts, match.end() - 1) - 1
+                self.spans.setdefault(paragraph_index, []).append(
+                    (match.group(1), start_run, match.start() - run_starts[start_run],
+                     end_run, match.end() - run_starts[end_run]))
+                self.fields.add(match.group(1))
+
+    def render(self, replacements: Dict[str, str]) -> Any:
+        """
+        Retorna um novo Document com os placeholders substituídos (uma passada pelos parágrafos indexados).
+        Campos sem valor em `replacements` permanecem como placeholder. O texto inserido herda a formatação
+        do run em que o placeholder começa.
+        """
+        document = Document(BytesIO(self._content))
+        paragraphs = _iter_template_paragraphs(document)
+        for paragraph_index, spans in self.spans.items():
+            runs = paragraphs[paragraph_index].runs
+            # Da direita para a esquerda, para que os deslocamentos ainda não aplicados continuem válidos
+            for field_name, start_run, start_offset, end_run, end_offset in reversed(spans):
+                if field_name not in replacements:
+                    continue
+                value = replacements[field_name]
+                if start_run == end_run:
+                    text = runs[start_run].text
+                    runs[start_run].text = text[:start_offset] + value + text[end_offset:]
+                    continue
+                runs[end_run].text = runs[end_run].text[end_offset:]
+                for run in runs[start_run + 1:end_run]:
+                    run.text = ""
+                runs[start_run].text = runs[start_run].text[:start_offset] + value
+        return document
+
+_compiled_templates: Dict[str, Tuple[Tuple[float, int], CompiledDocxTemplate]] = {}
+_compiled_templates_lock = threading.Lock()
+
+def get_compiled_template(template_path: str) -> CompiledDocxTemplate:
+    """Template compilado em cache, recompilado quando o arquivo muda (mtime/tamanho)."""
+    stat = os.stat(template_path)
+    signature = (stat.st_mtime, stat.st_size)
+    key = os.path.abspath(template_path)
+    with _compiled_templates_lock:
+        cached = _compiled_templates.get(key)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+    start = perf_counter()
+    compiled = CompiledDocxTemplate(template_path)
+    with _compiled_templates_lock:
+        _compiled_templates[key] = (signature, compiled)
+    logger.debug(f"Template '{os.path.basename(template_path)}' compilado em {perf_counter() - start:.4f}s "
+                 f"({sum(len(spans) for spans in compiled.spans.values())} placeholders).")
+    return compiled
+
 class DocxExporter:
     """
     Classe responsável por exportar dados de análise para documentos DOCX,
@@ -51,13 +169,13 @@ class DocxExporter:
         }
         return name_map.get(field_name, field_name.replace("_", " ").title())
 
-    def export_simple_docx(self, data: formatted_initial_analysis, output_path: str) -> bool:
+    def export_simple_docx(self, data: formatted_initial_analysis, output_path: Union[str, IO[bytes]]) -> bool:
         """
         Exporta os dados da análise (objeto FormatAnaliseInicial) para uma tabela em um arquivo DOCX.
 
         Args:
             data (FormatAnaliseInicial): O objeto contendo os dados da análise.
-            output_path (str): O caminho completo onde o arquivo .docx será salvo.
+            output_path (Union[str, IO[bytes]]): O caminho completo (ou stream binário) onde o arquivo .docx será salvo.
 
         Returns:
             bool: True se a exportação for bem-sucedida, False caso contrário.
@@ -151,14 +269,15 @@ class DocxExporter:
         logger.debug(f"Encontrados {len(templates)} templates em '{self.templates_dir}'.")
         return templates
 
-    def export_from_template_docx(self, data: formatted_initial_analysis, template_path: str, output_path: str) -> Tuple[bool, List[str]]:
+    def export_from_template_docx(self, data: formatted_initial_analysis, template_path: str, output_path: Union[str, IO[bytes]]) -> Tuple[bool, List[str]]:
         """
         Cria um novo DOCX a partir de um template, substituindo placeholders pelos dados da análise.
+        O template é compilado uma única vez (ver `get_compiled_template`) e preenchido em uma só passada.
 
         Args:
             data (FormatAnaliseInicial): O objeto contendo os dados da análise.
             template_path (str): Caminho para o arquivo .docx do template.
-            output_path (str): Caminho completo onde o arquivo .docx final será salvo.
+            output_path (Union[str, IO[bytes]]): Caminho completo (ou stream binário) onde o arquivo .docx final será salvo.
 
         Returns:
             Tuple[bool, List[str]]: (True se sucesso False caso contrário, Lista de chaves não encontradas no template mas com valor nos dados)
@@ -170,121 +289,25 @@ class DocxExporter:
                 logger.error(f"Template '{template_path}' não encontrado.")
                 return False, ["Template não encontrado"]
 
-            # Copia o template para o local de saída para não modificar o original
-            # shutil.copyfile(template_path, output_path) # Cuidado, Docx não gosta de abrir um arquivo que ele está editando
-            document = Document(template_path) # Abre o template diretamente
+            compiled = get_compiled_template(template_path)
 
-            # Placeholders a serem substituídos (devem corresponder aos campos de FormatAnaliseInicial)
-            # Exclui as justificativas e campos que podem não fazer sentido em todos os templates
-            fields_to_replace = [
-                "tipo_documento_origem", "orgao_origem", "uf_origem", "municipio_origem",
-                "tipo_local", "uf_fato", "municipio_fato", "valor_apuracao",
-                "area_atribuicao", "tipificacao_penal", "tipo_a_autuar", "assunto_re", "destinacao",
-                "descricao_geral", "resumo_fato", "pessoas_envolvidas", "linha_do_tempo", "observacoes"
-            ]
-
-            placeholders_found_in_template = set()
-
-            def replace_text_in_element(paragraph: Any, field_name: str, value: Any):
-                """
-                Substitui um placeholder em um parágrafo por um valor dado.
-                Lida com placeholders que podem estar divididos entre múltiplos 'runs'.
-
-                Args:
-                    paragraph (Any): O objeto parágrafo do docx.
-                    field_name (str): O nome do campo correspondente ao placeholder.
-                    value (Any): O valor a ser inserido no lugar do placeholder.
-                """
-                placeholder = f"<{field_name}>" # Formato do placeholder: <nome_do_campo>
-                placeholder_found = False
-                inline = paragraph.runs
-                
-                # Primeira tentativa: substituição direta em runs individuais
-                for line in range(len(inline)):
-                    if inline[line].text != '' and placeholder in inline[line].text:
-                        placeholders_found_in_template.add(placeholder[1:-1])
-                        inline[line].text = inline[line].text.replace(placeholder, str(value))
-                        placeholder_found = True
-                
-                # Se não encontrou o placeholder em runs individuais
-                if not placeholder_found:
-                    # Tenta encontrar placeholders que atravessam múltiplos runs
-                    # Encontra os runs que contêm partes do placeholder
-                    current_text = ''
-                    start_run_index = -1
-                    last_run_index = -1
-                    
-                    # Percorre todos os runs para encontrar o placeholder completo
-                    for run_index, run in enumerate(inline):
-                        current_text += run.text
-                        
-                        # Verifica se o placeholder foi completamente encontrado
-                        if placeholder in current_text:
-                            placeholders_found_in_template.add(placeholder[1:-1])
-                            last_run_index = run_index
-                            
-                            # Encontra o primeiro run do placeholder
-                            temp_text = ''
-                            for i in range(run_index, -1, -1):
-                                temp_text = inline[i].text + temp_text
-                                if placeholder in temp_text:
-                                    start_run_index = i
-                                    break
-                            
-                            # Preserva formatação do primeiro run
-                            first_run = inline[start_run_index]
-                            
-                            # Calcula o texto total dos runs do placeholder
-                            total_text = ''.join(r.text for r in inline[start_run_index:last_run_index+1])
-                            total_text = total_text.replace(placeholder, str(value))
-                            
-                            # Remove runs extras
-                            for extra_run in inline[start_run_index+1:last_run_index+1]:
-                                extra_run.text = ''
-                            
-                            # Substitui no primeiro run
-                            first_run.text = total_text
-                            
-                            placeholder_found = True
-                            break
-                        
-                        if placeholder_found:
-                            break
-
-            for field_name in fields_to_replace:
+            replacements = {}
+            for field_name in TEMPLATE_FIELDS:
                 if hasattr(data, field_name):
-                    value = getattr(data, field_name)
-                    
-                    # Formata o valor para string
-                    if isinstance(value, list):
-                        replacement = "\n".join(map(str, value)) if value else "" # Lista de itens, um por linha
-                    elif isinstance(value, float) and field_name == "valor_apuracao":
-                        replacement = f"R$ {value:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".") if value is not None else ""
-                    else:
-                        replacement = str(value) if value is not None else ""
-
-                    # Substitui em todos os parágrafos
-                    for paragraph in document.paragraphs:
-                        replace_text_in_element(paragraph, field_name, replacement)
-
-                    # Substitui em todas as tabelas
-                    for table in document.tables:
-                        for row in table.rows:
-                            for cell in row.cells:
-                                for paragraph in cell.paragraphs:
-                                    replace_text_in_element(paragraph, field_name, replacement)
-            
+                    replacements[field_name] = _format_template_value(field_name, getattr(data, field_name))
+
+            document = compiled.render(replacements)
+
             # Verifica por placeholders não encontrados no template mas com valor nos dados
-            for field_name in fields_to_replace:
+            for field_name in TEMPLATE_FIELDS:
                 value = getattr(data, field_name, None)
-                if value and field_name not in placeholders_found_in_template:
+                if value and field_name not in compiled.fields:
                     # Verifica se o valor não é apenas uma lista vazia ou string vazia
                     if isinstance(value, list) and not any(value): continue
                     if isinstance(value, str) and not value.strip(): continue
                     
                     missing_keys_with_values.append(self._get_field_display_name(field_name))
 
-
             document.save(output_path)
             logger.info(f"DOCX a partir de template salvo com sucesso em: {output_path}")
             if missing_keys_with_values:
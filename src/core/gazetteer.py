@@ -0,0 +1,149 @@
+# src/core/gazetteer.py
+"""
+Índice geográfico (UFs, municípios e circunscrições da PF/SP) pré-computado para o pós-processamento.
+
+`normalizing_function` e `review_function` resolvem UFs e municípios a cada análise. Antes, cada
+consulta normalizava (unidecode + minúsculas) todos os candidatos da lista e percorria as listas de
+circunscrições linearmente. Aqui o `dict_municipios.json` é carregado uma única vez e as chaves
+normalizadas, o mapa de UFs e o índice reverso município → circunscrição ficam prontos em dicionários
+(consulta O(1)). Um índice de trigramas por UF permite corrigir pequenas variações de grafia da LLM
+("Sao Jose dos Campo") consultando apenas os municípios que compartilham trigramas com o nome buscado.
+"""
+import logging
+logger = logging.getLogger(__name__)
+
+from time import perf_counter
+start_time = perf_counter()
+logger.debug(f"{start_time:.4f}s - Iniciando gazetteer.py")
+
+import re
+import threading
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, Optional, Set
+
+from src.settings import GAZETTEER_FUZZY_MIN_SIMILARITY
+
+NOMES_UF = {
+    "AC": "Acre", "AL": "Alagoas", "AP": "Amapá", "AM": "Amazonas", "BA": "Bahia", "CE": "Ceará",
+    "DF": "Distrito Federal", "ES": "Espírito Santo", "GO": "Goiás", "MA": "Maranhão", "MT": "Mato Grosso",
+    "MS": "Mato Grosso do Sul", "MG": "Minas Gerais", "PA": "Pará", "PB": "Paraíba", "PR": "Paraná",
+    "PE": "Pernambuco", "PI": "Piauí", "RJ": "Rio de Janeiro", "RN": "Rio Grande do Norte",
+    "RS": "Rio Grande do Sul", "RO": "Rondônia", "RR": "Roraima", "SC": "Santa Catarina",
+    "SP": "São Paulo", "SE": "Sergipe", "TO": "Tocantins",
+}
+
+@lru_cache(maxsize=16384)
+def normalizar_nome(texto: str) -> str:
+    """Chave de comparação de nomes: sem acentos, minúsculas e espaços colapsados."""
+    from unidecode import unidecode
+    return re.sub(r'\s+', ' ', unidecode(texto).lower()).strip()
+
+def trigramas(nome_normalizado: str) -> Set[str]:
+    """Trigramas do nome normalizado (com bordas, como no pg_trgm)."""
+    padded = f"  {nome_normalizado} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+@lru_cache(maxsize=1)
+def _mapa_ufs() -> Dict[str, str]:
+    mapa = {normalizar_nome(nome): sigla for sigla, nome in NOMES_UF.items()}
+    mapa.update({sigla.lower(): sigla for sigla in NOMES_UF})
+    return mapa
+
+def sigla_uf(nome_estado_ou_sigla: Optional[str]) -> Optional[str]:
+    """Sigla da UF a partir do nome do estado ou da própria sigla (None se não reconhecida)."""
+    if not nome_estado_ou_sigla or not isinstance(nome_estado_ou_sigla, str):
+        return None
+    return _mapa_ufs().get(normalizar_nome(nome_estado_ou_sigla))
+
+class Gazetteer:
+    """
+    Índices de consulta sobre os municípios por UF e as circunscrições das unidades da PF.
+
+    Args:
+        municipios_por_uf (Dict[str, List[str]]): Municípios de cada UF (grafia canônica, ex.: dict_municipios.json).
+        circunscricoes (Optional[Dict[str, List[str]]]): Municípios de cada unidade; em caso de repetição,
+                                                        vale a primeira unidade (mesma ordem da busca linear).
+        min_similarity (float): Similaridade mínima (Jaccard de trigramas) da correspondência aproximada.
+    """
+    def __init__(self, municipios_por_uf: Dict[str, List[str]], circunscricoes: Optional[Dict[str, List[str]]] = None,
+                 min_similarity: float = GAZETTEER_FUZZY_MIN_SIMILARITY):
+        self.min_similarity = min_similarity
+        self._municipios: Dict[str, Dict[str, str]] = {}      # UF -> {nome normalizado: nome canônico}
+        self._nomes: Dict[str, List[str]] = {}                # UF -> nomes normalizados (posição = id no índice)
+        self._trigramas: Dict[str, List[Set[str]]] = {}       # UF -> trigramas de cada nome
+        self._indice_trigramas: Dict[str, Dict[str, List[int]]] = {}  # UF -> {trigrama: ids dos nomes}
+        for uf, municipios in (municipios_por_uf or {}).items():
+            canonicos: Dict[str, str] = {}
+            for municipio in municipios:
+                canonicos.setdefault(normalizar_nome(municipio), municipio)
+            nomes = list(canonicos)
+            indice: Dict[str, List[int]] = {}
+            grams = [trigramas(nome) for nome in nomes]
+            for i, gram_set in enumerate(grams):
+                for gram in gram_set:
+                    indice.setdefault(gram, []).append(i)
+            self._municipios[uf] = canonicos
+            self._nomes[uf] = nomes
+            self._trigramas[uf] = grams
+            self._indice_trigramas[uf] = indice
+
+        self._circunscricao: Dict[str, str] = {}
+        for unidade, municipios in (circunscricoes or {}).items():
+            for municipio in municipios:
+                self._circunscricao.setdefault(normalizar_nome(municipio), unidade)
+
+    def municipio(self, nome: Optional[str], uf: Optional[str], fuzzy: bool = True) -> Optional[str]:
+        """
+        Grafia canônica do município na UF: correspondência exata (sem acentos/caixa) e, se não houver
+        e `fuzzy` for True, a mais semelhante por trigramas acima de `min_similarity` (None se ambígua).
+        """
+        if not nome or not isinstance(nome, str) or uf not in self._municipios:
+            return None
+        normalizado = normalizar_nome(nome)
+        exato = self._municipios[uf].get(normalizado)
+        if exato is not None or not fuzzy:
+            return exato
+
+        consulta = trigramas(normalizado)
+        comuns: Counter = Counter()
+        indice = self._indice_trigramas[uf]
+        for gram in consulta:
+            comuns.update(indice.get(gram, ()))
+        melhor_id, melhor_score, empate = None, 0.0, False
+        for i, n_comuns in comuns.items():
+            score = n_comuns / (len(consulta) + len(self._trigramas[uf][i]) - n_comuns)
+            if score > melhor_score:
+                melhor_id, melhor_score, empate = i, score, False
+            elif score == melhor_score:
+                empate = True
+        if melhor_id is None or empate or melhor_score < self.min_similarity:
+            return None
+        canonico = self._municipios[uf][self._nomes[uf][melhor_id]]
+        logger.debug(f"Município '{nome}' ({uf}) aproximado para '{canonico}' (similaridade {melhor_score:.2f}).")
+        return canonico
+
+    def circunscricao(self, municipio: Optional[str]) -> Optional[str]:
+        """Unidade da PF cuja circunscrição inclui o município (None se não houver)."""
+        if not municipio or not isinstance(municipio, str):
+            return None
+        return self._circunscricao.get(normalizar_nome(municipio))
+
+_gazetteer: Optional[Gazetteer] = None
+_gazetteer_lock = threading.Lock()
+
+def get_gazetteer() -> Gazetteer:
+    """Índice global, construído uma única vez a partir de dict_municipios.json e de dict_circunscrições."""
+    global _gazetteer
+    if _gazetteer is None:
+        with _gazetteer_lock:
+            if _gazetteer is None:
+                start = perf_counter()
+                from src.utils import get_municipios_por_uf_cached
+                from src.core.prompts import dict_circunscrições
+                _gazetteer = Gazetteer(get_municipios_por_uf_cached(), dict_circunscrições)
+                logger.debug(f"Índice geográfico construído em {perf_counter() - start:.4f}s.")
+    return _gazetteer
+
+execution_time = perf_counter() - start_time
+logger.debug(f"Carregado GAZETTEER em {execution_time:.4f}s")
@@ -0,0 +1,126 @@
+# src/core/llm_clients.py
+"""
+Registro thread-safe de clientes OpenAI de longa duração.
+
+Cada cliente é identificado por (provedor, impressão digital da chave API, URL base, proxy, verificação SSL)
+e recebe a chave explicitamente, sem gravá-la em variáveis de ambiente do processo: sessões simultâneas
+de usuários diferentes nunca compartilham chave. Os clientes reutilizam um pool de conexões httpx
+keep-alive por (proxy, verificação SSL), evitando novos handshakes TCP/TLS a cada análise.
+"""
+import logging
+logger = logging.getLogger(__name__)
+
+from time import perf_counter
+start_time = perf_counter()
+logger.debug(f"{start_time:.4f}s - Iniciando llm_clients.py")
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import httpx
+from openai import OpenAI, DefaultHttpxClient
+
+from src.utils import current_proxy_settings, key_fingerprint
+from src.settings import (LLM_HTTP_MAX_CONNECTIONS, LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS, LLM_HTTP_KEEPALIVE_EXPIRY_SECONDS,
+                          LLM_HTTP_CONNECT_TIMEOUT_SECONDS, LLM_CLIENT_REGISTRY_MAX_CLIENTS)
+
+class OpenAIClientRegistry:
+    """
+    Mantém clientes OpenAI (e os pools httpx subjacentes) reutilizáveis entre threads e análises.
+
+    Args:
+        max_clients (int): Máximo de clientes mantidos; os menos usados recentemente são descartados
+                           do registro (sem fechar o pool, que pode estar em uso por outra thread).
+    """
+    def __init__(self, max_clients: int = LLM_CLIENT_REGISTRY_MAX_CLIENTS):
+        self.max_clients = max(1, max_clients)
+        self._lock = threading.Lock()
+        self._clients: "OrderedDict[Tuple, OpenAI]" = OrderedDict()
+        self._http_clients: Dict[Tuple[str, bool], httpx.Client] = {}
+
+    def get_http_client(self, proxy_url: Optional[str] = None, verify_ssl: bool = True) -> httpx.Client:
+        """Retorna o pool httpx compartilhado para a combinação (proxy, verificação SSL)."""
+        pool_key = (key_fingerprint(proxy_url) if proxy_url else "", verify_ssl)
+        with self._lock:
+            http_client = self._http_clients.get(pool_key)
+            if http_client is None or http_client.is_closed:
+                http_client = DefaultHttpxClient(
+                    limits=httpx.Limits(max_connections=LLM_HTTP_MAX_CONNECTIONS,
+                                        max_keepalive_connections=LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                                        keepalive_expiry=LLM_HTTP_KEEPALIVE_EXPIRY_SECONDS),
+                    timeout=httpx.Timeout(600.0, connect=LLM_HTTP_CONNECT_TIMEOUT_SECONDS),
+                    proxy=proxy_url,
+                    verify=verify_ssl,
+                    trust_env=False, # Proxy/SSL explícitos: mudanças posteriores no ambiente não afetam o pool
+                )
+                self._http_clients[pool_key] = http_client
+                logger.debug(f"Novo pool HTTP para LLM (proxy={'sim' if proxy_url else 'não'}, verify_ssl={verify_ssl}).")
+            return http_client
+
+    def get_client(self, api_key: str, provider: str = "openai", base_url: Optional[str] = None,
+                   proxy_url: Optional[str] = None, verify_ssl: bool = True) -> OpenAI:
+        """
+        Retorna o cliente OpenAI registrado para a combinação informada, criando-o se necessário.
+
+        Args:
+            api_key (str): Chave API (usada apenas no cliente; nunca gravada no ambiente).
+            provider (str): Provedor (compõe a chave do registro).
+            base_url (Optional[str]): URL base da API (None = padrão do SDK).
+            proxy_url (Optional[str]): Proxy HTTP(S) explícito.
+            verify_ssl (bool): Verificação do certificado SSL.
+
+        Returns:
+            OpenAI: Cliente pronto para uso concorrente.
+        """
+        if not api_key:
+            raise ValueError("Chave API não informada para o cliente OpenAI.")
+        registry_key = (provider, key_fingerprint(api_key), base_url or "",
+                        key_fingerprint(proxy_url) if proxy_url else "", verify_ssl)
+        with self._lock:
+            client = self._clients.get(registry_key)
+            if client is not None:
+                self._clients.move_to_end(registry_key)
+                return client
+        http_client = self.get_http_client(proxy_url, verify_ssl)
+        with self._lock:
+            client = self._clients.get(registry_key)
+            if client is None:
+                client = OpenAI(api_key=api_key, base_url=base_url, http_client=http_client)
+                self._clients[registry_key] = client
+                logger.debug(f"Novo cliente OpenAI no registro (provedor={provider}, chave={registry_key[1]}).")
+                while len(self._clients) > self.max_clients:
+                    self._clients.popitem(last=False)
+            self._clients.move_to_end(registry_key)
+            return client
+
+    def clear(self, close: bool = False):
+        """Esvazia o registro (ex.: logout); com close=True fecha também os pools HTTP."""
+        with self._lock:
+            http_clients = list(self._http_clients.values())
+            self._clients.clear()
+            self._http_clients.clear()
+        if close:
+            for http_client in http_clients:
+                try:
+                    http_client.close()
+                except Exception as e:
+                    logger.debug(f"Falha ao fechar pool HTTP da LLM: {e}")
+
+_registry = OpenAIClientRegistry()
+
+def get_openai_client(api_key: str, provider: str = "openai", base_url: Optional[str] = None) -> OpenAI:
+    """Cliente do registro global para a chave e a configuração de proxy/SSL correntes."""
+    proxy_url, verify_ssl = current_proxy_settings()
+    return _registry.get_client(api_key, provider=provider, base_url=base_url, proxy_url=proxy_url, verify_ssl=verify_ssl)
+
+def get_llm_http_client() -> httpx.Client:
+    """Pool httpx do registro global para a configuração de proxy/SSL corrente (ex.: ChatOpenAI)."""
+    proxy_url, verify_ssl = current_proxy_settings()
+    return _registry.get_http_client(proxy_url, verify_ssl)
+
+def clear_openai_clients(close: bool = False):
+    _registry.clear(close=close)
+
+execution_time = perf_counter() - start_time
+logger.debug(f"Carregado LLM_CLIENTS em {execution_time:.4f}s")
@@ -0,0 +1,321 @@
+# src/core/llm_resilience.py
+"""
+Camada de resiliência para as chamadas à LLM (provedores 'openai' e 'lang_chain_openai').
+
+`ResilientLLMCaller.call(fn)` executa `fn(timeout)`, em que `fn` faz UMA requisição respeitando o
+timeout recebido, e aplica:
+- prazo (deadline) por chamada lógica, incluindo todas as novas tentativas;
+- novas tentativas com backoff exponencial e jitter ("full jitter") apenas em erros transitórios
+  (timeout, conexão, 429 e 5xx), respeitando o cabeçalho Retry-After quando presente;
+- circuit breaker por provedor/modelo: após falhas transitórias consecutivas, as chamadas falham
+  imediatamente (`CircuitOpenError`) até o fim do período de espera;
+- hedging opcional: se a requisição passar da latência p95 já observada, uma cópia é disparada e
+  vence a primeira resposta válida.
+
+Tentativas, novas tentativas e hedges ficam em `caller.stats` e são anexados ao token_usage_info.
+"""
+import logging
+logger = logging.getLogger(__name__)
+
+from time import perf_counter
+start_time = perf_counter()
+logger.debug(f"{start_time:.4f}s - Iniciando llm_resilience.py")
+
+import contextvars
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, Optional
+
+from src.settings import (LLM_CALL_DEADLINE_SECONDS, LLM_ATTEMPT_TIMEOUT_SECONDS, LLM_RETRY_MAX_ATTEMPTS,
+                          LLM_RETRY_BASE_DELAY_SECONDS, LLM_RETRY_MAX_DELAY_SECONDS,
+                          LLM_CIRCUIT_FAILURE_THRESHOLD, LLM_CIRCUIT_RESET_SECONDS,
+                          LLM_HEDGING_ENABLED, LLM_HEDGING_PERCENTILE, LLM_HEDGING_MIN_SAMPLES)
+
+class CircuitOpenError(Exception):
+    """Chamada recusada porque o circuito do provedor/modelo está aberto."""
+
+class LLMDeadlineExceededError(TimeoutError):
+    """O prazo total da chamada lógica (incluindo novas tentativas) se esgotou."""
+
+def is_retryable_error(exc: BaseException) -> bool:
+    """
+    Indica se o erro é transitório: timeout, falha de conexão, 429 (rate limit) ou 5xx.
+    Erros de autenticação, requisição inválida etc. não são repetidos.
+    """
+    if isinstance(exc, (TimeoutError, FutureTimeoutError, ConnectionError)):
+        return True
+    try:
+        import openai
+    except ImportError: # pragma: no cover - openai é dependência obrigatória
+        return False
+    if isinstance(exc, (openai.APITimeoutError, openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)):
+        return True
+    status_code = getattr(exc, "status_code", None)
+    return isinstance(status_code, int) and (status_code == 429 or status_code >= 500)
+
+def _retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """Lê 'retry-after-ms' / 'retry-after' (em segundos) da resposta HTTP do erro, se houver."""
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000.0
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        pass
+    return None
+
+def compute_backoff(attempt: int, base_delay: float, max_delay: float, rng: Optional[random.Random] = None) -> float:
+    """Backoff exponencial com 'full jitter': uniforme em [0, min(max_delay, base_delay * 2^(attempt-1))]."""
+    cap = min(max_delay, base_delay * (2 ** max(0, attempt - 1)))
+    return (rng or random).uniform(0.0, cap)
+
+class CircuitBreaker:
+    """
+    Circuit breaker simples (fechado -> aberto -> meio-aberto).
+
+    Aberto após `failure_threshold` falhas transitórias consecutivas; decorrido `reset_seconds`,
+    deixa passar uma requisição de teste (meio-aberto), que fecha o circuito em caso de sucesso
+    ou o reabre em caso de falha.
+    """
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = LLM_CIRCUIT_FAILURE_THRESHOLD,
+                 reset_seconds: float = LLM_CIRCUIT_RESET_SECONDS, clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_seconds:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_seconds:
+                self._state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self._state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info(f"Circuit breaker '{self.name}' fechado após requisição bem-sucedida.")
+            self._state = self.CLOSED
+            self._consecutive_failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._consecutive_failures += 1
+            if self._state == self.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    logger.warning(f"Circuit breaker '{self.name}' ABERTO após {self._consecutive_failures} falha(s) consecutiva(s). "
+                                   f"Novas chamadas serão recusadas por {self.reset_seconds:.0f}s.")
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+                self._probe_in_flight = False
+
+class LatencyTracker:
+    """Janela das latências recentes (s) de requisições bem-sucedidas, para o limiar do hedging."""
+    def __init__(self, maxlen: int = 200):
+        self._samples = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def add(self, latency_s: float):
+        with self._lock:
+            self._samples.append(latency_s)
+
+    def percentile(self, p: float, min_samples: int = 1) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples or len(samples) < min_samples:
+            return None
+        index = min(len(samples) - 1, max(0, int(round(p * len(samples))) - 1))
+        return samples[index]
+
+# Estado compartilhado pelo processo (breakers e latências sobrevivem entre análises)
+_registry_lock = threading.Lock()
+_circuit_breakers: Dict[str, CircuitBreaker] = {}
+_latency_trackers: Dict[str, LatencyTracker] = {}
+
+def get_circuit_breaker(provider: str, model_name: Optional[str]) -> CircuitBreaker:
+    key = f"{provider}/{model_name}"
+    with _registry_lock:
+        if key not in _circuit_breakers:
+            _circuit_breakers[key] = CircuitBreaker(key)
+        return _circuit_breakers[key]
+
+def get_latency_tracker(provider: str, model_name: Optional[str], label: str = "") -> LatencyTracker:
+    key = f"{provider}/{model_name}/{label}"
+    with _registry_lock:
+        if key not in _latency_trackers:
+            _latency_trackers[key] = LatencyTracker()
+        return _latency_trackers[key]
+
+def reset_resilience_state():
+    """Descarta breakers e latências registrados (ex.: testes ou troca de chave API)."""
+    with _registry_lock:
+        _circuit_breakers.clear()
+        _latency_trackers.clear()
+
+class ResilientLLMCaller:
+    """
+    Executa requisições à LLM de um provedor/modelo com prazo, novas tentativas, circuit breaker e hedging.
+
+    Uma instância acompanha uma análise inteira (pode ser usada por várias threads, ex.: segmentos
+    concorrentes); `stats` acumula os contadores de todas as chamadas feitas por ela.
+
+    Args:
+        provider (str): Provedor LLM (chave do circuit breaker, junto com o modelo).
+        model_name (Optional[str]): Modelo.
+        deadline_s (Optional[float]): Prazo total de cada chamada lógica, incluindo novas tentativas.
+        attempt_timeout_s (Optional[float]): Timeout de cada tentativa (limitado ao prazo restante).
+        max_attempts (Optional[int]): Número máximo de tentativas por chamada.
+        hedging (Optional[bool]): Habilita o hedging (padrão: LLM_HEDGING_ENABLED).
+        sleep (Callable[[float], None]): Função de espera entre tentativas (injetável em testes).
+    """
+    def __init__(self, provider: str, model_name: Optional[str], deadline_s: Optional[float] = None,
+                 attempt_timeout_s: Optional[float] = None, max_attempts: Optional[int] = None,
+                 base_delay_s: Optional[float] = None, max_delay_s: Optional[float] = None,
+                 hedging: Optional[bool] = None, sleep: Callable[[float], None] = time.sleep):
+        self.provider = provider
+        self.model_name = model_name
+        self.deadline_s = LLM_CALL_DEADLINE_SECONDS if deadline_s is None else deadline_s
+        self.attempt_timeout_s = LLM_ATTEMPT_TIMEOUT_SECONDS if attempt_timeout_s is None else attempt_timeout_s
+        self.max_attempts = max(1, LLM_RETRY_MAX_ATTEMPTS if max_attempts is None else max_attempts)
+        self.base_delay_s = LLM_RETRY_BASE_DELAY_SECONDS if base_delay_s is None else base_delay_s
+        self.max_delay_s = LLM_RETRY_MAX_DELAY_SECONDS if max_delay_s is None else max_delay_s
+        self.hedging = LLM_HEDGING_ENABLED if hedging is None else hedging
+        self.breaker = get_circuit_breaker(provider, model_name)
+        self._sleep = sleep
+        self._stats_lock = threading.Lock()
+        self.stats: Dict[str, Any] = {
+            "llm_attempts": 0,
+            "llm_retries": 0,
+            "llm_hedged_requests": 0,
+            "llm_hedge_wins": 0,
+            "llm_retry_errors": [],
+        }
+
+    def _count(self, key: str, amount: int = 1):
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def usage_fields(self) -> Dict[str, Any]:
+        """Cópia dos contadores, para anexar ao token_usage_info."""
+        with self._stats_lock:
+            return {key: (list(value) if isinstance(value, list) else value) for key, value in self.stats.items()}
+
+    def _hedge_delay(self, label: str) -> Optional[float]:
+        if not self.hedging:
+            return None
+        return get_latency_tracker(self.provider, self.model_name, label).percentile(LLM_HEDGING_PERCENTILE, LLM_HEDGING_MIN_SAMPLES)
+
+    def _run_attempt(self, fn: Callable[[float], Any], timeout_s: float, label: str, hedgeable: bool) -> Any:
+        hedge_delay = self._hedge_delay(label) if hedgeable else None
+        if hedge_delay is None or hedge_delay >= timeout_s:
+            return fn(timeout_s)
+
+        # A requisição perdedora não é cancelada (o SDK não permite); termina em segundo plano, limitada ao seu timeout.
+        executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="llm_hedge")
+        try:
+            # Cada thread recebe uma cópia do contexto (ex.: get_openai_callback do LangChain usa ContextVar)
+            primary = executor.submit(contextvars.copy_context().run, fn, timeout_s)
+            done, _ = wait([primary], timeout=hedge_delay)
+            if done:
+                return primary.result()
+
+            logger.info(f"Hedging LLM ({label or self.model_name}): sem resposta após {hedge_delay:.2f}s (p95); disparando requisição duplicada.")
+            self._count("llm_hedged_requests")
+            hedge = executor.submit(contextvars.copy_context().run, fn, max(0.1, timeout_s - hedge_delay))
+            pending = {primary, hedge}
+            last_error: Optional[BaseException] = None
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is None:
+                        if future is hedge:
+                            self._count("llm_hedge_wins")
+                        return future.result()
+                    last_error = future.exception()
+            raise last_error
+        finally:
+            executor.shutdown(wait=False)
+
+    def call(self, fn: Callable[[float], Any], label: str = "", hedgeable: bool = True) -> Any:
+        """
+        Executa `fn(timeout_s)` com as políticas de resiliência.
+
+        Args:
+            fn (Callable[[float], Any]): Faz uma requisição com o timeout (s) recebido e retorna a resposta.
+            label (str): Rótulo da chamada (logs e janela de latências do hedging).
+            hedgeable (bool): False para chamadas que não podem ser duplicadas (ex.: streaming com callback de GUI).
+
+        Returns:
+            Any: O retorno de `fn`.
+
+        Raises:
+            CircuitOpenError: Circuito aberto para o provedor/modelo.
+            LLMDeadlineExceededError: Prazo total esgotado antes de uma nova tentativa.
+            Exception: O erro não transitório, ou o último erro transitório após esgotar as tentativas.
+        """
+        deadline = time.monotonic() + self.deadline_s
+        attempt = 0
+        while True:
+            if not self.breaker.allow_request():
+                raise CircuitOpenError(f"Circuito aberto para '{self.breaker.name}'; tente novamente em instantes.")
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise LLMDeadlineExceededError(f"Prazo de {self.deadline_s:.0f}s esgotado para a chamada LLM '{label}'.")
+
+            attempt += 1
+            self._count("llm_attempts")
+            t0 = time.monotonic()
+            try:
+                result = self._run_attempt(fn, min(self.attempt_timeout_s, remaining), label, hedgeable)
+            except Exception as exc:
+                if not is_retryable_error(exc):
+                    self.breaker.record_success() # O provedor respondeu (ex.: 400/401); não indica indisponibilidade
+                    raise
+                self.breaker.record_failure()
+                with self._stats_lock:
+                    self.stats["llm_retry_errors"].append(type(exc).__name__)
+                if attempt >= self.max_attempts:
+                    logger.error(f"Chamada LLM '{label}' falhou após {attempt} tentativa(s): {type(exc).__name__}: {exc}")
+                    raise
+                delay = max(compute_backoff(attempt, self.base_delay_s, self.max_delay_s), _retry_after_seconds(exc) or 0.0)
+                if time.monotonic() + delay >= deadline:
+                    logger.error(f"Chamada LLM '{label}': sem prazo para nova tentativa após {type(exc).__name__}.")
+                    raise
+                self._count("llm_retries")
+                logger.warning(f"Chamada LLM '{label}' falhou ({type(exc).__name__}: {exc}). "
+                               f"Nova tentativa {attempt + 1}/{self.max_attempts} em {delay:.2f}s.")
+                self._sleep(delay)
+                continue
+
+            self.breaker.record_success()
+            get_latency_tracker(self.provider, self.model_name, label).add(time.monotonic() - t0)
+            return result
+
+execution_time = perf_counter() - start_time
+logger.debug(f"Carregado LLM_RESILIENCE em {execution_time:.4f}s")
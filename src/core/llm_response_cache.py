@@ -0,0 +1,164 @@
+# src/core/llm_response_cache.py
+"""
+Cache em disco das respostas da LLM usado por `ai_orchestrator.analyze_text_with_llm`.
+
+A chave é um hash canônico (SHA-256) de provedor, modelo, temperatura, mensagens totalmente
+renderizadas e schema de saída. Cada entrada guarda a resposta bruta (texto) e o uso de tokens
+da requisição original, em um arquivo JSON por chave.
+"""
+import logging
+logger = logging.getLogger(__name__)
+
+from time import perf_counter
+start_time = perf_counter()
+logger.debug(f"{start_time:.4f}s - Iniciando llm_response_cache.py")
+
+import os, json, hashlib, threading, time
+from typing import Any, Dict, Optional
+
+from src.settings import (LLM_RESPONSE_CACHE_ENABLED, LLM_RESPONSE_CACHE_DIR, LLM_RESPONSE_CACHE_TTL_SECONDS,
+                          LLM_RESPONSE_CACHE_MAX_TEMPERATURE)
+
+_cache_lock = threading.Lock()
+
+def _schema_of(output_format: Any) -> Any:
+    """Retorna uma representação serializável do schema de saída (modelo Pydantic, lista de modelos ou None)."""
+    if output_format is None:
+        return None
+    if isinstance(output_format, (list, tuple)):
+        return [_schema_of(item) for item in output_format]
+    if hasattr(output_format, "model_json_schema"):
+        return output_format.model_json_schema()
+    return str(output_format)
+
+def make_cache_key(provider: str, model_name: str, temperature: float, messages: Any, output_format: Any = None) -> str:
+    """
+    Gera a chave canônica de uma requisição à LLM.
+
+    Args:
+        provider (str): Provedor (ex.: 'openai', 'lang_chain_openai').
+        model_name (str): Modelo.
+        temperature (float): Temperatura.
+        messages (Any): Mensagens já renderizadas (com o texto do documento).
+        output_format (Any): Modelo(s) Pydantic do formato de saída, se houver.
+
+    Returns:
+        str: Hash SHA-256 em hexadecimal.
+    """
+    payload = {
+        "provider": provider,
+        "model": model_name,
+        "temperature": float(temperature),
+        "messages": messages,
+        "schema": _schema_of(output_format),
+    }
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+def is_cacheable(temperature: float) -> bool:
+    """Indica se uma requisição pode usar o cache (habilitado e temperatura determinística)."""
+    try:
+        return LLM_RESPONSE_CACHE_ENABLED and float(temperature) <= LLM_RESPONSE_CACHE_MAX_TEMPERATURE
+    except (TypeError, ValueError):
+        return False
+
+def _entry_path(cache_key: str, cache_dir: Optional[str] = None) -> str:
+    return os.path.join(cache_dir or LLM_RESPONSE_CACHE_DIR, cache_key[:2], f"{cache_key}.json")
+
+def get_cached_response(cache_key: str, ttl_seconds: Optional[int] = None,
+                        cache_dir: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Lê uma entrada do cache. Entradas expiradas (TTL) ou corrompidas são removidas.
+
+    Returns:
+        Optional[Dict[str, Any]]: Dicionário com 'raw_output', 'token_usage_info' e 'created_at', ou None.
+    """
+    ttl_seconds = LLM_RESPONSE_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+    path = _entry_path(cache_key, cache_dir)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+        if ttl_seconds and time.time() - entry.get("created_at", 0) > ttl_seconds:
+            logger.debug(f"Cache LLM expirado para a chave {cache_key[:12]}...")
+            with _cache_lock:
+                os.remove(path)
+            return None
+        return entry
+    except Exception as e:
+        logger.warning(f"Entrada inválida no cache LLM ({cache_key[:12]}...): {e}")
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None
+
+def store_response(cache_key: str, raw_output: str, token_usage_info: Optional[Dict[str, Any]],
+                   metadata: Optional[Dict[str, Any]] = None, cache_dir: Optional[str] = None) -> bool:
+    """
+    Grava a resposta bruta e o uso de tokens da requisição original (escrita atômica).
+
+    Returns:
+        bool: True se gravado com sucesso.
+    """
+    if raw_output is None:
+        return False
+    path = _entry_path(cache_key, cache_dir)
+    entry = {
+        "created_at": time.time(),
+        "raw_output": raw_output,
+        "token_usage_info": token_usage_info or {},
+        "metadata": metadata or {},
+    }
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False, default=str)
+        with _cache_lock:
+            os.replace(tmp_path, path)
+        logger.debug(f"Resposta LLM gravada no cache ({cache_key[:12]}...).")
+        return True
+    except Exception as e:
+        logger.warning(f"Falha ao gravar resposta no cache LLM: {e}")
+        return False
+
+def build_cache_hit_usage(entry: Dict[str, Any], cache_key: str) -> Dict[str, Any]:
+    """
+    Monta o token_usage_info de uma resposta servida pelo cache: nenhum token é cobrado,
+    e o uso/custo da requisição original fica registrado para os painéis de custo.
+    """
+    original_usage = entry.get("token_usage_info") or {}
+    return {
+        "input_tokens":  0,
+        "cached_tokens": 0,
+        "output_tokens": 0,
+        "total_tokens":  0,
+        "successful_requests": 0,
+        "total_cost_usd": 0.0,
+        "response_cache_hit": True,
+        "response_cache_key": cache_key,
+        "response_cache_saved_cost_usd": original_usage.get("total_cost_usd"),
+        "response_cache_original_usage": original_usage,
+    }
+
+def clear_cache(cache_dir: Optional[str] = None) -> int:
+    """Remove todas as entradas do cache. Retorna a quantidade de arquivos removidos."""
+    cache_dir = cache_dir or LLM_RESPONSE_CACHE_DIR
+    removed = 0
+    if not os.path.isdir(cache_dir):
+        return 0
+    with _cache_lock:
+        for root, _, files in os.walk(cache_dir):
+            for name in files:
+                try:
+                    os.remove(os.path.join(root, name))
+                    removed += 1
+                except OSError:
+                    pass
+    logger.info(f"Cache LLM limpo: {removed} entradas removidas.")
+    return removed
+
+execution_time = perf_counter() - start_time
+logger.debug(f"Carregado LLM_RESPONSE_CACHE em {execution_time:.4f}s")
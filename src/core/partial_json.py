@@ -0,0 +1,113 @@
+# src/core/partial_json.py
+"""
+Parser incremental de JSON parcial para respostas estruturadas recebidas em streaming.
+
+A LLM devolve um objeto JSON (ex.: `formatted_initial_analysis`) em pedaços. O
+`IncrementalJSONObjectParser` consome os deltas e devolve cada campo de primeiro
+nível assim que o seu valor está completo, sem reprocessar os campos já emitidos.
+"""
+import logging
+logger = logging.getLogger(__name__)
+
+from time import perf_counter
+start_time = perf_counter()
+logger.debug(f"{start_time:.4f}s - Iniciando partial_json.py")
+
+import json
+from typing import Any, Dict
+
+_WHITESPACE = " \t\n\r"
+
+class IncrementalJSONObjectParser:
+    """
+    Extrai, de forma incremental, os campos completos de primeiro nível de um objeto JSON.
+
+    Uso:
+        parser = IncrementalJSONObjectParser()
+        for delta in stream:
+            novos_campos = parser.feed(delta)   # {campo: valor} completados neste delta
+        todos = parser.fields
+    """
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0              # Posição após o último campo completo
+        self._started = False      # '{' inicial já consumido
+        self.finished = False      # '}' final já consumido
+        self.fields: Dict[str, Any] = {}
+        self._decoder = json.JSONDecoder()
+
+    def _skip(self, chars: str) -> None:
+        while self._pos < len(self._buffer) and self._buffer[self._pos] in chars:
+            self._pos += 1
+
+    def feed(self, delta: str) -> Dict[str, Any]:
+        """
+        Acrescenta um trecho ao buffer e retorna os campos completados por ele.
+
+        Args:
+            delta (str): Novo trecho de texto recebido do stream.
+
+        Returns:
+            Dict[str, Any]: Campos de primeiro nível concluídos neste delta (pode ser vazio).
+        """
+        if self.finished or not delta:
+            return {}
+        self._buffer += delta
+        new_fields: Dict[str, Any] = {}
+
+        if not self._started:
+            self._skip(_WHITESPACE)
+            if self._pos >= len(self._buffer):
+                return new_fields
+            if self._buffer[self._pos] != "{":
+                logger.debug("IncrementalJSONObjectParser: conteúdo não inicia com objeto JSON; ignorando.")
+                self.finished = True
+                return new_fields
+            self._pos += 1
+            self._started = True
+
+        while True:
+            self._skip(_WHITESPACE + ",")
+            if self._pos >= len(self._buffer):
+                break
+            if self._buffer[self._pos] == "}":
+                self._pos += 1
+                self.finished = True
+                break
+            try:
+                key, key_end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                break # Chave ainda incompleta
+
+            colon = key_end
+            while colon < len(self._buffer) and self._buffer[colon] in _WHITESPACE:
+                colon += 1
+            if colon >= len(self._buffer):
+                break
+            if self._buffer[colon] != ":":
+                logger.debug("IncrementalJSONObjectParser: JSON malformado; parser encerrado.")
+                self.finished = True
+                break
+            value_start = colon + 1
+            while value_start < len(self._buffer) and self._buffer[value_start] in _WHITESPACE:
+                value_start += 1
+            if value_start >= len(self._buffer):
+                break
+            try:
+                value, value_end = self._decoder.raw_decode(self._buffer, value_start)
+            except json.JSONDecodeError:
+                break # Valor ainda incompleto
+            # Números e literais só estão completos quando há um delimitador depois deles (ex.: '12' pode virar '123')
+            if self._buffer[value_start] not in '"[{':
+                if value_end >= len(self._buffer):
+                    break
+                if self._buffer[value_end] not in _WHITESPACE + ",}":
+                    break # Ex.: '12.' ainda será completado por '5'
+
+            self.fields[key] = value
+            new_fields[key] = value
+            self._pos = value_end
+        return new_fields
+
+execution_time = perf_counter() - start_time
+logger.debug(f"Carregado PARTIAL_JSON em {execution_time:.4f}s")
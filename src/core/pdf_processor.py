@@ -433,13 +433,8 @@ def get_similarity_matrix(vectors_combined: np_ndarray, normalizer: bool = True)
     logger.debug("Procedido: get_similarity_matrix")
     return similarity_matrix
 
-#@timing_decorator()
-def get_tfidf_scores(pages_texts: List[str], language: str = 'portuguese') -> np_array:
-    """
-    Calcula a relevância de cada texto (página) usando TF-IDF.
-    Retorna um array com os scores TF-IDF para cada texto, e os vetores.
-    """
-    # Garante que stopwords para o idioma especificado estejam disponíveis
+def get_stopwords(language: str = 'portuguese') -> List[str]:
+    """Retorna as stopwords do NLTK para o idioma (tentando o download se ausentes; lista vazia em caso de falha)."""
     try:
         current_stopwords = list(set(stopwords.words(language)))
     except OSError: # Pode ocorrer se o corpus 'stopwords' para o idioma não existir
@@ -452,7 +447,16 @@ def get_tfidf_scores(pages_texts: List[str], language: str = 'portuguese') -> np
             warnings.warn(f"Falha ao baixar stopwords para '{language}': {e}. Usando lista vazia de stopwords.")
             logger.warning(f"Falha ao baixar stopwords para '{language}': {e}. Usando lista vazia de stopwords.")
             current_stopwords = []
-            
+    return current_stopwords
+
+#@timing_decorator()
+def get_tfidf_scores(pages_texts: List[str], language: str = 'portuguese') -> np_array:
+    """
+    Calcula a relevância de cada texto (página) usando TF-IDF.
+    Retorna um array com os scores TF-IDF para cada texto, e os vetores.
+    """
+    # Garante que stopwords para o idioma especificado estejam disponíveis
+    current_stopwords = get_stopwords(language)
     vectorizer = TfidfVectorizer(stop_words=current_stopwords)
     tf_idf_matrix = vectorizer.fit_transform(pages_texts)
     
@@ -524,6 +528,11 @@ from typing import Dict, Any
 # )
 # Supondo que as funções de src.utils existem
 from src.utils import timing_decorator, reduce_text_to_limit, get_string_intervalos
+from src.profiling import MemoryProfiler, profiled_job
+from src.settings import PAGE_BUDGET_PLANNER, TEXT_COMPRESSION_ENABLED, BOILERPLATE_STRIPPING_ENABLED
+from src.core.budget_planner import plan_page_selection
+from src.core.text_compression import compress_pages
+from src.core.boilerplate import strip_boilerplate
 
 def print_text_intelligibility(texts_normalized: list[tuple[int, str]]):
     """
@@ -635,7 +644,8 @@ class PDFDocumentAnalyzer:
 
     ### ======================================================================================
     #@timing_decorator()
-    def extract_texts_and_preprocess_files(self, pdf_paths_ordered: List[str], clean_spaces: bool = True, lowercase: bool = False
+    def extract_texts_and_preprocess_files(self, pdf_paths_ordered: List[str], clean_spaces: bool = True, lowercase: bool = False,
+                                           strip_repeated_lines: bool = BOILERPLATE_STRIPPING_ENABLED
                                            ) -> Tuple[List[Tuple[int, str]], List[List[int]], List[Dict[int, str]], List[str]]:
         """
         Extrai textos de um lote de PDFs ordenados e os pré-processa.
@@ -643,7 +653,11 @@ class PDFDocumentAnalyzer:
         textos pré-processados para armazenamento e textos pré-processados para análise.
         Retorna uma tupla: (processed_files_metadata, all_indices_in_batch, 
                             all_texts_for_storage_combined)
+
+        Com strip_repeated_lines, cabeçalhos/rodapés repetidos em cada arquivo (src/core/boilerplate.py)
+        são removidos antes do pré-processamento; o resumo do lote fica em `self.last_boilerplate_stats`.
         """
+        self.last_boilerplate_stats = {"boilerplate_patterns": 0, "lines_removed": 0, "tokens_saved": 0}
         if not pdf_paths_ordered:
             logger.warning("Nenhum caminho de PDF fornecido para análise em lote.")
             return [], [], [], [], 0
@@ -666,6 +680,13 @@ class PDFDocumentAnalyzer:
                     logger.warning(f"Nenhum texto extraído de {os.path.basename(pdf_path)}.")
                     continue
 
+                if strip_repeated_lines:
+                    cleaned_texts, boilerplate_stats = strip_boilerplate([text for _, text in extracted_pages_content_single_file],
+                                                                         lambda line: count_tokens(line, model_name=model_name_for_tokens))
+                    extracted_pages_content_single_file = [(idx, text) for (idx, _), text in zip(extracted_pages_content_single_file, cleaned_texts)]
+                    for stat_key, value in boilerplate_stats.items():
+                        self.last_boilerplate_stats[stat_key] += value
+
                 actual_indices_in_file = [idx for idx, _ in extracted_pages_content_single_file]
                 texts_for_storage_single_file = {idx: function_preprocess_text_basic(text, clean_spaces, lowercase) for idx, text in extracted_pages_content_single_file}
                 texts_for_analysis_single_file = [function_preprocess_text_basic(text, clean_spaces, lowercase) for _, text in extracted_pages_content_single_file]
@@ -679,6 +700,10 @@ class PDFDocumentAnalyzer:
                 logger.error(f"Erro ao processar (extração/pré-proc) arquivo {os.path.basename(pdf_path)}: {e}", exc_info=True)
                 continue 
 
+        if self.last_boilerplate_stats["lines_removed"]:
+            logger.info(f"Cabeçalhos/rodapés repetidos removidos: {self.last_boilerplate_stats['lines_removed']} linhas "
+                        f"({self.last_boilerplate_stats['boilerplate_patterns']} padrões), ~{self.last_boilerplate_stats['tokens_saved']} tokens a menos no lote.")
+
         if not all_texts_for_analysis_list:
             logger.warning("Nenhum texto para análise combinado de todos os arquivos.")
         else:
@@ -758,27 +783,37 @@ class PDFDocumentAnalyzer:
         return embedding_vectors_combined, tfidf_vectors_combined, tf_idf_scores_array_combined
 
     #@timing_decorator()
+    @profiled_job("analyze_pdf_documents")
     def analyze_pdf_documents(self, pdf_paths_ordered: List[str],
                               clean_spaces=True, lowercase=False,
                               model_embedding: str = 'all-MiniLM-L6-v2', ready_embeddings: np_array = None, preprocess_text_advanced: bool = False) -> Dict[str, Dict[str, Any]]:
 
-        processed_files_metadata, all_indices_in_batch, all_texts_for_storage_dict, all_texts_for_analysis_list = self.extract_texts_and_preprocess_files(
+        # Perfil de memória por etapa (opt-in via MEMORY_PROFILING_ENV_VAR; sem custo quando desabilitado)
+        mem_profiler = MemoryProfiler(job_name="analyze_pdf_documents",
+                                      extra_info={"extractor": type(self.extractor).__name__, "model_embedding": model_embedding})
+        try:
+            with mem_profiler.stage("extract_texts_and_preprocess_files"):
+                processed_files_metadata, all_indices_in_batch, all_texts_for_storage_dict, all_texts_for_analysis_list = self.extract_texts_and_preprocess_files(
                                                                                                                         pdf_paths_ordered, clean_spaces, lowercase)
-        if not processed_files_metadata:
-            logger.warning("Nenhum arquivo PDF produziu dados na fase de extração.")
-            return {}
-    
-        combined_processed_page_data, all_global_page_keys_ordered = self.build_combined_page_data(processed_files_metadata, 
+            if not processed_files_metadata:
+                logger.warning("Nenhum arquivo PDF produziu dados na fase de extração.")
+                return {}
+        
+            with mem_profiler.stage("build_combined_page_data"):
+                combined_processed_page_data, all_global_page_keys_ordered = self.build_combined_page_data(processed_files_metadata, 
                                                                             all_indices_in_batch, all_texts_for_storage_dict)
 
-        if not all_texts_for_storage_dict or not all_texts_for_analysis_list:
-            logger.warning("Nenhum texto para análise combinado de todos os arquivos. Pulando análise de similaridade e relevância.")
-            return combined_processed_page_data
-        
-        embedding_vectors_combined, tfidf_vectors_combined, tf_idf_scores_array_combined = self.get_similarity_and_tfidf_score_docs(
+            if not all_texts_for_storage_dict or not all_texts_for_analysis_list:
+                logger.warning("Nenhum texto para análise combinado de todos os arquivos. Pulando análise de similaridade e relevância.")
+                return combined_processed_page_data
+            
+            with mem_profiler.stage("get_similarity_and_tfidf_score_docs"):
+                embedding_vectors_combined, tfidf_vectors_combined, tf_idf_scores_array_combined = self.get_similarity_and_tfidf_score_docs(
                                                                     all_texts_for_analysis_list, model_embedding, ready_embeddings, preprocess_text_advanced)
 
-        return combined_processed_page_data, all_global_page_keys_ordered, embedding_vectors_combined, tfidf_vectors_combined, tf_idf_scores_array_combined
+            return combined_processed_page_data, all_global_page_keys_ordered, embedding_vectors_combined, tfidf_vectors_combined, tf_idf_scores_array_combined
+        finally:
+            mem_profiler.write_report()
    
     ### ======================================================================================
 
@@ -1015,6 +1050,8 @@ class PDFDocumentAnalyzer:
                 "original_index": original_page_idx,
                 "recalculated_relevance": final_relevance_scores[i]
             })
+            # Valor usado pelo planejador do orçamento de tokens (group_texts_by_relevance_and_token_limit)
+            combined_processed_page_data[original_page_idx]['recalculated_relevance'] = float(final_relevance_scores[i])
         
         # Ordenar pelo score de relevância recalculado (decrescente)
         sorted_final_pages_data = sorted(final_pages_data, key=lambda x: x["recalculated_relevance"], reverse=True)
@@ -1039,40 +1076,20 @@ class PDFDocumentAnalyzer:
             discarded_by_similarity_count
         )
 
-    #@timing_decorator()
-    def group_texts_by_relevance_and_token_limit(
-        self,
-        processed_page_data: Dict[str, Dict[str, Any]], # Chave é global_page_key (str)
-        relevant_page_ordered_indices: List[str], # Lista de global_page_key (str)
-        token_limit: int,
-    ) -> Tuple[str, str, int, int]: 
+    def _select_texts_greedy(self, processed_page_data: Dict[str, Dict[str, Any]],
+                             relevant_page_ordered_indices: List[str], token_limit: int) -> Tuple[Dict[str, str], int]:
         """
-        Agrupa textos de páginas relevantes, respeitando um limite de tokens.
-        Os textos são concatenados na ordem original das páginas,
-        mas a seleção das páginas é baseada na lista `relevant_page_indices`.
-
-        Args:
-            processed_page_data (Dict[int, Dict[str, Any]]): Dados processados das páginas.
-            relevant_page_indices (List[int]): Lista de índices de páginas relevantes,
-                                               já ordenadas por prioridade.
-            token_limit (int): Limite máximo de tokens para o texto acumulado.
-            model_name_for_tokens (str, optional): Nome do modelo para contagem de tokens,
-                                                   passado para count_tokens e reduce_text_to_limit.
-                                                   Default é "gpt-3.5-turbo".
+        Seleção gulosa (legado): inclui as páginas na ordem de relevância até o limite, trunca a
+        primeira que não cabe e ignora as seguintes.
 
         Returns:
-            Tuple[str, str, int, int]: Tupla contendo:
-                - intervalos de páginas consideradas.
-                - Texto acumulado das páginas selecionadas (e possivelmente truncadas).
-                - Total de tokens das páginas selecionadas ANTES de qualquer truncamento.
-                - Total de tokens do texto acumulado FINAL (após truncamento, se houver).
+            Tuple[Dict[str, str], int]: Textos incluídos por chave (na ordem de relevância) e o total
+            de tokens das páginas relevantes antes do truncamento.
         """
         current_total_tokens_final = 0 # Total final
         total_tokens_before_truncation = 0 # Variável para rastrear tokens totais das páginas selecionadas antes do truncamento
         texts_for_concatenation = {}
 
-        assert len(relevant_page_ordered_indices) == len(set(relevant_page_ordered_indices))
-
         limit_reached = False
         for page_idx in relevant_page_ordered_indices:
             if page_idx not in processed_page_data:
@@ -1109,6 +1126,182 @@ class PDFDocumentAnalyzer:
                     logger.info(f'Texto da página {page_idx} reduzido para caber no limite de tokens.')
                     limit_reached = True
 
+        return texts_for_concatenation, total_tokens_before_truncation
+
+    def _select_texts_by_knapsack(self, processed_page_data: Dict[str, Dict[str, Any]],
+                                  relevant_page_ordered_indices: List[str], token_limit: int) -> Tuple[Dict[str, str], int]:
+        """
+        Seleção por mochila 0/1: valor = 'recalculated_relevance' (gravada por filter_and_classify_pages;
+        na ausência, uma relevância decrescente pela posição), custo = 'number_tokens' (já calculado em
+        build_combined_page_data). A melhor página excluída que ainda tenha espaço entra truncada.
+
+        Returns:
+            Tuple[Dict[str, str], int]: Mesmo formato de `_select_texts_greedy`.
+        """
+        page_keys, values, costs = [], [], []
+        n_relevant = len(relevant_page_ordered_indices)
+        for rank, page_idx in enumerate(relevant_page_ordered_indices):
+            if page_idx not in processed_page_data:
+                logger.warning(f"Chave de página relevante '{page_idx}' não encontrada...")
+                continue
+            page_data = processed_page_data[page_idx]
+            page_tokens = page_data.get('number_tokens')
+            if page_tokens is None:
+                page_tokens = count_tokens(page_data['text_stored'], model_name=model_name_for_tokens)
+            page_keys.append(page_idx)
+            values.append(page_data.get('recalculated_relevance', (n_relevant - rank) / n_relevant))
+            costs.append(int(page_tokens))
+
+        plan = plan_page_selection(page_keys, values, costs, token_limit)
+        self.last_budget_plan = plan
+
+        texts_for_concatenation = {key: processed_page_data[key]['text_stored'] for key in plan["full_keys"]}
+        if plan["partial_key"] is not None:
+            partial_key = plan["partial_key"]
+            texts_for_concatenation[partial_key] = reduce_text_to_limit(processed_page_data[partial_key]['text_stored'],
+                                                                        plan["partial_budget"], model_name=model_name_for_tokens)
+            logger.info(f'Texto da página {partial_key} reduzido para caber no limite de tokens.')
+
+        logger.info(f"Planejador de orçamento (mochila {'exata' if plan['exact'] else 'aproximada'}): "
+                    f"{len(plan['full_keys'])} páginas inteiras de {len(page_keys)}; relevância {plan['value']:.4f} "
+                    f"vs. {plan['greedy_value']:.4f} do plano guloso (+{plan['recovered_pct']:.1f}%).")
+        return texts_for_concatenation, sum(costs)
+
+    def compress_relevant_pages(self, processed_page_data: Dict[str, Dict[str, Any]],
+                                relevant_page_ordered_indices: List[str], token_limit: int,
+                                enabled: bool = TEXT_COMPRESSION_ENABLED) -> Optional[Dict[str, Any]]:
+        """
+        Compressão extrativa (ver src/core/text_compression.py) das páginas relevantes, executada antes de
+        `group_texts_by_relevance_and_token_limit` quando o total de tokens excede `token_limit`.
+        Atualiza 'text_stored' e 'number_tokens' das páginas comprimidas (o texto e a contagem originais
+        ficam em 'text_uncompressed' e 'number_tokens_uncompressed', usados por `build_map_reduce_chunks`).
+
+        Returns:
+            Optional[Dict[str, Any]]: Estatísticas da compressão ('tokens_before', 'tokens_after',
+            'compression_ratio', 'dropped_redundant', 'dropped_low_info'), ou None se não foi necessária.
+        """
+        self.last_compression = None
+        valid_keys = [key for key in relevant_page_ordered_indices if key in processed_page_data]
+        total_tokens = sum(processed_page_data[key].get('number_tokens') or 0 for key in valid_keys)
+        if not enabled or total_tokens <= token_limit:
+            return None
+
+        compression = compress_pages({key: processed_page_data[key]['text_stored'] for key in valid_keys}, token_limit,
+                                     lambda text: count_tokens(text, model_name=model_name_for_tokens),
+                                     stop_words=get_stopwords())
+        compressed_texts = compression.pop("texts")
+        for key, text in compressed_texts.items():
+            page_data = processed_page_data[key]
+            if text != page_data['text_stored']:
+                page_data.setdefault('text_uncompressed', page_data['text_stored'])
+                page_data.setdefault('number_tokens_uncompressed', page_data.get('number_tokens'))
+                page_data['text_stored'] = text
+                page_data['number_tokens'] = count_tokens(text, model_name=model_name_for_tokens)
+
+        self.last_compression = compression
+        logger.info(f"Compressão extrativa: {compression['tokens_before']} -> {compression['tokens_after']} tokens "
+                    f"(razão {compression['compression_ratio']:.3f}; {compression['dropped_redundant']} frases redundantes e "
+                    f"{compression['dropped_low_info']} de baixa informação descartadas).")
+        return compression
+
+    def build_map_reduce_chunks(self, processed_page_data: Dict[str, Dict[str, Any]],
+                                relevant_page_ordered_indices: List[str], chunk_token_limit: int) -> List[Dict[str, Any]]:
+        """
+        Particiona as páginas relevantes em blocos de até `chunk_token_limit` tokens para o modo map-reduce.
+        Dentro de cada bloco as páginas seguem a ordem original dos documentos; páginas maiores que o
+        limite são truncadas com reduce_text_to_limit. Usa o texto original das páginas ('text_uncompressed'),
+        não o resultado da compressão extrativa: no map-reduce cada bloco já cabe no limite.
+
+        Args:
+            processed_page_data (Dict[str, Dict[str, Any]]): Dados processados das páginas.
+            relevant_page_ordered_indices (List[str]): Chaves das páginas relevantes.
+            chunk_token_limit (int): Máximo de tokens por bloco.
+
+        Returns:
+            List[Dict[str, Any]]: Blocos com 'page_keys', 'text', 'tokens' e 'relevance' (soma da
+            relevância recalculada das páginas), na ordem dos documentos.
+        """
+        def get_sortable_page_key(global_key: str) -> Tuple[int, int]:
+            parts = global_key.replace("file", "").replace("page", "").split('_')
+            return int(parts[0]), int(parts[1])
+
+        chunks: List[Dict[str, Any]] = []
+        current = {"page_keys": [], "texts": [], "tokens": 0, "relevance": 0.0}
+
+        def close_current():
+            if current["page_keys"]:
+                chunks.append({"page_keys": list(current["page_keys"]), "text": " ".join(current["texts"]).strip(),
+                               "tokens": current["tokens"], "relevance": current["relevance"]})
+            current.update({"page_keys": [], "texts": [], "tokens": 0, "relevance": 0.0})
+
+        valid_keys = [key for key in relevant_page_ordered_indices if key in processed_page_data]
+        for page_key in sorted(valid_keys, key=get_sortable_page_key):
+            page_data = processed_page_data[page_key]
+            if 'text_uncompressed' in page_data:
+                page_text, page_tokens = page_data['text_uncompressed'], page_data.get('number_tokens_uncompressed')
+            else:
+                page_text, page_tokens = page_data['text_stored'], page_data.get('number_tokens')
+            if page_tokens is None:
+                page_tokens = count_tokens(page_text, model_name=model_name_for_tokens)
+            if page_tokens > chunk_token_limit:
+                page_text = reduce_text_to_limit(page_text, chunk_token_limit, model_name=model_name_for_tokens)
+                page_tokens = count_tokens(page_text, model_name=model_name_for_tokens)
+            if current["tokens"] + page_tokens > chunk_token_limit:
+                close_current()
+            current["page_keys"].append(page_key)
+            current["texts"].append(page_text)
+            current["tokens"] += page_tokens
+            current["relevance"] += float(page_data.get('recalculated_relevance', 0.0))
+        close_current()
+
+        logger.info(f"Map-reduce: {len(valid_keys)} páginas relevantes particionadas em {len(chunks)} blocos de até {chunk_token_limit} tokens.")
+        return chunks
+
+    #@timing_decorator()
+    def group_texts_by_relevance_and_token_limit(
+        self,
+        processed_page_data: Dict[str, Dict[str, Any]], # Chave é global_page_key (str)
+        relevant_page_ordered_indices: List[str], # Lista de global_page_key (str)
+        token_limit: int,
+        planner: str = PAGE_BUDGET_PLANNER,
+    ) -> Tuple[str, str, int, int]: 
+        """
+        Agrupa textos de páginas relevantes, respeitando um limite de tokens.
+        Os textos são concatenados na ordem original das páginas,
+        mas a seleção das páginas é baseada na lista `relevant_page_indices`.
+
+        Com planner="knapsack", a seleção maximiza a relevância recalculada total dentro do limite
+        (mochila 0/1, ver src/core/budget_planner.py), aproveitando páginas curtas posteriores que o
+        preenchimento guloso ("greedy") descartaria. O comparativo com o plano guloso fica em
+        `self.last_budget_plan`.
+
+        Args:
+            processed_page_data (Dict[int, Dict[str, Any]]): Dados processados das páginas.
+            relevant_page_indices (List[int]): Lista de índices de páginas relevantes,
+                                               já ordenadas por prioridade.
+            token_limit (int): Limite máximo de tokens para o texto acumulado.
+            planner (str): "knapsack" ou "greedy" (comportamento legado).
+            model_name_for_tokens (str, optional): Nome do modelo para contagem de tokens,
+                                                   passado para count_tokens e reduce_text_to_limit.
+                                                   Default é "gpt-3.5-turbo".
+
+        Returns:
+            Tuple[str, str, int, int]: Tupla contendo:
+                - intervalos de páginas consideradas.
+                - Texto acumulado das páginas selecionadas (e possivelmente truncadas).
+                - Total de tokens das páginas selecionadas ANTES de qualquer truncamento.
+                - Total de tokens do texto acumulado FINAL (após truncamento, se houver).
+        """
+        assert len(relevant_page_ordered_indices) == len(set(relevant_page_ordered_indices))
+
+        self.last_budget_plan = None
+        if planner == "knapsack":
+            texts_for_concatenation, total_tokens_before_truncation = self._select_texts_by_knapsack(
+                                                        processed_page_data, relevant_page_ordered_indices, token_limit)
+        else:
+            texts_for_concatenation, total_tokens_before_truncation = self._select_texts_greedy(
+                                                        processed_page_data, relevant_page_ordered_indices, token_limit)
+
         def get_sortable_page_key(global_key: str) -> Tuple[int, int]:
             # Função para extrair (file_idx, page_idx_in_file) para ordenação
             # formato exato de _generate_global_page_key: exemplo: "file0_page10"
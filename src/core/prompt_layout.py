@@ -0,0 +1,79 @@
+# src/core/prompt_layout.py
+"""
+Montagem de prompts favorável ao cache de prefixo do provedor.
+
+O cache de prefixo só aproveita a parte inicial idêntica entre requisições. Se o texto do documento
+estiver no meio das instruções (como em `prompt_inicial_para_cache`), nada após ele é reaproveitado
+entre documentos diferentes. Aqui as mensagens estáticas (instruções, listas e formato de saída)
+ficam sempre à frente, e o texto do documento é movido para uma única mensagem ao final, de modo
+que o prefixo estático é compartilhado entre análises e usuários.
+"""
+import logging
+logger = logging.getLogger(__name__)
+
+from time import perf_counter
+start_time = perf_counter()
+logger.debug(f"{start_time:.4f}s - Iniciando prompt_layout.py")
+
+from typing import Any, Dict, List, Optional
+
+from src.settings import PROMPT_CACHE_FRIENDLY_LAYOUT
+
+DOCUMENT_PLACEHOLDER = "{input_text}"
+DOCUMENT_REFERENCE = "[o texto do documento é fornecido adiante, entre as marcas <documento> e </documento>]"
+DOCUMENT_MESSAGE_TEMPLATE = "<documento>\n" + DOCUMENT_PLACEHOLDER + "\n</documento>"
+
+def cache_friendly_layout(messages: List[Dict[str, str]], placeholder: str = DOCUMENT_PLACEHOLDER,
+                          enabled: bool = PROMPT_CACHE_FRIENDLY_LAYOUT) -> List[Dict[str, str]]:
+    """
+    Reordena um template de mensagens: as estáticas primeiro (na ordem original) e o placeholder do
+    documento numa única mensagem final. O placeholder continua presente, então a substituição pelo
+    texto (str.replace ou ChatPromptTemplate) segue como antes.
+
+    Nas mensagens que continham o placeholder, ele é trocado por uma referência ao bloco do documento;
+    mensagens que só continham o placeholder são descartadas. A mensagem final herda o papel (role)
+    da primeira mensagem em que o placeholder aparecia.
+
+    Args:
+        messages (List[Dict[str, str]]): Template de mensagens ({'role', 'content'}).
+        placeholder (str): Marcador do texto do documento.
+        enabled (bool): Se False, devolve o template inalterado.
+
+    Returns:
+        List[Dict[str, str]]: Nova lista de mensagens (o template original não é alterado).
+    """
+    if not enabled or not messages:
+        return list(messages or [])
+    document_role: Optional[str] = None
+    static_messages: List[Dict[str, str]] = []
+    for msg_dict in messages:
+        content = msg_dict.get("content", "")
+        if placeholder not in content:
+            static_messages.append(dict(msg_dict))
+            continue
+        if document_role is None:
+            document_role = msg_dict.get("role", "user")
+        remaining = content.replace(placeholder, "").strip()
+        if remaining:
+            static_messages.append({**msg_dict, "content": content.replace(placeholder, DOCUMENT_REFERENCE)})
+    if document_role is None: # Template sem documento: nada a reordenar
+        return static_messages
+    return static_messages + [{"role": document_role, "content": DOCUMENT_MESSAGE_TEMPLATE.replace(DOCUMENT_PLACEHOLDER, placeholder)}]
+
+def cached_tokens_ratio(token_usage_info: Optional[Dict[str, Any]]) -> Optional[float]:
+    """Proporção dos tokens de entrada servidos pelo cache de prefixo (None se não houve tokens de entrada)."""
+    if not token_usage_info:
+        return None
+    input_tokens = token_usage_info.get("input_tokens") or 0
+    if input_tokens <= 0:
+        return None
+    return round((token_usage_info.get("cached_tokens") or 0) / input_tokens, 4)
+
+def add_cache_efficiency(token_usage_info: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Grava 'cached_tokens_ratio' no token_usage_info (ao lado de 'total_cost_usd') e o retorna."""
+    if token_usage_info is not None:
+        token_usage_info["cached_tokens_ratio"] = cached_tokens_ratio(token_usage_info)
+    return token_usage_info
+
+execution_time = perf_counter() - start_time
+logger.debug(f"Carregado PROMPT_LAYOUT em {execution_time:.4f}s")
@@ -0,0 +1,166 @@
+# src/core/prompt_registry.py
+"""
+Registro de prompts compartilhado pelo processo.
+
+Os componentes base de prompts (ALL_lists, ALL_prompts) são os mesmos para todos os usuários. Em vez de
+baixá-los e recompilar os pipelines a cada sessão, o registro guarda uma única versão compilada
+(identificada pelo `updateTime` do documento no Firestore), revalida a versão no máximo a cada
+PROMPT_REGISTRY_RECHECK_SECONDS e só baixa e recompila o documento quando ela muda. As sessões recebem
+referências para os mesmos objetos, que devem ser tratados como somente leitura.
+"""
+import logging
+logger = logging.getLogger(__name__)
+
+from time import perf_counter, monotonic
+start_time = perf_counter()
+logger.debug(f"{start_time:.4f}s - Iniciando prompt_registry.py")
+
+import copy
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from src.settings import PROMPT_REGISTRY_RECHECK_SECONDS
+from src.core.prompts import get_prompts_for_initial_analysis
+from src.core.prompt_layout import cache_friendly_layout, DOCUMENT_PLACEHOLDER
+
+STATIC_TOKEN_COUNTS_KEY = "_static_token_counts" # Metadado incluído em final_prompts (não é um pipeline)
+TOKEN_COUNT_MODEL = "gpt-4o"
+
+# (versão, componentes) ou None em caso de falha
+ComponentsLoader = Callable[[], Optional[Tuple[str, Dict[str, Any]]]]
+
+def count_static_tokens(final_prompts: Dict[str, Any]) -> Dict[str, int]:
+    """
+    Conta os tokens fixos de cada pipeline (mensagens já no layout final, sem o texto do documento).
+    Em PROMPTS_SEGMENTADOS, soma todos os grupos de segmentos.
+    """
+    import tiktoken
+    encoder = tiktoken.encoding_for_model(TOKEN_COUNT_MODEL)
+
+    def _count(messages):
+        return len(encoder.encode(str([{k: v.replace(DOCUMENT_PLACEHOLDER, "") for k, v in msg.items()}
+                                       for msg in cache_friendly_layout(messages)])))
+
+    counts = {}
+    for name, pipeline in final_prompts.items():
+        if pipeline and isinstance(pipeline[0], list):
+            counts[name] = sum(_count(group) for group in pipeline)
+        elif pipeline:
+            counts[name] = _count(pipeline)
+    return counts
+
+def compile_prompt_set(version: str, components: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Compila os pipelines de prompts de uma versão dos componentes base.
+
+    Args:
+        version (str): Identificador da versão (ex.: updateTime do documento no Firestore).
+        components (Dict[str, Any]): Componentes com as chaves "ALL_lists" e "ALL_prompts".
+
+    Returns:
+        Dict[str, Any]: 'version', 'final_prompts' (com STATIC_TOKEN_COUNTS_KEY), 'prompts_dict',
+        'lists' e 'static_token_counts'.
+    """
+    start = perf_counter()
+    components = copy.deepcopy(components) # replace_values_by_lists altera os dicionários recebidos
+    final_prompts, prompts_dict = get_prompts_for_initial_analysis(components["ALL_lists"], components["ALL_prompts"])
+    try:
+        static_token_counts = count_static_tokens(final_prompts)
+    except Exception as e:
+        logger.warning(f"Não foi possível contar os tokens fixos dos prompts: {e}")
+        static_token_counts = {}
+    final_prompts[STATIC_TOKEN_COUNTS_KEY] = static_token_counts
+    logger.info(f"Prompts compilados (versão {version}) em {perf_counter() - start:.4f}s. Tokens fixos: {static_token_counts}")
+    return {
+        "version": version,
+        "final_prompts": final_prompts,
+        "prompts_dict": prompts_dict,
+        "lists": components["ALL_lists"],
+        "static_token_counts": static_token_counts,
+    }
+
+class PromptRegistry:
+    """
+    Mantém a versão compilada corrente dos prompts, com revalidação condicional e carga única
+    (sessões simultâneas aguardam a mesma carga em vez de repeti-la).
+
+    Args:
+        recheck_seconds (float): Intervalo mínimo entre verificações de versão na origem.
+        clock (Callable[[], float]): Relógio monotônico (injetável em testes).
+    """
+    def __init__(self, recheck_seconds: float = PROMPT_REGISTRY_RECHECK_SECONDS, clock: Callable[[], float] = monotonic):
+        self.recheck_seconds = recheck_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entry: Optional[Dict[str, Any]] = None
+        self._checked_at: Optional[float] = None
+
+    def current(self) -> Optional[Dict[str, Any]]:
+        return self._entry
+
+    def _is_fresh(self) -> bool:
+        return self._entry is not None and self._checked_at is not None and \
+            (self._clock() - self._checked_at) < self.recheck_seconds
+
+    def get(self, fetch_version: Callable[[], Optional[str]], fetch_components: ComponentsLoader,
+            fallback_components: Optional[ComponentsLoader] = None,
+            on_new_version: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Retorna a versão compilada corrente, revalidando-a na origem se o intervalo expirou.
+
+        Args:
+            fetch_version: Consulta barata da versão na origem (None se indisponível).
+            fetch_components: Carga completa dos componentes (versão, componentes).
+            fallback_components: Carga alternativa (ex.: cópia local), usada se a origem falhar
+                                 e não houver versão compilada.
+            on_new_version: Chamado com (versão, componentes) quando uma nova versão é baixada da origem.
+
+        Returns:
+            Optional[Dict[str, Any]]: Entrada de `compile_prompt_set`, ou None se nada pôde ser carregado.
+        """
+        with self._lock:
+            if self._is_fresh():
+                return self._entry
+
+            if self._entry is not None:
+                try:
+                    version = fetch_version()
+                except Exception as e:
+                    logger.warning(f"Falha ao verificar a versão dos prompts: {e}")
+                    version = None
+                if version is None or version == self._entry["version"]:
+                    # Versão inalterada (ou origem indisponível): mantém a compilação atual
+                    self._checked_at = self._clock()
+                    return self._entry
+
+            loaded, from_origin = None, False
+            try:
+                loaded = fetch_components()
+                from_origin = loaded is not None
+            except Exception as e:
+                logger.error(f"Falha ao carregar componentes de prompts da origem: {e}", exc_info=True)
+            if loaded is None and self._entry is None and fallback_components is not None:
+                loaded = fallback_components()
+            if loaded is None:
+                return self._entry
+
+            version, components = loaded
+            if self._entry is None or version != self._entry["version"]:
+                self._entry = compile_prompt_set(version, components)
+                if from_origin and on_new_version is not None:
+                    try:
+                        on_new_version(version, components)
+                    except Exception as e:
+                        logger.warning(f"Falha no tratamento da nova versão de prompts: {e}")
+            self._checked_at = self._clock()
+            return self._entry
+
+    def invalidate(self):
+        """Força a revalidação na próxima chamada de `get` (a compilação atual é mantida até lá)."""
+        with self._lock:
+            self._checked_at = None
+
+prompt_registry = PromptRegistry()
+
+execution_time = perf_counter() - start_time
+logger.debug(f"Carregado PROMPT_REGISTRY em {execution_time:.4f}s")
@@ -209,7 +209,7 @@ def return_parse_prompt(dados_respostas: List[str]) -> List[Dict[str, str]]:
 
 ### FUNÇÕES AUXILIARES:
 import json
-from src.utils import (get_sigla_uf, get_municipios_por_uf_cached, obter_string_normalizada_em_lista, clean_and_convert_to_float, convert_to_list_of_strings)
+from src.utils import (get_sigla_uf, clean_and_convert_to_float, convert_to_list_of_strings)
 
 dict_corregedorias_uf = {
     'AC': 'COR/SR/PF/AC', 
@@ -355,7 +355,8 @@ def normalizing_function(resposta_formatada: formatted_initial_analysis) -> form
     Returns:
         formatted_initial_analysis: A resposta formatada após a normalização.
     """
-    municipios_list = get_municipios_por_uf_cached()
+    from src.core.gazetteer import get_gazetteer
+    gazetteer = get_gazetteer()
 
     if not isinstance(resposta_formatada, formatted_initial_analysis):
         resposta_formatada = try_convert_to_pydantic_format(resposta_formatada, formatted_initial_analysis)
@@ -366,11 +367,9 @@ def normalizing_function(resposta_formatada: formatted_initial_analysis) -> form
         resposta_formatada.uf_origem = get_sigla_uf(resposta_formatada.uf_origem)
         resposta_formatada.uf_fato = get_sigla_uf(resposta_formatada.uf_fato)
         
-        municipios_origem_init = municipios_list.get(resposta_formatada.uf_origem, []) if resposta_formatada.uf_origem else []
-        resposta_formatada.municipio_origem = obter_string_normalizada_em_lista(resposta_formatada.municipio_origem, municipios_origem_init)
-
-        municipios_fato_init = municipios_list.get(resposta_formatada.uf_fato, []) if resposta_formatada.uf_fato else []
-        resposta_formatada.municipio_fato = obter_string_normalizada_em_lista(resposta_formatada.municipio_fato, municipios_fato_init)
+        # Grafia canônica do município na UF (exata ou aproximada por trigramas); None se não encontrado
+        resposta_formatada.municipio_origem = gazetteer.municipio(resposta_formatada.municipio_origem, resposta_formatada.uf_origem)
+        resposta_formatada.municipio_fato = gazetteer.municipio(resposta_formatada.municipio_fato, resposta_formatada.uf_fato)
     else:
         logger.warning(f"Resposta fora da formatação esperada: {type(resposta_formatada)}.\nCancelando normalização de dados.")
     
@@ -399,13 +398,11 @@ def review_function(resposta_formatada: formatted_initial_analysis) -> formatted
         destinacao_alterada = True
     elif resposta_formatada.municipio_fato not in dict_circunscrições["SR/PF/SP"]:
         # Conferido nomes com MUNICIPIOS_POR_UF["SP"]; os municípios da SR tiveram upper ativado.
-        from unidecode import unidecode
-        for dpf, municipios in dict_circunscrições.items():
-            municipios = [unidecode(m).lower() for m in municipios]
-            if unidecode(resposta_formatada.municipio_fato).lower() in municipios:
-                resposta_formatada.destinacao = dpf
-                destinacao_alterada = True
-                break
+        from src.core.gazetteer import get_gazetteer
+        dpf = get_gazetteer().circunscricao(resposta_formatada.municipio_fato)
+        if dpf:
+            resposta_formatada.destinacao = dpf
+            destinacao_alterada = True
     
     if destinacao_alterada:
         resposta_formatada.tipo_a_autuar = 'RDF - Registro de Fato'
@@ -0,0 +1,131 @@
+# src/core/text_compression.py
+"""
+Compressão extrativa do texto das páginas relevantes quando o orçamento de tokens é excedido.
+
+Em vez de cortar o texto numa posição fixa (reduce_text_to_limit), as frases das páginas
+selecionadas são pontuadas por TF-IDF (IDF calculado entre as páginas, como na relevância
+recalculada de `filter_and_classify_pages`). Frases quase idênticas a outras já mantidas
+(qualificações repetidas, blocos de assinatura) e as de menor informação por token são
+descartadas até o texto caber no orçamento; as demais permanecem na ordem original.
+"""
+import logging
+logger = logging.getLogger(__name__)
+
+from time import perf_counter
+start_time = perf_counter()
+logger.debug(f"{start_time:.4f}s - Iniciando text_compression.py")
+
+import re
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import normalize as sk_normalize
+
+from src.settings import (TEXT_COMPRESSION_REDUNDANCY_THRESHOLD, TEXT_COMPRESSION_MIN_KEEP_RATIO,
+                          TEXT_COMPRESSION_MAX_SENTENCES_FOR_SIMILARITY)
+
+# Fim de frase seguido de espaço e de um início provável de frase (maiúscula, dígito, aspas, marcador)
+SENTENCE_BOUNDARY_RE = re.compile(r'(?<=[.!?;:])\s+(?=[A-ZÀ-Ý0-9"“\'(\-•])')
+
+def split_sentences(text: str) -> List[str]:
+    """Divide o texto em frases (heurística leve, adequada a textos já normalizados em uma linha)."""
+    return [s.strip() for s in SENTENCE_BOUNDARY_RE.split(text or "") if s.strip()]
+
+def compress_pages(page_texts: Dict[str, str], token_budget: int, count_tokens_fn: Callable[[str], int],
+                   stop_words: Optional[Sequence[str]] = None,
+                   redundancy_threshold: float = TEXT_COMPRESSION_REDUNDANCY_THRESHOLD,
+                   min_keep_ratio: float = TEXT_COMPRESSION_MIN_KEEP_RATIO,
+                   max_sentences_for_similarity: int = TEXT_COMPRESSION_MAX_SENTENCES_FOR_SIMILARITY) -> Dict[str, Any]:
+    """
+    Comprime os textos das páginas até `token_budget` tokens (ou até o limite de `min_keep_ratio` por página).
+
+    Args:
+        page_texts (Dict[str, str]): Texto de cada página (chave global da página).
+        token_budget (int): Orçamento total de tokens.
+        count_tokens_fn (Callable[[str], int]): Contador de tokens.
+        stop_words (Optional[Sequence[str]]): Stopwords do TF-IDF.
+        redundancy_threshold (float): Similaridade de cosseno a partir da qual uma frase é redundante.
+        min_keep_ratio (float): Fração mínima dos tokens de cada página que é preservada.
+        max_sentences_for_similarity (int): Acima deste número de frases, só duplicatas exatas são removidas.
+
+    Returns:
+        Dict[str, Any]: 'texts' (páginas comprimidas; mesmas chaves), 'tokens_before', 'tokens_after',
+        'compression_ratio' (tokens_after / tokens_before), 'dropped_redundant' e 'dropped_low_info'.
+    """
+    sentences: List[Dict[str, Any]] = []
+    page_tokens: Dict[str, int] = {}
+    for key, text in page_texts.items():
+        page_tokens[key] = 0
+        for sentence in split_sentences(text):
+            tokens = count_tokens_fn(sentence)
+            sentences.append({"key": key, "text": sentence, "tokens": tokens, "kept": True})
+            page_tokens[key] += tokens
+
+    tokens_before = sum(page_tokens.values())
+    result = {"texts": dict(page_texts), "tokens_before": tokens_before, "tokens_after": tokens_before,
+              "compression_ratio": 1.0, "dropped_redundant": 0, "dropped_low_info": 0}
+    if tokens_before <= token_budget or len(sentences) < 2:
+        return result
+
+    # Pontuação: soma dos pesos TF-IDF por token da frase (IDF entre as páginas)
+    try:
+        vectorizer = TfidfVectorizer(stop_words=list(stop_words) if stop_words else None, norm=None)
+        vectorizer.fit(list(page_texts.values()))
+        weights = vectorizer.transform([s["text"] for s in sentences])
+    except ValueError: # Vocabulário vazio (só stopwords/números)
+        logger.warning("Compressão extrativa: vocabulário vazio; textos mantidos.")
+        return result
+    scores = np.asarray(weights.sum(axis=1)).ravel() / np.maximum(1, [s["tokens"] for s in sentences])
+    order = np.argsort(-scores, kind="stable")
+
+    # 1) Redundância: percorre da frase mais informativa para a menos; descarta quase-duplicatas das já mantidas
+    total = tokens_before
+    kept_per_page = dict(page_tokens)
+    seen_exact = set()
+    unit_vectors = sk_normalize(weights).tocsr() if len(sentences) <= max_sentences_for_similarity else None
+    kept_mask = np.zeros(len(sentences), dtype=bool)
+    for i in order:
+        sentence = sentences[i]
+        normalized = re.sub(r'\W+', ' ', sentence["text"].lower()).strip()
+        redundant = normalized in seen_exact
+        if not redundant and unit_vectors is not None and kept_mask.any() and unit_vectors[i].nnz:
+            similarities = (unit_vectors @ unit_vectors[i].T).toarray().ravel()
+            redundant = similarities[kept_mask].max() >= redundancy_threshold
+        if redundant:
+            sentence["kept"] = False
+            total -= sentence["tokens"]
+            kept_per_page[sentence["key"]] -= sentence["tokens"]
+            result["dropped_redundant"] += 1
+        else:
+            seen_exact.add(normalized)
+            kept_mask[i] = True
+
+    # 2) Baixa informação: descarta as frases de menor pontuação até caber, preservando min_keep_ratio de cada página
+    for i in order[::-1]:
+        if total <= token_budget:
+            break
+        sentence = sentences[i]
+        key = sentence["key"]
+        if not sentence["kept"] or kept_per_page[key] - sentence["tokens"] < min_keep_ratio * page_tokens[key]:
+            continue
+        sentence["kept"] = False
+        total -= sentence["tokens"]
+        kept_per_page[key] -= sentence["tokens"]
+        result["dropped_low_info"] += 1
+
+    # Reconstrói as páginas alteradas na ordem original das frases
+    changed_keys = {s["key"] for s in sentences if not s["kept"]}
+    kept_sentences: Dict[str, List[str]] = {key: [] for key in changed_keys}
+    for sentence in sentences:
+        if sentence["key"] in changed_keys and sentence["kept"]:
+            kept_sentences[sentence["key"]].append(sentence["text"])
+    for key in changed_keys:
+        result["texts"][key] = " ".join(kept_sentences[key])
+    tokens_after = sum(count_tokens_fn(result["texts"][key]) if key in changed_keys else page_tokens[key] for key in page_texts)
+    result["tokens_after"] = tokens_after
+    result["compression_ratio"] = tokens_after / tokens_before if tokens_before else 1.0
+    return result
+
+execution_time = perf_counter() - start_time
+logger.debug(f"Carregado TEXT_COMPRESSION em {execution_time:.4f}s")
@@ -30,6 +30,7 @@ from . import theme
 error_color = theme.COLOR_ERROR if hasattr(theme, 'COLOR_ERROR') else ft.Colors.RED
 
 from src.services.firebase_client import FbManagerAuth, FirebaseClientFirestore, _from_firestore_value
+from src.services.metrics_writer import get_metrics_writer, close_metrics_writer
 from src.logger.logger import LoggerSetup
 
 auth_manager = FbManagerAuth()
@@ -57,13 +58,26 @@ def load_default_analysis_settings(page: ft.Page):
         page.session.set(KEY_SESSION_ANALYSIS_SETTINGS, FALLBACK_ANALYSIS_SETTINGS.copy())
         return
 
+    providers_doc_path = f"{LLM_PROVIDERS_CONFIG_COLLECTION}/{LLM_PROVIDERS_DEFAULT_DOC_ID}"
+    embeddings_doc_path = f"{LLM_EMBEDDINGS_CONFIG_COLLECTION}/{LLM_EMBEDDINGS_DEFAULT_DOC_ID}" # Reutiliza a coleção, mas doc ID diferente
+    user_prefs_doc_path = f"{USER_LLM_PREFERENCES_COLLECTION}/{user_id}"
+    defaults_doc_path = f"{APP_DEFAULT_SETTINGS_COLLECTION}/{ANALYZE_PDF_DEFAULTS_DOC_ID}"
+
+    # 0. Leitura única: documentos globais do cache compartilhado; os demais em um só documents:batchGet
+    load_start = time.perf_counter()
+    documents, timings = firestore_client.load_documents_client(
+        user_token,
+        global_paths=[providers_doc_path, embeddings_doc_path, defaults_doc_path],
+        user_paths=[user_prefs_doc_path],
+    )
+    logger.info(f"Documentos de configuração carregados em {time.perf_counter() - load_start:.3f}s: " +
+                ", ".join(f"{path} ({t['source']}, {t['seconds']:.3f}s)" for path, t in timings.items()))
+
     # 1. Carregar Lista de Provedores LLM (Configuração Global)
     loaded_providers_list = []
-    providers_doc_path = f"{LLM_PROVIDERS_CONFIG_COLLECTION}/{LLM_PROVIDERS_DEFAULT_DOC_ID}"
     try:
-        response_providers = firestore_client._make_firestore_request("GET", user_token, providers_doc_path)
-        if response_providers.status_code == 200:
-            providers_doc_data = response_providers.json()
+        providers_doc_data = documents.get(providers_doc_path)
+        if providers_doc_data is not None:
             providers_array_fs = providers_doc_data.get("fields", {}).get("all_providers", {}).get("arrayValue", {}).get("values", [])
             if providers_array_fs:
                 # Cada item em providers_array_fs é um mapValue que precisa ser convertido
@@ -75,21 +89,17 @@ def load_default_analysis_settings(page: ft.Page):
                 logger.info(f"{len(loaded_providers_list)} provedores LLM carregados do Firestore.")
             else:
                 logger.warning(f"Documento de provedores LLM '{providers_doc_path}' não contém 'all_providers' ou está vazio.")
-        elif response_providers.status_code == 404:
-            logger.warning(f"Documento de configuração de provedores LLM '{providers_doc_path}' não encontrado.")
         else:
-            logger.error(f"Erro ao carregar provedores LLM: {response_providers.status_code} - {response_providers.text}")
+            logger.warning(f"Documento de configuração de provedores LLM '{providers_doc_path}' não encontrado.")
     except Exception as e_prov:
         logger.error(f"Exceção ao carregar provedores LLM: {e_prov}", exc_info=True)
     page.session.set(KEY_SESSION_LOADED_LLM_PROVIDERS, loaded_providers_list)
 
     # NOVO: 1.B. Carregar Lista de Custos de Modelos de Embedding
     loaded_embeddings_list = []
-    embeddings_doc_path = f"{LLM_EMBEDDINGS_CONFIG_COLLECTION}/{LLM_EMBEDDINGS_DEFAULT_DOC_ID}" # Reutiliza a coleção, mas doc ID diferente
     try:
-        response_embeddings = firestore_client._make_firestore_request("GET", user_token, embeddings_doc_path)
-        if response_embeddings.status_code == 200:
-            embeddings_doc_data = response_embeddings.json()
+        embeddings_doc_data = documents.get(embeddings_doc_path)
+        if embeddings_doc_data is not None:
             # Supondo que o documento tem um campo 'embeddings_costs' que é um array de maps
             embeddings_array_fs = embeddings_doc_data.get("fields", {}).get("all_models", {}).get("arrayValue", {}).get("values", [])
             if embeddings_array_fs:
@@ -105,40 +115,32 @@ def load_default_analysis_settings(page: ft.Page):
                 logger.info(f"{len(loaded_embeddings_list)} configurações de custo de embedding carregadas.")
             else:
                 logger.warning(f"Documento de custos de embedding '{embeddings_doc_path}' não contém 'all_models' ou está vazio.")
-        elif response_embeddings.status_code == 404:
-            logger.warning(f"Documento de custos de embedding '{embeddings_doc_path}' não encontrado.")
         else:
-            logger.error(f"Erro ao carregar custos de embedding: {response_embeddings.status_code} - {response_embeddings.text}")
+            logger.warning(f"Documento de custos de embedding '{embeddings_doc_path}' não encontrado.")
     except Exception as e_emb:
         logger.error(f"Exceção ao carregar custos de embedding: {e_emb}", exc_info=True)
     page.session.set(KEY_SESSION_MODEL_EMBEDDINGS_LIST, loaded_embeddings_list)
 
     # 2. Carregar Preferências de LLM do Usuário
     user_llm_preferences = {}
-    user_prefs_doc_path = f"{USER_LLM_PREFERENCES_COLLECTION}/{user_id}"
     try:
-        response_prefs = firestore_client._make_firestore_request("GET", user_token, user_prefs_doc_path)
-        if response_prefs.status_code == 200:
-            prefs_doc_data = response_prefs.json()
+        prefs_doc_data = documents.get(user_prefs_doc_path)
+        if prefs_doc_data is not None:
             fields = prefs_doc_data.get("fields", {})
             if fields:
                 user_llm_preferences = {k: _from_firestore_value(v) for k, v in fields.items()}
                 logger.info(f"Preferências de LLM do usuário '{user_id}' carregadas: {user_llm_preferences}")
-        elif response_prefs.status_code == 404:
-            logger.info(f"Nenhuma preferência de LLM salva para o usuário '{user_id}'.")
         else:
-            logger.error(f"Erro ao carregar preferências de LLM do usuário: {response_prefs.status_code} - {response_prefs.text}")
+            logger.info(f"Nenhuma preferência de LLM salva para o usuário '{user_id}'.")
     except Exception as e_prefs:
         logger.error(f"Exceção ao carregar preferências de LLM do usuário: {e_prefs}", exc_info=True)
     page.session.set(KEY_SESSION_USER_LLM_PREFERENCES, user_llm_preferences)
 
     # 3. Carregar Configurações Padrão de Análise (analyze_pdf_defaults)
     analysis_defaults = FALLBACK_ANALYSIS_SETTINGS.copy() # Começa com o fallback local
-    defaults_doc_path = f"{APP_DEFAULT_SETTINGS_COLLECTION}/{ANALYZE_PDF_DEFAULTS_DOC_ID}"
     try:
-        response_defaults = firestore_client._make_firestore_request("GET", user_token, defaults_doc_path)
-        if response_defaults.status_code == 200:
-            defaults_data = response_defaults.json()
+        defaults_data = documents.get(defaults_doc_path)
+        if defaults_data is not None:
             fields = defaults_data.get("fields", {})
             if fields:
                 raw_cloud_defaults = {k: _from_firestore_value(v) for k, v in fields.items()}
@@ -157,10 +159,8 @@ def load_default_analysis_settings(page: ft.Page):
                 logger.info("Configurações padrão de análise (defaults) carregadas do Firestore.")
             else:
                 logger.warning(f"Documento de defaults '{defaults_doc_path}' vazio. Usando fallbacks locais.")
-        elif response_defaults.status_code == 404:
-            logger.warning(f"Documento de defaults '{defaults_doc_path}' não encontrado. Usando fallbacks locais.")
         else:
-            logger.error(f"Erro ao carregar defaults de análise: {response_defaults.status_code} - {response_defaults.text}. Usando fallbacks locais.")
+            logger.warning(f"Documento de defaults '{defaults_doc_path}' não encontrado. Usando fallbacks locais.")
     except Exception as e_def:
         logger.error(f"Exceção ao carregar defaults de análise: {e_def}. Usando fallbacks locais.", exc_info=True)
     
@@ -281,6 +281,7 @@ def check_and_refresh_token_if_needed(page: ft.Page, force_refresh: bool = False
             logger.debug("Tokens atualizados também no client_storage.")
         
         LoggerSetup.set_cloud_user_context(new_id_token, page.session.get("auth_user_id"))
+        get_metrics_writer().set_user_token(page.session.get("auth_user_id"), new_id_token)
         return True
     else:
         logger.error("Falha ao renovar o ID Token. Deslogando usuário.")
@@ -361,6 +362,7 @@ def load_auth_state_from_storage(page: ft.Page):
 
         # Passo 3: Configurações pós-restauração
         LoggerSetup.set_cloud_user_context(final_id_token, final_user_id)
+        get_metrics_writer().set_user_token(final_user_id, final_id_token) # Reenvia métricas pendentes no spool
         logger.debug(f"Contexto do logger de nuvem restaurado para usuário {final_user_id}.")
 
         try:
@@ -507,7 +509,10 @@ def main(page: ft.Page, dev_mode: bool = DEV_MODE):
             cleanup_old_temp_files(temp_exports_path)
             cleanup_old_temp_files(UPLOAD_TEMP_DIR)
             
-            # 3. Flush e Encerramento SEGURO do Logger da Nuvem
+            # 3. Envio das métricas pendentes (o que não for enviado a tempo permanece no spool local)
+            close_metrics_writer(timeout=3)
+
+            # 4. Flush e Encerramento SEGURO do Logger da Nuvem
             if LoggerSetup._active_cloud_handler_instance:
                 logger.debug("Executando desligamento completo do CloudLogHandler...")
                 CloudLogHandler._force_upload_on_exit_static(LoggerSetup._active_cloud_handler_instance)
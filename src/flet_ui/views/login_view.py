@@ -7,6 +7,7 @@ from typing import Optional, Dict, Any
 from src.settings import PATH_IMAGE_LOGO_DEPARTAMENTO, APP_TITLE, APP_VERSION
 
 from src.services.firebase_client import FbManagerAuth # Ajuste o caminho se FbManagerAuth estiver em outro lugar
+from src.services.metrics_writer import get_metrics_writer
 #from src.flet_ui.layout import show_proxy_settings_dialog
 from src.flet_ui.components import show_snackbar, show_loading_overlay, hide_loading_overlay, ValidatedTextField
 from src.flet_ui import theme # Para cores de erro, etc.
@@ -254,6 +255,7 @@ def create_login_view(page: ft.Page) -> ft.View:
                     logger.error("Função 'load_settings_func' não encontrada em page.data! As configurações do usuário podem não ser carregadas.")
 
                 LoggerSetup.set_cloud_user_context(id_token, user_id)
+                get_metrics_writer().set_user_token(user_id, id_token) # Reenvia métricas pendentes no spool
                 # TENTA ADICIONAR CLOUD LOGGING AQUI
                 try:
                     if not LoggerSetup._active_cloud_handler_instance:
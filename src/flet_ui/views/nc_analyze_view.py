@@ -9,7 +9,7 @@ logger.info(f"[DEBUG] {start_time:.4f}s - Iniciando nc_analyze_view.py")
 
 import flet as ft
 import threading, os, shutil, json
-from typing import Optional, Dict, Any, List, Union, Tuple, Callable
+from typing import Optional, Dict, Any, List, Union, Tuple, Callable, get_origin, get_args
 from time import time, sleep
 from datetime import datetime
 from enum import Enum
@@ -27,20 +27,22 @@ from src.settings import (UPLOAD_TEMP_DIR, ASSETS_DIR, WEB_TEMP_EXPORTS_SUBDIR,
                           KEY_SESSION_ANALYSIS_SETTINGS, KEY_SESSION_CLOUD_ANALYSIS_DEFAULTS, 
                           FALLBACK_ANALYSIS_SETTINGS, KEY_SESSION_LOADED_LLM_PROVIDERS,
                           KEY_SESSION_TOKENS_EMBEDDINGS, KEY_SESSION_MODEL_EMBEDDINGS_LIST,
-                          PROMPTS_COLLECTION, PROMPTS_DOCUMENT_ID)
+                          PROMPTS_COLLECTION, PROMPTS_DOCUMENT_ID, LLM_MAP_REDUCE_CHUNK_TOKENS)
 
 from src.settings import (KEY_SESSION_CURRENT_BATCH_NAME, KEY_SESSION_PDF_FILES_ORDERED, KEY_SESSION_PROCESSING_METADATA, KEY_SESSION_LLM_METADATA, 
                           KEY_SESSION_FEEDBACK_COLLECTED_FOR_CURRENT_ANALYSIS, KEY_SESSION_LLM_REANALYSIS, KEY_SESSION_PDF_AGGREGATED_TEXT_INFO,
                           KEY_SESSION_PDF_LLM_RESPONSE, KEY_SESSION_PDF_LLM_RESPONSE_ACTUAL, KEY_SESSION_PDF_LLM_RESPONSE_SNAPSHOT_FOR_FEEDBACK,
-                          KEY_SESSION_PROMPTS_FINAL, KEY_SESSION_PROMPTS_DICT, KEY_SESSION_LIST_TO_PROMPTS)
+                          KEY_SESSION_PROMPTS_FINAL, KEY_SESSION_PROMPTS_DICT, KEY_SESSION_LIST_TO_PROMPTS,
+                          KEY_SESSION_PDF_MAP_REDUCE_CHUNKS)
 
 from src.services.firebase_client import FirebaseClientFirestore, _from_firestore_value
 
 from src.utils import (format_seconds_to_min_sec, clean_and_convert_to_float, convert_to_list_of_strings,
-                        get_lista_ufs_cached, get_municipios_por_uf_cached, calcular_similaridade_rouge_l)
+                        get_lista_ufs_cached, get_municipios_por_uf_cached, calcular_similaridades_rouge_l)
 
 # Outros imports pesados aqui:
-from src.core.prompts import (formatted_initial_analysis, get_prompts_for_initial_analysis)
+from src.core.prompts import formatted_initial_analysis
+from src.core.prompt_registry import prompt_registry
 
 from src.utils import _initialize_heavy_utils
 _initialize_heavy_utils()
@@ -48,6 +50,7 @@ _initialize_heavy_utils()
 from src.core.pdf_processor import PDFDocumentAnalyzer, PdfPlumberExtractor
 import src.core.ai_orchestrator as ai_orchestrator 
 from src.core.doc_generator import DocxExporter
+from src.profiling import MemoryProfiler, profiled_job, annotate_current_profile
 
 ufs_list = get_lista_ufs_cached()  # TODO: incluir atualização a partir do firestore
 municipios_list = get_municipios_por_uf_cached()
@@ -96,67 +99,75 @@ class FeedbackDialogAction(Enum):
 
 def load_prompts_from_firestore(page: ft.Page):
     """
-    Carrega os componentes base de prompts (ALL_lists, ALL_prompts) do Firestore,
-    constrói os pipelines de prompts finais e os armazena no cache do servidor.
+    Obtém os pipelines de prompts do registro compartilhado pelo processo (`prompt_registry`) e
+    guarda no cache do servidor apenas referências a eles (somente leitura).
+
+    O registro consulta a versão (updateTime) do documento no Firestore no máximo a cada
+    PROMPT_REGISTRY_RECHECK_SECONDS; o documento completo só é baixado, salvo localmente e
+    recompilado quando a versão muda. Sem acesso ao Firestore, usa a cópia local em assets.
     """
     logger.debug("Carregando componentes base de prompt...")
     user_token = page.session.get("auth_id_token")
-    user_id = page.session.get("auth_user_id")
     user_cache = get_user_cache(page)
 
     prompts_path = os.path.join(ASSETS_DIR, 'dict_prompts.json')
+    prompts_doc_path = f"{PROMPTS_COLLECTION}/{PROMPTS_DOCUMENT_ID}"
 
-    loaded_components = None
+    def _fetch_version():
+        if not user_token:
+            return None
+        # Máscara com campo inexistente: retorna só os metadados do documento (name, createTime, updateTime)
+        response = firestore_client._make_firestore_request("GET", user_token, prompts_doc_path,
+                                                            params={"mask.fieldPaths": "versao_prompts_probe"})
+        return response.json().get("updateTime") if response.status_code == 200 else None
 
-    if user_token:
-        prompts_doc_path = f"{PROMPTS_COLLECTION}/{PROMPTS_DOCUMENT_ID}"
-        try:
-            response = firestore_client._make_firestore_request("GET", user_token, prompts_doc_path)
-            if response.status_code == 200:
-                prompts_data = response.json()
-                fields = prompts_data.get("fields", {})
-                if fields:
-                    loaded_components = {k: _from_firestore_value(v) for k, v in fields.items()}
-                    logger.debug("Componentes base de prompt carregados com sucesso do Firestore.")
-                    # Salva uma cópia local ao baixar com sucesso
-                    with open(prompts_path, 'w', encoding='utf-8') as f:
-                        json.dump(loaded_components, f, ensure_ascii=False, indent=4)
-                        logger.debug(f"Cópia local dos prompts salva em: {prompts_path}")
-        except Exception as e:
-            logger.error(f"Exceção ao carregar componentes de prompts do Firestore: {e}", exc_info=True)
+    def _fetch_components():
+        if not user_token:
+            return None
+        response = firestore_client._make_firestore_request("GET", user_token, prompts_doc_path)
+        if response.status_code != 200:
+            return None
+        prompts_data = response.json()
+        fields = prompts_data.get("fields", {})
+        if not fields:
+            return None
+        logger.debug("Componentes base de prompt carregados com sucesso do Firestore.")
+        return prompts_data.get("updateTime") or "firestore", {k: _from_firestore_value(v) for k, v in fields.items()}
 
     # É esperado trabalhar somente com prompts baixados ou versão local em assets; 
     # prompts hardocoded em prompts.py serão descontinuados
-    if not loaded_components: 
-        if os.path.exists(prompts_path):
-            with open(prompts_path, 'r', encoding='utf-8') as f:
-                loaded_components = json.load(f)
-                logger.debug("Fallback: Componentes de prompts carregados localmente.")
-    
-    if not loaded_components:
-        msg_erro = "Nenhum componente de prompt carregado localmente."
-        logger.critical(msg_erro)
-        raise Exception(msg_erro)
+    def _load_local_components():
+        if not os.path.exists(prompts_path):
+            return None
+        with open(prompts_path, 'r', encoding='utf-8') as f:
+            logger.debug("Fallback: Componentes de prompts carregados localmente.")
+            return f"local:{os.path.getmtime(prompts_path):.0f}", json.load(f)
+
+    def _save_local_copy(version, components):
+        # Salva uma cópia local apenas quando uma nova versão é baixada
+        with open(prompts_path, 'w', encoding='utf-8') as f:
+            json.dump(components, f, ensure_ascii=False, indent=4)
+        logger.debug(f"Cópia local dos prompts (versão {version}) salva em: {prompts_path}")
 
-    user_cache = get_user_cache(page)
-    # Agora, construa os prompts finais usando os componentes carregados (do Firestore ou fallback)
     try:
-        # Passa os componentes carregados para a função de construção
-        final_prompts, prompts_dict = get_prompts_for_initial_analysis(
-            loaded_components["ALL_lists"],
-            loaded_components["ALL_prompts"]
-        )
-        # Armazena o resultado final no cache do servidor
-        user_cache[KEY_SESSION_PROMPTS_FINAL] = final_prompts
-        user_cache[KEY_SESSION_PROMPTS_DICT] = prompts_dict
-        user_cache[KEY_SESSION_LIST_TO_PROMPTS] = loaded_components["ALL_lists"]
-        logger.info("Pipelines de prompts finais construídos e armazenados no cache do servidor.")
+        entry = prompt_registry.get(_fetch_version, _fetch_components, _load_local_components, _save_local_copy)
     except Exception as e:
         logger.error(f"Falha ao construir pipelines de prompts finais: {e}", exc_info=True)
-        # Em caso de erro, armazena um dicionário vazio para evitar falhas posteriores
+        entry = None
+
+    if entry:
+        user_cache[KEY_SESSION_PROMPTS_FINAL] = entry["final_prompts"]
+        user_cache[KEY_SESSION_PROMPTS_DICT] = entry["prompts_dict"]
+        user_cache[KEY_SESSION_LIST_TO_PROMPTS] = entry["lists"]
+        logger.info(f"Pipelines de prompts (versão {entry['version']}) referenciados no cache do servidor.")
+    else:
+        msg_erro = "Nenhum componente de prompt carregado."
+        logger.critical(msg_erro)
+        # Armazena dicionários vazios para evitar falhas posteriores
         user_cache[KEY_SESSION_PROMPTS_FINAL] = {}
         user_cache[KEY_SESSION_PROMPTS_DICT] = {}
         user_cache[KEY_SESSION_LIST_TO_PROMPTS] = {}
+        raise Exception(msg_erro)
      
 class AnalyzePDFViewContent(ft.Column):
     """
@@ -835,6 +846,16 @@ class AnalyzePDFViewContent(ft.Column):
                  ft.PopupMenuItem(text="Nenhum template DOCX encontrado", disabled=True)
             )
 
+        # Exportação em lote: análises de um arquivo JSON (mesmo formato do modo sem interface de bulk_export)
+        export_button.items.append(ft.PopupMenuItem()) # Divisor
+        bulk_export_item = ft.PopupMenuItem(
+            text="Exportar Lote (ZIP) de Análises em JSON",
+            data="export_bulk_zip",
+            disabled=not self.page.web,
+        )
+        bulk_export_item.on_click = self.export_manager.handle_export_selected # Mesmo handler, que tratará 'export_bulk_zip'
+        export_button.items.append(bulk_export_item)
+
         # Opção de Gerenciar Templates (ainda desabilitada)
         export_button.items.append(ft.PopupMenuItem()) # Divisor
         manage_templates_item = ft.PopupMenuItem(
@@ -1028,6 +1049,8 @@ class AnalyzePDFViewContent(ft.Column):
                 #"count_selected_final":                         "Qtd. Páginas Selecionadas com limite de tokens",
                 ("final_aggregated_tokens",                      "Tokens totais das Páginas Selecionadas"),
                 ("supressed_tokens_percentage",                  "Percentual de Tokens Suprimidos"),
+                ("boilerplate_tokens_saved",                     "Tokens de Cabeçalhos/Rodapés Removidos"),
+                ("compression_ratio",                            "Razão de Compressão Extrativa"),
                 ("processing_time",                              "Tempo de processamento"),
                 ("calculated_embedding_cost_usd",                "Custos de Embeddings")
             ]
@@ -1056,6 +1079,12 @@ class AnalyzePDFViewContent(ft.Column):
                     if key == "supressed_tokens_percentage" and isinstance(value, (int, float)):
                         value = 0 if value < 0 else value
                         display_value = f"{value:.2f}%"
+                    elif key == "boilerplate_tokens_saved" and not value:
+                        continue
+                    elif key == "compression_ratio":
+                        if value is None:
+                            continue # Compressão não foi necessária
+                        display_value = f"{value:.1%} dos tokens mantidos"
                     elif key == "relevant_pages_global_keys_formatted" and value is not None:
                         total_value = metadata_to_display.get("count_selected_relevant")
                         display_value = f"{total_value} : {display_value}"
@@ -1124,10 +1153,12 @@ class AnalyzePDFViewContent(ft.Column):
             labels = [
                 ("input_tokens",         "Tokens de Entrada"),
                 ("cached_tokens",        "Tokens em Cache"),
+                ("cached_tokens_ratio",  "Aproveitamento do Cache"),
                 ("output_tokens",        "Tokens de Resposta"),
                 #"total_tokens",        "Total de Tokens Processados pela LLM",
                 ("total_cost_usd",       "Custo Estimado (USD)"),
                 ("total_cost_brl",       "Custo Estimado (BRL)"),
+                ("response_cache_hit",   "Resposta do Cache Local"),
                 ("llm_provider_used",    "Provedor LLM"),
                 ("llm_model_used",       "Modelo Utilizado"),
                 ("processing_time",      "Tempo de processamento")
@@ -1151,6 +1182,10 @@ class AnalyzePDFViewContent(ft.Column):
                     if key in ["total_cost_usd", "total_cost_brl"] and isinstance(value, (int, float)):
                         currency_symbol = "U$" if key == "total_cost_usd" else "R$"
                         display_value = f"{currency_symbol} {value:.4f}" # 4 casas decimais para custo
+                    elif key == "cached_tokens_ratio" and isinstance(value, (int, float)):
+                        display_value = f"{value:.1%}"
+                    elif key == "response_cache_hit":
+                        display_value = "Sim" if value else "Não"
                     
                     data_rows.append((label_text, display_value))
                 
@@ -1230,6 +1265,7 @@ class AnalyzePDFViewContent(ft.Column):
         
         self.user_cache = get_user_cache(self.page)
         self.user_cache.pop(KEY_SESSION_PDF_AGGREGATED_TEXT_INFO, None)
+        self.user_cache.pop(KEY_SESSION_PDF_MAP_REDUCE_CHUNKS, None)
         self.user_cache.pop(KEY_SESSION_PDF_LLM_RESPONSE, None)
         self.user_cache.pop(KEY_SESSION_PDF_LLM_RESPONSE_ACTUAL, None)
         self.user_cache.pop(KEY_SESSION_PDF_LLM_RESPONSE_SNAPSHOT_FOR_FEEDBACK, None)
@@ -1606,6 +1642,7 @@ class InternalAnalysisController:
             txt_to_update.weight = ft.FontWeight.BOLD if is_error else ft.FontWeight.NORMAL
             txt_to_update.update()
         
+    @profiled_job("pdf_processing")
     def _pdf_processing_thread_func(self, pdf_paths: List[str], batch_name: str, analyze_llm_after: bool, is_reanalysis: bool = False):
         """
         Função executada em uma thread separada para realizar o processamento de PDF.
@@ -1622,6 +1659,7 @@ class InternalAnalysisController:
         """
         current_analysis_settings = self._get_current_analysis_settings()
         logger.info(f"Usando configurações de análise para processamento: {current_analysis_settings}")
+        annotate_current_profile(settings=current_analysis_settings)
         pdf_extractor = current_analysis_settings.get("pdf_extractor", FALLBACK_ANALYSIS_SETTINGS["pdf_extractor"])
         provider = current_analysis_settings.get("llm_provider", FALLBACK_ANALYSIS_SETTINGS["llm_provider"])
         vectorization_model = current_analysis_settings.get("vectorization_model", FALLBACK_ANALYSIS_SETTINGS["vectorization_model"])
@@ -1640,16 +1678,19 @@ class InternalAnalysisController:
         if decrypted_api_key:
             logger.debug(f"Chave API descriptografada para '{provider}' obtida da sessão.")
  
+        mem_profiler = MemoryProfiler(job_name=batch_name, extra_info=current_analysis_settings)
         try:
             start_time = perf_counter()
  
             logger.debug(f"Thread: Iniciando processamento de PDFs para '{batch_name}' (LLM depois: {analyze_llm_after})")
             self.page.run_thread(self._update_status_callback, "Etapa 1/5: Extraindo textos do(s) arquivo(s) selecionado(s)...")
  
-            processed_files_metadata, all_indices, all_texts_to_storage, all_texts_to_loop = \
+            with mem_profiler.stage("extract_texts_and_preprocess_files"):
+                processed_files_metadata, all_indices, all_texts_to_storage, all_texts_to_loop = \
                                 self.pdf_analyzer.extract_texts_and_preprocess_files(pdf_paths)
  
-            processed_page_data_combined, all_global_page_keys_ordered = \
+            with mem_profiler.stage("build_combined_page_data"):
+                processed_page_data_combined, all_global_page_keys_ordered = \
                                 self.pdf_analyzer.build_combined_page_data(processed_files_metadata, all_indices, all_texts_to_storage)
  
             self.page.run_thread(self._update_status_callback, f"Etapa 2/5: Processando {len(processed_page_data_combined)} páginas...")
@@ -1662,10 +1703,12 @@ class InternalAnalysisController:
                     assert decrypted_api_key, "Chave de API não encontrada ou não cadastrada! Verifique."
  
                 loaded_embeddings_providers = self.page.session.get(KEY_SESSION_MODEL_EMBEDDINGS_LIST)
-                ready_embeddings, tokens_embeddings, calculated_embedding_cost_usd = ai_orchestrator.get_embeddings_from_api(
+                with mem_profiler.stage("get_embeddings_from_api"):
+                    ready_embeddings, tokens_embeddings, calculated_embedding_cost_usd = ai_orchestrator.get_embeddings_from_api(
                                                                                      all_texts_to_loop, vectorization_model, decrypted_api_key, loaded_embeddings_providers)
  
-            embedding_vectors_combined, tfidf_vectors_combined, tf_idf_scores_array_combined = self.pdf_analyzer.get_similarity_and_tfidf_score_docs(
+            with mem_profiler.stage("get_similarity_and_tfidf_score_docs"):
+                embedding_vectors_combined, tfidf_vectors_combined, tf_idf_scores_array_combined = self.pdf_analyzer.get_similarity_and_tfidf_score_docs(
                                                                             all_texts_to_loop, model_embedding=vectorization_model, ready_embeddings=ready_embeddings)
             
             point_time = perf_counter()
@@ -1683,7 +1726,8 @@ class InternalAnalysisController:
                 raise ValueError("Nenhum dado processável encontrado nos PDFs.")
             
             #pr-int('\n[DEBUG]:\n', processed_page_data_combined, '\n\n')
-            classified_data = self.pdf_analyzer.filter_and_classify_pages(processed_page_data_combined, all_global_page_keys_ordered,
+            with mem_profiler.stage("filter_and_classify_pages"):
+                classified_data = self.pdf_analyzer.filter_and_classify_pages(processed_page_data_combined, all_global_page_keys_ordered,
                                                                           embedding_vectors_combined, tfidf_vectors_combined, tf_idf_scores_array_combined,
                                                                           mode_main_filter, mode_filter_similar, similarity_threshold)
             
@@ -1698,13 +1742,30 @@ class InternalAnalysisController:
             point_time = perf_counter()
             self.page.run_thread(self._update_status_callback, "Etapa 4/5: Filtrando páginas...")
  
-            aggregated_info = self.pdf_analyzer.group_texts_by_relevance_and_token_limit(processed_page_data_combined, relevant_ordered_indices, token_limit_pref)
+            # Acima do limite: compressão extrativa das páginas relevantes antes da seleção por orçamento
+            with mem_profiler.stage("compress_relevant_pages"):
+                compression_info = self.pdf_analyzer.compress_relevant_pages(processed_page_data_combined, relevant_ordered_indices, token_limit_pref)
+
+            with mem_profiler.stage("group_texts_by_relevance_and_token_limit"):
+                aggregated_info = self.pdf_analyzer.group_texts_by_relevance_and_token_limit(processed_page_data_combined, relevant_ordered_indices, token_limit_pref)
             
-            self.user_cache = get_user_cache(self.page)
-            self.user_cache[KEY_SESSION_PDF_AGGREGATED_TEXT_INFO] = aggregated_info
+            # Conteúdo relevante acima do limite: blocos para o modo map-reduce (prompt_structure="map_reduce").
+            # A decisão usa o total anterior à compressão extrativa, que mantém ao menos metade de cada página
+            relevant_tokens_uncompressed = compression_info["tokens_before"] if compression_info else aggregated_info[2]
+            map_reduce_chunks = None
+            if relevant_tokens_uncompressed > token_limit_pref:
+                with mem_profiler.stage("build_map_reduce_chunks"):
+                    map_reduce_chunks = self.pdf_analyzer.build_map_reduce_chunks(processed_page_data_combined, relevant_ordered_indices,
+                                                                                  min(LLM_MAP_REDUCE_CHUNK_TOKENS, token_limit_pref))
+
+            with mem_profiler.stage("store_in_user_cache"):
+                self.user_cache = get_user_cache(self.page)
+                self.user_cache[KEY_SESSION_PDF_AGGREGATED_TEXT_INFO] = aggregated_info
+                self.user_cache[KEY_SESSION_PDF_MAP_REDUCE_CHUNKS] = map_reduce_chunks
             self.page.session.set("has_analyzer_data", True)
             
-            pages_agg_indices, _, tokens_antes_agg, tokens_final_agg = aggregated_info
+            pages_agg_indices, _, _, tokens_final_agg = aggregated_info
+            tokens_antes_agg = relevant_tokens_uncompressed # Comparável com registros anteriores à compressão extrativa
             count_sel_final = len(pages_agg_indices)
             #pr-int('\n[DEBUG]:\n', pages_agg_indices, '\n\n')
  
@@ -1725,6 +1786,8 @@ class InternalAnalysisController:
                 "count_selected_final": count_sel_final,
                 "final_aggregated_tokens": tokens_final_agg,
                 "supressed_tokens_percentage": perc_supressed,
+                "boilerplate_tokens_saved": (getattr(self.pdf_analyzer, "last_boilerplate_stats", None) or {}).get("tokens_saved"),
+                "compression_ratio": compression_info["compression_ratio"] if compression_info else None,
                 "processing_time": format_seconds_to_min_sec(total_processing_time),
                 "calculated_embedding_cost_usd": calculated_embedding_cost_usd
             }
@@ -1752,6 +1815,7 @@ class InternalAnalysisController:
             self.page.run_thread(self._update_status_callback, f"Erro ao processar PDFs: {ex_proc}", True, True)
             self.parent_view._files_processed = False # Falhou
         finally:
+            mem_profiler.write_report()
             self.gui_controls[CTL_PROC_METADATA_PANEL].visible = True
             self.gui_controls[CTL_PROC_METADATA_PANEL].controls[0].expanded = True
             hide_loading_overlay(self.page)
@@ -1840,6 +1904,7 @@ class InternalAnalysisController:
         return (user_id, user_token, filenames_uploaded, proc_meta_session, tokens_embeddings_session, llm_meta_session,
             current_settings, default_settings, llm_response_obj, fields_to_log)
     
+    @profiled_job("llm_analysis")
     def _llm_analysis_thread_func(self, aggregated_text: str, batch_name: str, is_reanalysis: bool = False):
         """
         Função executada em uma thread separada para realizar a análise LLM.
@@ -1856,6 +1921,7 @@ class InternalAnalysisController:
  
         current_analysis_settings = self._get_current_analysis_settings()
         logger.debug(f"Usando configurações de análise para LLM: {current_analysis_settings}")
+        annotate_current_profile(settings=current_analysis_settings)
         provider = current_analysis_settings.get("llm_provider", FALLBACK_ANALYSIS_SETTINGS["llm_provider"])
         model_name = current_analysis_settings.get("llm_model", FALLBACK_ANALYSIS_SETTINGS["llm_model"])
         temperature = current_analysis_settings.get("llm_temperature", FALLBACK_ANALYSIS_SETTINGS["llm_temperature"])
@@ -1863,10 +1929,16 @@ class InternalAnalysisController:
   
         if mode_prompt == "sequential_prompts":
             key_prompt_group = "PROMPTS_SEGMENTADOS_for_INITIAL_ANALYSIS"
-        else: # if mode_prompt == "prompt_unico":
+        else: # if mode_prompt in ("prompt_unico", "map_reduce"):
             key_prompt_group = "PROMPT_UNICO_for_INITIAL_ANALYSIS"
 
+        # PROMPT_UNICO em streaming: campos concluídos aparecem na GUI enquanto a resposta chega
+        on_partial_fields = self._show_partial_llm_fields if key_prompt_group == "PROMPT_UNICO_for_INITIAL_ANALYSIS" else None
+
         self.user_cache = get_user_cache(self.page)
+        map_reduce_chunks = self.user_cache.get(KEY_SESSION_PDF_MAP_REDUCE_CHUNKS) if mode_prompt == "map_reduce" else None
+        if mode_prompt == "map_reduce" and not map_reduce_chunks:
+            logger.info("Modo map-reduce: conteúdo relevante cabe no limite de tokens; usando o prompt único.")
         loaded_prompts = self.user_cache.get(KEY_SESSION_PROMPTS_FINAL)
         if not loaded_prompts:
             logger.error("Prompts ausentes para a thread de análise!")
@@ -1888,9 +1960,17 @@ class InternalAnalysisController:
  
             loaded_llm_providers = self.page.session.get(KEY_SESSION_LOADED_LLM_PROVIDERS)
  
-            llm_response_data, token_usage_info, processing_time_llm = ai_orchestrator.analyze_text_with_llm(key_prompt_group, loaded_prompts, aggregated_text,
+            if map_reduce_chunks:
+                self.page.run_thread(self._update_status_callback, f"Etapa 5/5: Analisando {len(map_reduce_chunks)} blocos do documento (map-reduce)...")
+                llm_response_data, token_usage_info, processing_time_llm = ai_orchestrator.analyze_text_with_llm_map_reduce(
+                                                                                                 loaded_prompts, map_reduce_chunks,
                                                                                                  provider, model_name, temperature,
                                                                                                  decrypted_api_key, loaded_llm_providers)
+            else:
+                llm_response_data, token_usage_info, processing_time_llm = ai_orchestrator.analyze_text_with_llm(key_prompt_group, loaded_prompts, aggregated_text,
+                                                                                                 provider, model_name, temperature,
+                                                                                                 decrypted_api_key, loaded_llm_providers,
+                                                                                                 on_partial_fields=on_partial_fields)
  
             if llm_response_data:
                 # Se já existe uma llm_response na sessão é porque é caso de reanálise (usuário clicou em 'Solicitar Análise' novamente).
@@ -1936,6 +2016,27 @@ class InternalAnalysisController:
             hide_loading_overlay(self.page)
             # A atualização da GUI já foi tratada dentro do try/except, não precisa aqui.
  
+    def _show_partial_llm_fields(self, partial_fields: Dict[str, Any]):
+        """
+        Callback do streaming da LLM: exibe os campos já recebidos no LLMStructuredResultDisplay
+        (somente leitura) e informa o progresso. A resposta completa substitui o conteúdo ao final.
+
+        Args:
+            partial_fields (Dict[str, Any]): Campos de formatted_initial_analysis concluídos até o momento.
+        """
+        structured_result = self.gui_controls[CTL_LLM_STRUCTURED_RESULT_DISPLAY]
+        if not isinstance(structured_result, LLMStructuredResultDisplay):
+            return
+        if not structured_result.visible:
+            self.gui_controls[CTL_LLM_RESULT_INFO_BALLOON].visible = False
+            self.gui_controls[CTL_LLM_RESULT_TEXT].visible = False
+            structured_result.visible = True
+            if self.parent_view.llm_result_container.page and self.parent_view.llm_result_container.uid:
+                self.parent_view.llm_result_container.update()
+        structured_result.show_partial_data(partial_fields)
+        total_fields = len(formatted_initial_analysis.model_fields)
+        self.page.run_thread(self._update_status_callback, f"Etapa 5/5: Recebendo análise da LLM ({len(partial_fields)}/{total_fields} campos)...")
+
     def start_pdf_processing_only(self, pdf_paths: List[str], batch_name: str):
         """
         Inicia o processo de extração e pré-processamento de PDF em uma nova thread.
@@ -2084,6 +2185,108 @@ class InternalExportManager:
         else: # Desktop
             raise ValueError("Método não customizado para desktop!")
 
+    def start_bulk_export(self, analyses: List[Tuple[str, formatted_initial_analysis]], template_path: Optional[str] = None):
+        """
+        Exporta várias análises (um DOCX por caso) em um único ZIP, em thread de trabalho,
+        exibindo o progresso no overlay de carregamento e iniciando o download ao final (modo web).
+
+        Args:
+            analyses (List[Tuple[str, formatted_initial_analysis]]): Pares (nome do arquivo, análise).
+            template_path (Optional[str]): Template DOCX; se None, usa a exportação simples.
+        """
+        if not analyses:
+            show_snackbar(self.page, "Nenhuma análise selecionada para exportação.", theme.COLOR_WARNING)
+            return
+        if not self.page.web:
+            logger.warning("ExportManager (lote): exportação em lote solicitada fora do modo web.")
+            show_snackbar(self.page, "Exportação em lote disponível apenas no modo web.", theme.COLOR_ERROR)
+            return
+
+        def _run_bulk_export():
+            from src.core.bulk_export import export_bulk_docx
+            temp_exports_path = os.path.join(ASSETS_DIR, WEB_TEMP_EXPORTS_SUBDIR)
+            zip_filename = f"analises_lote_{int(time())}.zip"
+            try:
+                os.makedirs(temp_exports_path, exist_ok=True)
+                show_loading_overlay(self.page, f"Exportando {len(analyses)} análises...")
+                result = export_bulk_docx(
+                    analyses, os.path.join(temp_exports_path, zip_filename), template_path=template_path,
+                    progress_callback=lambda done, total: show_loading_overlay(self.page, f"Exportando análises: {done}/{total}..."))
+            except Exception as e:
+                logger.error(f"ExportManager (lote): Falha na exportação em lote: {e}", exc_info=True)
+                hide_loading_overlay(self.page)
+                show_snackbar(self.page, "Falha ao gerar o arquivo ZIP das análises.", theme.COLOR_ERROR)
+                return
+
+            hide_loading_overlay(self.page)
+            if not result["exported"]:
+                show_snackbar(self.page, "Falha ao gerar os documentos das análises.", theme.COLOR_ERROR)
+                return
+            self.page.launch_url(f"/{WEB_TEMP_EXPORTS_SUBDIR}/{zip_filename}", web_window_name="_blank")
+            if result["failed"]:
+                show_snackbar(self.page, f"{result['exported']} documentos exportados; {len(result['failed'])} falharam.", theme.COLOR_WARNING)
+            else:
+                show_snackbar(self.page, f"Download de '{zip_filename}' iniciado ({result['exported']} documentos).", theme.COLOR_SUCCESS)
+
+        self.page.run_thread(_run_bulk_export)
+
+    def handle_bulk_export_click(self):
+        """
+        Handler para o item 'Exportar Lote (ZIP)'.
+
+        Solicita o JSON com as análises (lista de análises ou {nome_arquivo: análise}, como no modo sem
+        interface de src/core/bulk_export.py), faz o upload e inicia `start_bulk_export` ao final.
+        """
+        if not self.page.web:
+            show_snackbar(self.page, "Exportação em lote disponível apenas no modo web.", theme.COLOR_ERROR)
+            return
+        if not self.global_file_picker:
+            show_snackbar(self.page, "Erro: Seletor de arquivos não pronto.", theme.COLOR_ERROR)
+            return
+
+        self.global_file_picker.on_result = self._upload_picked_file_web
+        self.global_file_picker.on_upload = self.on_bulk_json_uploaded_web
+        self.global_file_picker.pick_files(
+            dialog_title="Selecionar JSON das Análises",
+            allowed_extensions=["json"],
+            allow_multiple=False)
+
+    def on_bulk_json_uploaded_web(self, e: ft.FilePickerUploadEvent):
+        """
+        Handler para o upload do JSON de análises da exportação em lote (modo web).
+
+        Args:
+            e (ft.FilePickerUploadEvent): O evento de upload do FilePicker.
+        """
+        if e.error:
+            hide_loading_overlay(self.page)
+            show_snackbar(self.page, f"Erro no upload do JSON: {e.error}", theme.COLOR_ERROR)
+            return
+        if e.progress is not None and e.progress < 1.0:
+            return
+
+        hide_loading_overlay(self.page)
+        source_path_server = os.path.join(UPLOAD_TEMP_DIR, e.file_name)
+        for _ in range(5):
+            if os.path.exists(source_path_server):
+                break
+            sleep(0.3)
+
+        from src.core.bulk_export import load_analyses_json
+        try:
+            analyses = load_analyses_json(source_path_server)
+        except Exception as ex:
+            logger.error(f"ExportManager (lote): JSON de análises inválido '{e.file_name}': {ex}", exc_info=True)
+            show_snackbar(self.page, "Arquivo JSON de análises inválido.", theme.COLOR_ERROR)
+            return
+        finally:
+            try:
+                os.remove(source_path_server)
+            except OSError as er:
+                logger.warning(f"Não remover temp do lote '{source_path_server}': {er}")
+
+        self.start_bulk_export(analyses)
+
     def handle_add_new_template_click(self):
         """
         Handler para o clique no item 'Adicionar Novo Template'.
@@ -2155,7 +2358,15 @@ class InternalExportManager:
         """
         Handler para a seleção de um arquivo de template no modo web (antes do upload).
 
-        Prepara o URL de upload e inicia o processo de upload do arquivo para o servidor temporário.
+        Args:
+            e (ft.FilePickerResultEvent): O evento do FilePicker com os arquivos selecionados.
+        """
+        self._upload_picked_file_web(e)
+
+    def _upload_picked_file_web(self, e: ft.FilePickerResultEvent):
+        """
+        Prepara o URL de upload e inicia o upload do arquivo selecionado para o servidor temporário (modo web).
+        O handler `on_upload` configurado no FilePicker trata a conclusão.
 
         Args:
             e (ft.FilePickerResultEvent): O evento do FilePicker com os arquivos selecionados.
@@ -2175,14 +2386,14 @@ class InternalExportManager:
         try:
             upload_url = self.page.get_upload_url(file_name, expires=300)
             if not upload_url:
-                raise ValueError("URL de upload template não gerada.")
+                raise ValueError("URL de upload não gerada.")
             
             self.global_file_picker.upload([
                 ft.FilePickerUploadFile(name=file_name, upload_url=upload_url)])
             show_loading_overlay(self.page, f"Fazendo upload de '{file_name}'...")
             self.page.update()
         except Exception as ex:
-            logger.error(f"Erro upload template web: {ex}", exc_info=True)
+            logger.error(f"Erro upload web de '{file_name}': {ex}", exc_info=True)
             show_snackbar(self.page, f"Erro upload: {ex}", theme.COLOR_ERROR)
             hide_loading_overlay(self.page)
 
@@ -2357,6 +2568,9 @@ class InternalExportManager:
         elif selected_action_data == "manage_templates":
             self.handle_add_new_template_click()
             return
+        elif selected_action_data == "export_bulk_zip":
+            self.handle_bulk_export_click()
+            return
         else:
             logger.warning(f"Ação de exportação desconhecida: {selected_action_data}")
             return
@@ -2475,6 +2689,7 @@ class SettingsDrawerManager:
             content=ft.Column([
                 ft.Radio(value="prompt_unico", label="Prompt Único"),
                 ft.Radio(value="sequential_prompts", label="Prompt Agrupado", disabled=False),
+                ft.Radio(value="map_reduce", label="Map-Reduce (documentos extensos)"),
             ], spacing=1), value=current_analysis_settings.get("prompt_structure")
         )
  
@@ -2953,7 +3168,11 @@ class LLMStructuredResultDisplay(ft.Column):
                 # mas sabendo que pode não ser o "verdadeiro" original da LLM.
                 self.user_cache[KEY_SESSION_PDF_LLM_RESPONSE_SNAPSHOT_FOR_FEEDBACK] = self.original_llm_data_snapshot
 
-        # Limpa controles antigos e reconstrói a UI
+        self.disabled = False # Fim de eventual streaming: libera edição
+        self._rebuild_controls()
+
+    def _rebuild_controls(self):
+        """Limpa os controles e reconstrói campos e cards a partir de self.data."""
         self.controls.clear()
         self.gui_fields.clear()
 
@@ -2973,6 +3192,29 @@ class LLMStructuredResultDisplay(ft.Column):
         else:
             if self.page and self.uid: self.update()
 
+    def show_partial_data(self, partial_fields: Dict[str, Any]):
+        """
+        Exibe, em modo somente leitura, os campos já recebidos de uma resposta em streaming.
+        Os demais campos ficam vazios até a chegada da resposta completa (update_data).
+        Não altera snapshots de feedback.
+
+        Args:
+            partial_fields (Dict[str, Any]): Campos de formatted_initial_analysis concluídos até o momento.
+        """
+        values = {}
+        for name, field_info in formatted_initial_analysis.model_fields.items():
+            is_list = get_origin(field_info.annotation) is list or List[str] in get_args(field_info.annotation)
+            values[name] = [] if is_list else ""
+        for name, value in partial_fields.items():
+            if name in values and value is not None:
+                values[name] = value
+        if isinstance(values["valor_apuracao"], (int, float)):
+            values["valor_apuracao"] = float(values["valor_apuracao"])
+
+        self.data = formatted_initial_analysis.model_construct(**values) # Sem validação: dados ainda incompletos
+        self.disabled = True
+        self._rebuild_controls()
+
     def _create_field_with_icon(self, field_control, justificativa_text):
         """Cria um campo com ícone de justificativa de forma consistente."""
         return ft.Row(
@@ -3768,7 +4010,24 @@ class FeedbackWorkflowManager:
         # que deve ter sido chamado antes de _get_prepared_feedback_data ser invocado.
         current_data_ui = llm_display_component.data 
 
-        feedback_fields_data = get_prepared_feedback_data(original_snapshot, current_data_ui, llm_display_component.gui_fields)
+        # A comparação dos campos (incluindo o ROUGE-L dos textos editados) roda fora da thread da interface;
+        # o diálogo é exibido ao final, como nos demais fluxos que usam page.run_thread.
+        self.page.run_thread(self._prepare_feedback_and_show_dialog, action_context_name, primary_action_callable,
+                             original_snapshot, current_data_ui, llm_display_component.gui_fields)
+
+    def _prepare_feedback_and_show_dialog(
+        self,
+        action_context_name: str,
+        primary_action_callable: Callable[[], None],
+        original_snapshot: formatted_initial_analysis,
+        current_data_ui: formatted_initial_analysis,
+        gui_fields: Dict[str, ft.Control],
+    ):
+        """
+        Prepara os dados de feedback (em thread de trabalho) e exibe o diálogo, ou segue
+        direto para a ação primária se não houver o que avaliar.
+        """
+        feedback_fields_data = get_prepared_feedback_data(original_snapshot, current_data_ui, gui_fields)
 
         if not feedback_fields_data:
             logger.warning(f"FeedbackWorkflowManager: Não foi possível preparar dados para feedback para '{action_context_name}'. Prosseguindo sem feedback.")
@@ -3934,6 +4193,8 @@ def get_prepared_feedback_data(original_snapshot: formatted_initial_analysis, cu
         return None
 
     feedback_field_data_prepared  = []
+    entries_for_similarity: List[Dict[str, Any]] = []
+    pairs_for_similarity: List[Tuple[str, str]] = []
     fields_for_feedback = [
         "descricao_geral", "tipo_documento_origem", "orgao_origem", "uf_origem", "municipio_origem",
         "resumo_fato", "tipo_local", "uf_fato", "municipio_fato", "valor_apuracao",
@@ -3986,13 +4247,15 @@ def get_prepared_feedback_data(original_snapshot: formatted_initial_analysis, cu
             "valor_atual_ui": current_value_ui,
         }
 
-        # Adiciona similaridade apenas se editado e for um tipo de texto aplicável
+        # Adiciona similaridade apenas se editado e for um tipo de texto aplicável (calculada em lote abaixo)
         if foi_editado and tipo_campo_str in ["textfield_multiline", "textfield", "textfield_lista"]:
-            field_data_entry["similaridade_pos_edicao"] = calcular_similaridade_rouge_l(
-                str(original_value or ""), str(current_value_ui or "")
-            )
+            entries_for_similarity.append(field_data_entry)
+            pairs_for_similarity.append((str(original_value or ""), str(current_value_ui or "")))
         
         feedback_field_data_prepared.append(field_data_entry)
+
+    for field_data_entry, similarity in zip(entries_for_similarity, calcular_similaridades_rouge_l(pairs_for_similarity)):
+        field_data_entry["similaridade_pos_edicao"] = similarity
         
     return feedback_field_data_prepared
 
@@ -0,0 +1,458 @@
+# src/profiling.py
+"""
+Ferramentas de profiling opt-in do pipeline de análise.
+
+- MemoryProfiler: registra, por etapa, o pico e a memória retida (tracemalloc) e o
+  RSS do processo (amostrado em thread auxiliar), gravando relatório e principais
+  sítios de alocação em PATH_LOGS_DIR/profiling.
+- profiled_job / profile_job: envolve um job de análise (thread de processamento ou de LLM)
+  em cProfile (.prof + resumo pstats) ou em um profiler por amostragem de baixo overhead
+  (.folded, compatível com flamegraph.pl/speedscope), com upload opcional pelo CloudLogHandler.
+
+Quando desabilitados, o custo é apenas a leitura de uma variável de ambiente.
+"""
+import logging
+logger = logging.getLogger(__name__)
+
+from time import perf_counter
+start_time = perf_counter()
+logger.debug(f"{start_time:.4f}s - Iniciando profiling.py")
+
+import os, re, sys, json, threading, tracemalloc, functools
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from src.settings import (PROFILING_REPORTS_DIR, MEMORY_PROFILING_ENV_VAR, MEMORY_PROFILING_TOP_N,
+                          MEMORY_PROFILING_TRACE_FRAMES, MEMORY_PROFILING_RSS_INTERVAL,
+                          CPU_PROFILING_ENV_VAR, CPU_PROFILING_UPLOAD_ENV_VAR, CPU_PROFILING_SAMPLE_INTERVAL,
+                          CPU_PROFILING_STATS_LINES, CLOUD_PROFILING_FOLDER)
+
+_MB = 1024 * 1024
+_ENV_TRUE_VALUES = ("1", "true", "yes", "sim", "on")
+
+def _env_flag_enabled(env_var: str) -> bool:
+    """Retorna True se a variável de ambiente estiver definida com um valor afirmativo."""
+    return os.getenv(env_var, "").strip().lower() in _ENV_TRUE_VALUES
+
+def is_memory_profiling_enabled() -> bool:
+    """Indica se o perfil de memória está ativo (lido a cada job, sem reiniciar a aplicação)."""
+    return _env_flag_enabled(MEMORY_PROFILING_ENV_VAR)
+
+def _safe_filename(text: str, max_len: int = 60) -> str:
+    """Normaliza um texto livre (ex.: nome do lote) para uso em nome de arquivo."""
+    safe = re.sub(r"[^\w\-]+", "_", str(text or "job")).strip("_")
+    return safe[:max_len] or "job"
+
+def get_rss_bytes() -> Optional[int]:
+    """
+    Retorna o RSS atual do processo em bytes.
+    Usa psutil se disponível; em Linux, recorre a /proc/self/statm. Retorna None se indisponível.
+    """
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    except Exception as e:
+        logger.debug(f"Falha ao obter RSS via psutil: {e}")
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        return None
+
+class _RssSampler:
+    """Amostra o RSS em uma thread daemon enquanto uma etapa está em execução, guardando o pico."""
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.peak: Optional[int] = get_rss_bytes()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="RssSampler")
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            rss = get_rss_bytes()
+            if rss is not None and (self.peak is None or rss > self.peak):
+                self.peak = rss
+
+    def __enter__(self):
+        if self.peak is not None:
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop_event.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout=1)
+        rss = get_rss_bytes()
+        if rss is not None and (self.peak is None or rss > self.peak):
+            self.peak = rss
+
+# O tracemalloc é global ao processo: contabiliza quantos perfis estão ativos para
+# só interromper o rastreamento quando o último terminar.
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+
+def _acquire_tracemalloc():
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(MEMORY_PROFILING_TRACE_FRAMES)
+        _tracemalloc_users += 1
+
+def _release_tracemalloc():
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        _tracemalloc_users = max(0, _tracemalloc_users - 1)
+        if _tracemalloc_users == 0 and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+class MemoryProfiler:
+    """
+    Perfil de memória por etapa de um job (ex.: processamento de um lote de PDFs).
+
+    Uso:
+        mem_profiler = MemoryProfiler(job_name=batch_name)
+        with mem_profiler.stage("extract_texts_and_preprocess_files"):
+            ...
+        mem_profiler.write_report()
+
+    Observação: com sessões simultâneas perfiladas ao mesmo tempo, os números do tracemalloc
+    incluem alocações de todas as threads do processo.
+    """
+    def __init__(self, job_name: str, enabled: Optional[bool] = None, top_n: int = MEMORY_PROFILING_TOP_N,
+                 reports_dir: str = PROFILING_REPORTS_DIR, extra_info: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            job_name (str): Identificação do job (nome do lote), usada no nome do relatório.
+            enabled (Optional[bool]): Força habilitar/desabilitar; se None, usa a variável de ambiente.
+            top_n (int): Quantidade de sítios de alocação registrados por etapa.
+            reports_dir (str): Diretório de saída dos relatórios.
+            extra_info (Optional[Dict[str, Any]]): Metadados adicionais (ex.: configurações da análise).
+        """
+        self.job_name = job_name
+        self.enabled = is_memory_profiling_enabled() if enabled is None else enabled
+        self.top_n = top_n
+        self.reports_dir = reports_dir
+        self.extra_info = extra_info or {}
+        self.stages: List[Dict[str, Any]] = []
+        self._rss_start = get_rss_bytes() if self.enabled else None
+        if self.enabled:
+            logger.info(f"Perfil de memória ATIVO para o job '{job_name}'.")
+
+    @contextmanager
+    def stage(self, stage_name: str):
+        """Context manager que mede a memória de uma etapa do pipeline."""
+        if not self.enabled:
+            yield
+            return
+
+        _acquire_tracemalloc()
+        try:
+            snapshot_before = tracemalloc.take_snapshot()
+            traced_before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            rss_before = get_rss_bytes()
+            t0 = perf_counter()
+            with _RssSampler(MEMORY_PROFILING_RSS_INTERVAL) as rss_sampler:
+                yield
+        finally:
+            try:
+                duration = perf_counter() - t0
+                traced_after, traced_peak = tracemalloc.get_traced_memory()
+                snapshot_after = tracemalloc.take_snapshot()
+                rss_after = get_rss_bytes()
+                top_stats = snapshot_after.compare_to(snapshot_before, "lineno")[:self.top_n]
+                self.stages.append({
+                    "stage": stage_name,
+                    "duration_s": round(duration, 4),
+                    "traced_peak_mb": round((traced_peak - traced_before) / _MB, 3),
+                    "traced_retained_mb": round((traced_after - traced_before) / _MB, 3),
+                    "rss_before_mb": round(rss_before / _MB, 2) if rss_before is not None else None,
+                    "rss_after_mb": round(rss_after / _MB, 2) if rss_after is not None else None,
+                    "rss_peak_mb": round(rss_sampler.peak / _MB, 2) if rss_sampler.peak is not None else None,
+                    "top_allocations": [
+                        {"site": str(stat.traceback), "size_diff_kb": round(stat.size_diff / 1024, 1),
+                         "count_diff": stat.count_diff}
+                        for stat in top_stats if stat.size_diff
+                    ],
+                })
+                logger.debug(f"[MemProfile] {stage_name}: pico={self.stages[-1]['traced_peak_mb']}MB, "
+                             f"retido={self.stages[-1]['traced_retained_mb']}MB, rss_pico={self.stages[-1]['rss_peak_mb']}MB")
+            except Exception as e:
+                logger.error(f"Falha ao registrar perfil de memória da etapa '{stage_name}': {e}", exc_info=True)
+            finally:
+                _release_tracemalloc()
+
+    def _format_text_report(self, report: Dict[str, Any]) -> str:
+        """Formata o relatório em texto legível."""
+        lines = [f"Perfil de memória - job: {report['job_name']} - {report['created_at']}",
+                 f"RSS inicial: {report['rss_start_mb']} MB | RSS final: {report['rss_end_mb']} MB", ""]
+        if report["extra_info"]:
+            lines.append(f"Info: {json.dumps(report['extra_info'], ensure_ascii=False, default=str)}")
+            lines.append("")
+        lines.append(f"{'Etapa':<45}{'Tempo(s)':>10}{'Pico(MB)':>11}{'Retido(MB)':>12}{'RSS pico(MB)':>14}")
+        for s in report["stages"]:
+            lines.append(f"{s['stage']:<45}{s['duration_s']:>10}{s['traced_peak_mb']:>11}{s['traced_retained_mb']:>12}{str(s['rss_peak_mb']):>14}")
+        for s in report["stages"]:
+            lines.append("")
+            lines.append(f"--- Principais sítios de alocação: {s['stage']} ---")
+            for alloc in s["top_allocations"]:
+                lines.append(f"{alloc['size_diff_kb']:>12} KB  ({alloc['count_diff']:+d} blocos)  {alloc['site']}")
+        return "\n".join(lines) + "\n"
+
+    def write_report(self) -> Optional[str]:
+        """
+        Grava o relatório (JSON e texto) no diretório de profiling.
+
+        Returns:
+            Optional[str]: Caminho do relatório em texto, ou None se desabilitado/sem etapas/erro.
+        """
+        if not self.enabled or not self.stages:
+            return None
+        try:
+            rss_end = get_rss_bytes()
+            report = {
+                "job_name": self.job_name,
+                "created_at": datetime.now().isoformat(),
+                "rss_start_mb": round(self._rss_start / _MB, 2) if self._rss_start is not None else None,
+                "rss_end_mb": round(rss_end / _MB, 2) if rss_end is not None else None,
+                "extra_info": self.extra_info,
+                "stages": self.stages,
+            }
+            os.makedirs(self.reports_dir, exist_ok=True)
+            base_name = f"mem_{datetime.now():%Y%m%d_%H%M%S}_{_safe_filename(self.job_name)}"
+            with open(os.path.join(self.reports_dir, base_name + ".json"), "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+            text_path = os.path.join(self.reports_dir, base_name + ".txt")
+            with open(text_path, "w", encoding="utf-8") as f:
+                f.write(self._format_text_report(report))
+            logger.info(f"Relatório de perfil de memória gravado em: {text_path}")
+            return text_path
+        except Exception as e:
+            logger.error(f"Falha ao gravar relatório de perfil de memória: {e}", exc_info=True)
+            return None
+
+# =============================================================================
+# Perfil de CPU por job (cProfile ou amostragem)
+# =============================================================================
+
+CPU_PROFILING_MODES = ("cprofile", "sampling")
+
+def get_cpu_profiling_mode() -> Optional[str]:
+    """Retorna o modo de perfil de CPU configurado ('cprofile' ou 'sampling'), ou None se desabilitado."""
+    mode = os.getenv(CPU_PROFILING_ENV_VAR, "").strip().lower()
+    if mode in _ENV_TRUE_VALUES:
+        return "cprofile"
+    return mode if mode in CPU_PROFILING_MODES else None
+
+class _SamplingProfiler:
+    """
+    Profiler por amostragem: uma thread daemon captura periodicamente a pilha da thread alvo
+    (sys._current_frames) e acumula pilhas no formato "folded" (func;func;func contagem).
+    """
+    def __init__(self, target_thread_id: int, interval: float = CPU_PROFILING_SAMPLE_INTERVAL):
+        self.target_thread_id = target_thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.num_samples = 0
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="SamplingProfiler")
+
+    @staticmethod
+    def _frame_label(frame) -> str:
+        code = frame.f_code
+        return f"{os.path.basename(code.co_filename)}:{code.co_name}:{code.co_firstlineno}"
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.target_thread_id)
+            if frame is None:
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(self._frame_label(frame))
+                frame = frame.f_back
+            self.stacks[";".join(reversed(labels))] += 1
+            self.num_samples += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._thread.join(timeout=1)
+
+    def to_folded(self) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common()) + "\n"
+
+class ProfilingSession:
+    """Estado de um job perfilado; acessível pela thread do job via annotate_current_profile."""
+    def __init__(self, job_name: str, mode: str, extra_info: Optional[Dict[str, Any]] = None):
+        self.job_name = job_name
+        self.mode = mode
+        self.extra_info: Dict[str, Any] = dict(extra_info or {})
+        self.started_at = datetime.now()
+        self.output_paths: List[str] = []
+
+_thread_local_profiling = threading.local()
+
+def annotate_current_profile(**info: Any):
+    """
+    Acrescenta metadados (ex.: configurações da análise) ao perfil ativo na thread atual.
+    Não faz nada se não houver perfil ativo.
+    """
+    session = getattr(_thread_local_profiling, "session", None)
+    if session is not None:
+        session.extra_info.update(info)
+
+def _write_text(path: str, content: str):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+def _profile_metadata(session: ProfilingSession, elapsed: float) -> Dict[str, Any]:
+    """Identificação do job e metadados do perfil."""
+    return {"job": session.job_name, "modo": session.mode, "inicio": session.started_at.isoformat(),
+            "duracao_s": round(elapsed, 3), "info": session.extra_info}
+
+def _profile_header(metadata: Dict[str, Any]) -> str:
+    """Cabeçalho (comentários '#') do resumo de texto do cProfile."""
+    return "".join(f"# {key}: {json.dumps(value, ensure_ascii=False, default=str) if key == 'info' else value}\n"
+                   for key, value in metadata.items())
+
+def _upload_profile_texts(files_to_upload: Dict[str, str]):
+    """
+    Envia artefatos de texto do perfil pelo uploader do CloudLogHandler ativo (cliente ou admin).
+    Executado em thread daemon; falhas apenas são registradas.
+    """
+    from src.logger.logger import LoggerSetup
+    handler = LoggerSetup._active_cloud_handler_instance
+    if handler is None:
+        logger.warning("Upload de perfil solicitado, mas não há CloudLogHandler ativo.")
+        return
+    folder = f"{CLOUD_PROFILING_FOLDER.rstrip('/')}/{datetime.now():%Y/%m/%d}"
+    for filename, content in files_to_upload.items():
+        try:
+            if handler.uploader.upload_logs([content], f"{folder}/{filename}"):
+                logger.info(f"Perfil enviado para a nuvem: {folder}/{filename}")
+            else:
+                logger.warning(f"Falha ao enviar perfil '{filename}' para a nuvem.")
+        except Exception as e:
+            logger.error(f"Erro ao enviar perfil '{filename}' para a nuvem: {e}")
+
+@contextmanager
+def profile_job(job_name: str, mode: Optional[str] = None, extra_info: Optional[Dict[str, Any]] = None,
+                reports_dir: str = PROFILING_REPORTS_DIR, upload: Optional[bool] = None):
+    """
+    Envolve um job em cProfile ou no profiler por amostragem e grava os artefatos em reports_dir.
+
+    - cprofile: '<base>.prof' (pstats/snakeviz) e '<base>.txt' (resumo por tempo cumulativo).
+    - sampling: '<base>.folded' (apenas pilhas agregadas, para flamegraph.pl/speedscope, que não aceitam
+      comentários) e '<base>.meta.json' (identificação do job e metadados).
+
+    Jobs aninhados na mesma thread (ex.: pipeline que encadeia etapas) não iniciam um segundo perfil.
+
+    Args:
+        job_name (str): Identificação do job (ex.: 'pdf_processing_<lote>'), usada no nome dos arquivos.
+        mode (Optional[str]): 'cprofile' ou 'sampling'; se None, usa a variável de ambiente.
+        extra_info (Optional[Dict[str, Any]]): Metadados gravados no cabeçalho dos artefatos.
+        reports_dir (str): Diretório de saída.
+        upload (Optional[bool]): Envia os artefatos de texto à nuvem; se None, usa a variável de ambiente.
+
+    Yields:
+        Optional[ProfilingSession]: Sessão ativa, ou None se desabilitado.
+    """
+    mode = mode or get_cpu_profiling_mode()
+    if not mode or getattr(_thread_local_profiling, "session", None) is not None:
+        yield None
+        return
+
+    session = ProfilingSession(job_name, mode, extra_info)
+    _thread_local_profiling.session = session
+    profiler = None
+    try:
+        if mode == "cprofile":
+            import cProfile
+            profiler = cProfile.Profile()
+            profiler.enable()
+        else:
+            profiler = _SamplingProfiler(threading.get_ident())
+            profiler.start()
+        logger.info(f"Perfil de CPU ({mode}) ATIVO para o job '{job_name}'.")
+    except Exception as e:
+        logger.error(f"Não foi possível iniciar o perfil de CPU ({mode}): {e}")
+        profiler = None
+
+    t0 = perf_counter()
+    try:
+        yield session
+    finally:
+        _thread_local_profiling.session = None
+        if profiler is not None:
+            try:
+                elapsed = perf_counter() - t0
+                if mode == "cprofile":
+                    profiler.disable()
+                else:
+                    profiler.stop()
+                _save_cpu_profile(session, profiler, elapsed, reports_dir, upload)
+            except Exception as e:
+                logger.error(f"Falha ao gravar perfil de CPU do job '{job_name}': {e}", exc_info=True)
+
+def _save_cpu_profile(session: ProfilingSession, profiler: Any, elapsed: float, reports_dir: str, upload: Optional[bool]):
+    """Grava os artefatos do perfil e, se configurado, dispara o upload em segundo plano."""
+    os.makedirs(reports_dir, exist_ok=True)
+    base_name = f"cpu_{session.started_at:%Y%m%d_%H%M%S}_{_safe_filename(session.job_name)}"
+    metadata = _profile_metadata(session, elapsed)
+    text_files: Dict[str, str] = {}
+
+    if session.mode == "cprofile":
+        import io, pstats
+        prof_path = os.path.join(reports_dir, base_name + ".prof")
+        profiler.dump_stats(prof_path)
+        session.output_paths.append(prof_path)
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(CPU_PROFILING_STATS_LINES)
+        text_files[base_name + ".txt"] = _profile_header(metadata) + stream.getvalue()
+    else:
+        text_files[base_name + ".folded"] = profiler.to_folded()
+        text_files[base_name + ".meta.json"] = json.dumps(metadata, ensure_ascii=False, indent=2, default=str)
+
+    for filename, content in text_files.items():
+        path = os.path.join(reports_dir, filename)
+        _write_text(path, content)
+        session.output_paths.append(path)
+    logger.info(f"Perfil de CPU do job '{session.job_name}' gravado em: {', '.join(session.output_paths)}")
+
+    should_upload = _env_flag_enabled(CPU_PROFILING_UPLOAD_ENV_VAR) if upload is None else upload
+    if should_upload:
+        threading.Thread(target=_upload_profile_texts, args=(text_files,), daemon=True).start()
+
+def profiled_job(job_label: str, name_arg: str = "batch_name") -> Callable:
+    """
+    Decorador que perfila a função como um job quando CPU_PROFILING_ENV_VAR está ativa.
+    O nome do job é '<job_label>_<valor do argumento name_arg>' (ex.: nome do lote).
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            mode = get_cpu_profiling_mode()
+            if not mode:
+                return func(*args, **kwargs)
+            job_name = job_label
+            try:
+                import inspect
+                bound = inspect.signature(func).bind_partial(*args, **kwargs).arguments
+                if bound.get(name_arg):
+                    job_name = f"{job_label}_{bound[name_arg]}"
+            except TypeError:
+                pass
+            with profile_job(job_name, mode=mode):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+execution_time = perf_counter() - start_time
+logger.debug(f"Carregado PROFILING em {execution_time:.4f}s")
@@ -0,0 +1,164 @@
+# src/services/config_cache.py
+"""
+Cache de leitura (read-through) dos documentos de configuração globais do Firestore, compartilhado pelo processo.
+
+Os documentos de provedores LLM, custos de embeddings e defaults de análise são os mesmos para todos os
+usuários, mas eram baixados a cada login. Aqui cada documento (chave: caminho) fica em memória:
+
+- até CONFIG_CACHE_TTL_SECONDS após a última validação, é servido direto da memória;
+- depois disso, por mais CONFIG_CACHE_STALE_SECONDS, a cópia em memória é servida imediatamente e uma
+  revalidação é disparada em segundo plano (stale-while-revalidate);
+- além desse prazo (ou sem cópia), a revalidação é feita antes de retornar.
+
+A revalidação consulta apenas o `updateTime` do documento (GET com máscara de campos) e só baixa o
+documento completo quando ele mudou. Sessões simultâneas aguardam a mesma carga em vez de repeti-la.
+Em caso de falha na origem, a última cópia conhecida continua sendo servida.
+"""
+import logging
+logger = logging.getLogger(__name__)
+
+from time import perf_counter, monotonic
+start_time = perf_counter()
+logger.debug(f"{start_time:.4f}s - Iniciando config_cache.py")
+
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from src.settings import CONFIG_CACHE_TTL_SECONDS, CONFIG_CACHE_STALE_SECONDS
+
+# Documento completo da API REST (None se inexistente)
+DocumentLoader = Callable[[], Optional[Dict[str, Any]]]
+# updateTime do documento (None se inexistente)
+VersionLoader = Callable[[], Optional[str]]
+
+class ConfigDocumentCache:
+    """
+    Cache por caminho de documento com revalidação por `updateTime`, TTL e stale-while-revalidate.
+
+    Args:
+        ttl_seconds (float): Tempo após a validação em que o documento é servido sem consultar a origem.
+        stale_seconds (float): Janela adicional em que a cópia é servida enquanto revalida em segundo plano.
+        clock (Callable[[], float]): Relógio monotônico (injetável em testes).
+        run_in_background (Callable): Executa a revalidação em segundo plano (padrão: thread daemon).
+    """
+    def __init__(self, ttl_seconds: float = CONFIG_CACHE_TTL_SECONDS, stale_seconds: float = CONFIG_CACHE_STALE_SECONDS,
+                 clock: Callable[[], float] = monotonic, run_in_background: Optional[Callable[[Callable[[], None]], None]] = None):
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self._clock = clock
+        self._run_in_background = run_in_background or (lambda fn: threading.Thread(target=fn, daemon=True).start())
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {} # path -> {"document", "update_time", "validated_at"}
+        self._path_locks: Dict[str, threading.Lock] = {}
+        self._refreshing: set = set()
+
+        self.last_stats: Dict[str, Any] = {}
+
+    def _path_lock(self, path: str) -> threading.Lock:
+        with self._lock:
+            return self._path_locks.setdefault(path, threading.Lock())
+
+    def get(self, path: str, fetch_document: DocumentLoader, fetch_version: Optional[VersionLoader] = None) -> Optional[Dict[str, Any]]:
+        """
+        Retorna o documento (formato da API REST) do caminho, da memória ou da origem.
+
+        Args:
+            path (str): Caminho do documento (chave do cache).
+            fetch_document: Carga completa do documento (None se inexistente; exceção em caso de erro).
+            fetch_version: Consulta barata do `updateTime` (opcional; sem ela, a revalidação baixa o documento).
+
+        Returns:
+            Optional[Dict[str, Any]]: O documento, ou None se não existir.
+
+        Raises:
+            Exception: Erro da origem quando não há cópia em memória.
+        """
+        start_refresh = False
+        with self._lock:
+            entry = self._entries.get(path)
+            age = None if entry is None else self._clock() - entry["validated_at"]
+            if entry is not None and age < self.ttl_seconds:
+                self.last_stats = {"path": path, "source": "memory", "age_seconds": age}
+                return entry["document"]
+            if entry is not None and age < self.ttl_seconds + self.stale_seconds:
+                start_refresh = path not in self._refreshing
+                self._refreshing.add(path)
+                self.last_stats = {"path": path, "source": "stale", "age_seconds": age}
+        if entry is not None and age < self.ttl_seconds + self.stale_seconds:
+            if start_refresh:
+                self._run_in_background(lambda: self._refresh_in_background(path, fetch_document, fetch_version))
+            return entry["document"]
+
+        with self._path_lock(path):
+            # Outra sessão pode ter concluído a carga enquanto esta aguardava
+            with self._lock:
+                entry = self._entries.get(path)
+                if entry is not None and self._clock() - entry["validated_at"] < self.ttl_seconds:
+                    self.last_stats = {"path": path, "source": "memory", "age_seconds": self._clock() - entry["validated_at"]}
+                    return entry["document"]
+            try:
+                return self._revalidate(path, fetch_document, fetch_version)
+            except Exception as e:
+                if entry is None:
+                    raise
+                logger.warning(f"Falha ao revalidar '{path}'; usando a cópia em memória: {e}")
+                self.last_stats = {"path": path, "source": "stale-if-error"}
+                return entry["document"]
+
+    def _revalidate(self, path: str, fetch_document: DocumentLoader, fetch_version: Optional[VersionLoader]) -> Optional[Dict[str, Any]]:
+        start = perf_counter()
+        with self._lock:
+            entry = self._entries.get(path)
+        if entry is not None and entry["update_time"] and fetch_version is not None:
+            update_time = fetch_version()
+            if update_time == entry["update_time"]:
+                with self._lock:
+                    entry["validated_at"] = self._clock()
+                self.last_stats = {"path": path, "source": "revalidated", "elapsed_seconds": perf_counter() - start}
+                logger.debug(f"Configuração '{path}' inalterada (updateTime {update_time}).")
+                return entry["document"]
+
+        document = fetch_document()
+        with self._lock:
+            self._entries[path] = {"document": document, "validated_at": self._clock(),
+                                   "update_time": (document or {}).get("updateTime")}
+        self.last_stats = {"path": path, "source": "origin", "elapsed_seconds": perf_counter() - start}
+        logger.debug(f"Configuração '{path}' carregada da origem em {perf_counter() - start:.4f}s.")
+        return document
+
+    def _refresh_in_background(self, path: str, fetch_document: DocumentLoader, fetch_version: Optional[VersionLoader]):
+        try:
+            with self._path_lock(path):
+                self._revalidate(path, fetch_document, fetch_version)
+        except Exception as e:
+            logger.warning(f"Falha na revalidação em segundo plano de '{path}': {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(path)
+
+    def peek(self, path: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """Retorna (True, documento) se houver cópia dentro do TTL; caso contrário (False, None)."""
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and self._clock() - entry["validated_at"] < self.ttl_seconds:
+                return True, entry["document"]
+        return False, None
+
+    def put(self, path: str, document: Optional[Dict[str, Any]]):
+        """Registra um documento obtido por outra via (ex.: `documents:batchGet`) como recém-validado."""
+        with self._lock:
+            self._entries[path] = {"document": document, "validated_at": self._clock(),
+                                   "update_time": (document or {}).get("updateTime")}
+
+    def invalidate(self, path: Optional[str] = None):
+        """Descarta um documento (ou todos), forçando a carga na próxima leitura."""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(path, None)
+
+config_document_cache = ConfigDocumentCache()
+
+execution_time = perf_counter() - start_time
+logger.debug(f"Carregado CONFIG_CACHE em {execution_time:.4f}s")
@@ -7,14 +7,19 @@ from time import perf_counter
 start_time = perf_counter()
 logger.debug(f"{start_time:.4f}s - Iniciando firebase_client.py")
 
-import requests, json, re, secrets, time
+import requests, json, time, hashlib
 import urllib.parse
-from datetime import datetime
-from typing import Optional, Dict, Any, List, Union, Callable
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, List, Tuple, Union, Callable
 import base64 # Para codificar/decodificar bytes para Firestore bytesValue
 
-from src.settings import APP_VERSION, PROJECT_ID, FB_STORAGE_BUCKET, FIREBASE_WEB_API_KEY
+from src.settings import (APP_VERSION, PROJECT_ID, FB_STORAGE_BUCKET, FIREBASE_WEB_API_KEY,
+                          ID_TOKEN_VERIFY_CACHE_MARGIN_SECONDS, ID_TOKEN_VERIFY_CACHE_MAX_ENTRIES)
 from src.utils import with_proxy
+from src.services.http_sessions import get_firebase_session
+from src.services.metrics_writer import get_metrics_writer, new_metric_document_id
+from src.services.config_cache import config_document_cache
 
 from flet import Page as ft_Page
 
@@ -103,7 +108,7 @@ class FirebaseClientStorage:
         Inicializa o cliente de Storage.
         """
         self.auth_manager = FbManagerAuth()
-        # Nenhuma inicialização complexa necessária aqui, pois usaremos requests.
+        # As requisições usam a sessão HTTP compartilhada (src/services/http_sessions.py).
         logger.info(f"FirebaseClientStorage inicializado. Target Bucket: {FB_STORAGE_BUCKET}")
     
     @with_proxy() # Aplica proxy e tratamento SSL se configurado
@@ -136,7 +141,7 @@ class FirebaseClientStorage:
         logger.debug(f"Storage Request: {method} {url} | Params: {params} | Content-Type: {content_type}")
 
         try:
-            response = requests.request(
+            response = get_firebase_session().request(
                 method,
                 url,
                 headers=headers,
@@ -285,7 +290,7 @@ class FirebaseClientFirestore:
         logger.debug(f"Firestore Request: {method} {url} | Params: {params} | JSON: {json_data is not None}")
 
         try:
-            response = requests.request(
+            response = get_firebase_session().request(
                 method,
                 url,
                 headers=headers,
@@ -322,6 +327,115 @@ class FirebaseClientFirestore:
             logger.error(f"Erro inesperado em _make_firestore_request para {document_path}: {e}", exc_info=True)
             raise
 
+    def get_config_document_client(self, user_token: str, document_path: str) -> Optional[Dict[str, Any]]:
+        """
+        Lê um documento de configuração global (igual para todos os usuários) através do cache
+        compartilhado pelo processo (src/services/config_cache.py).
+
+        Returns:
+            Optional[Dict[str, Any]]: Documento no formato da API REST, ou None se não existir.
+
+        Raises:
+            requests.exceptions.RequestException: Erro da origem sem cópia em memória.
+        """
+        def _fetch_document():
+            response = self._make_firestore_request("GET", user_token, document_path)
+            return response.json() if response.status_code == 200 else None
+
+        def _fetch_version():
+            # Máscara com campo inexistente: retorna só os metadados do documento (name, createTime, updateTime)
+            response = self._make_firestore_request("GET", user_token, document_path,
+                                                    params={"mask.fieldPaths": "versao_config_probe"})
+            return response.json().get("updateTime") if response.status_code == 200 else None
+
+        return config_document_cache.get(document_path, _fetch_document, _fetch_version)
+
+    @with_proxy()
+    def batch_get_documents_client(self, user_token: str, document_paths: List[str], timeout: int = 30) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Lê vários documentos em uma única requisição (`documents:batchGet`).
+
+        Args:
+            user_token (str): Token de ID do Firebase.
+            document_paths (List[str]): Caminhos relativos a `documents/` (ex.: "colecao/doc").
+            timeout (int): Timeout da requisição (s).
+
+        Returns:
+            Dict[str, Optional[Dict[str, Any]]]: {caminho: documento no formato da API REST, ou None se inexistente}.
+
+        Raises:
+            requests.exceptions.RequestException: Erro de rede ou HTTP.
+        """
+        root = FIRESTORE_BASE_URL.split("/v1/", 1)[1] # projects/{id}/databases/(default)/documents
+        names = {f"{root}/{path}": path for path in document_paths}
+        headers = {
+            "Authorization": f"Bearer {user_token}",
+            "Content-Type": "application/json",
+            "Accept": "application/json"
+        }
+        url = f"{FIRESTORE_BASE_URL}:batchGet"
+        logger.debug(f"Firestore Request: POST {url} | {len(document_paths)} documento(s)")
+        response = get_firebase_session().post(url, headers=headers, json={"documents": list(names)}, timeout=timeout)
+        response.raise_for_status()
+
+        documents: Dict[str, Optional[Dict[str, Any]]] = {path: None for path in document_paths}
+        for item in response.json():
+            if "found" in item:
+                documents[names.get(item["found"].get("name"), item["found"].get("name"))] = item["found"]
+        return documents
+
+    def load_documents_client(self, user_token: str, global_paths: List[str], user_paths: Optional[List[str]] = None):
+        """
+        Carrega documentos de configuração de uma vez: os globais dentro do TTL vêm do cache compartilhado
+        e todos os demais (globais desatualizados e documentos do usuário) de um único `documents:batchGet`.
+        Se o batchGet falhar, cada documento é lido individualmente.
+
+        Returns:
+            Tuple[Dict[str, Optional[Dict[str, Any]]], Dict[str, Dict[str, Any]]]:
+                ({caminho: documento ou None}, {caminho: {"source": ..., "seconds": ...}}).
+        """
+        user_paths = list(user_paths or [])
+        documents: Dict[str, Optional[Dict[str, Any]]] = {}
+        timings: Dict[str, Dict[str, Any]] = {}
+        to_fetch = []
+        for path in global_paths:
+            fresh, document = config_document_cache.peek(path)
+            if fresh:
+                documents[path] = document
+                timings[path] = {"source": "memória", "seconds": 0.0}
+            else:
+                to_fetch.append(path)
+        to_fetch += user_paths
+        if not to_fetch:
+            return documents, timings
+
+        start = perf_counter()
+        try:
+            fetched = self.batch_get_documents_client(user_token, to_fetch)
+            elapsed = perf_counter() - start
+            for path in to_fetch:
+                documents[path] = fetched.get(path)
+                timings[path] = {"source": "batchGet", "seconds": elapsed}
+                if path in global_paths:
+                    config_document_cache.put(path, documents[path])
+            return documents, timings
+        except Exception as e:
+            logger.warning(f"batchGet de {len(to_fetch)} documento(s) falhou ({e}). Lendo individualmente.")
+
+        for path in to_fetch:
+            start = perf_counter()
+            try:
+                if path in global_paths:
+                    documents[path] = self.get_config_document_client(user_token, path)
+                else:
+                    response = self._make_firestore_request("GET", user_token, path)
+                    documents[path] = response.json() if response.status_code == 200 else None
+                timings[path] = {"source": "GET", "seconds": perf_counter() - start}
+            except Exception as e:
+                logger.error(f"Falha ao ler o documento '{path}': {e}")
+                timings[path] = {"source": "erro", "seconds": perf_counter() - start}
+        return documents, timings
+
     def save_user_api_key_client(self, user_token: str, user_id: str, service_name: str, encrypted_api_key_bytes: bytes) -> bool:
         """
         Salva (ou atualiza) a chave de API de um serviço LLM (criptografada) para um usuário.
@@ -480,9 +594,30 @@ class FirebaseClientFirestore:
             logger.error(f"Falha ao obter chave API (cliente) do Firestore: {e}")
             return None
 
+    def _build_metric_document(self, user_id: str, metric_data: Dict[str, Any]):
+        """
+        Monta o caminho (com ID de documento cronológico) e os campos Firestore de uma métrica.
+
+        Returns:
+            Tuple[str, Dict[str, Any]]: (caminho do documento, campos no formato da API REST).
+        """
+        # ID cronológico: YYYYMMDDHHMMSSmmm_EventType_sufixo (legibilidade, ordenação e sem colisões)
+        now = datetime.now() # Considere datetime.utcnow()
+        document_id = new_metric_document_id(metric_data.get("event_type", "unknown"), now)
+        full_document_path = f"user_metrics/{user_id}/metrics/{document_id}"
+
+        # Adiciona o timestamp ao próprio dado da métrica se não existir
+        if "timestamp_iso" not in metric_data:
+            metric_data["timestamp_iso"] = now.isoformat()
+        if "client_doc_id" not in metric_data: # Guarda o ID que geramos
+            metric_data["client_doc_id"] = document_id
+
+        return full_document_path, {k: _to_firestore_value(v) for k, v in metric_data.items()}
+
     def save_metrics_client(self, user_token: str, user_id: str, metric_data: Dict[str, Any]) -> bool:
         """
         Salva dados de métricas no Firestore sob o caminho do usuário, usando um ID de documento cronológico.
+        Gravação síncrona; o fluxo de análise usa `enqueue_metrics_client`.
 
         Args:
             user_token (str): Token de ID do Firebase.
@@ -496,39 +631,16 @@ class FirebaseClientFirestore:
             logger.error("save_metrics_client: Argumentos inválidos.")
             return False
 
-        # Gerar ID de documento cronológico
-        # Formato: YYYYMMDDHHMMSSmmm_EventType (para legibilidade e ordenação)
-        # O timestamp deve ser UTC para consistência global se a aplicação for usada em diferentes fusos.
-        # Por simplicidade, usaremos o tempo local, mas UTC é recomendado para produção.
-        now = datetime.now() # Considere datetime.utcnow()
-        # Adiciona uma pequena parte aleatória ou contador para evitar colisões se muitas escritas no mesmo milissegundo
-        random_suffix = secrets.token_hex(3) # Sufixo aleatório curto (6 caracteres hex)
-
-        metric_event_type_safe = re.sub(r'[^a-zA-Z0-9_]', '', metric_data.get("event_type", "unknown")).lower()[:20]
-        document_id = f"{now.strftime('%Y%m%d%H%M%S%f')[:-3]}_{metric_event_type_safe}_{random_suffix}" # Inclui milissegundos
-
-        collection_path = f"user_metrics/{user_id}/metrics"
-        full_document_path = f"{collection_path}/{document_id}"
-
-        # Adiciona o timestamp ao próprio dado da métrica se não existir
-        if "timestamp_iso" not in metric_data:
-            metric_data["timestamp_iso"] = now.isoformat()
-        if "client_doc_id" not in metric_data: # Guarda o ID que geramos
-            metric_data["client_doc_id"] = document_id
-
-        firestore_payload = {"fields": {k: _to_firestore_value(v) for k, v in metric_data.items()}}
+        full_document_path, fields = self._build_metric_document(user_id, metric_data)
 
         logger.debug(f"Tentando salvar métrica (cliente) para Firestore em: {full_document_path}")
         try:
-            # Usamos PATCH no caminho completo do documento para criá-lo com o ID especificado.
-            # Se o documento já existir (improvável com este ID), ele seria sobrescrito.
-            # A API REST para "criar com ID específico" é feita com PATCH no path do documento.
+            # PATCH no caminho completo do documento cria-o com o ID especificado.
             self._make_firestore_request(
-                method="PATCH", # Ou PUT, mas PATCH é mais flexível para criar/sobrescrever
+                method="PATCH",
                 user_token=user_token,
-                document_path=full_document_path, # Path do documento, incluindo o novo ID
-                json_data=firestore_payload
-                # Não é necessário documentId no query params quando o ID está no path para PATCH/PUT
+                document_path=full_document_path,
+                json_data={"fields": fields}
             )
             logger.debug(f"Métrica (cliente) salva com sucesso para Firestore: {full_document_path}")
             return True
@@ -536,6 +648,43 @@ class FirebaseClientFirestore:
             logger.error(f"Falha ao salvar métrica (cliente) para Firestore ({full_document_path}): {e}")
             return False
 
+    def enqueue_metrics_client(self, user_token: str, user_id: str, metric_data: Dict[str, Any]) -> bool:
+        """
+        Enfileira uma métrica para gravação em segundo plano (src/services/metrics_writer.py) e retorna
+        imediatamente. O evento é persistido no spool local antes do retorno.
+
+        Returns:
+            bool: True se enfileirada, False em caso de argumentos inválidos ou erro.
+        """
+        if not all([user_token, user_id, metric_data]):
+            logger.error("enqueue_metrics_client: Argumentos inválidos.")
+            return False
+        try:
+            full_document_path, fields = self._build_metric_document(user_id, metric_data)
+            get_metrics_writer(self.commit_writes_client).enqueue(user_token, user_id, full_document_path, fields)
+            logger.debug(f"Métrica (cliente) enfileirada para Firestore: {full_document_path}")
+            return True
+        except Exception as e:
+            logger.error(f"Falha ao enfileirar métrica (cliente): {e}", exc_info=True)
+            return False
+
+    @with_proxy()
+    def commit_writes_client(self, user_token: str, writes: List[Dict[str, Any]], timeout: int = 30) -> Dict[str, Any]:
+        """
+        Executa um `documents:commit` (escritas atômicas em lote, até 500) com o token do usuário.
+        Levanta `requests.exceptions.HTTPError` em caso de erro (tratado pelo MetricsWriter).
+        """
+        headers = {
+            "Authorization": f"Bearer {user_token}",
+            "Content-Type": "application/json",
+            "Accept": "application/json"
+        }
+        url = f"{FIRESTORE_BASE_URL}:commit"
+        logger.debug(f"Firestore Request: POST {url} | {len(writes)} escrita(s)")
+        response = get_firebase_session().post(url, headers=headers, json={"writes": writes}, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+
     def save_analysis_metrics(self, user_id, user_token, filenames_uploaded, proc_meta_session, tokens_embeddings_session, llm_meta_session,
             current_settings, default_settings, llm_response_obj, fields_to_log=[]):
         """
@@ -554,6 +703,8 @@ class FirebaseClientFirestore:
                 "relevant_pages_global_keys_formatted": proc_meta_session.get("relevant_pages_global_keys_formatted"),
                 "unintelligible_pages_global_keys_formatted": proc_meta_session.get("unintelligible_pages_global_keys_formatted"),
                 "final_aggregated_tokens": proc_meta_session.get("final_aggregated_tokens"),
+                "compression_ratio": proc_meta_session.get("compression_ratio"),
+                "boilerplate_tokens_saved": proc_meta_session.get("boilerplate_tokens_saved"),
                 "processing_time": proc_meta_session.get("processing_time")
             }
             
@@ -570,10 +721,13 @@ class FirebaseClientFirestore:
                 "cached_tokens": llm_meta_session.get("cached_tokens"),
                 "output_tokens": llm_meta_session.get("output_tokens"),
                 "total_cost_usd": llm_meta_session.get("total_cost_usd"),
+                "cached_tokens_ratio": llm_meta_session.get("cached_tokens_ratio"), # Aproveitamento do cache de prefixo
                 "llm_provider_used": llm_meta_session.get("llm_provider_used"),
                 "llm_model_used": llm_meta_session.get("llm_model_used"),
                 "processing_time": llm_meta_session.get("processing_time"), # Tempo da LLM
                 "event_timestamp_iso": llm_meta_session.get("event_timestamp_iso"), 
+                "response_cache_hit": llm_meta_session.get("response_cache_hit"), # Resposta servida pelo cache local (custo zero)
+                "response_cache_saved_cost_usd": llm_meta_session.get("response_cache_saved_cost_usd"),
             } 
             
             # Remover chaves com valor None para não poluir o Firestore
@@ -614,11 +768,11 @@ class FirebaseClientFirestore:
                 "analysis_settings_overrides": analysis_settings_overrides
             }
 
-            # Envia a métrica
-            if not self.save_metrics_client(user_token, user_id, metric_data):
+            # Enfileira a métrica (gravação em segundo plano, com spool local)
+            if not self.enqueue_metrics_client(user_token, user_id, metric_data):
                 logger.error("Falha ao registrar métricas da análise no Firestore.")
             else:
-                logger.info("Métricas da análise registradas com sucesso no Firestore.")
+                logger.info("Métricas da análise enfileiradas para o Firestore.")
                 return True
             return False
 
@@ -683,8 +837,8 @@ class FirebaseClientFirestore:
             if reanalysis_occurrence:
                 metric_like_feedback_payload["reanalysis_occurrence"] = 1
 
-            if self.save_metrics_client(user_token, user_id, metric_like_feedback_payload):
-                logger.info("Dados de feedback detalhado salvos com sucesso no Firestore.")
+            if self.enqueue_metrics_client(user_token, user_id, metric_like_feedback_payload):
+                logger.info("Dados de feedback detalhado enfileirados para o Firestore.")
                 return True
             else:
                 logger.error("Falha ao salvar dados de feedback detalhado no Firestore.")
@@ -700,6 +854,8 @@ class FbManagerAuth:
     _public_keys_cache: Dict[str, Any] = {}
     _public_keys_lock: Lock = Lock()
     _public_keys_expiry: Optional[float] = None
+    _public_key_objects: Dict[str, Tuple[Any, float]] = {} # kid -> (chave pública, validade do certificado)
+    _verified_tokens: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict() # hash do token -> (payload, válido até)
 
     def __init__(self):
         """
@@ -729,7 +885,16 @@ class FbManagerAuth:
             ou None em caso de falha.
         """
         from cryptography import x509
-        from cryptography.hazmat.primitives import serialization
+
+        # 0. Token já verificado e ainda longe do 'exp': apenas comparação de instante
+        token_key = hashlib.sha256(id_token.encode("utf-8")).hexdigest() if id_token else ""
+        with self._public_keys_lock:
+            cached = self._verified_tokens.get(token_key)
+            if cached is not None:
+                if time.time() < cached[1]:
+                    self._verified_tokens.move_to_end(token_key)
+                    return dict(cached[0])
+                del self._verified_tokens[token_key]
 
         try:
             # 1. Obter o 'kid' do cabeçalho
@@ -741,12 +906,13 @@ class FbManagerAuth:
 
             # 2. Obter as chaves públicas do Google
             with self._public_keys_lock:
-                if not self._public_keys_cache or (self._public_keys_expiry and time.time() > self._public_keys_expiry):
+                if not self._public_keys_cache or (self._public_keys_expiry is not None and time.time() > self._public_keys_expiry):
                     logger.debug("Cache de chaves públicas do Firebase expirado ou vazio. Buscando novas chaves.")
                     keys_url = "https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com"
-                    response = requests.get(keys_url, timeout=10)
+                    response = get_firebase_session().get(keys_url, timeout=10)
                     response.raise_for_status()
-                    self._public_keys_cache = response.json()
+                    FbManagerAuth._public_keys_cache = response.json()
+                    FbManagerAuth._public_key_objects = {} # Novo conjunto de certificados: chaves decodificadas sob demanda
                     
                     # Definir expiração baseada no cache-control do response
                     cache_control = response.headers.get('cache-control', '')
@@ -757,7 +923,7 @@ class FbManagerAuth:
                         except (ValueError, IndexError):
                             pass
                     
-                    self._public_keys_expiry = time.time() + max_age
+                    FbManagerAuth._public_keys_expiry = time.time() + max_age
                 
                 public_keys = self._public_keys_cache
 
@@ -766,28 +932,31 @@ class FbManagerAuth:
             if not certificate_pem:
                 logger.error(f"Certificado com kid '{kid}' não encontrado. O token pode ser antigo ou inválido.")
                 with self._public_keys_lock:
-                    self._public_keys_expiry = 0  # Força refresh do cache
+                    FbManagerAuth._public_keys_expiry = 0  # Força refresh do cache
                 return None
             
-            # 4. Extrair a chave pública do certificado X.509
-            try:
-                # Parse do certificado X.509
-                cert = x509.load_pem_x509_certificate(certificate_pem.encode('utf-8'))
-                # Extrair a chave pública
-                public_key = cert.public_key()
-                # Serializar a chave pública em formato PEM
-                public_key_pem = public_key.public_bytes(
-                    encoding=serialization.Encoding.PEM,
-                    format=serialization.PublicFormat.SubjectPublicKeyInfo
-                )
-            except Exception as cert_error:
-                logger.error(f"Erro ao processar certificado X.509: {cert_error}")
-                return None
+            # 4. Extrair a chave pública do certificado X.509 (decodificada uma vez por kid, enquanto o certificado valer)
+            with self._public_keys_lock:
+                cached_key = self._public_key_objects.get(kid)
+            if cached_key is not None and time.time() < cached_key[1]:
+                public_key = cached_key[0]
+            else:
+                try:
+                    cert = x509.load_pem_x509_certificate(certificate_pem.encode('utf-8'))
+                    public_key = cert.public_key()
+                    not_after = cert.not_valid_after_utc.timestamp() if hasattr(cert, "not_valid_after_utc") \
+                        else cert.not_valid_after.replace(tzinfo=timezone.utc).timestamp()
+                except Exception as cert_error:
+                    logger.error(f"Erro ao processar certificado X.509: {cert_error}")
+                    return None
+                with self._public_keys_lock:
+                    if self._public_keys_cache is public_keys: # Ignora se o conjunto de certificados mudou nesse meio-tempo
+                        self._public_key_objects[kid] = (public_key, not_after)
             
             # 5. Verificar o token com a chave pública extraída
             decoded_token = jwt.decode(
                 id_token,
-                key=public_key_pem,  # Usa a chave pública extraída
+                key=public_key,  # Objeto de chave pública (RSA) do certificado
                 algorithms=["RS256"],
                 audience=self.project_id,
                 issuer=f"https://securetoken.google.com/{self.project_id}",
@@ -817,6 +986,10 @@ class FbManagerAuth:
                 logger.warning(f"Autenticação muito antiga: {current_time - auth_time} segundos")
             
             logger.debug(f"Token JWT verificado com sucesso para usuário: {decoded_token.get('user_id')}")
+            with self._public_keys_lock:
+                self._verified_tokens[token_key] = (dict(decoded_token), decoded_token["exp"] - ID_TOKEN_VERIFY_CACHE_MARGIN_SECONDS)
+                while len(self._verified_tokens) > ID_TOKEN_VERIFY_CACHE_MAX_ENTRIES:
+                    self._verified_tokens.popitem(last=False)
             return decoded_token
 
         except jwt.ExpiredSignatureError:
@@ -863,7 +1036,7 @@ class FbManagerAuth:
         headers = {"Content-Type": "application/json"}
 
         try:
-            response = requests.post(rest_api_url, headers=headers, data=payload, timeout=15)
+            response = get_firebase_session().post(rest_api_url, headers=headers, data=payload, timeout=15)
             response.raise_for_status()
 
             response_data = response.json()
@@ -928,7 +1101,7 @@ class FbManagerAuth:
         headers = {"Content-Type": "application/json"}
 
         try:
-            response = requests.post(rest_api_url, headers=headers, data=payload, timeout=15)
+            response = get_firebase_session().post(rest_api_url, headers=headers, data=payload, timeout=15)
             response.raise_for_status() # Levanta HTTPError para respostas 4xx/5xx
 
             response_data = response.json()
@@ -979,7 +1152,7 @@ class FbManagerAuth:
         headers = {"Content-Type": "application/json"}
 
         try:
-            response = requests.post(rest_api_url, headers=headers, data=payload, timeout=15)
+            response = get_firebase_session().post(rest_api_url, headers=headers, data=payload, timeout=15)
             response.raise_for_status()
             response_data = response.json()
             
@@ -1042,7 +1215,7 @@ class FbManagerAuth:
         headers = {"Content-Type": "application/json"}
 
         try:
-            response = requests.post(rest_api_url, headers=headers, data=payload, timeout=15)
+            response = get_firebase_session().post(rest_api_url, headers=headers, data=payload, timeout=15)
             response.raise_for_status()
             logger.debug(f"Solicitação de email de verificação enviada com sucesso para o usuário.")
             return True
@@ -1066,7 +1239,7 @@ class FbManagerAuth:
         headers = {"Content-Type": "application/json"}
 
         try:
-            response = requests.post(rest_api_url, headers=headers, data=payload, timeout=15)
+            response = get_firebase_session().post(rest_api_url, headers=headers, data=payload, timeout=15)
             response.raise_for_status()
             logger.debug(f"Email de redefinição de senha enviado para {email}.")
             return True
@@ -1110,7 +1283,7 @@ class FbManagerAuth:
         headers = {"Content-Type": "application/json"}
 
         try:
-            response = requests.post(rest_api_url, headers=headers, data=payload, timeout=15)
+            response = get_firebase_session().post(rest_api_url, headers=headers, data=payload, timeout=15)
             response.raise_for_status()
             response_data = response.json() # Contém id_token, refresh_token, expires_in, user_id
 
@@ -1234,7 +1407,7 @@ class FbManagerAuth:
             "returnSecureToken": False 
         })
         headers = {"Content-Type": "application/json"}
-        response = requests.post(rest_api_url, headers=headers, data=payload, timeout=15)
+        response = get_firebase_session().post(rest_api_url, headers=headers, data=payload, timeout=15)
         response.raise_for_status() # Deixa _execute_sensitive_action tratar HTTPError
         logger.debug("API Call: Senha alterada com sucesso (raw).")
         return response.json() # Retorna o JSON da resposta (geralmente dados do usuário atualizados ou vazio)
@@ -1284,7 +1457,7 @@ class FbManagerAuth:
 
         payload = json.dumps(payload_dict)
         headers = {"Content-Type": "application/json"}
-        response = requests.post(rest_api_url, headers=headers, data=payload, timeout=15)
+        response = get_firebase_session().post(rest_api_url, headers=headers, data=payload, timeout=15)
         response.raise_for_status()
         logger.debug("API Call: Perfil atualizado com sucesso (raw).")
         return response.json()
@@ -1322,7 +1495,7 @@ class FbManagerAuth:
         rest_api_url = f"{self.identity_toolkit_base_url}:delete?key={self.firebase_web_api_key}"
         payload = json.dumps({"idToken": id_token})
         headers = {"Content-Type": "application/json"}
-        response = requests.post(rest_api_url, headers=headers, data=payload, timeout=15)
+        response = get_firebase_session().post(rest_api_url, headers=headers, data=payload, timeout=15)
         response.raise_for_status()
         logger.debug("API Call: Conta do usuário excluída com sucesso (raw).")
         return response.json() # Geralmente um JSON vazio {}
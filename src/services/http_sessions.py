@@ -0,0 +1,95 @@
+# src/services/http_sessions.py
+"""
+Sessões `requests` compartilhadas para as APIs REST do Firebase (Firestore, Storage e Auth).
+
+`requests.request`/`requests.post` criam uma sessão (e uma nova conexão TCP+TLS, muitas vezes via proxy
+corporativo) a cada chamada. Aqui há uma sessão por (proxy, verificação SSL), com pool de conexões
+keep-alive e novas tentativas com backoff exponencial (respeitando Retry-After) em 429/5xx para métodos
+idempotentes e em falhas de conexão para qualquer método. O proxy e a verificação SSL são definidos
+explicitamente na sessão (trust_env=False), a partir de `config_manager.get_proxy_config`.
+"""
+import logging
+logger = logging.getLogger(__name__)
+
+from time import perf_counter
+start_time = perf_counter()
+logger.debug(f"{start_time:.4f}s - Iniciando http_sessions.py")
+
+import threading
+from typing import Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from src.settings import (FIREBASE_HTTP_POOL_MAXSIZE, FIREBASE_HTTP_MAX_RETRIES, FIREBASE_HTTP_BACKOFF_FACTOR,
+                          FIREBASE_HTTP_RETRY_STATUS)
+from src.utils import current_proxy_settings, key_fingerprint
+
+# POST (criação de documentos, login, commit) não é repetido após resposta de erro: pode não ser idempotente
+RETRY_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE", "PATCH"})
+
+def build_session(proxy_url: Optional[str] = None, verify_ssl: bool = True,
+                  pool_maxsize: int = FIREBASE_HTTP_POOL_MAXSIZE, max_retries: int = FIREBASE_HTTP_MAX_RETRIES,
+                  backoff_factor: float = FIREBASE_HTTP_BACKOFF_FACTOR) -> requests.Session:
+    """Cria uma sessão com pool keep-alive, política de novas tentativas e proxy/SSL explícitos."""
+    retry = Retry(
+        total=max_retries,
+        connect=max_retries,
+        read=max_retries,
+        status=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=FIREBASE_HTTP_RETRY_STATUS,
+        allowed_methods=RETRY_METHODS,
+        respect_retry_after_header=True,
+        raise_on_status=False, # A resposta final segue para raise_for_status() no chamador
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.trust_env = False # Proxy/SSL explícitos: mudanças posteriores no ambiente não afetam a sessão
+    if proxy_url:
+        session.proxies = {"http": proxy_url, "https": proxy_url}
+    session.verify = verify_ssl
+    return session
+
+class HttpSessionPool:
+    """Mantém uma sessão `requests` reutilizável (thread-safe para requisições) por (proxy, verificação SSL)."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sessions: Dict[Tuple[str, bool], requests.Session] = {}
+
+    def get(self, proxy_url: Optional[str] = None, verify_ssl: bool = True) -> requests.Session:
+        pool_key = (key_fingerprint(proxy_url) if proxy_url else "", verify_ssl)
+        with self._lock:
+            session = self._sessions.get(pool_key)
+            if session is None:
+                session = build_session(proxy_url, verify_ssl)
+                self._sessions[pool_key] = session
+                logger.debug(f"Nova sessão HTTP para o Firebase (proxy={'sim' if proxy_url else 'não'}, verify_ssl={verify_ssl}).")
+            return session
+
+    def close_all(self):
+        """Fecha as sessões (ex.: logout ou encerramento do app)."""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            try:
+                session.close()
+            except Exception as e:
+                logger.debug(f"Falha ao fechar sessão HTTP do Firebase: {e}")
+
+_pool = HttpSessionPool()
+
+def get_firebase_session() -> requests.Session:
+    """Sessão compartilhada para a configuração de proxy/SSL em memória (`config_manager.get_proxy_config`)."""
+    proxy_url, verify_ssl = current_proxy_settings()
+    return _pool.get(proxy_url, verify_ssl)
+
+def close_firebase_sessions():
+    _pool.close_all()
+
+execution_time = perf_counter() - start_time
+logger.debug(f"Carregado HTTP_SESSIONS em {execution_time:.4f}s")
@@ -0,0 +1,329 @@
+# src/services/metrics_writer.py
+"""
+Gravação assíncrona (write-behind) das métricas de uso e dos feedbacks no Firestore.
+
+`save_analysis_metrics`/`save_feedback_data` apenas enfileiram o evento e retornam; uma thread daemon
+agrupa os eventos pendentes e os grava com `documents:commit` (até METRICS_WRITER_BATCH_SIZE escritas
+por requisição). Cada evento é antes anexado a um spool local (JSONL, somente acréscimo) e só é
+confirmado no spool após o commit, de modo que métricas geradas offline ou antes de uma queda do app
+são reenviadas na próxima execução. Os IDs de documento são gerados no enfileiramento: reenviar um
+lote já gravado apenas sobrescreve os mesmos documentos.
+
+O token do usuário não é gravado no spool: eventos de execuções anteriores aguardam até que um token
+do mesmo usuário seja informado (próximo evento ou `set_user_token`).
+"""
+import logging
+logger = logging.getLogger(__name__)
+
+from time import perf_counter
+start_time = perf_counter()
+logger.debug(f"{start_time:.4f}s - Iniciando metrics_writer.py")
+
+import json, os, re, secrets, threading, time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from src.settings import (PROJECT_ID, METRICS_WRITER_BATCH_SIZE, METRICS_WRITER_FLUSH_INTERVAL_SECONDS,
+                          METRICS_WRITER_MAX_BACKOFF_SECONDS, METRICS_WRITER_SPOOL_PATH)
+
+DOCUMENTS_ROOT = f"projects/{PROJECT_ID}/databases/(default)/documents"
+
+# commit_fn(user_token, writes) grava as escritas (formato `Write` da API REST) ou levanta exceção
+CommitFunction = Callable[[str, List[Dict[str, Any]]], None]
+
+def new_metric_document_id(event_type: Optional[str], now: Optional[datetime] = None) -> str:
+    """ID cronológico do documento: YYYYMMDDHHMMSSmmm_<evento>_<sufixo aleatório>."""
+    now = now or datetime.now()
+    event_type_safe = re.sub(r'[^a-zA-Z0-9_]', '', event_type or "unknown").lower()[:20]
+    return f"{now.strftime('%Y%m%d%H%M%S%f')[:-3]}_{event_type_safe}_{secrets.token_hex(3)}"
+
+def _status_code(error: Exception) -> Optional[int]:
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None)
+
+class MetricsWriter:
+    """
+    Fila de métricas com spool em disco e gravação em lote por uma thread de fundo.
+
+    Args:
+        commit_fn (CommitFunction): Função que executa o `documents:commit` com o token do usuário.
+        spool_path (Optional[str]): Arquivo JSONL do spool (None = sem persistência local).
+        batch_size (int): Máximo de escritas por commit (limite da API: 500).
+        flush_interval (float): Espera máxima (s) entre a chegada de um evento e o envio do lote.
+        max_backoff (float): Intervalo máximo (s) entre novas tentativas após falha de envio.
+        clock (Callable[[], float]): Relógio monotônico (injetável em testes).
+    """
+    def __init__(self, commit_fn: CommitFunction, spool_path: Optional[str] = METRICS_WRITER_SPOOL_PATH,
+                 batch_size: int = METRICS_WRITER_BATCH_SIZE, flush_interval: float = METRICS_WRITER_FLUSH_INTERVAL_SECONDS,
+                 max_backoff: float = METRICS_WRITER_MAX_BACKOFF_SECONDS, clock: Callable[[], float] = time.monotonic):
+        self._commit_fn = commit_fn
+        self._spool_path = spool_path
+        self._batch_size = max(1, min(int(batch_size), 500))
+        self._flush_interval = flush_interval
+        self._max_backoff = max_backoff
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._idle = threading.Condition(self._lock)
+        self._pending: Dict[str, Dict[str, Any]] = {} # doc_id -> {"user_id", "path", "fields"} (ordem de chegada)
+        self._tokens: Dict[str, str] = {}
+        self._blocked_users: Dict[str, float] = {} # user_id -> instante a partir do qual pode tentar de novo
+        self._failures: Dict[str, int] = {}
+        self._spool_records = 0
+        self._in_flight = 0
+        self._window_started: Optional[float] = None # Chegada do 1º evento do lote em formação
+        self._flush_requested = False
+        self._stop = False
+        self._thread: Optional[threading.Thread] = None
+
+        self.last_commit_stats: Dict[str, Any] = {}
+        self._load_spool()
+
+    # --- Spool -----------------------------------------------------------------------------------
+
+    def _load_spool(self):
+        """Reconstrói os eventos pendentes (adicionados e ainda não confirmados) do spool."""
+        if not self._spool_path or not os.path.exists(self._spool_path):
+            return
+        try:
+            with open(self._spool_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    self._spool_records += 1
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue # Linha truncada (queda durante a escrita)
+                    if record.get("op") == "add":
+                        self._pending[record["id"]] = {k: record[k] for k in ("user_id", "path", "fields")}
+                    elif record.get("op") == "ack":
+                        for doc_id in record.get("ids", []):
+                            self._pending.pop(doc_id, None)
+            if self._pending:
+                logger.info(f"MetricsWriter: {len(self._pending)} métrica(s) pendente(s) recuperada(s) do spool.")
+            self._compact_spool_locked()
+        except Exception as e:
+            logger.error(f"MetricsWriter: falha ao ler o spool {self._spool_path}: {e}")
+
+    def _append_spool_locked(self, record: Dict[str, Any]):
+        if not self._spool_path:
+            return
+        try:
+            with open(self._spool_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._spool_records += 1
+        except Exception as e:
+            logger.error(f"MetricsWriter: falha ao gravar no spool {self._spool_path}: {e}")
+
+    def _compact_spool_locked(self):
+        """Reescreve o spool apenas com os eventos pendentes (substituição atômica)."""
+        if not self._spool_path:
+            return
+        try:
+            if not self._pending:
+                if os.path.exists(self._spool_path):
+                    os.remove(self._spool_path)
+                self._spool_records = 0
+                return
+            tmp_path = f"{self._spool_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for doc_id, event in self._pending.items():
+                    f.write(json.dumps({"op": "add", "id": doc_id, **event}, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self._spool_path)
+            self._spool_records = len(self._pending)
+        except Exception as e:
+            logger.error(f"MetricsWriter: falha ao compactar o spool {self._spool_path}: {e}")
+
+    # --- API pública ---------------------------------------------------------------------------
+
+    def enqueue(self, user_token: str, user_id: str, document_path: str, fields: Dict[str, Any]) -> str:
+        """
+        Registra um documento a gravar (já no formato `fields` da API REST) e retorna imediatamente.
+
+        Args:
+            user_token (str): Token de ID do usuário (usado também para os pendentes dele no spool).
+            user_id (str): ID do usuário.
+            document_path (str): Caminho do documento relativo a `documents/` (ex.: "user_metrics/uid/metrics/id").
+            fields (Dict[str, Any]): Campos convertidos por `_to_firestore_value`.
+
+        Returns:
+            str: ID do evento (último segmento do caminho do documento).
+        """
+        doc_id = document_path.rsplit("/", 1)[-1]
+        event = {"user_id": user_id, "path": document_path, "fields": fields}
+        with self._lock:
+            self._append_spool_locked({"op": "add", "id": doc_id, **event})
+            self._pending[doc_id] = event
+            if self._window_started is None:
+                self._window_started = self._clock()
+            self._set_token_locked(user_id, user_token)
+        self._ensure_thread()
+        self._wakeup.set()
+        return doc_id
+
+    def set_user_token(self, user_id: str, user_token: str):
+        """Atualiza o token usado para os eventos do usuário (ex.: após login ou renovação do token)."""
+        with self._lock:
+            self._set_token_locked(user_id, user_token)
+            has_pending = any(event["user_id"] == user_id for event in self._pending.values())
+        if has_pending:
+            self._ensure_thread()
+            self._wakeup.set()
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Solicita o envio imediato e aguarda até não haver eventos enviáveis. Retorna True se esvaziou."""
+        deadline = None if timeout is None else self._clock() + timeout
+        self._ensure_thread()
+        with self._lock:
+            self._blocked_users.clear()
+            self._flush_requested = True
+            self._wakeup.set()
+            while self._in_flight or self._sendable_users_locked():
+                remaining = None if deadline is None else deadline - self._clock()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._idle.wait(remaining if remaining is not None else 1.0)
+                self._wakeup.set()
+            return not self._pending
+
+    def close(self, timeout: float = 5.0):
+        """Tenta enviar os pendentes e encerra a thread (o que sobrar continua no spool)."""
+        self.flush(timeout)
+        with self._lock:
+            self._stop = True
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    # --- Thread de envio -------------------------------------------------------------------------
+
+    def _set_token_locked(self, user_id: str, user_token: str):
+        if user_token and self._tokens.get(user_id) != user_token:
+            self._tokens[user_id] = user_token
+            self._blocked_users.pop(user_id, None) # Novo token: tenta de novo sem esperar o backoff
+
+    def _sendable_users_locked(self) -> List[str]:
+        now = self._clock()
+        users = []
+        for event in self._pending.values():
+            user_id = event["user_id"]
+            if user_id in users or user_id not in self._tokens:
+                continue
+            if self._blocked_users.get(user_id, 0.0) > now:
+                continue
+            users.append(user_id)
+        return users
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._stop or (self._thread is not None and self._thread.is_alive()):
+                return
+            self._thread = threading.Thread(target=self._run, name="MetricsWriter", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if self._stop:
+                    return
+                wait_for = self._flush_interval
+                if self._window_started is not None and not self._flush_requested:
+                    wait_for = max(0.0, self._window_started + self._flush_interval - self._clock())
+            if wait_for > 0:
+                self._wakeup.wait(wait_for)
+            self._wakeup.clear()
+            while self._send_next_batch():
+                pass
+
+    def _send_next_batch(self) -> bool:
+        """
+        Envia um lote de um usuário. Lotes incompletos só são enviados ao fim da janela de agrupamento
+        (ou em `flush`). Retorna True se ainda pode haver lotes enviáveis.
+        """
+        with self._lock:
+            users = self._sendable_users_locked()
+            due = (self._flush_requested or self._window_started is None
+                   or self._clock() >= self._window_started + self._flush_interval)
+            batch = []
+            for user_id in users:
+                batch = [(doc_id, event) for doc_id, event in self._pending.items() if event["user_id"] == user_id][:self._batch_size]
+                if due or len(batch) == self._batch_size:
+                    break
+                batch = []
+            if not batch:
+                if due:
+                    # Nada mais a enviar agora; pendentes sem token ou em backoff são verificados a cada intervalo
+                    self._flush_requested = False
+                    self._window_started = None
+                self._idle.notify_all()
+                return False
+            user_token = self._tokens[user_id]
+            self._in_flight += 1
+
+        writes = [{"update": {"name": f"{DOCUMENTS_ROOT}/{event['path']}", "fields": event["fields"]}} for _, event in batch]
+        start = perf_counter()
+        error = None
+        try:
+            self._commit_fn(user_token, writes)
+        except Exception as e:
+            error = e
+
+        with self._lock:
+            self._in_flight -= 1
+            doc_ids = [doc_id for doc_id, _ in batch]
+            status = _status_code(error) if error is not None else None
+            if error is None or (status is not None and 400 <= status < 500 and status not in (401, 403, 408, 429)):
+                # Sucesso, ou requisição rejeitada por conteúdo inválido (reenviar não adiantaria)
+                if error is not None:
+                    logger.error(f"MetricsWriter: {len(batch)} métrica(s) descartada(s) após erro {status}: {error}")
+                for doc_id in doc_ids:
+                    self._pending.pop(doc_id, None)
+                self._append_spool_locked({"op": "ack", "ids": doc_ids})
+                if not self._pending or self._spool_records > 4 * max(len(self._pending), self._batch_size):
+                    self._compact_spool_locked()
+                self._failures.pop(user_id, None)
+            else:
+                failures = self._failures.get(user_id, 0) + 1
+                self._failures[user_id] = failures
+                delay = min(self._max_backoff, self._flush_interval * (2 ** (failures - 1)))
+                if status in (401, 403):
+                    delay = self._max_backoff # Token expirado/sem permissão: aguarda um novo token
+                self._blocked_users[user_id] = self._clock() + delay
+                logger.warning(f"MetricsWriter: falha ao enviar {len(batch)} métrica(s) (tentativa {failures}, "
+                               f"nova tentativa em {delay:.0f}s; mantidas no spool): {error}")
+            self.last_commit_stats = {"writes": len(batch), "ok": error is None, "status": status,
+                                      "elapsed_seconds": perf_counter() - start, "pending": len(self._pending)}
+            self._idle.notify_all()
+        return True
+
+_writer: Optional[MetricsWriter] = None
+_writer_lock = threading.Lock()
+
+def get_metrics_writer(commit_fn: Optional[CommitFunction] = None) -> MetricsWriter:
+    """Instância compartilhada do processo (criada no primeiro uso com o `commit_fn` informado)."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            if commit_fn is None:
+                from src.services.firebase_client import FirebaseClientFirestore
+                commit_fn = FirebaseClientFirestore().commit_writes_client
+            _writer = MetricsWriter(commit_fn)
+        return _writer
+
+def close_metrics_writer(timeout: float = 5.0):
+    """Envia o que for possível antes do encerramento do app (o restante fica no spool)."""
+    with _writer_lock:
+        writer = _writer
+    if writer is not None:
+        writer.close(timeout)
+
+execution_time = perf_counter() - start_time
+logger.debug(f"Carregado METRICS_WRITER em {execution_time:.4f}s")
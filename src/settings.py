@@ -45,6 +45,7 @@ for pth in [UPLOAD_TEMP_DIR, ASSETS_DIR, PATH_LOGS_DIR]:
 PATH_IMAGE_LOGO_DEPARTAMENTO = "logo_pf_orgao.png" 
 TEMPLATES_DOCX_SUBDIR = "templates_docx"
 WEB_TEMP_EXPORTS_SUBDIR = "temp_docx_exports"
+BULK_EXPORT_MAX_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1)) # Processos da exportação em lote de DOCX (src/core/bulk_export.py)
 
 # --- Configurações Gerais da Aplicação -------------------------------------------------------------------------------
 APP_NAME = "DocsAnalyzerPF"
@@ -80,6 +81,16 @@ if FIREBASE_WEB_API_KEY == "SUA_FIREBASE_WEB_API_KEY_AQUI":
 
 PROJECT_ID = "docs-analyzer-a7430"
 FB_STORAGE_BUCKET = "docs-analyzer-a7430.firebasestorage.app"
+# Sessões HTTP das APIs REST do Firebase (src/services/http_sessions.py): pool keep-alive por (proxy, verificação SSL)
+# e novas tentativas com backoff exponencial em 429/5xx (apenas métodos idempotentes) e em falhas de conexão.
+FIREBASE_HTTP_POOL_MAXSIZE = 10
+FIREBASE_HTTP_MAX_RETRIES = 3
+FIREBASE_HTTP_BACKOFF_FACTOR = 0.5
+FIREBASE_HTTP_RETRY_STATUS = (429, 500, 502, 503, 504)
+# Verificação de ID tokens (FbManagerAuth.verify_id_token): chaves públicas decodificadas ficam em cache por `kid`
+# enquanto o certificado é válido, e tokens já verificados até ID_TOKEN_VERIFY_CACHE_MARGIN_SECONDS antes do `exp`.
+ID_TOKEN_VERIFY_CACHE_MARGIN_SECONDS = 60
+ID_TOKEN_VERIFY_CACHE_MAX_ENTRIES = 256
 #FIREBASE_DB_URL = 'https://app-scripts-sec-default-rtdb.firebaseio.com/'
 
 # Caminhos de configuração do FIRESTORE -----------------------------------
@@ -93,6 +104,11 @@ LLM_EMBEDDINGS_DEFAULT_DOC_ID = "model_embeddings_list" # Documento com a lista
 
 PROMPTS_COLLECTION = "prompt_templates"
 PROMPTS_DOCUMENT_ID = "initial_analysis_v1"
+PROMPT_REGISTRY_RECHECK_SECONDS = 300 # Intervalo mínimo entre verificações da versão (updateTime) do documento de prompts
+# Cache de documentos de configuração globais (src/services/config_cache.py): servidos da memória por
+# CONFIG_CACHE_TTL_SECONDS; depois, por mais CONFIG_CACHE_STALE_SECONDS, servidos enquanto revalidam em segundo plano.
+CONFIG_CACHE_TTL_SECONDS = 300
+CONFIG_CACHE_STALE_SECONDS = 3600
 
 # Chaves de sessão relacionadas ao Firebase ---------------------------------
 KEYRING_SERVICE_FIREBASE = f"{APP_NAME}_Firebase"
@@ -117,6 +133,84 @@ DEFAULT_LLM_SERVICE = "openai" # Exemplo
 DEFAULT_LLM_PROVIDER = "openai"
 DEFAULT_LLM_MODEL = "gpt-4.1-mini" # Modelo inicial padrão
 DEFAULT_TEMPERATURE = 0.3 # Baixa temperatura para respostas mais factuais/consistentes
+# Sobrescreve a URL base da API compatível com OpenAI (ex.: servidor stub local em benchmarks/stub_server.py)
+LLM_BASE_URL_ENV_VAR = "DOCS_ANALYZER_OPENAI_BASE_URL"
+# Registro de clientes OpenAI (src/core/llm_clients.py): um cliente por (provedor, chave, URL base, proxy),
+# com pool de conexões HTTP keep-alive compartilhado por (proxy, verificação SSL).
+LLM_HTTP_MAX_CONNECTIONS = 20
+LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS = 10
+LLM_HTTP_KEEPALIVE_EXPIRY_SECONDS = 120.0
+LLM_HTTP_CONNECT_TIMEOUT_SECONDS = 10.0
+LLM_CLIENT_REGISTRY_MAX_CLIENTS = 32
+
+# Seleção das páginas que cabem em llm_input_token_limit (src/core/budget_planner.py):
+# "knapsack" maximiza a relevância total (mochila 0/1); "greedy" preenche na ordem de relevância e trunca a 1ª que não cabe.
+PAGE_BUDGET_PLANNER = "knapsack"
+KNAPSACK_EXACT_MAX_CELLS = 5_000_000   # Programação dinâmica exata enquanto n_páginas * (orçamento+1) couber neste limite
+KNAPSACK_APPROX_BUCKETS = 4000         # Acima disso, custos são reescalados para esta resolução (solução aproximada)
+# Remoção de cabeçalhos/rodapés repetidos (src/core/boilerplate.py): linhas presentes em pelo menos
+# BOILERPLATE_MIN_PAGE_FRACTION das páginas de um arquivo são removidas logo após a extração.
+BOILERPLATE_STRIPPING_ENABLED = True
+BOILERPLATE_MIN_PAGE_FRACTION = 0.6
+BOILERPLATE_MIN_PAGES = 3        # Arquivos com menos páginas não são avaliados
+BOILERPLATE_MIN_LINE_CHARS = 4   # Linhas mais curtas (ex.: números de página isolados) não são consideradas
+# Compressão extrativa (src/core/text_compression.py): quando as páginas relevantes excedem o limite de tokens,
+# frases redundantes e de baixa informação são descartadas antes da seleção por orçamento (o corte fixo do
+# texto passa a ser o último recurso).
+TEXT_COMPRESSION_ENABLED = True
+TEXT_COMPRESSION_REDUNDANCY_THRESHOLD = 0.9     # Similaridade de cosseno (TF-IDF) para considerar uma frase redundante
+TEXT_COMPRESSION_MIN_KEEP_RATIO = 0.5           # Fração mínima dos tokens de cada página preservada pela compressão
+TEXT_COMPRESSION_MAX_SENTENCES_FOR_SIMILARITY = 5000 # Acima disso, apenas duplicatas exatas são removidas
+# Índice geográfico (src/core/gazetteer.py): similaridade mínima (Jaccard de trigramas) para aceitar a grafia
+# aproximada de um município retornado pela LLM.
+GAZETTEER_FUZZY_MIN_SIMILARITY = 0.7
+
+# Modo PROMPTS_SEGMENTADOS: o 1º segmento é enviado sozinho (aquece o cache de prefixo do provedor)
+# e os demais seguem em paralelo, limitados por LLM_SEGMENTS_MAX_CONCURRENCY.
+LLM_SEGMENTS_CONCURRENT = True
+LLM_SEGMENTS_MAX_CONCURRENCY = 4
+# Modo map-reduce (prompt_structure="map_reduce"): quando as páginas relevantes excedem llm_input_token_limit,
+# são particionadas em blocos de até LLM_MAP_REDUCE_CHUNK_TOKENS, analisados em paralelo com o PROMPT_UNICO e
+# consolidados por return_parse_prompt. Blocos menos relevantes são descartados se a estimativa de custo
+# ultrapassar LLM_MAP_REDUCE_MAX_COST_USD.
+LLM_MAP_REDUCE_CHUNK_TOKENS = 60000
+LLM_MAP_REDUCE_MAX_CONCURRENCY = 4
+LLM_MAP_REDUCE_MAX_CHUNKS = 12
+LLM_MAP_REDUCE_MAX_COST_USD = 2.0
+LLM_MAP_REDUCE_EST_OUTPUT_TOKENS = 2000 # Estimativa de tokens de saída por bloco (cálculo do custo máximo)
+# PROMPT_UNICO em streaming: campos da resposta estruturada são exibidos na GUI à medida que chegam.
+LLM_STREAMING_ENABLED = True
+# Layout dos prompts favorável ao cache de prefixo (src/core/prompt_layout.py): instruções estáticas primeiro
+# e o texto do documento ao final, para que o prefixo seja reaproveitado entre documentos e usuários.
+PROMPT_CACHE_FRIENDLY_LAYOUT = True
+
+# Cache local (disco) de respostas da LLM: reaproveita requisições idênticas (modelo, temperatura,
+# mensagens renderizadas e schema de saída), comuns durante ajuste de prompts e reanálises.
+LLM_RESPONSE_CACHE_ENABLED = True
+LLM_RESPONSE_CACHE_DIR = os.path.join(APP_DATA_DIR, "llm_response_cache")
+LLM_RESPONSE_CACHE_TTL_SECONDS = 7 * 24 * 3600
+LLM_RESPONSE_CACHE_MAX_TEMPERATURE = 0.0 # Temperaturas acima deste valor não usam o cache (respostas não determinísticas)
+
+# Resiliência das chamadas à LLM (src/core/llm_resilience.py): prazo por chamada lógica (incluindo novas
+# tentativas), backoff exponencial com jitter em erros transitórios, circuit breaker por provedor/modelo
+# e hedging opcional (requisição duplicada após a latência p95 observada; vence a primeira resposta).
+LLM_CALL_DEADLINE_SECONDS = 300.0
+LLM_ATTEMPT_TIMEOUT_SECONDS = 180.0
+LLM_RETRY_MAX_ATTEMPTS = 4
+LLM_RETRY_BASE_DELAY_SECONDS = 1.0
+LLM_RETRY_MAX_DELAY_SECONDS = 30.0
+LLM_CIRCUIT_FAILURE_THRESHOLD = 5      # Falhas transitórias consecutivas que abrem o circuito
+LLM_CIRCUIT_RESET_SECONDS = 60.0       # Tempo com o circuito aberto antes de uma requisição de teste
+LLM_HEDGING_ENABLED = False            # Duplica requisições lentas (custo extra de tokens)
+LLM_HEDGING_PERCENTILE = 0.95
+LLM_HEDGING_MIN_SAMPLES = 10           # Latências observadas necessárias antes de ativar o hedging
+
+# Métricas e feedbacks (src/services/metrics_writer.py): gravados em segundo plano com documents:commit em lotes.
+# Eventos ainda não confirmados ficam no spool local e são reenviados na próxima execução.
+METRICS_WRITER_BATCH_SIZE = 100                  # Escritas por commit (máximo da API: 500)
+METRICS_WRITER_FLUSH_INTERVAL_SECONDS = 2.0      # Espera para agrupar eventos antes do envio
+METRICS_WRITER_MAX_BACKOFF_SECONDS = 300.0       # Intervalo máximo entre novas tentativas após falha
+METRICS_WRITER_SPOOL_PATH = os.path.join(APP_DATA_DIR, "metrics_spool.jsonl")
 
 # Fallback Default Analysis Settings (se Firestore falhar)
 FALLBACK_ANALYSIS_SETTINGS = {
@@ -135,6 +229,19 @@ FALLBACK_ANALYSIS_SETTINGS = {
     "prompt_structure": "prompt_unico",
 }
 
+# --- Configurações de Profiling (opt-in) ----------------------------------------------------------------
+# Relatórios são gravados em subpasta do diretório de logs gerenciado pelo LoggerSetup.
+PROFILING_REPORTS_DIR = os.path.join(PATH_LOGS_DIR, "profiling")
+MEMORY_PROFILING_ENV_VAR = "DOCS_ANALYZER_MEMORY_PROFILING" # "1" ativa o perfil de memória por etapa
+MEMORY_PROFILING_TOP_N = 15              # Quantidade de sítios de alocação listados por etapa
+MEMORY_PROFILING_TRACE_FRAMES = 1        # Profundidade das tracebacks do tracemalloc (1 = mais barato)
+MEMORY_PROFILING_RSS_INTERVAL = 0.05     # Intervalo de amostragem do RSS (segundos)
+CPU_PROFILING_ENV_VAR = "DOCS_ANALYZER_CPU_PROFILING"  # "cprofile" ou "sampling" ativa o perfil de CPU por job
+CPU_PROFILING_UPLOAD_ENV_VAR = "DOCS_ANALYZER_PROFILING_UPLOAD" # "1" envia os perfis (texto) pelo CloudLogHandler
+CPU_PROFILING_SAMPLE_INTERVAL = 0.005    # Intervalo do profiler por amostragem (segundos)
+CPU_PROFILING_STATS_LINES = 60           # Linhas do resumo pstats gravado junto ao .prof
+CLOUD_PROFILING_FOLDER = "logs/profiling/" # Pasta no CloudStorage (sob a pasta de logs)
+
 
 # --- Configurações de Proxy -------------------------------------------------------------------------
 # Constantes Keyring Proxy -> rótulos fixos para uso no keyring e também no Dict_resultado config_proxy
@@ -147,6 +254,9 @@ K_PROXY_IP_URL = "ip_address"
 K_PROXY_PORT = "port_proxy"
 K_PROXY_USERNAME = "username_proxy"
 K_PROXY_PASSWORD = "password_proxy"
+# Com o proxy habilitado, a verificação do certificado SSL é desativada nos clientes HTTP (inspeção TLS do proxy
+# corporativo). A configuração é lida do Keyring uma vez (config_manager.get_proxy_config) e repassada explicitamente.
+PROXY_SKIP_SSL_VERIFY = True
 
 def show_data_k(keyring):
     """
@@ -170,6 +280,7 @@ KEY_SESSION_LLM_REANALYSIS = "apv_llm_reanalysis_flag"
 
 # Dados a ficar em _SERVER_SIDE_CACHE:
 KEY_SESSION_PDF_AGGREGATED_TEXT_INFO = "apv_pdf_aggregated_text_info" # (str_pages, aggregated_text, tokens_antes, tokens_depois)
+KEY_SESSION_PDF_MAP_REDUCE_CHUNKS = "apv_pdf_map_reduce_chunks" # Blocos de páginas relevantes p/ o modo map-reduce (None se couberem no limite)
 KEY_SESSION_PDF_LLM_RESPONSE = "apv_pdf_llm_response"                                           # Resposta original da IA
 KEY_SESSION_PDF_LLM_RESPONSE_ACTUAL = "apv_pdf_llm_response_actual"                             # Resposta na GUI (que pode ter sido editada pelo usuário) # LLMStructuredResultDisplay.get_current_form_data()
 KEY_SESSION_PDF_LLM_RESPONSE_SNAPSHOT_FOR_FEEDBACK = "apv_llm_response_snapshot_for_feedback"   # Cópia da resposta original p/ fins de comparação com a respota editada pelo usuário.
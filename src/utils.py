@@ -6,12 +6,11 @@ start_time = perf_counter()
 logger.info(f"[DEBUG] {start_time:.4f}s - Iniciando utils.py")
 print(f"[DEBUG] {start_time:.4f}s - Iniciando utils.py")
 
-import os, keyring, re
+import os, re
 from rich import print
-from typing import Union, Optional, Any, List
+from typing import Union, Optional, Any, List, Tuple
 
-from src.settings import (K_PROXY_ENABLED, K_PROXY_IP_URL, K_PROXY_PORT, K_PROXY_USERNAME, 
-                            K_PROXY_PASSWORD_SAVED, ASSETS_DIR)
+from src.settings import ASSETS_DIR
 
 # Dicionário para servir como cache no lado do servidor para dados pesados da sessão.
 # A chave será o ID da sessão do Flet (page.session_id).
@@ -52,167 +51,66 @@ def clear_user_cache(page, preserve_keys: Optional[List[str]] = None):
         del _SERVER_SIDE_CACHE[session_id]
         logger.debug(f"Cache completo do lado do servidor limpo para a sessão {session_id}.")
 
-import functools, urllib, ssl
-def with_proxy(skip_ssl_verify: bool = True):
+import functools
+def with_proxy():
     """
-    Decorador de fábrica que aplica configurações de proxy e, opcionalmente,
-    desativa a verificação de certificado SSL para a função decorada.
+    Decorador de fábrica que marca funções com acesso à rede que dependem da configuração de proxy.
 
-    Busca as configurações de proxy usando config_manager.
-
-    Args:
-        skip_ssl_verify (bool, optional): Se True (padrão), desativa a
-            verificação de certificado SSL. Se False, mantém a verificação padrão.
+    A configuração não é mais aplicada em variáveis de ambiente nem no contexto SSL global do processo
+    (inseguro com sessões simultâneas): ela é lida do Keyring uma única vez (`config_manager.get_proxy_config`)
+    e os clientes HTTP (sessões `requests` do Firebase, pools httpx da OpenAI) a recebem explicitamente
+    via `current_proxy_settings`. O decorador apenas garante a configuração carregada e, com a verificação
+    SSL desativada (PROXY_SKIP_SSL_VERIFY), suprime os avisos InsecureRequestWarning do urllib3.
 
     Returns:
         Callable: O decorador real a ser aplicado à função.
     """
-    from src import config_manager
     def decorator(func):
         """O decorador real que envolve a função."""
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            """A função wrapper que aplica e restaura as configurações."""
-            # Salva o estado original do ambiente e SSL
-            # previous_http_proxy = os.environ.get('HTTP_PROXY', '')
-            # previous_https_proxy = os.environ.get('HTTPS_PROXY', '')
-            # previous_wdm_ssl_verify = os.environ.get('WDM_SSL_VERIFY', '') # Era '1', mas '' é mais seguro como padrão não definido
-            # previous_pyhttps_verify = os.environ.get('PYTHONHTTPSVERIFY', '') # Era '1', mas '' é mais seguro
-            # previous_ssl_cert_file = os.environ.get('SSL_CERT_FILE', '')
-            # previous_requests_ca = os.environ.get('REQUESTS_CA_BUNDLE', '')
-
-            previous_env = {key: os.environ.get(key, '') for key in [
-                'HTTP_PROXY', 'HTTPS_PROXY', 'ALL_PROXY', 'http_proxy', 'https_proxy', 'all_proxy',
-                'WDM_SSL_VERIFY', 'PYTHONHTTPSVERIFY', 'SSL_CERT_FILE', 'REQUESTS_CA_BUNDLE'
-            ]}
-
-            original_ssl_context = ssl._create_default_https_context
-            logger.debug(f"with_proxy: Estado inicial salvo. skip_ssl_verify={skip_ssl_verify}")
-
-            # Tentar aplicar configurações de proxy e SSL
-            proxy_config = None
-            try:
-                # Obter configurações do config_manager
-                proxy_config = config_manager.get_proxy_settings()
-
-                if proxy_config.get(K_PROXY_ENABLED):
-                    ip = proxy_config.get(K_PROXY_IP_URL)
-                    port = proxy_config.get(K_PROXY_PORT)
-                    username = proxy_config.get(K_PROXY_USERNAME)
-                    password_saved = proxy_config.get(K_PROXY_PASSWORD_SAVED)
-
-                    if not ip or not port:
-                        logger.warning("Proxy habilitado mas IP ou Porta não definidos no config_manager. Proxy não será aplicado.")
-                    else:
-                        logger.debug(f"Proxy habilitado via config_manager: {ip}:{port}, User: {username}, Password Saved: {password_saved}")
-                        proxy_url_base = f"http://{ip}:{port}"
-                        proxy_url_auth = None
-
-                        # Buscar senha somente se houver usuário, além da habilitação do proxy
-                        if username:
-                            try:
-                                password = keyring.get_password(
-                                    config_manager.PROXY_KEYRING_SERVICE, # Usar constante do config_manager
-                                    config_manager.K_PROXY_PASSWORD       # Usar constante do config_manager
-                                )
-                                if password:
-                                    logger.debug("Senha do proxy recuperada do Keyring.")
-                                    # Cuidado com caracteres especiais na senha/usuário para URLs
-                                    safe_user = urllib.parse.quote(username)
-                                    safe_pass = urllib.parse.quote(password)
-                                    proxy_url_auth = f"http://{safe_user}:{safe_pass}@{ip}:{port}"
-                                else:
-                                    logger.warning(f"Proxy user '{username}' definido e senha marcada como salva, mas senha não encontrada no Keyring.")
-                                    # Decide se continua sem autenticação ou falha? Por ora, continua sem.
-                            except Exception as e:
-                                logger.error(f"Erro ao buscar senha do proxy do Keyring: {e}", exc_info=True)
-                                # Falha ao buscar senha, continua sem autenticação
-
-                        # Definir variáveis de ambiente do proxy
-                        final_proxy_url = proxy_url_auth if proxy_url_auth else proxy_url_base
-                        os.environ['HTTP_PROXY'] = final_proxy_url
-                        os.environ['HTTPS_PROXY'] = final_proxy_url
-                        logger.debug(f"Variáveis de ambiente HTTP_PROXY/HTTPS_PROXY definidas para: {final_proxy_url}")
-
-                        # Aplicar desativação de SSL *condicionalmente*
-                        if skip_ssl_verify:
-                            logger.warning("Desativando verificação de certificado SSL devido à configuração do proxy e skip_ssl_verify=True.")
-                            # 1. Variáveis de ambiente comuns
-                            os.environ['WDM_SSL_VERIFY'] = '0'
-                            os.environ['PYTHONHTTPSVERIFY'] = '0'
-                            # Limpar caminhos de certificado pode ajudar em alguns casos
-                            os.environ['SSL_CERT_FILE'] = ''
-                            os.environ['REQUESTS_CA_BUNDLE'] = ''
-
-                            # 2. Desabilitar avisos de SSL inseguro (urllib3)
-                            try:
-                                import urllib3
-                                urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-                                logger.debug("Avisos InsecureRequestWarning do urllib3 desativados.")
-                            except ImportError:
-                                logger.debug("urllib3 não encontrado para desativar warnings.")
-                            except Exception as e:
-                                logger.error(f"Erro ao tentar desativar warnings do urllib3: {e}", exc_info=True)
-
-
-                            # 3. Modificar o contexto SSL global (último recurso, impacta tudo)
-                            try:
-                                ssl._create_default_https_context = ssl._create_unverified_context
-                                logger.debug("Contexto SSL padrão (_create_default_https_context) modificado para _create_unverified_context.")
-                            except Exception as e:
-                                 logger.error(f"Erro ao tentar modificar o contexto SSL padrão: {e}", exc_info=True)
-
-                            # 4. Configurar o módulo requests se estiver disponível
-                            try:
-                                import requests
-                                # Tentar desativar na sessão padrão e via urllib3 dentro do requests
-                                requests.packages.urllib3.disable_warnings()
-                                requests.Session().verify = False # Afeta novas sessões criadas a partir daqui
-                                logger.debug("Configurações de verificação SSL para 'requests' (se importado) ajustadas.")
-                            except ImportError:
-                                logger.debug("'requests' não encontrado para configuração SSL específica.")
-                            except Exception as e:
-                                logger.error(f"Erro ao tentar configurar 'requests' para SSL: {e}", exc_info=True)
-                        else:
-                             logger.debug("Verificação de certificado SSL mantida (skip_ssl_verify=False).")
-                else:
-                    logger.debug("Proxy desabilitado ou não configurado no config_manager.")
-                    # Limpa todas as variáveis de proxy quando desabilitado
-                    logger.debug("Proxy desabilitado. Limpando variáveis de ambiente relacionadas a proxy.")
-                    for var in ['HTTP_PROXY', 'HTTPS_PROXY', 'ALL_PROXY', 'http_proxy', 'https_proxy', 'all_proxy']:
-                        os.environ.pop(var, None)
-
-                # Executa a função original decorada
-                return func(*args, **kwargs)
-
-            except Exception as e:
-                 # Logar qualquer erro inesperado ocorrido DENTRO da lógica do proxy/ssl setup
-                 logger.error(f"Erro inesperado dentro do setup do decorador with_proxy: {e}", exc_info=True)
-                 raise # Re-lançar a exceção para não mascarar problemas
-
-            finally:
-                # Restaura o estado original
-                logger.debug("with_proxy: Restaurando estado original.")
-                for key, value in previous_env.items():
-                    if value:
-                        os.environ[key] = value
-                    else:
-                        os.environ.pop(key, None)
-                ssl._create_default_https_context = original_ssl_context
-                logger.debug("with_proxy: Restauração concluída.")
+            _, verify_ssl = current_proxy_settings()
+            if not verify_ssl:
+                _disable_insecure_request_warnings()
+            return func(*args, **kwargs)
 
         return wrapper
-    return decorator    # @with_proxy(skip_ssl_verify=False)
+    return decorator
+
+@functools.lru_cache(maxsize=None)
+def _disable_insecure_request_warnings():
+    try:
+        import urllib3
+        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+        logger.debug("Avisos InsecureRequestWarning do urllib3 desativados (proxy com verificação SSL desativada).")
+    except Exception as e:
+        logger.debug(f"Não foi possível desativar avisos do urllib3: {e}")
+
+def current_proxy_settings() -> Tuple[Optional[str], bool]:
+    """
+    Configuração de proxy em memória (lida do Keyring na primeira chamada e após alterações).
+
+    Returns:
+        Tuple[Optional[str], bool]: URL do proxy (ou None) e se o certificado SSL deve ser verificado.
+    """
+    from src import config_manager
+    config = config_manager.get_proxy_config()
+    return config.url, config.verify_ssl
+
+def key_fingerprint(secret: Optional[str]) -> str:
+    """Impressão digital curta (SHA-256) de uma chave/URL sensível, para compor chaves de registro e logs."""
+    import hashlib
+    return hashlib.sha256((secret or "").encode("utf-8")).hexdigest()[:16]
 
-@with_proxy() # Usa as configurações de proxy do ambiente
+@with_proxy() # Usa as configurações de proxy em memória
 def test_connection(use_proxy: bool) -> dict:
     """
     Tenta fazer uma requisição a um endpoint confiável para testar a conexão.
     Pode usar ou não as configurações de proxy do ambiente.
 
     Args:
-        use_proxy (bool): Se True, a requisição tentará usar o proxy configurado
-                          no ambiente (pelo decorador). Se False, tentará uma conexão direta.
+        use_proxy (bool): Se True, a requisição usará o proxy configurado
+                          (config_manager.get_proxy_config). Se False, tentará uma conexão direta.
 
     Returns:
         Um dicionário com o status e a mensagem.
@@ -223,16 +121,15 @@ def test_connection(use_proxy: bool) -> dict:
     test_url = "https://www.google.com"
     logger.info(f"Testando conexão de rede para: {test_url} (Usando Proxy: {use_proxy})")
     
-    # Se não for para usar proxy, definimos explicitamente os proxies como None
-    # para a chamada do requests, sobrepondo as variáveis de ambiente que o
-    # decorador @with_proxy possa ter definido.
-    proxies = {} if not use_proxy else {
-        'http': os.environ.get('HTTP_PROXY'),
-        'https': os.environ.get('HTTPS_PROXY'),
-    }
+    from src import config_manager
+    proxy_config = config_manager.get_proxy_config()
+    proxies = proxy_config.requests_proxies if use_proxy else {}
+    verify_ssl = proxy_config.verify_ssl if use_proxy else True
     try:
-        # Passamos o dicionário de proxies para a chamada
-        response = requests.get(test_url, timeout=10, proxies=proxies)
+        # Sessão sem leitura do ambiente (trust_env=False): proxy e SSL explícitos
+        with requests.Session() as session:
+            session.trust_env = False
+            response = session.get(test_url, timeout=10, proxies=proxies, verify=verify_ssl)
         
         if response.status_code == 200:
             return {"success": True, "message": "Conexão bem-sucedida!"}
@@ -244,7 +141,7 @@ def test_connection(use_proxy: bool) -> dict:
     except requests.exceptions.ProxyError as e:
         logger.error(f"Erro de proxy ao testar conexão: {e}", exc_info=True)
         # Extrai a causa raiz para uma mensagem mais clara
-        proxy_url_raw = os.environ.get('HTTP_PROXY') or os.environ.get('HTTPS_PROXY') or ''
+        proxy_url_raw = proxy_config.url or ''
         safe_proxy_url = re.sub(r'//.*@', '//***:***@', proxy_url_raw)
         return {"success": False, "message": f"Erro de Proxy: Não foi possível conectar ao host '{safe_proxy_url}'. Verifique o endereço e a porta."}
     except requests.exceptions.ConnectTimeout:
@@ -623,49 +520,8 @@ def get_sigla_uf(nome_estado_ou_sigla: Optional[str]) -> Optional[str]:
     Converte um nome de estado (ou sigla) para sua sigla UF normalizada.
     Retorna None se não conseguir encontrar uma correspondência.
     """
-    if not nome_estado_ou_sigla or not isinstance(nome_estado_ou_sigla, str):
-        return None
-    
-    _initialize_heavy_utils()
-    from unidecode import unidecode as unidecoder
-
-    ESTADO_PARA_SIGLA = {
-        unidecoder("acre").lower(): "AC",
-        unidecoder("alagoas").lower(): "AL",
-        unidecoder("amapa").lower(): "AP",
-        unidecoder("amazonas").lower(): "AM",
-        unidecoder("bahia").lower(): "BA",
-        unidecoder("ceara").lower(): "CE",
-        unidecoder("distrito federal").lower(): "DF",
-        unidecoder("espirito santo").lower(): "ES",
-        unidecoder("goias").lower(): "GO",
-        unidecoder("maranhao").lower(): "MA",
-        unidecoder("mato grosso").lower(): "MT",
-        unidecoder("mato grosso do sul").lower(): "MS",
-        unidecoder("minas gerais").lower(): "MG",
-        unidecoder("para").lower(): "PA",
-        unidecoder("paraiba").lower(): "PB",
-        unidecoder("parana").lower(): "PR",
-        unidecoder("pernambuco").lower(): "PE",
-        unidecoder("piaui").lower(): "PI",
-        unidecoder("rio de janeiro").lower(): "RJ",
-        unidecoder("rio grande do norte").lower(): "RN",
-        unidecoder("rio grande do sul").lower(): "RS",
-        unidecoder("rondonia").lower(): "RO",
-        unidecoder("roraima").lower(): "RR",
-        unidecoder("santa catarina").lower(): "SC",
-        unidecoder("sao paulo").lower(): "SP",
-        unidecoder("sergipe").lower(): "SE",
-        unidecoder("tocantins").lower(): "TO",
-        # Adicionar siglas diretamente também, para o caso da LLM retornar a sigla
-        "ac": "AC", "al": "AL", "ap": "AP", "am": "AM", "ba": "BA", "ce": "CE", "df": "DF", "es": "ES",
-        "go": "GO", "ma": "MA", "mt": "MT", "ms": "MS", "mg": "MG", "pa": "PA", "pb": "PB", "pr": "PR",
-        "pe": "PE", "pi": "PI", "rj": "RJ", "rn": "RN", "rs": "RS", "ro": "RO", "rr": "RR", "sc": "SC",
-        "sp": "SP", "se": "SE", "to": "TO"
-    }
-    
-    normalizado = unidecoder(nome_estado_ou_sigla.strip()).lower()
-    return ESTADO_PARA_SIGLA.get(normalizado)
+    from src.core.gazetteer import sigla_uf
+    return sigla_uf(nome_estado_ou_sigla)
 
 ### ========================================================================================================
   
@@ -695,16 +551,14 @@ def obter_string_normalizada_em_lista(string_atual, lista_opções):
     :param lista_opções: Lista de strings para comparação
     :return: String correspondente da lista ou None se não encontrar
     """
-    # Normaliza o nome do município a ser buscado
-    _initialize_heavy_utils()
-    from unidecode import unidecode as unidecoder
-    nome_normalizado = unidecoder(string_atual.lower())
+    # Normalização em cache (src/core/gazetteer.py): os itens da lista não são reprocessados a cada chamada
+    from src.core.gazetteer import normalizar_nome
+    if not string_atual or not isinstance(string_atual, str):
+        return None
+    nome_normalizado = normalizar_nome(string_atual)
 
     for item in lista_opções:
-        # Normaliza cada município na lista:
-        item_normalizado = unidecoder(item.lower())
-        # Compara os municípios normalizados:
-        if nome_normalizado == item_normalizado:
+        if nome_normalizado == normalizar_nome(item):
             return item  # Retorna o município correspondente
     
     return None
@@ -839,28 +693,46 @@ def calcular_similaridade_rouge_l(texto_original: str, texto_editado: str) -> fl
                Retorna 1.0 se ambos os textos forem vazios/nulos.
                Retorna 0.0 se um for vazio/nulo e o outro não.
     """
-    _initialize_heavy_utils()
-    original_strip = texto_original.strip() if isinstance(texto_original, str) else ""
-    editado_strip = texto_editado.strip() if isinstance(texto_editado, str) else ""
+    return calcular_similaridades_rouge_l([(texto_original, texto_editado)])[0]
 
-    if not original_strip and not editado_strip:
-        logger.debug("Ambos os textos (original e editado) estão vazios. Similaridade: 1.0")
-        return 1.0
-    if not original_strip or not editado_strip:
-        logger.debug(f"Um dos textos está vazio. Original vazio: {not original_strip}, Editado vazio: {not editado_strip}. Similaridade: 0.0")
-        return 0.0
+def calcular_similaridades_rouge_l(pares: List[Tuple[str, str]]) -> List[float]:
+    """
+    Calcula, em lote, a similaridade ROUGE-L F-score de cada par (texto original, texto editado).
+    Usa o LCS bit-paralelo de src/core/rouge_l.py (mesmos valores do rouge_score com use_stemmer=True).
+
+    Args:
+        pares (List[Tuple[str, str]]): Pares (texto original, texto editado).
 
+    Returns:
+        List[float]: F-score de cada par, com as mesmas regras de `calcular_similaridade_rouge_l`
+                     para textos vazios; 0.0 para todos os pares em caso de erro no cálculo.
+    """
+    from src.core.rouge_l import rouge_l_scores
+
+    resultados: List[Optional[float]] = []
+    pares_para_calculo = []
+    for texto_original, texto_editado in pares:
+        original_strip = texto_original.strip() if isinstance(texto_original, str) else ""
+        editado_strip = texto_editado.strip() if isinstance(texto_editado, str) else ""
+        if not original_strip and not editado_strip:
+            resultados.append(1.0)
+        elif not original_strip or not editado_strip:
+            resultados.append(0.0)
+        else:
+            resultados.append(None)
+            pares_para_calculo.append((original_strip, editado_strip))
+
+    if not pares_para_calculo:
+        return resultados
     try:
-        # Se `use_stemmer=True` for problemático para português, remova-o ou use um tokenizer específico.
-        scorer = _rouge_scorer.RougeScorer(['rougeL'], use_stemmer=True) 
-        scores = scorer.score(original_strip, editado_strip)
-        fmeasure = scores['rougeL'].fmeasure
-        
-        logger.debug(f"ROUGE-L F-score calculado: {fmeasure:.4f}")
-        return fmeasure
+        start = perf_counter()
+        fmeasures = iter(score["fmeasure"] for score in rouge_l_scores(pares_para_calculo))
+        resultados = [valor if valor is not None else next(fmeasures) for valor in resultados]
+        logger.debug(f"ROUGE-L calculado para {len(pares_para_calculo)} par(es) em {perf_counter() - start:.4f}s")
+        return resultados
     except Exception as e:
         logger.error(f"Erro ao calcular ROUGE-L: {e}", exc_info=True)
-        return 0.0 # Retorna 0 em caso de erro no cálculo
+        return [valor if valor is not None else 0.0 for valor in resultados] # 0 em caso de erro no cálculo
 
 ### ----------------------------------------------------------------
 
@@ -915,6 +787,7 @@ def check_app_version() -> None:
 
     from src.settings import APP_VERSION, PROJECT_ID, FIREBASE_WEB_API_KEY
     import requests
+    from src.services.http_sessions import get_firebase_session
 
     logger.debug(f"Verificando versão da aplicação. Versão local: {APP_VERSION}")
 
@@ -928,7 +801,7 @@ def check_app_version() -> None:
     firestore_url_with_key = f"{firestore_url_base}?key={FIREBASE_WEB_API_KEY}"
 
     try:
-        response = requests.get(firestore_url_with_key, timeout=5)
+        response = get_firebase_session().get(firestore_url_with_key, timeout=5) # Já aquece a conexão com o Firestore
         response.raise_for_status()
 
         data = response.json()
@@ -0,0 +1,145 @@
+# tests/services/test_verify_id_token.py
+
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import jwt
+
+pytest.importorskip("flet") # firebase_client importa tipos do flet
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+
+from src.services import firebase_client
+from src.services.firebase_client import FbManagerAuth
+from src.settings import PROJECT_ID, ID_TOKEN_VERIFY_CACHE_MARGIN_SECONDS
+
+# --- Fixtures ---
+
+def _self_signed(common_name):
+    """Par (chave privada PEM, certificado PEM) autoassinado, no formato das chaves do securetoken."""
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, common_name)])
+    now = datetime.now(timezone.utc)
+    cert = (x509.CertificateBuilder().subject_name(name).issuer_name(name).public_key(key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(now - timedelta(days=1)).not_valid_after(now + timedelta(days=1))
+            .sign(key, hashes.SHA256()))
+    private_pem = key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption())
+    return private_pem, cert.public_bytes(serialization.Encoding.PEM).decode("utf-8")
+
+@pytest.fixture(scope="module")
+def keys():
+    return {"k1": _self_signed("k1"), "k2": _self_signed("k2")}
+
+class FakeResponse:
+    def __init__(self, certificates):
+        self.headers = {"cache-control": "public, max-age=3600"}
+        self._certificates = certificates
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return dict(self._certificates)
+
+class FakeSession:
+    """Sessão HTTP que serve o conjunto de certificados atual e conta as buscas."""
+    def __init__(self, certificates):
+        self.certificates = certificates
+        self.fetches = 0
+
+    def get(self, url, timeout=None):
+        self.fetches += 1
+        return FakeResponse(self.certificates)
+
+@pytest.fixture
+def auth(monkeypatch, keys):
+    """FbManagerAuth com caches de classe limpos e certificados servidos localmente (kid 'k1')."""
+    monkeypatch.setattr(FbManagerAuth, "_public_keys_cache", {})
+    monkeypatch.setattr(FbManagerAuth, "_public_keys_expiry", None)
+    monkeypatch.setattr(FbManagerAuth, "_public_key_objects", {})
+    monkeypatch.setattr(FbManagerAuth, "_verified_tokens", OrderedDict())
+    session = FakeSession({"k1": keys["k1"][1]})
+    monkeypatch.setattr(firebase_client, "get_firebase_session", lambda: session)
+
+    decode_calls = []
+    real_decode = jwt.decode
+    def counting_decode(*args, **kwargs):
+        decode_calls.append(args[0])
+        return real_decode(*args, **kwargs)
+    monkeypatch.setattr(firebase_client.jwt, "decode", counting_decode)
+
+    manager = FbManagerAuth()
+    manager.session, manager.decode_calls = session, decode_calls
+    return manager
+
+def _token(keys, kid="k1", sub="uid-1", lifetime=3600):
+    now = int(time.time())
+    payload = {"sub": sub, "user_id": sub, "aud": PROJECT_ID, "iss": f"https://securetoken.google.com/{PROJECT_ID}",
+               "iat": now, "exp": now + lifetime}
+    return jwt.encode(payload, keys[kid][0], algorithm="RS256", headers={"kid": kid})
+
+# --- Testes ---
+
+def test_token_em_cache_retorna_sem_decodificar(auth, keys):
+    token = _token(keys)
+    assert auth.verify_id_token(token)["sub"] == "uid-1"
+    assert len(auth.decode_calls) == 1
+
+    assert auth.verify_id_token(token)["sub"] == "uid-1"
+    assert len(auth.decode_calls) == 1 # Servido do cache de tokens verificados
+    assert auth.session.fetches == 1
+
+def test_token_sai_do_cache_na_margem_antes_do_exp(auth, keys, monkeypatch):
+    token = _token(keys, lifetime=600)
+    exp = auth.verify_id_token(token)["exp"]
+
+    monkeypatch.setattr(firebase_client.time, "time", lambda: exp - ID_TOKEN_VERIFY_CACHE_MARGIN_SECONDS - 1)
+    auth.verify_id_token(token)
+    assert len(auth.decode_calls) == 1 # Ainda antes da margem
+
+    monkeypatch.setattr(firebase_client.time, "time", lambda: exp - ID_TOKEN_VERIFY_CACHE_MARGIN_SECONDS)
+    assert auth.verify_id_token(token)["sub"] == "uid-1"
+    assert len(auth.decode_calls) == 2 # Removido do cache e verificado de novo
+
+def test_token_adulterado_rejeitado_com_chave_em_cache(auth, keys):
+    token = _token(keys)
+    assert auth.verify_id_token(token)
+    assert "k1" in FbManagerAuth._public_key_objects
+
+    header, _, signature = token.split(".")
+    forged_payload = jwt.utils.base64url_encode(jwt.utils.force_bytes(
+        '{"sub":"admin","aud":"%s","iss":"https://securetoken.google.com/%s","iat":%d,"exp":%d}'
+        % (PROJECT_ID, PROJECT_ID, int(time.time()), int(time.time()) + 3600))).decode("ascii")
+    assert auth.verify_id_token(f"{header}.{forged_payload}.{signature}") is None
+    assert len(FbManagerAuth._verified_tokens) == 1 and auth.session.fetches == 1
+
+def test_novo_conjunto_de_certificados_limpa_chaves_decodificadas(auth, keys):
+    assert auth.verify_id_token(_token(keys, kid="k1"))
+    assert set(FbManagerAuth._public_key_objects) == {"k1"}
+
+    auth.session.certificates = {"k2": keys["k2"][1]} # Rotação das chaves do Google
+    FbManagerAuth._public_keys_expiry = 0
+    assert auth.verify_id_token(_token(keys, kid="k2", sub="uid-2"))["sub"] == "uid-2"
+    assert auth.session.fetches == 2
+    assert set(FbManagerAuth._public_key_objects) == {"k2"}
+
+def test_cache_de_tokens_limitado_lru(auth, keys, monkeypatch):
+    monkeypatch.setattr(firebase_client, "ID_TOKEN_VERIFY_CACHE_MAX_ENTRIES", 3)
+    tokens = [_token(keys, sub=f"uid-{i}") for i in range(5)]
+    for token in tokens[:3]:
+        auth.verify_id_token(token)
+    auth.verify_id_token(tokens[0]) # Uso recente: tokens[1] passa a ser o mais antigo
+    for token in tokens[3:]:
+        auth.verify_id_token(token)
+
+    assert len(FbManagerAuth._verified_tokens) == 3
+    calls_before = len(auth.decode_calls)
+    auth.verify_id_token(tokens[0])
+    assert len(auth.decode_calls) == calls_before # Mantido por ter sido usado recentemente
+    auth.verify_id_token(tokens[1])
+    assert len(auth.decode_calls) == calls_before + 1 # Removido pelo limite
@@ -0,0 +1,112 @@
+# tests/test_ai_orchestrator.py
+
+import threading
+import time
+from types import SimpleNamespace
+
+from benchmarks.fake_endpoints import FakeOpenAIClient
+from src.core import ai_orchestrator
+
+PROMPT_CACHE = [{"role": "system", "content": "Documento: " + "texto " * 400}]
+PROMPT_GROUPS = [[{"role": "user", "content": f"Segmento {i}"}] for i in range(5)]
+
+def test_run_prompt_segments_preserva_ordem_e_aquece_cache():
+    """O 1º segmento termina antes dos demais começarem; respostas voltam na ordem original."""
+    events = []
+    lock = threading.Lock()
+
+    class _Responses:
+        def create(self, model, input, **kwargs):
+            label = input[-1]["content"]
+            with lock: events.append(("start", label))
+            time.sleep(0.05 if label == "Segmento 1" else 0.01) # Segmento 1 termina por último
+            with lock: events.append(("end", label))
+            return SimpleNamespace(output_text=label, usage=None)
+
+    client = SimpleNamespace(responses=_Responses())
+    dados = ai_orchestrator._run_prompt_segments(client, "gpt-x", 0.0, PROMPT_CACHE, PROMPT_GROUPS,
+                                                 concurrent=True, max_concurrency=4)
+
+    assert [r.output_text for r in dados] == [g[0]["content"] for g in PROMPT_GROUPS]
+    assert events[:2] == [("start", "Segmento 0"), ("end", "Segmento 0")]
+    max_in_flight = in_flight = 0
+    for kind, _ in events[2:]:
+        in_flight += 1 if kind == "start" else -1
+        max_in_flight = max(max_in_flight, in_flight)
+    assert 1 < max_in_flight <= 4
+
+def test_run_prompt_segments_contabiliza_cache_como_sequencial():
+    """No modo concorrente, apenas o 1º segmento deixa de aproveitar o cache de prefixo."""
+    client = FakeOpenAIClient(latency_s=0.01)
+    dados = ai_orchestrator._run_prompt_segments(client, "gpt-x", 0.0, PROMPT_CACHE, PROMPT_GROUPS, concurrent=True)
+    usage = ai_orchestrator._get_token_usage_info(dados)
+
+    cached_por_segmento = [r.usage.input_tokens_details.cached_tokens for r in dados]
+    assert cached_por_segmento[0] == 0
+    assert all(c > 0 for c in cached_por_segmento[1:])
+    assert usage["cached_tokens"] == sum(cached_por_segmento)
+    assert client.calls["responses.create"] == len(PROMPT_GROUPS)
+
+# --- Cache de respostas da LLM ---
+
+from src.core import llm_response_cache
+from benchmarks.fake_endpoints import offline_openai_client
+
+PROMPTS_UNICO = {"PROMPT_UNICO_for_INITIAL_ANALYSIS": [
+    {"role": "system", "content": "Analise o documento."},
+    {"role": "user", "content": "Documento: {input_text}"},
+]}
+
+def test_make_cache_key_canonico():
+    msgs = [{"role": "user", "content": "x"}]
+    key = llm_response_cache.make_cache_key("openai", "gpt-x", 0, msgs)
+    assert key == llm_response_cache.make_cache_key("openai", "gpt-x", 0.0, [{"content": "x", "role": "user"}])
+    assert key != llm_response_cache.make_cache_key("openai", "gpt-y", 0, msgs)
+    assert key != llm_response_cache.make_cache_key("openai", "gpt-x", 0, [{"role": "user", "content": "y"}])
+
+def test_analyze_text_with_llm_reaproveita_resposta_do_cache(monkeypatch, tmp_path):
+    monkeypatch.setattr(llm_response_cache, "LLM_RESPONSE_CACHE_DIR", str(tmp_path))
+    fake_client = FakeOpenAIClient()
+    with offline_openai_client(fake_client):
+        args = ("PROMPT_UNICO_for_INITIAL_ANALYSIS", PROMPTS_UNICO, "texto do documento", "openai", "gpt-x", 0.0, "sk-fake")
+        resp_1, usage_1, _ = ai_orchestrator.analyze_text_with_llm(*args)
+        resp_2, usage_2, _ = ai_orchestrator.analyze_text_with_llm(*args)
+
+    assert fake_client.calls["responses.parse"] == 1
+    assert resp_2 == resp_1
+    assert "response_cache_hit" not in usage_1
+    assert usage_2["response_cache_hit"] is True
+    assert usage_2["input_tokens"] == 0 and usage_2["total_cost_usd"] == 0.0
+    assert usage_2["response_cache_original_usage"]["input_tokens"] == usage_1["input_tokens"]
+
+def test_analyze_text_with_llm_temperatura_positiva_nao_usa_cache(monkeypatch, tmp_path):
+    monkeypatch.setattr(llm_response_cache, "LLM_RESPONSE_CACHE_DIR", str(tmp_path))
+    fake_client = FakeOpenAIClient()
+    with offline_openai_client(fake_client):
+        for _ in range(2):
+            ai_orchestrator.analyze_text_with_llm("PROMPT_UNICO_for_INITIAL_ANALYSIS", PROMPTS_UNICO, "texto",
+                                                  "openai", "gpt-x", 0.7, "sk-fake")
+    assert fake_client.calls["responses.parse"] == 2
+    assert not any(tmp_path.rglob("*.json"))
+
+# --- Modo map-reduce ---
+
+LOADED_PROVIDERS = [{"system_name": "openai", "models": [{"id": "gpt-x", "input_coust_million": 1.0, "output_coust_million": 4.0}]}]
+
+def test_select_map_reduce_chunks_respeita_custo_maximo():
+    chunks = [{"tokens": 100_000, "relevance": r, "text": str(r)} for r in (1.0, 3.0, 2.0)]
+    # Cada bloco custa ~US$ 0,108 (100k de entrada + 2k de saída estimados)
+    kept, cost = ai_orchestrator.select_map_reduce_chunks(chunks, 0, "openai", "gpt-x", LOADED_PROVIDERS, max_cost_usd=0.25)
+    assert [c["relevance"] for c in kept] == [3.0, 2.0] # Os mais relevantes, na ordem dos documentos
+    assert cost <= 0.25
+
+def test_map_reduce_consolida_blocos_em_paralelo():
+    fake_client = FakeOpenAIClient(latency_s=0.01)
+    chunks = [{"page_keys": [f"file0_page{i}"], "text": f"Bloco {i} " * 50, "tokens": 100, "relevance": float(i)} for i in range(4)]
+    with offline_openai_client(fake_client):
+        response, usage, _ = ai_orchestrator.analyze_text_with_llm_map_reduce(PROMPTS_UNICO, chunks, "openai", "gpt-x", 0.7,
+                                                                             "sk-fake", LOADED_PROVIDERS, max_concurrency=3)
+    assert isinstance(response, ai_orchestrator.formatted_initial_analysis)
+    assert fake_client.calls["responses.parse"] == len(chunks) + 1 # map + reduce
+    assert usage["map_reduce_chunks"] == 4 and usage["map_reduce_chunks_skipped"] == 0
+    assert usage["successful_requests"] == 5 and usage["input_tokens"] > 0
@@ -0,0 +1,82 @@
+# tests/test_benchmarks.py
+
+import pytest
+
+from benchmarks.corpus_generator import gerar_pdf_sintetico, gerar_corpus
+from benchmarks.fake_endpoints import fake_embedding, FakeOpenAIClient
+from benchmarks.run_benchmarks import compare_results
+
+# --- Testes do gerador de corpus ---
+
+def test_gerar_pdf_sintetico_contagem_paginas(tmp_path):
+    """O PDF gerado deve ter o número de páginas pedido e a mistura de tipos configurada."""
+    import fitz
+    pdf_path = tmp_path / "corpus.pdf"
+    contagem = gerar_pdf_sintetico(str(pdf_path), 20, seed=1,
+                                   page_mix={"duplicada": 0.2, "cid": 0.1, "branco": 0.1})
+
+    assert sum(contagem.values()) == 20
+    assert contagem["duplicada"] == 4
+    assert contagem["cid"] == 2
+    assert contagem["branco"] == 2
+    with fitz.open(str(pdf_path)) as doc:
+        assert len(doc) == 20
+        textos = [page.get_text() for page in doc]
+    assert sum(1 for t in textos if not t.strip()) == 2
+    assert sum(1 for t in textos if "(cid:" in t) == 2
+
+def test_gerar_corpus_reaproveita_arquivos(tmp_path):
+    """Corpora já existentes não devem ser regerados (mesma semente, mesmo arquivo)."""
+    paths = gerar_corpus(str(tmp_path), sizes=(5,), seed=7)
+    mtime = (tmp_path / paths[5].split("/")[-1]).stat().st_mtime_ns
+    paths_again = gerar_corpus(str(tmp_path), sizes=(5,), seed=7)
+    assert paths == paths_again
+    assert (tmp_path / paths[5].split("/")[-1]).stat().st_mtime_ns == mtime
+
+# --- Testes dos endpoints falsos ---
+
+def test_fake_embedding_deterministico_e_normalizado():
+    v1 = fake_embedding("Notícia-crime sobre sonegação fiscal")
+    v2 = fake_embedding("Notícia-crime sobre sonegação fiscal")
+    assert v1 == v2
+    assert sum(x * x for x in v1) == pytest.approx(1.0)
+
+def test_fake_client_embeddings_create():
+    client = FakeOpenAIClient(embedding_dim=32)
+    response = client.embeddings.create(model="text-embedding-3-small", input=["a b", "c d"])
+    assert len(response.data) == 2
+    assert len(response.data[0].embedding) == 32
+    assert response.usage.total_tokens > 0
+    assert client.calls["embeddings.create"] == 1
+
+# --- Testes do comparador de baselines ---
+
+def _resultado(segundos_por_etapa):
+    return {"cases": {"10p|PyMuPdf-fitz|tfidf_vectorizer": {"stages": segundos_por_etapa}}}
+
+def test_compare_results_sinaliza_regressao():
+    baseline = _resultado({"extract": 1.0, "filter": 0.5, "tiny": 0.001})
+    current = _resultado({"extract": 1.5, "filter": 0.5, "tiny": 0.01})
+    comparisons = compare_results(baseline, current, threshold=0.2)
+
+    por_etapa = {c["stage"]: c for c in comparisons}
+    assert por_etapa["extract"]["regression"] is True
+    assert por_etapa["extract"]["change_pct"] == 50.0
+    assert por_etapa["filter"]["regression"] is False
+    assert "tiny" not in por_etapa # Abaixo do tempo mínimo comparável
+
+def test_compare_results_ignora_casos_com_erro():
+    baseline = {"cases": {"x": {"error": "falhou"}}}
+    current = {"cases": {"x": {"stages": {"total": 1.0}}}}
+    assert compare_results(baseline, current) == []
+
+def test_compare_results_acompanha_metricas_de_qualidade():
+    caso = "10p|PyMuPdf-fitz|tfidf_vectorizer"
+    baseline = {"cases": {caso: {"stages": {}, "budget_recovered_pct": 10.0, "compression_ratio": 0.8, "boilerplate_tokens_saved": 100}}}
+    current = {"cases": {caso: {"stages": {}, "budget_recovered_pct": 5.0, "compression_ratio": 0.6, "boilerplate_tokens_saved": 110}}}
+
+    por_metrica = {c["metric"]: c for c in compare_results(baseline, current, threshold=0.2)}
+    assert por_metrica["budget_recovered_pct"]["regression"] is True
+    assert por_metrica["budget_recovered_pct"]["change_pct"] == -50.0
+    assert por_metrica["compression_ratio"]["regression"] is False # Apenas informativa
+    assert por_metrica["boilerplate_tokens_saved"]["regression"] is False
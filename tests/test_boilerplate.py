@@ -0,0 +1,24 @@
+# tests/test_boilerplate.py
+
+from src.core.boilerplate import strip_boilerplate
+
+def _page(n, body):
+    return (f"MINISTÉRIO DA JUSTIÇA - POLÍCIA FEDERAL\n{body}\n"
+            f"Documento assinado eletronicamente em 0{n}/02/2024\nPágina {n} de 5")
+
+def test_remove_linhas_repetidas_entre_paginas():
+    bodies = ["Relato do fato.", "Depoimento da vítima.", "Extratos bancários.", "Laudo pericial.", "Conclusão."]
+    pages = [_page(n, body) for n, body in enumerate(bodies, start=1)]
+    pages[2] += "\nMINISTÉRIO DA JUSTIÇA - POLÍCIA FEDERAL" # Repetição dentro da mesma página também sai
+    cleaned, stats = strip_boilerplate(pages, count_tokens_fn=lambda line: len(line.split()))
+
+    assert cleaned[0] == pages[0] # Primeira ocorrência mantida: timbre identifica o órgão de origem
+    assert cleaned[1:] == bodies[1:]
+    assert stats["boilerplate_patterns"] == 3
+    assert stats["lines_removed"] == 13
+    assert stats["tokens_saved"] == 6 * 5 + 5 * 4 + 4 * 4 # Só as repetições removidas (timbre, assinatura, paginação)
+
+def test_preserva_arquivos_curtos_e_linhas_unicas():
+    pages = [_page(1, "Único."), _page(2, "Outro.")]
+    cleaned, stats = strip_boilerplate(pages)
+    assert cleaned == pages and stats["lines_removed"] == 0
@@ -0,0 +1,44 @@
+# tests/test_budget_planner.py
+
+import itertools
+import random
+
+from src.core.budget_planner import solve_knapsack, plan_page_selection, greedy_plan
+
+def _melhor_por_forca_bruta(values, costs, capacity):
+    melhor = 0.0
+    for r in range(len(values) + 1):
+        for combo in itertools.combinations(range(len(values)), r):
+            if sum(costs[i] for i in combo) <= capacity:
+                melhor = max(melhor, sum(values[i] for i in combo))
+    return melhor
+
+def test_solucao_exata_coincide_com_forca_bruta():
+    rng = random.Random(7)
+    for _ in range(30):
+        n = rng.randint(1, 9)
+        values = [rng.uniform(0.1, 5) for _ in range(n)]
+        costs = [rng.randint(1, 60) for _ in range(n)]
+        capacity = rng.randint(10, 200)
+        selected, exact = solve_knapsack(values, costs, capacity)
+        assert exact
+        assert sum(costs[i] for i in selected) <= capacity
+        assert abs(sum(values[i] for i in selected) - _melhor_por_forca_bruta(values, costs, capacity)) < 1e-9
+
+def test_solucao_aproximada_respeita_orcamento_e_supera_guloso():
+    rng = random.Random(11)
+    values = sorted((rng.uniform(0.1, 3) for _ in range(300)), reverse=True)
+    costs = [rng.randint(50, 3000) for _ in range(300)]
+    selected, exact = solve_knapsack(values, costs, 180000, max_exact_cells=1000, approx_buckets=500)
+    assert not exact
+    assert sum(costs[i] for i in selected) <= 180000
+    greedy_full, _, _, _ = greedy_plan(values, costs, 180000)
+    assert sum(values[i] for i in selected) >= sum(values[i] for i in greedy_full)
+
+def test_plano_aproveita_paginas_curtas_posteriores():
+    keys = ["file0_page0", "file0_page1", "file0_page2", "file0_page3"]
+    values = [3.0, 2.0, 1.5, 1.0]
+    costs = [600, 900, 200, 150]
+    plan = plan_page_selection(keys, values, costs, 1000)
+    assert set(plan["full_keys"]) == {"file0_page0", "file0_page2", "file0_page3"}
+    assert plan["value"] > plan["greedy_value"] and plan["recovered_pct"] > 0
@@ -0,0 +1,40 @@
+import json
+import zipfile
+from io import BytesIO
+
+from docx import Document
+
+from src.core.bulk_export import export_bulk_docx, main
+
+
+def _make_template(path):
+    document = Document()
+    document.add_paragraph("Origem: <orgao_origem> / Resumo: <resumo_fato>")
+    document.save(path)
+
+
+def test_bulk_export_streams_one_docx_per_analysis_into_zip(tmp_path):
+    template = str(tmp_path / "modelo.docx")
+    _make_template(template)
+    analyses = [("caso/1", {"orgao_origem": f"Órgão {i}", "resumo_fato": f"Resumo {i}"}) for i in range(5)]
+    progress = []
+
+    result = export_bulk_docx(analyses, str(tmp_path / "lote.zip"), template_path=template, max_workers=2,
+                              progress_callback=lambda done, total: progress.append((done, total)))
+
+    assert result["exported"] == 5 and not result["failed"]
+    assert progress[-1] == (5, 5) and len(progress) == 5
+    with zipfile.ZipFile(tmp_path / "lote.zip") as archive:
+        names = archive.namelist()
+        assert sorted(names) == ["caso_1.docx", "caso_1_2.docx", "caso_1_3.docx", "caso_1_4.docx", "caso_1_5.docx"]
+        texts = {Document(BytesIO(archive.read(name))).paragraphs[0].text for name in names}
+    assert texts == {f"Origem: Órgão {i} / Resumo: Resumo {i}" for i in range(5)}
+
+
+def test_bulk_export_headless_entry_point(tmp_path):
+    entrada = tmp_path / "analises.json"
+    entrada.write_text(json.dumps([{"nome_arquivo": "A", "orgao_origem": "MPF"}, {"orgao_origem": "PC"}]), encoding="utf-8")
+
+    assert main([str(entrada), str(tmp_path / "saida.zip"), "--workers", "1"]) == 0
+    with zipfile.ZipFile(tmp_path / "saida.zip") as archive:
+        assert sorted(archive.namelist()) == ["A.docx", "analise_002.docx"]
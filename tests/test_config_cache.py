@@ -0,0 +1,86 @@
+import pytest
+
+from src.services.config_cache import ConfigDocumentCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeOrigin:
+    def __init__(self):
+        self.update_time = "t1"
+        self.document_reads = 0
+        self.version_reads = 0
+        self.fail = False
+
+    def fetch_document(self):
+        if self.fail:
+            raise ConnectionError("offline")
+        self.document_reads += 1
+        return {"fields": {"v": {"stringValue": self.update_time}}, "updateTime": self.update_time}
+
+    def fetch_version(self):
+        if self.fail:
+            raise ConnectionError("offline")
+        self.version_reads += 1
+        return self.update_time
+
+
+def test_serves_from_memory_and_revalidates_by_update_time():
+    clock, origin = FakeClock(), FakeOrigin()
+    cache = ConfigDocumentCache(ttl_seconds=10, stale_seconds=0, clock=clock)
+
+    for _ in range(3):
+        assert cache.get("cfg/doc", origin.fetch_document, origin.fetch_version)["updateTime"] == "t1"
+    assert (origin.document_reads, origin.version_reads) == (1, 0)
+
+    clock.now = 11 # Expirado e inalterado: só a versão é consultada
+    cache.get("cfg/doc", origin.fetch_document, origin.fetch_version)
+    assert (origin.document_reads, origin.version_reads) == (1, 1)
+
+    clock.now = 22
+    origin.update_time = "t2"
+    assert cache.get("cfg/doc", origin.fetch_document, origin.fetch_version)["updateTime"] == "t2"
+    assert origin.document_reads == 2
+
+
+def test_stale_while_revalidate_and_stale_if_error():
+    clock, origin = FakeClock(), FakeOrigin()
+    background = []
+    cache = ConfigDocumentCache(ttl_seconds=10, stale_seconds=100, clock=clock, run_in_background=background.append)
+    cache.get("cfg/doc", origin.fetch_document, origin.fetch_version)
+
+    clock.now = 50
+    origin.update_time = "t2"
+    assert cache.get("cfg/doc", origin.fetch_document, origin.fetch_version)["updateTime"] == "t1"
+    assert cache.get("cfg/doc", origin.fetch_document, origin.fetch_version)["updateTime"] == "t1"
+    assert len(background) == 1 # Uma única revalidação em andamento
+    background.pop()()
+    assert cache.get("cfg/doc", origin.fetch_document, origin.fetch_version)["updateTime"] == "t2"
+
+    clock.now = 500
+    origin.fail = True
+    assert cache.get("cfg/doc", origin.fetch_document, origin.fetch_version)["updateTime"] == "t2"
+    with pytest.raises(ConnectionError):
+        cache.get("cfg/other", origin.fetch_document, origin.fetch_version)
+
+
+def test_documents_from_a_batch_read_are_served_as_fresh():
+    clock, origin = FakeClock(), FakeOrigin()
+    cache = ConfigDocumentCache(ttl_seconds=10, stale_seconds=0, clock=clock)
+    assert cache.peek("cfg/doc") == (False, None)
+
+    cache.put("cfg/doc", {"fields": {}, "updateTime": "t1"})
+    assert cache.peek("cfg/doc") == (True, {"fields": {}, "updateTime": "t1"})
+    assert cache.get("cfg/doc", origin.fetch_document, origin.fetch_version)["updateTime"] == "t1"
+    assert origin.document_reads == 0
+
+    clock.now = 11
+    assert cache.peek("cfg/doc") == (False, None)
+    cache.get("cfg/doc", origin.fetch_document, origin.fetch_version)
+    assert (origin.document_reads, origin.version_reads) == (0, 1)
@@ -0,0 +1,60 @@
+import os
+
+from docx import Document
+
+from src.core.doc_generator import DocxExporter, get_compiled_template
+from src.core.prompts import formatted_initial_analysis
+
+
+def _make_template(path):
+    document = Document()
+    paragraph = document.add_paragraph()
+    for part in ["Origem: <orgao_", "orig", "em> (", "<uf_origem>", ")"]:
+        paragraph.add_run(part)
+    document.add_paragraph("Resumo: <resumo_fato>. Destino: <destinacao>.")
+    table = document.add_table(rows=1, cols=2)
+    table.rows[0].cells[0].text = "Pessoas"
+    table.rows[0].cells[1].text = "<pessoas_envolvidas>"
+    document.save(path)
+
+
+def _texts(path):
+    document = Document(path)
+    return [p.text for p in document.paragraphs] + [c.text for r in document.tables[0].rows for c in r.cells]
+
+
+def test_compiled_template_fills_split_runs_and_table_cells(tmp_path):
+    template = str(tmp_path / "modelo.docx")
+    output = str(tmp_path / "saida.docx")
+    _make_template(template)
+    data = formatted_initial_analysis.model_construct(
+        orgao_origem="MPF", uf_origem="SP", resumo_fato="Fraude", destinacao="DPF/STS/SP",
+        pessoas_envolvidas=["Fulano", "Beltrano"], observacoes="Sem placeholder")
+
+    success, missing = DocxExporter().export_from_template_docx(data, template, output)
+
+    assert success
+    assert "Observações" in missing and "Órgão de Origem" not in missing
+    texts = _texts(output)
+    assert "Origem: MPF (SP)" in texts
+    assert "Resumo: Fraude. Destino: DPF/STS/SP." in texts
+    assert "Fulano\nBeltrano" in texts
+    assert get_compiled_template(template).fields == {"orgao_origem", "uf_origem", "resumo_fato", "destinacao", "pessoas_envolvidas"}
+
+
+def test_compiled_template_is_cached_until_file_changes(tmp_path):
+    template = str(tmp_path / "modelo.docx")
+    _make_template(template)
+
+    compiled = get_compiled_template(template)
+    assert get_compiled_template(template) is compiled
+
+    document = Document()
+    document.add_paragraph("<tipo_local>")
+    document.save(template)
+    stat = os.stat(template)
+    os.utime(template, (stat.st_atime, stat.st_mtime + 5))
+
+    recompiled = get_compiled_template(template)
+    assert recompiled is not compiled
+    assert recompiled.fields == {"tipo_local"}
@@ -0,0 +1,40 @@
+from src.core.gazetteer import Gazetteer, sigla_uf
+
+
+MUNICIPIOS = {
+    "SP": ["SÃO JOSÉ DOS CAMPOS", "SÃO JOSÉ DO RIO PRETO", "SANTOS", "ARAÇATUBA"],
+    "RJ": ["RIO DE JANEIRO", "NITERÓI"],
+}
+CIRCUNSCRICOES = {
+    "DPF/SJK/SP": ["São José dos Campos"],
+    "DPF/ARU/SP": ["Araçatuba"],
+    "DPF/OUTRA/SP": ["Araçatuba"],
+}
+
+
+def test_sigla_uf_accepts_names_and_siglas():
+    assert sigla_uf("São Paulo") == "SP"
+    assert sigla_uf("  rio grande do sul ") == "RS"
+    assert sigla_uf("mg") == "MG"
+    assert sigla_uf("Atlântida") is None
+    assert sigla_uf(None) is None
+
+
+def test_municipio_exact_and_fuzzy_lookup():
+    gazetteer = Gazetteer(MUNICIPIOS, CIRCUNSCRICOES, min_similarity=0.7)
+
+    assert gazetteer.municipio("sao jose dos campos", "SP") == "SÃO JOSÉ DOS CAMPOS"
+    assert gazetteer.municipio("Sao Jose dos Campo", "SP") == "SÃO JOSÉ DOS CAMPOS"
+    assert gazetteer.municipio("Sao Jose dos Campo", "SP", fuzzy=False) is None
+    assert gazetteer.municipio("Niteroi", "SP") is None  # outra UF
+    assert gazetteer.municipio("Campinas", "SP") is None
+    assert gazetteer.municipio(None, "SP") is None
+
+
+def test_circunscricao_reverse_index_keeps_first_unit():
+    gazetteer = Gazetteer(MUNICIPIOS, CIRCUNSCRICOES)
+
+    assert gazetteer.circunscricao("SÃO JOSÉ DOS CAMPOS") == "DPF/SJK/SP"
+    assert gazetteer.circunscricao("ARAÇATUBA") == "DPF/ARU/SP"
+    assert gazetteer.circunscricao("Santos") is None
+    assert gazetteer.circunscricao(None) is None
@@ -0,0 +1,34 @@
+# tests/test_llm_clients.py
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from src.core.llm_clients import OpenAIClientRegistry, key_fingerprint
+
+def test_registro_reutiliza_cliente_por_chave_e_url():
+    registry = OpenAIClientRegistry(max_clients=4)
+    a = registry.get_client("sk-a", base_url="http://127.0.0.1:1/v1")
+    assert registry.get_client("sk-a", base_url="http://127.0.0.1:1/v1") is a
+    b = registry.get_client("sk-b", base_url="http://127.0.0.1:1/v1")
+    c = registry.get_client("sk-a", base_url="http://127.0.0.1:2/v1")
+    assert len({id(a), id(b), id(c)}) == 3
+    assert a.api_key == "sk-a" and b.api_key == "sk-b"
+    assert a._client is b._client # Mesmo pool keep-alive para o mesmo (proxy, SSL)
+    assert registry.get_client("sk-a", base_url="http://127.0.0.1:1/v1", verify_ssl=False)._client is not a._client
+    assert key_fingerprint("sk-a") != key_fingerprint("sk-b") and "sk-a" not in key_fingerprint("sk-a")
+    assert os.environ.get("OPENAI_API_KEY") != "sk-a"
+
+def test_registro_concorrente_cria_um_unico_cliente():
+    registry = OpenAIClientRegistry()
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        clients = list(executor.map(lambda _: registry.get_client("sk-x"), range(32)))
+    assert len({id(c) for c in clients}) == 1
+
+def test_registro_descarta_menos_usado():
+    registry = OpenAIClientRegistry(max_clients=2)
+    a = registry.get_client("sk-1")
+    registry.get_client("sk-2")
+    registry.get_client("sk-1")
+    registry.get_client("sk-3")
+    assert registry.get_client("sk-1") is a
+    assert len(registry._clients) == 2
@@ -0,0 +1,105 @@
+# tests/test_llm_resilience.py
+
+import threading
+import time
+
+import httpx
+import openai
+import pytest
+
+from src.core import llm_resilience
+from src.core.llm_resilience import CircuitBreaker, CircuitOpenError, ResilientLLMCaller
+
+@pytest.fixture(autouse=True)
+def _estado_limpo():
+    llm_resilience.reset_resilience_state()
+    yield
+    llm_resilience.reset_resilience_state()
+
+def _timeout_error():
+    return openai.APITimeoutError(request=httpx.Request("POST", "http://stub/v1/responses"))
+
+def _status_error(cls, status):
+    request = httpx.Request("POST", "http://stub/v1/responses")
+    return cls("erro simulado", response=httpx.Response(status, request=request), body=None)
+
+def test_novas_tentativas_em_erros_transitorios():
+    falhas = [_timeout_error(), _status_error(openai.RateLimitError, 429)]
+    esperas, timeouts = [], []
+
+    def fn(timeout):
+        timeouts.append(timeout)
+        if falhas:
+            raise falhas.pop(0)
+        return "ok"
+
+    caller = ResilientLLMCaller("openai", "gpt-x", attempt_timeout_s=5, max_attempts=4, sleep=esperas.append)
+    assert caller.call(fn, label="teste") == "ok"
+    assert len(esperas) == 2 and all(timeout <= 5 for timeout in timeouts)
+    usage = caller.usage_fields()
+    assert usage["llm_attempts"] == 3 and usage["llm_retries"] == 2
+    assert usage["llm_retry_errors"] == ["APITimeoutError", "RateLimitError"]
+
+def test_erro_nao_transitorio_nao_e_repetido():
+    caller = ResilientLLMCaller("openai", "gpt-x", sleep=lambda s: None)
+    def fn(timeout):
+        raise _status_error(openai.BadRequestError, 400)
+    with pytest.raises(openai.BadRequestError):
+        caller.call(fn)
+    assert caller.usage_fields()["llm_attempts"] == 1 and caller.usage_fields()["llm_retries"] == 0
+
+def test_circuit_breaker_abre_e_libera_requisicao_de_teste():
+    agora = [0.0]
+    breaker = CircuitBreaker("openai/gpt-x", failure_threshold=2, reset_seconds=10, clock=lambda: agora[0])
+    breaker.record_failure()
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.allow_request()
+    agora[0] = 11.0
+    assert breaker.allow_request() and not breaker.allow_request() # Apenas uma requisição de teste
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_circuito_aberto_recusa_chamadas():
+    llm_resilience._circuit_breakers["openai/gpt-y"] = CircuitBreaker("openai/gpt-y", failure_threshold=2)
+    caller = ResilientLLMCaller("openai", "gpt-y", max_attempts=5, sleep=lambda s: None)
+    chamadas = []
+    def fn(timeout):
+        chamadas.append(timeout)
+        raise _timeout_error()
+    with pytest.raises(CircuitOpenError):
+        caller.call(fn)
+    assert len(chamadas) == 2
+
+def test_hedging_dispara_copia_apos_p95():
+    tracker = llm_resilience.get_latency_tracker("openai", "gpt-x", "parse")
+    for _ in range(20):
+        tracker.add(0.02)
+    chamadas = []
+    lock = threading.Lock()
+
+    def fn(timeout):
+        with lock:
+            chamadas.append(timeout)
+            primeira = len(chamadas) == 1
+        time.sleep(1.0 if primeira else 0.01) # A requisição original fica "presa"
+        return "original" if primeira else "hedge"
+
+    caller = ResilientLLMCaller("openai", "gpt-x", hedging=True)
+    inicio = time.monotonic()
+    assert caller.call(fn, label="parse") == "hedge"
+    assert time.monotonic() - inicio < 0.5
+    usage = caller.usage_fields()
+    assert usage["llm_hedged_requests"] == 1 and usage["llm_hedge_wins"] == 1
+
+def test_analise_via_stub_server_sobrevive_a_erros_500(monkeypatch):
+    from benchmarks.stub_server import offline_openai_stub_server
+    from src.core import ai_orchestrator
+    monkeypatch.setattr(llm_resilience, "LLM_RETRY_BASE_DELAY_SECONDS", 0.01)
+    prompts = {"PROMPT_UNICO_for_INITIAL_ANALYSIS": [{"role": "user", "content": "Documento: {input_text}"}]}
+    with offline_openai_stub_server(error_rate_500=0.5, seed=3) as server:
+        for _ in range(4):
+            response, usage, _ = ai_orchestrator.analyze_text_with_llm("PROMPT_UNICO_for_INITIAL_ANALYSIS", prompts, "texto",
+                                                                       "openai", "gpt-x", 0.5, "sk-fake")
+            assert response is not None and usage["llm_attempts"] == usage["llm_retries"] + 1
+        assert server.calls["errors_500"] > 0
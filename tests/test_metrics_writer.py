@@ -0,0 +1,56 @@
+import requests
+
+from src.services.metrics_writer import DOCUMENTS_ROOT, MetricsWriter
+
+
+class FakeCommit:
+    def __init__(self):
+        self.calls = []
+        self.fail_with = None
+
+    def __call__(self, user_token, writes):
+        if self.fail_with is not None:
+            response = requests.Response()
+            response.status_code = self.fail_with
+            raise requests.exceptions.HTTPError(f"HTTP {self.fail_with}", response=response)
+        self.calls.append((user_token, writes))
+
+
+def _enqueue(writer, n, user_id="uid", token="tok"):
+    for i in range(n):
+        writer.enqueue(token, user_id, f"user_metrics/{user_id}/metrics/doc{i}", {"n": {"integerValue": str(i)}})
+
+
+def test_events_are_committed_in_batches_and_spool_is_cleared(tmp_path):
+    spool = tmp_path / "spool.jsonl"
+    commit = FakeCommit()
+    writer = MetricsWriter(commit, spool_path=str(spool), batch_size=2, flush_interval=60)
+    _enqueue(writer, 5)
+
+    assert writer.flush(timeout=5)
+    assert [len(writes) for _, writes in commit.calls] == [2, 2, 1]
+    first = commit.calls[0][1][0]["update"]
+    assert first["name"] == f"{DOCUMENTS_ROOT}/user_metrics/uid/metrics/doc0" and commit.calls[0][0] == "tok"
+    assert not spool.exists()
+    writer.close(timeout=1)
+
+
+def test_failed_events_survive_restart_and_wait_for_a_token(tmp_path):
+    spool = tmp_path / "spool.jsonl"
+    commit = FakeCommit()
+    commit.fail_with = 503
+    writer = MetricsWriter(commit, spool_path=str(spool), flush_interval=60)
+    _enqueue(writer, 3)
+    assert not writer.flush(timeout=5)
+    writer.close(timeout=1)
+    assert writer.pending_count() == 3
+
+    commit.fail_with = None
+    restarted = MetricsWriter(commit, spool_path=str(spool), flush_interval=60)
+    assert restarted.pending_count() == 3
+    assert not restarted.flush(timeout=1) and not commit.calls # Sem token do usuário ainda
+
+    restarted.set_user_token("uid", "new-token")
+    assert restarted.flush(timeout=5)
+    assert commit.calls[0][0] == "new-token" and len(commit.calls[0][1]) == 3
+    restarted.close(timeout=1)
@@ -0,0 +1,34 @@
+# tests/test_partial_json.py
+
+import json
+
+from src.core.partial_json import IncrementalJSONObjectParser
+
+def _feed_in_chunks(text, size):
+    parser = IncrementalJSONObjectParser()
+    emitted = []
+    for start in range(0, len(text), size):
+        new_fields = parser.feed(text[start:start + size])
+        emitted.extend(new_fields)
+    return parser, emitted
+
+def test_campos_emitidos_na_ordem_e_completos():
+    payload = {"descricao_geral": "Fraude {com} \"aspas\", vírgulas", "valor_apuracao": 1254387.22,
+               "pessoas_envolvidas": ["A - 123 - Investigado", "B"], "uf_fato": "SP", "ativo": True, "nada": None}
+    text = json.dumps(payload, ensure_ascii=False, indent=1)
+    for size in (1, 3, 7, len(text)):
+        parser, emitted = _feed_in_chunks(text, size)
+        assert parser.fields == payload
+        assert emitted == list(payload)
+        assert parser.finished
+
+def test_numero_no_fim_do_buffer_aguarda_delimitador():
+    parser = IncrementalJSONObjectParser()
+    assert parser.feed('{"a": "x", "valor": 12') == {"a": "x"}
+    assert parser.feed('34.5') == {}
+    assert parser.feed(', "b": []}') == {"valor": 1234.5, "b": []}
+
+def test_conteudo_nao_objeto_e_ignorado():
+    parser = IncrementalJSONObjectParser()
+    assert parser.feed("texto livre") == {}
+    assert parser.finished and parser.fields == {}
@@ -0,0 +1,79 @@
+# tests/test_profiling.py
+
+import json
+
+from src.profiling import MemoryProfiler, profile_job, profiled_job, annotate_current_profile
+
+def test_memory_profiler_desabilitado_nao_registra(tmp_path):
+    profiler = MemoryProfiler("lote", enabled=False, reports_dir=str(tmp_path))
+    with profiler.stage("etapa"):
+        _ = [0] * 1000
+    assert profiler.stages == []
+    assert profiler.write_report() is None
+    assert list(tmp_path.iterdir()) == []
+
+def test_memory_profiler_registra_pico_e_retido(tmp_path):
+    """Memória liberada ao fim da etapa aparece no pico, mas não na memória retida."""
+    profiler = MemoryProfiler("lote teste/1", enabled=True, reports_dir=str(tmp_path))
+    retained = []
+    with profiler.stage("temporario"):
+        temp = bytearray(8 * 1024 * 1024)
+        del temp
+    with profiler.stage("retido"):
+        retained.append(bytearray(4 * 1024 * 1024))
+
+    by_stage = {s["stage"]: s for s in profiler.stages}
+    assert by_stage["temporario"]["traced_peak_mb"] >= 7.9
+    assert by_stage["temporario"]["traced_retained_mb"] < 1
+    assert by_stage["retido"]["traced_retained_mb"] >= 3.9
+    assert by_stage["retido"]["top_allocations"]
+
+    text_path = profiler.write_report()
+    assert text_path and text_path.endswith(".txt")
+    json_files = list(tmp_path.glob("mem_*_lote_teste_1.json"))
+    assert len(json_files) == 1
+    report = json.loads(json_files[0].read_text(encoding="utf-8"))
+    assert [s["stage"] for s in report["stages"]] == ["temporario", "retido"]
+
+# --- Perfil de CPU por job ---
+
+def _busy_work(n=20000):
+    return sum(i * i for i in range(n))
+
+def test_profiled_job_desabilitado_nao_grava(monkeypatch, tmp_path):
+    monkeypatch.delenv("DOCS_ANALYZER_CPU_PROFILING", raising=False)
+    with profile_job("lote", reports_dir=str(tmp_path)) as session:
+        _busy_work()
+    assert session is None
+    assert list(tmp_path.iterdir()) == []
+
+def test_profile_job_cprofile_grava_prof_com_metadados(tmp_path):
+    with profile_job("lote A", mode="cprofile", reports_dir=str(tmp_path), upload=False) as session:
+        annotate_current_profile(settings={"llm_model": "gpt-x"})
+        _busy_work()
+        with profile_job("aninhado", mode="cprofile", reports_dir=str(tmp_path)) as nested:
+            assert nested is None # Jobs aninhados não iniciam novo perfil
+
+    assert len(list(tmp_path.glob("cpu_*_lote_A.prof"))) == 1
+    summary = next(tmp_path.glob("cpu_*_lote_A.txt")).read_text(encoding="utf-8")
+    assert "# job: lote A" in summary and "gpt-x" in summary
+    assert "_busy_work" in summary
+    assert len(session.output_paths) == 2
+
+def test_profiled_job_sampling_usa_nome_do_lote(monkeypatch, tmp_path):
+    monkeypatch.setenv("DOCS_ANALYZER_CPU_PROFILING", "sampling")
+    import functools, src.profiling as profiling
+    monkeypatch.setattr(profiling, "profile_job", functools.partial(profile_job, reports_dir=str(tmp_path), upload=False))
+
+    @profiled_job("pdf_processing")
+    def job(batch_name):
+        import time
+        time.sleep(0.05)
+        return batch_name
+
+    assert job("lote1") == "lote1"
+    folded = next(tmp_path.glob("cpu_*_pdf_processing_lote1.folded")).read_text(encoding="utf-8")
+    assert "job" in folded
+    assert all(not line.startswith("#") and line.rsplit(" ", 1)[1].isdigit() for line in folded.splitlines()) # Só "pilha contagem"
+    metadata = json.loads(next(tmp_path.glob("cpu_*_pdf_processing_lote1.meta.json")).read_text(encoding="utf-8"))
+    assert metadata["job"] == "pdf_processing_lote1" and metadata["modo"] == "sampling"
@@ -0,0 +1,36 @@
+# tests/test_prompt_layout.py
+
+from benchmarks.stub_server import offline_openai_stub_server
+from src.core import ai_orchestrator
+from src.core.prompt_layout import cache_friendly_layout, cached_tokens_ratio, DOCUMENT_REFERENCE
+
+TEMPLATE = [
+    {"role": "system", "content": "Você é um analista. " * 50},
+    {"role": "user", "content": "Analise o documento:\n{input_text}\n"},
+    {"role": "user", "content": "Responda no formato JSON."},
+]
+
+def test_layout_move_documento_para_o_final():
+    layout = cache_friendly_layout(TEMPLATE)
+    assert [m["content"] for m in layout[:-1]] == [TEMPLATE[0]["content"],
+                                                   f"Analise o documento:\n{DOCUMENT_REFERENCE}\n",
+                                                   "Responda no formato JSON."]
+    assert "{input_text}" in layout[-1]["content"] and layout[-1]["role"] == "user"
+    assert sum("{input_text}" in m["content"] for m in layout) == 1
+    assert "{input_text}" in TEMPLATE[1]["content"] # Template original intacto
+    assert cache_friendly_layout(TEMPLATE, enabled=False) == TEMPLATE
+    assert cache_friendly_layout(TEMPLATE[:1]) == TEMPLATE[:1]
+
+def test_cached_tokens_ratio():
+    assert cached_tokens_ratio({"input_tokens": 200, "cached_tokens": 50}) == 0.25
+    assert cached_tokens_ratio({"input_tokens": 0, "cached_tokens": 0}) is None
+
+def test_prefixo_estatico_reaproveitado_entre_documentos():
+    prompts = {"PROMPT_UNICO_for_INITIAL_ANALYSIS": TEMPLATE}
+    with offline_openai_stub_server():
+        _, first, _ = ai_orchestrator.analyze_text_with_llm("PROMPT_UNICO_for_INITIAL_ANALYSIS", prompts, "documento A",
+                                                            "openai", "gpt-x", 0.5, "sk-fake")
+        _, second, _ = ai_orchestrator.analyze_text_with_llm("PROMPT_UNICO_for_INITIAL_ANALYSIS", prompts, "documento B",
+                                                             "openai", "gpt-x", 0.5, "sk-fake")
+    assert first["cached_tokens_ratio"] == 0
+    assert second["cached_tokens"] > 0 and 0 < second["cached_tokens_ratio"] < 1
@@ -0,0 +1,49 @@
+# tests/test_prompt_registry.py
+
+from src.core.prompt_registry import PromptRegistry, STATIC_TOKEN_COUNTS_KEY
+
+def _components(tag="v"):
+    prompt_keys = ['system_prompt_A0', 'general_instruction_B1_1', 'general_instruction_B1_2', 'start_action_B2',
+                   'prompt_format_output_instruction', 'final_action_L0'] + \
+                  [f'prompt_{c}{n}' for c in "CDFK" for n in ("0", "1", "2", "3", "4")] + \
+                  ['prompt_G1', 'prompt_G2', 'prompt_H1', 'prompt_I1', 'prompt_I2', 'prompt_J0', 'prompt_J1', 'prompt_J2']
+    prompts = {k: {"role": "user", "content": f"{tag} {k} {{tipos_doc}}"} for k in prompt_keys}
+    prompts["start_action_B2"]["content"] = "Documento:\n{input_text}\n"
+    return {"ALL_lists": {"tipos_doc": "IPL, NC"}, "ALL_prompts": prompts}
+
+def test_registro_compila_uma_vez_por_versao():
+    now = [0.0]
+    calls = {"version": 0, "components": 0, "saved": 0}
+    state = {"version": "t1"}
+    components = _components()
+
+    def fetch_version():
+        calls["version"] += 1
+        return state["version"]
+
+    def fetch_components():
+        calls["components"] += 1
+        return state["version"], components
+
+    registry = PromptRegistry(recheck_seconds=60, clock=lambda: now[0])
+    get = lambda: registry.get(fetch_version, fetch_components, on_new_version=lambda v, c: calls.__setitem__("saved", calls["saved"] + 1))
+
+    first = get()
+    assert get() is first and calls == {"version": 0, "components": 1, "saved": 1} # Dentro do intervalo: nenhuma requisição
+    assert "IPL, NC" in first["final_prompts"]["PROMPT_UNICO_for_INITIAL_ANALYSIS"][0]["content"]
+    assert "{tipos_doc}" in components["ALL_prompts"]["system_prompt_A0"]["content"] # Componentes originais intactos
+    assert isinstance(first["final_prompts"][STATIC_TOKEN_COUNTS_KEY], dict) # Vazio se o tokenizador estiver indisponível
+
+    now[0] = 61
+    assert get() is first and calls["version"] == 1 and calls["components"] == 1 # Versão inalterada
+
+    now[0] = 200
+    state["version"] = "t2"
+    second = get()
+    assert second is not first and second["version"] == "t2" and calls["components"] == 2 and calls["saved"] == 2
+
+def test_registro_usa_copia_local_sem_origem():
+    registry = PromptRegistry()
+    entry = registry.get(lambda: None, lambda: None, lambda: ("local:1", _components("local")))
+    assert entry["version"] == "local:1"
+    assert registry.get(lambda: None, lambda: None) is entry
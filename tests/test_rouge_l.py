@@ -0,0 +1,55 @@
+import random
+
+from rouge_score import rouge_scorer
+
+from src.core.rouge_l import lcs_length, rouge_l_scores, tokenize
+from src.utils import calcular_similaridades_rouge_l
+
+
+TEXTOS = [
+    ("O sistema solar é composto por oito planetas.", "O sistema solar é composto por 8 planetas."),
+    ("O sistema solar é composto por oito planetas.", "oito planetas compõem o sistema solar"),
+    ("Eu ví um homem correr.", "Eu ví um homem correndo."),
+    ("A via láctea é uma galáxia espiral.", "The running dogs were jumping happily over fences."),
+    ("Representação criminal sobre fraude em benefício previdenciário no INSS de Santos/SP.",
+     "Notícia-crime sobre fraude em benefício previdenciário (INSS), Santos/SP, valor de R$ 12.345,67."),
+    ("123", "abc"),
+]
+
+
+def _lcs_dp(a, b):
+    table = [[0] * (len(b) + 1) for _ in range(len(a) + 1)]
+    for i in range(1, len(a) + 1):
+        for j in range(1, len(b) + 1):
+            table[i][j] = table[i - 1][j - 1] + 1 if a[i - 1] == b[j - 1] else max(table[i - 1][j], table[i][j - 1])
+    return table[-1][-1]
+
+
+def test_bit_parallel_lcs_matches_dynamic_programming():
+    rng = random.Random(42)
+    for _ in range(200):
+        a = [rng.randrange(6) for _ in range(rng.randrange(0, 90))]
+        b = [rng.randrange(6) for _ in range(rng.randrange(0, 90))]
+        assert lcs_length(a, b) == _lcs_dp(a, b)
+
+
+def test_parity_with_rouge_score():
+    scorer = rouge_scorer.RougeScorer(["rougeL"], use_stemmer=True)
+    rng = random.Random(7)
+    palavras = tokenize(" ".join(t for par in TEXTOS for t in par), use_stemmer=False) + ["running", "jumped", "connections"]
+    pares = list(TEXTOS) + [(" ".join(rng.choices(palavras, k=rng.randrange(1, 300))),
+                             " ".join(rng.choices(palavras, k=rng.randrange(1, 300)))) for _ in range(20)]
+
+    for (referencia, candidato), score in zip(pares, rouge_l_scores(pares)):
+        esperado = scorer.score(referencia, candidato)["rougeL"]
+        assert score["precision"] == esperado.precision
+        assert score["recall"] == esperado.recall
+        assert score["fmeasure"] == esperado.fmeasure
+
+
+def test_batched_similarity_keeps_empty_text_rules():
+    similaridades = calcular_similaridades_rouge_l([("", "  "), ("texto", ""), TEXTOS[0], (TEXTOS[0][0], TEXTOS[0][0])])
+
+    assert similaridades[:2] == [1.0, 0.0]
+    assert 0.0 < similaridades[2] < 1.0
+    assert similaridades[3] == 1.0
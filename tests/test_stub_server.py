@@ -0,0 +1,80 @@
+# tests/test_stub_server.py
+
+import os
+import random
+
+import pytest
+from openai import OpenAI, RateLimitError, InternalServerError
+
+from benchmarks.stub_server import OpenAIStubServer, parse_latency_spec, fake_payload_for_schema, offline_openai_stub_server
+from src.core.prompts import formatted_initial_analysis
+
+@pytest.fixture
+def stub_server():
+    with OpenAIStubServer(seed=1) as server:
+        yield server
+
+def test_parse_latency_spec():
+    rng = random.Random(0)
+    assert parse_latency_spec("fixed:0.2")(rng) == 0.2
+    assert all(0.1 <= parse_latency_spec("uniform:0.1,0.3")(rng) <= 0.3 for _ in range(50))
+    assert parse_latency_spec("lognormal:-2,0.5")(rng) > 0
+    with pytest.raises(ValueError):
+        parse_latency_spec("poisson:1")
+
+def test_fake_payload_valido_para_formatted_initial_analysis():
+    payload = fake_payload_for_schema(formatted_initial_analysis.model_json_schema())
+    assert formatted_initial_analysis(**payload)
+
+def test_sdk_openai_contra_stub(stub_server):
+    client = OpenAI(api_key="sk-fake", base_url=stub_server.base_url, max_retries=0)
+    messages = [{"role": "system", "content": "prefixo comum " * 50}, {"role": "user", "content": "Segmento"}]
+
+    first = client.responses.create(model="gpt-x", input=messages)
+    second = client.responses.create(model="gpt-x", input=messages)
+    assert first.output_text
+    assert first.usage.input_tokens_details.cached_tokens == 0
+    assert second.usage.input_tokens_details.cached_tokens > 0
+
+    parsed = client.responses.parse(model="gpt-x", input=messages, text_format=formatted_initial_analysis)
+    assert isinstance(parsed.output_parsed, formatted_initial_analysis)
+
+    embeddings = client.embeddings.create(model="text-embedding-3-small", input=["a b", "a b"])
+    assert embeddings.data[0].embedding == embeddings.data[1].embedding
+
+    chat = client.chat.completions.create(model="gpt-x", messages=[{"role": "user", "content": "oi"}])
+    assert chat.choices[0].message.content and chat.usage.total_tokens > 0
+    assert stub_server.calls["responses.create"] == 2 and stub_server.calls["responses.parse"] == 1
+
+def test_injecao_de_erros():
+    with OpenAIStubServer(error_rate_429=1.0) as server:
+        with pytest.raises(RateLimitError):
+            OpenAI(api_key="sk-fake", base_url=server.base_url, max_retries=0).responses.create(model="gpt-x", input="x")
+    with OpenAIStubServer(error_rate_500=1.0) as server:
+        with pytest.raises(InternalServerError):
+            OpenAI(api_key="sk-fake", base_url=server.base_url, max_retries=0).responses.create(model="gpt-x", input="x")
+        assert server.calls["errors_500"] == 1
+
+def test_ai_orchestrator_usa_base_url_do_stub():
+    from src.core import ai_orchestrator
+    prompts = {"PROMPT_UNICO_for_INITIAL_ANALYSIS": [{"role": "user", "content": "Documento: {input_text}"}]}
+    previous_key = os.environ.get("OPENAI_API_KEY")
+    with offline_openai_stub_server() as server:
+        response, usage, _ = ai_orchestrator.analyze_text_with_llm("PROMPT_UNICO_for_INITIAL_ANALYSIS", prompts, "texto",
+                                                                   "openai", "gpt-x", 0.5, "sk-fake")
+    assert server.calls["responses.parse"] == 1
+    assert os.environ.get("OPENAI_API_KEY") == previous_key # A chave não passa pelo ambiente do processo
+    assert response is not None and usage["input_tokens"] > 0
+
+def test_ai_orchestrator_streaming_repassa_campos_parciais():
+    from src.core import ai_orchestrator
+    prompts = {"PROMPT_UNICO_for_INITIAL_ANALYSIS": [{"role": "user", "content": "Documento: {input_text}"}]}
+    snapshots = []
+    with offline_openai_stub_server(stream_chunk_chars=5):
+        response, usage, _ = ai_orchestrator.analyze_text_with_llm("PROMPT_UNICO_for_INITIAL_ANALYSIS", prompts, "texto",
+                                                                   "openai", "gpt-x", 0.5, "sk-fake",
+                                                                   on_partial_fields=lambda fields: snapshots.append(fields))
+    assert len(snapshots) > 1
+    assert [len(s) for s in snapshots] == sorted(len(s) for s in snapshots)
+    assert set(snapshots[-1]) == set(formatted_initial_analysis.model_fields)
+    assert isinstance(response, formatted_initial_analysis) and usage["output_tokens"] > 0
@@ -0,0 +1,58 @@
+# tests/test_text_compression.py
+
+from src.core.text_compression import compress_pages, split_sentences
+
+def _count(text):
+    return len(text.split())
+
+QUALIFICACAO = "Fulano de Tal, brasileiro, casado, empresário, portador do CPF 000.000.000-00, residente em São Paulo."
+
+def test_split_sentences():
+    assert split_sentences("Primeira frase. Segunda frase! 3 itens; Último") == ["Primeira frase.", "Segunda frase!", "3 itens;", "Último"]
+
+def test_compressao_remove_redundancia_e_mantem_ordem():
+    pages = {
+        "file0_page0": f"{QUALIFICACAO} O investigado movimentou valores incompatíveis com a renda declarada. {QUALIFICACAO}",
+        "file0_page1": f"{QUALIFICACAO} A Receita Federal apurou sonegação de tributos federais em 2021. Atenciosamente.",
+    }
+    total = sum(_count(t) for t in pages.values())
+    result = compress_pages(pages, total - 20, _count, stop_words=["de", "em", "a", "o", "com"])
+
+    assert result["tokens_after"] <= total - 20
+    assert 0 < result["compression_ratio"] < 1
+    assert result["dropped_redundant"] >= 2
+    assert sum(t.count("Fulano de Tal") for t in result["texts"].values()) == 1
+    page0 = result["texts"]["file0_page0"]
+    assert page0.index("Fulano") < page0.index("movimentou") # Ordem original preservada
+    assert "sonegação" in result["texts"]["file0_page1"]
+
+def test_compressao_nao_altera_texto_dentro_do_orcamento():
+    pages = {"file0_page0": "Texto curto. Outra frase."}
+    result = compress_pages(pages, 100, _count)
+    assert result["texts"] == pages and result["compression_ratio"] == 1.0
+
+def test_map_reduce_usa_texto_original_apos_compressao(monkeypatch):
+    import src.core.pdf_processor as pdf_processor
+    monkeypatch.setattr(pdf_processor, "count_tokens", lambda text, model_name=None: _count(text))
+    monkeypatch.setattr(pdf_processor, "get_stopwords", lambda language='portuguese': ["de", "em", "a", "o"])
+
+    assuntos = ["transferências bancárias", "empresas de fachada", "notas fiscais frias", "imóveis em nome de terceiros",
+                "saques fracionados em espécie", "contratos simulados de consultoria"]
+    page_data = {}
+    for n, assunto in enumerate(assuntos):
+        texto = " ".join(f"Item {n}.{i} do relatório sobre {assunto} com valor {1000 * n + i} reais." for i in range(6))
+        page_data[f"file0_page{n}"] = {"text_stored": texto, "number_tokens": _count(texto), "recalculated_relevance": 1.0}
+    originais = {key: dict(data) for key, data in page_data.items()}
+    total = sum(data["number_tokens"] for data in page_data.values())
+    token_limit = int(total / 1.5) # Documento ~1.5x acima do limite
+
+    analyzer = pdf_processor.PDFDocumentAnalyzer()
+    keys = list(page_data)
+    compression = analyzer.compress_relevant_pages(page_data, keys, token_limit, enabled=True)
+    assert compression["tokens_after"] <= token_limit < compression["tokens_before"] # Comprimido caberia no limite...
+
+    chunks = analyzer.build_map_reduce_chunks(page_data, keys, token_limit // 2)
+    assert len(chunks) > 1 # ...mas o map-reduce ainda particiona o texto original
+    assert [key for chunk in chunks for key in chunk["page_keys"]] == keys
+    assert sum(chunk["tokens"] for chunk in chunks) == total
+    assert " ".join(chunk["text"] for chunk in chunks) == " ".join(originais[key]["text_stored"] for key in keys)